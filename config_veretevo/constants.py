@@ -8,8 +8,18 @@ GENERAL_DIRECTOR_ID = 406325177
 # Пути к файлам
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TASKS_FILE = os.path.join(BASE_DIR, "data/tasks.json")
+TASKS_ARCHIVE_FILE = os.path.join(BASE_DIR, "data", "tasks_archive.jsonl")
 DEPARTMENTS_JSON_PATH = os.path.join(BASE_DIR, "config_veretevo", "departments_config.json")
+CLASSIFIER_KEYWORDS_PATH = os.path.join(BASE_DIR, "config_veretevo", "classifier_keywords.json")
 AUDIT_LOG_PATH = os.path.join(BASE_DIR, "logs", "audit.log")
+VOICE_JOBS_FILE = os.path.join(BASE_DIR, "data", "voice_jobs.json")
+GPT_CACHE_FILE = os.path.join(BASE_DIR, "data", "gpt_cache.json")
+CHAT_HISTORY_SPILL_FILE = os.path.join(BASE_DIR, "data", "chat_history.jsonl")
+SUPPLIERS_FILE = os.path.join(BASE_DIR, "data", "suppliers_database.json")
+# База контактов AI ассистента и состояние синхронизации с ней
+SHARED_SUPPLIERS_FILE = os.path.join(BASE_DIR, "..", "shared", "data", "suppliers_database.json")
+CONTACTS_SYNC_STATE_FILE = os.path.join(BASE_DIR, "data", "contacts_sync_state.json")
+CONTACTS_SYNC_CONFLICTS_FILE = os.path.join(BASE_DIR, "data", "contacts_sync_conflicts.jsonl")
 
 # Статусы задач
 TASK_STATUS_NEW = "новая"
@@ -13,12 +13,37 @@ if ASSISTANTS_CHAT_ID_STR is None:
 ASSISTANTS_CHAT_ID = int(ASSISTANTS_CHAT_ID_STR)
 FINANCE_CHAT_ID = int(os.getenv("FINANCE_CHAT_ID", "-1002844492561"))
 
+# Telegram Bot API (можно указать собственный сервер telegram-bot-api)
+def telegram_file_url(base_url: str) -> str:
+    """Адрес скачивания файлов для адреса Bot API (.../bot -> .../file/bot)"""
+    return base_url[:-len("/bot")] + "/file/bot" if base_url.endswith("/bot") else base_url
+
+
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org/bot")
+TELEGRAM_API_BASE_FILE_URL = os.getenv("TELEGRAM_API_BASE_FILE_URL") or telegram_file_url(TELEGRAM_API_BASE_URL)
+# В локальном режиме сервер отдает файлы путями на диске, без лимита 20 МБ на скачивание
+TELEGRAM_LOCAL_MODE = os.getenv("TELEGRAM_LOCAL_MODE", "false").lower() == "true"
+
+# GPT-подсказки директору: сообщения группы копятся столько секунд и приходят одной сводкой
+# (0 — каждое сообщение отдельно, как раньше); срочные отправляются сразу
+GPT_DIGEST_WINDOW = int(os.getenv("GPT_DIGEST_WINDOW", "120"))
+
+# Хранить вытесненные из памяти сообщения групп в data/chat_history.jsonl, чтобы кнопки
+# под старыми GPT-подсказками находили текст (по умолчанию выключено — переписка на диск не пишется)
+CHAT_HISTORY_SPILL = os.getenv("CHAT_HISTORY_SPILL", "false").lower() == "true"
+
+# Синхронизация контактов с базой AI ассистента из процесса бота, раз в столько секунд
+# (0 — выключена, синхронизирует cron через scripts/sync_contacts.py)
+CONTACTS_SYNC_INTERVAL = int(os.getenv("CONTACTS_SYNC_INTERVAL", "0"))
+
 # Yandex SpeechKit Configuration
 YANDEX_SPEECHKIT_API_KEY = os.getenv("YANDEX_SPEECHKIT_API_KEY")
 YANDEX_FOLDER_ID = os.getenv("YANDEX_FOLDER_ID")
 
 # Yandex GPT Configuration
 YANDEX_GPT_API_KEY = os.getenv("YANDEX_GPT_API_KEY")
+# Адрес API генерации (например, локальная заглушка utils_veretevo.gpt_stub для тестов)
+YANDEX_GPT_URL = os.getenv("YANDEX_GPT_URL", "https://llm.api.cloud.yandex.net/foundationModels/v1/completion")
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -43,11 +68,16 @@ if OPENAI_API_KEY is None:
 # TELEGRAM_TOKEN=ваш_токен
 # ASSISTANTS_CHAT_ID=ваш_чат_id
 # FINANCE_CHAT_ID=ваш_фин_чат_id
+# TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot  # собственный сервер telegram-bot-api (необязательно)
+# TELEGRAM_LOCAL_MODE=true                         # сервер запущен с --local
+# GPT_DIGEST_WINDOW=120                           # окно сводки GPT-подсказок, секунд (0 — без сводок)
 # YANDEX_SPEECHKIT_API_KEY=ваш_api_ключ_yandex_speechkit
 # YANDEX_FOLDER_ID=ваш_folder_id_yandex_cloud
 # YANDEX_GPT_API_KEY=ваш_api_ключ_yandex_gpt
+# YANDEX_GPT_URL=http://127.0.0.1:8766/foundationModels/v1/completion  # заглушка python3 -m utils_veretevo.gpt_stub
 # OPENAI_API_KEY=ваш_api_ключ_openai
 # OPENAI_MODEL=gpt-4o-mini
+# OPENAI_BASE_URL=https://api.openai.com/v1  # OpenAI-совместимый API; с ключом OpenAI становится резервом для хеджирования GPT
 
 def load_env():
     pass  # Заглушка для совместимости, если потребуется доинициализация
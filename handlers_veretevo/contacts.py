@@ -5,14 +5,27 @@
 Для тестирования без зависимости от OpenAI
 """
 
+import asyncio
+import html
 import logging
 import json
 import os
+import threading
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, Dict, Any
 from telegram import Update, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, CallbackQueryHandler, filters, Application, ConversationHandler
 from telegram.constants import ParseMode
+from utils_veretevo.contact_export import (
+    CATEGORY_NAMES, EXPORT_FORMATS, available_export_formats, export_contacts, export_filename,
+)
+from utils_veretevo.contact_index import (
+    SCOPE_ALL, SORT_NAME, SORT_ORDERS, ContactIndex, normalize_contacts_database, normalize_phone,
+)
+from config_veretevo.env import CONTACTS_SYNC_INTERVAL
+from services_veretevo.contact_sync_service import contact_sync, file_signature
+from utils_veretevo.json_files import write_json_atomic
 
 # Импортируем клавиатуры
 from utils_veretevo.keyboards import (
@@ -20,6 +33,8 @@ from utils_veretevo.keyboards import (
     contact_categories_keyboard, 
     contact_actions_keyboard,
     contact_creation_keyboard,
+    contacts_export_keyboard,
+    contacts_page_keyboard,
     main_menu_keyboard
 )
 
@@ -45,9 +60,14 @@ ALLOWED_DEPARTMENTS = ['Ассистенты', 'Руководители', 'Ст
 class KnowledgeCollector:
     """Реальный KnowledgeCollector для работы с контактами"""
     
-    def __init__(self):
+    def __init__(self, suppliers_file="data/suppliers_database.json"):
         self.suppliers_database = {}
-        self.suppliers_file = "data/suppliers_database.json"
+        self.suppliers_file = suppliers_file
+        # Триграммы, категории и порядок контактов: меню контактов и inline-поиск
+        self.index = ContactIndex()
+        # Изменения базы из обработчиков и из синхронизации с AI ассистентом (поток)
+        self.lock = threading.RLock()
+        self._file_signature = None
         self._load_suppliers_database()
     
     def _load_suppliers_database(self):
@@ -55,19 +75,76 @@ class KnowledgeCollector:
         try:
             if os.path.exists(self.suppliers_file):
                 with open(self.suppliers_file, 'r', encoding='utf-8') as f:
-                    self.suppliers_database = json.load(f)
+                    database = json.load(f)
+                # Ключи — телефоны в E.164; "+7 900..." и "8900..." сливаются в один контакт
+                self.suppliers_database, changed = normalize_contacts_database(database)
                 logger.info(f"📞 Загружена база поставщиков: {len(self.suppliers_database)} контактов")
+                if changed:
+                    # Файл не переписываем при загрузке: миграция — явный шаг
+                    # (scripts/migrate_contact_phones.py); до нее база в E.164 только в памяти
+                    # и попадет на диск при первом сохранении контакта
+                    logger.warning(f"📞 В базе поставщиков {changed} записей не в E.164 "
+                                   f"(дубликатов: {len(database) - len(self.suppliers_database)}); "
+                                   f"запустите scripts/migrate_contact_phones.py")
             else:
                 logger.info("📞 Создана новая база поставщиков")
         except Exception as e:
             logger.error(f"❌ Ошибка загрузки базы поставщиков: {e}")
             self.suppliers_database = {}
+        self.index.build(self.suppliers_database)
+        self._file_signature = file_signature(self.suppliers_file)
+    
+    def reload_if_changed(self):
+        """
+        Перечитывает базу, если файл изменили снаружи (синхронизация из cron)
+        
+        Вызывается на каждом чтении и записи: проверка — один stat файла.
+        """
+        with self.lock:
+            signature = file_signature(self.suppliers_file)
+            if signature is not None and signature != self._file_signature:
+                logger.info("📞 Файл базы поставщиков изменен снаружи — перечитываю")
+                self._load_suppliers_database()
+    
+    def snapshot(self):
+        """Копия базы для синхронизации (записи копируются, чтобы не менялись на ходу)"""
+        with self.lock:
+            return {phone: dict(data) for phone, data in self.suppliers_database.items()}
+    
+    def apply_sync_changes(self, updates, expected=None):
+        """
+        Применяет изменения из синхронизации: телефон -> запись или None (удален).
+        Контакты, измененные в боте после снимка expected, пропускаются —
+        они попадут в следующую синхронизацию.
+        
+        Returns:
+            Телефоны пропущенных контактов
+        """
+        with self.lock:
+            # Файл могли переписать снаружи во время слияния — такие контакты тоже пропускаются
+            self.reload_if_changed()
+            removed = False
+            skipped = []
+            for phone, data in updates.items():
+                if expected is not None and self.suppliers_database.get(phone) != expected.get(phone):
+                    skipped.append(phone)
+                    continue
+                if data is None:
+                    removed = self.suppliers_database.pop(phone, None) is not None or removed
+                    continue
+                self.suppliers_database[phone] = dict(data)
+                self._contact_index().add(phone, self.suppliers_database[phone])
+            if removed:
+                # Удаления редки — индекс проще перестроить
+                self.index.build(self.suppliers_database)
+            self._save_suppliers_database()
+            return skipped
     
     def _save_suppliers_database(self):
         """Сохранение базы поставщиков"""
         try:
-            with open(self.suppliers_file, 'w', encoding='utf-8') as f:
-                json.dump(self.suppliers_database, f, ensure_ascii=False, indent=2)
+            write_json_atomic(self.suppliers_file, self.suppliers_database)
+            self._file_signature = file_signature(self.suppliers_file)
             return True
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения базы поставщиков: {e}")
@@ -75,8 +152,13 @@ class KnowledgeCollector:
     
     def save_supplier_contact(self, contact_data):
         """Сохранение контакта поставщика"""
+        self.reload_if_changed()
+        with self.lock:
+            return self._save_supplier_contact(contact_data)
+    
+    def _save_supplier_contact(self, contact_data):
         try:
-            phone = contact_data.get('phone', '').strip()
+            phone = normalize_phone(contact_data.get('phone', ''))
             if not phone:
                 return False
             
@@ -112,6 +194,8 @@ class KnowledgeCollector:
                 }
                 logger.info(f"📞 Добавлен новый контакт {category}: {contact_data.get('name', 'Unknown')}")
             
+            self._contact_index().add(phone, self.suppliers_database[phone])
+            
             # Сохраняем базу поставщиков
             return self._save_suppliers_database()
             
@@ -119,81 +203,71 @@ class KnowledgeCollector:
             logger.error(f"❌ Ошибка сохранения контакта поставщика: {e}")
             return False
     
+    def _contact_index(self):
+        """Индекс по текущей базе; перестраивается, если базу заменили целиком"""
+        if self.index.database is not self.suppliers_database:
+            self.index.build(self.suppliers_database)
+        return self.index
+    
     def get_contacts_by_category(self, category):
-        """Получение контактов по категории"""
+        """Получение контактов по категории (представление без копирования)"""
         try:
-            contacts = []
-            for phone, data in self.suppliers_database.items():
-                if data.get('category') == category:
-                    contacts.append({
-                        'name': data.get('name', 'Unknown'),
-                        'phone': phone,
-                        'email': data.get('email', ''),
-                        'address': data.get('address', ''),
-                        'website': data.get('website', ''),
-                        'description': data.get('description', ''),
-                        'category': data.get('category', 'supplier')
-                    })
-            return contacts
+            self.reload_if_changed()
+            return self._contact_index().by_category_view(category)
         except Exception as e:
             logger.error(f"❌ Ошибка получения контактов по категории: {e}")
             return []
     
-    def search_contacts_advanced(self, query):
-        """Поиск контактов по ключевому слову"""
+    def search_contacts_advanced(self, query, limit=None):
+        """Поиск контактов по подстроке в имени, описании или телефоне (по триграммному индексу)"""
         try:
-            query_lower = query.lower()
-            matching_contacts = []
-            
-            for phone, data in self.suppliers_database.items():
-                name = data.get('name', '').lower()
-                phone_str = phone.lower()
-                description = data.get('description', '').lower()
-                
-                if (query_lower in name or 
-                    query_lower in phone_str or
-                    query_lower in description):
-                    matching_contacts.append({
-                        'name': data.get('name', 'Unknown'),
-                        'phone': phone,
-                        'email': data.get('email', ''),
-                        'address': data.get('address', ''),
-                        'website': data.get('website', ''),
-                        'description': data.get('description', ''),
-                        'category': data.get('category', 'supplier')
-                    })
-            
-            return matching_contacts
-            
+            self.reload_if_changed()
+            return self._contact_index().search(query, limit=limit)
         except Exception as e:
             logger.error(f"❌ Ошибка поиска контактов: {e}")
             return []
     
+    def search_contacts_indexed(self, query, limit=10):
+        """Поиск для inline-режима; возвращает список (телефон, данные контакта)"""
+        return [(contact['phone'], contact) for contact in self.search_contacts_advanced(query, limit=limit)]
+    
+    def get_contacts_page(self, scope=SCOPE_ALL, sort=SORT_NAME, cursor=None, forward=True, size=10):
+        """Страница контактов всей базы или категории в устойчивом порядке (ContactPage)"""
+        self.reload_if_changed()
+        return self._contact_index().page(scope, sort, cursor=cursor, forward=forward, size=size)
+    
     def get_all_contacts(self):
-        """Получение всех контактов"""
+        """Получение всех контактов (представление без копирования)"""
         try:
-            contacts = []
-            for phone, data in self.suppliers_database.items():
-                contacts.append({
-                    'name': data.get('name', 'Unknown'),
-                    'phone': phone,
-                    'email': data.get('email', ''),
-                    'address': data.get('address', ''),
-                    'website': data.get('website', ''),
-                    'description': data.get('description', ''),
-                    'category': data.get('category', 'supplier')
-                })
-            return contacts
+            self.reload_if_changed()
+            return self._contact_index().all()
         except Exception as e:
             logger.error(f"❌ Ошибка получения всех контактов: {e}")
             return []
 
+# Общая база контактов для меню контактов и inline-поиска
+knowledge_collector = KnowledgeCollector()
+
+
+def has_contacts_access(user_id: int) -> bool:
+    """Проверка доступа пользователя к функциям контактов"""
+    try:
+        if not user_id:
+            return False
+        
+        # Для тестирования разрешаем доступ всем
+        logger.info(f"🔓 Тестовый режим: пользователь {user_id} имеет доступ")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ Ошибка проверки доступа пользователя {user_id}: {e}")
+        return False
+
 class ContactsHandler:
     """Обработчик команд по контактам"""
     
     def __init__(self):
-        # Используем заглушку вместо реального KnowledgeCollector
-        self.knowledge_collector = KnowledgeCollector()
+        self.knowledge_collector = knowledge_collector
         self.veretevo_info_chat_id = None
     
     async def _safe_edit_message(self, query, text, reply_markup=None, parse_mode=None, fallback_message=""):
@@ -220,17 +294,7 @@ class ContactsHandler:
     
     def _check_user_access(self, user_id: int) -> bool:
         """Проверка доступа пользователя к функциям контактов"""
-        try:
-            if not user_id:
-                return False
-            
-            # Для тестирования разрешаем доступ всем
-            logger.info(f"🔓 Тестовый режим: пользователь {user_id} имеет доступ")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Ошибка проверки доступа пользователя {user_id}: {e}")
-            return False
+        return has_contacts_access(user_id)
     
     async def _send_notification_to_veretevo_info(self, message: str, context: ContextTypes.DEFAULT_TYPE):
         """Отправка уведомления в чат Веретево Инфо"""
@@ -339,6 +403,12 @@ class ContactsHandler:
                 await self._handle_show_categories(query, context)
             elif callback_data == "contacts_export":
                 await self._handle_export_contacts(query, context)
+            elif callback_data.startswith("contacts_export_"):
+                await self._handle_export_file(query, context, callback_data)
+            elif callback_data.startswith("contacts_page_"):
+                await self._handle_contacts_page(query, context, callback_data)
+            elif callback_data == "contacts_menu":
+                await self._handle_contacts_menu(query, context)
             elif callback_data == "contacts_main_menu":
                 await self._handle_main_menu(query, context)
             elif callback_data.startswith("category_"):
@@ -412,49 +482,60 @@ class ContactsHandler:
             return ConversationHandler.END
     
     async def _handle_list_contacts(self, query, context):
-        """Обработка списка всех контактов"""
+        """Обработка списка всех контактов (первая страница)"""
+        await self._show_contacts_page(query, SCOPE_ALL, SORT_NAME)
+    
+    @staticmethod
+    def _format_contact_lines(number, contact):
+        lines = f"{number}. <b>{html.escape(contact['name'])}</b>\n"
+        lines += f"   📱 {html.escape(contact['phone'])}\n"
+        for field, icon in (('email', '📧'), ('address', '📍'), ('website', '🌐'), ('description', '📝')):
+            if contact.get(field):
+                lines += f"   {icon} {html.escape(str(contact[field]))}\n"
+        return lines
+    
+    async def _show_contacts_page(self, query, scope, sort, cursor=None, forward=True):
+        """Страница списка контактов (всех или категории) с кнопками листания"""
         try:
-            # Получаем все контакты
-            all_contacts = self.knowledge_collector.get_all_contacts()
-            
-            if all_contacts:
-                # Формируем список контактов
-                contacts_text = "📋 <b>СПИСОК ВСЕХ КОНТАКТОВ</b>\n\n"
-                
-                for i, contact in enumerate(all_contacts, 1):
-                    contacts_text += f"{i}. <b>{contact['name']}</b>\n"
-                    contacts_text += f"   📱 {contact['phone']}\n"
-                    if contact.get('email'):
-                        contacts_text += f"   📧 {contact['email']}\n"
-                    if contact.get('address'):
-                        contacts_text += f"   📍 {contact['address']}\n"
-                    if contact.get('website'):
-                        contacts_text += f"   🌐 {contact['website']}\n"
-                    if contact.get('description'):
-                        contacts_text += f"   📝 {contact['description']}\n"
-                    contacts_text += f"   🏷️ {contact['category']}\n\n"
-                
-                # Ограничиваем длину сообщения
-                if len(contacts_text) > 4000:
-                    contacts_text = contacts_text[:4000] + "\n\n... (показаны первые контакты)"
-                
-                await self._safe_edit_message(
-                    query,
-                    contacts_text,
-                    reply_markup=contacts_menu_keyboard(),
-                    parse_mode=ParseMode.HTML,
-                    fallback_message="Список контактов уже отображается"
-                )
+            page = self.knowledge_collector.get_contacts_page(scope, sort, cursor=cursor, forward=forward)
+            if scope == SCOPE_ALL:
+                title = "📋 <b>СПИСОК ВСЕХ КОНТАКТОВ</b>"
             else:
+                title = f"🏷️ <b>КАТЕГОРИЯ: {CATEGORY_NAMES.get(scope, scope)}</b>"
+            
+            if not page.total:
+                empty = ("ℹ️ В базе пока нет контактов.\nДобавьте первый контакт!" if scope == SCOPE_ALL
+                         else "ℹ️ В этой категории пока нет контактов.")
                 await self._safe_edit_message(
                     query,
-                    "📋 <b>СПИСОК КОНТАКТОВ</b>\n\n"
-                    "ℹ️ В базе пока нет контактов.\n"
-                    "Добавьте первый контакт!",
-                    reply_markup=contacts_menu_keyboard(),
+                    f"{title}\n\n{empty}",
+                    reply_markup=contacts_menu_keyboard() if scope == SCOPE_ALL else contact_categories_keyboard(),
                     parse_mode=ParseMode.HTML,
                     fallback_message="Список контактов уже отображается"
                 )
+                return
+            
+            order = "по имени" if sort == SORT_NAME else "сначала новые"
+            text = (f"{title}\n\n"
+                    f"Контакты {page.offset + 1}–{page.offset + len(page.contacts)} из {page.total} ({order})\n\n")
+            for i, contact in enumerate(page.contacts, page.offset + 1):
+                entry = self._format_contact_lines(i, contact)
+                if scope == SCOPE_ALL:
+                    entry += f"   🏷️ {html.escape(contact['category'])}\n"
+                text += entry + "\n"
+            
+            # Ограничиваем длину сообщения
+            if len(text) > 4000:
+                text = text[:4000] + "\n\n..."
+            
+            await self._safe_edit_message(
+                query,
+                text,
+                reply_markup=contacts_page_keyboard(scope, sort, page.first_phone, page.last_phone,
+                                                    page.has_prev, page.has_next),
+                parse_mode=ParseMode.HTML,
+                fallback_message="Страница контактов уже отображается"
+            )
         except Exception as e:
             logger.error(f"❌ Ошибка при показе списка контактов: {e}")
             await self._safe_edit_message(
@@ -464,6 +545,26 @@ class ContactsHandler:
                 fallback_message="Ошибка загрузки"
             )
     
+    async def _handle_contacts_page(self, query, context, callback_data):
+        """Листание: callback contacts_page_<раздел>_<порядок>_<n|p|f>_<телефон>"""
+        parts = callback_data[len("contacts_page_"):].split("_", 3)
+        if len(parts) != 4 or parts[1] not in SORT_ORDERS:
+            logger.warning(f"⚠️ Неверный callback страницы контактов: {callback_data}")
+            return
+        scope, sort, direction, cursor = parts
+        await self._show_contacts_page(query, scope, sort, cursor=cursor or None, forward=direction != "p")
+    
+    async def _handle_contacts_menu(self, query, context):
+        """Возврат в меню контактов"""
+        await self._safe_edit_message(
+            query,
+            "📞 <b>УПРАВЛЕНИЕ КОНТАКТАМИ</b>\n\n"
+            "Выберите действие:",
+            reply_markup=contacts_menu_keyboard(),
+            parse_mode=ParseMode.HTML,
+            fallback_message="Меню контактов уже отображается"
+        )
+    
     async def _handle_show_categories(self, query, context):
         """Показ категорий контактов"""
         try:
@@ -495,45 +596,67 @@ class ContactsHandler:
             )
     
     async def _handle_export_contacts(self, query, context):
-        """Экспорт контактов"""
+        """Экспорт контактов: выбор категории и формата файла"""
+        total = len(self.knowledge_collector.get_all_contacts())
+        excel_line = "\n• Excel — файл .xlsx" if "xlsx" in available_export_formats() else ""
+        await self._safe_edit_message(
+            query,
+            "📤 <b>ЭКСПОРТ КОНТАКТОВ</b>\n\n"
+            f"Всего контактов: {total}\n\n"
+            "Выберите категорию и формат файла:\n"
+            "• CSV — для Excel и Google Таблиц\n"
+            "• vCard — для импорта в телефон"
+            f"{excel_line}",
+            reply_markup=contacts_export_keyboard(),
+            parse_mode=ParseMode.HTML,
+            fallback_message="Экспорт контактов уже отображается"
+        )
+    
+    async def _handle_export_file(self, query, context, callback_data):
+        """Выгрузка контактов файлом: callback contacts_export_<формат>_<категория|all>"""
+        export_format, _, category = callback_data[len("contacts_export_"):].partition("_")
+        category = None if category in ("", "all") else category
+        if export_format not in EXPORT_FORMATS:
+            logger.warning(f"⚠️ Неизвестный формат экспорта: {callback_data}")
+            return
+        
+        if category:
+            contacts = self.knowledge_collector.get_contacts_by_category(category)
+        else:
+            contacts = self.knowledge_collector.get_all_contacts()
+        category_title = CATEGORY_NAMES.get(category, category) if category else "все категории"
+        if not contacts:
+            await self._safe_edit_message(
+                query,
+                f"📤 <b>ЭКСПОРТ КОНТАКТОВ</b>\n\nℹ️ Нет контактов для экспорта ({category_title}).",
+                reply_markup=contacts_export_keyboard(),
+                parse_mode=ParseMode.HTML,
+                fallback_message="Нет контактов для экспорта"
+            )
+            return
+        
         try:
-            all_contacts = self.knowledge_collector.get_all_contacts()
-            
-            if all_contacts:
-                export_text = "📤 <b>ЭКСПОРТ КОНТАКТОВ</b>\n\n"
-                export_text += f"Всего контактов: {len(all_contacts)}\n\n"
-                
-                for contact in all_contacts:
-                    export_text += f"• {contact['name']} - {contact['phone']}\n"
-                
-                # Ограничиваем длину сообщения
-                if len(export_text) > 4000:
-                    export_text = export_text[:4000] + "\n\n... (показаны первые контакты)"
-                
-                await self._safe_edit_message(
-                    query,
-                    export_text,
-                    reply_markup=contacts_menu_keyboard(),
-                    parse_mode=ParseMode.HTML,
-                    fallback_message="Экспорт контактов уже отображается"
-                )
-            else:
-                await self._safe_edit_message(
-                    query,
-                    "📤 <b>ЭКСПОРТ КОНТАКТОВ</b>\n\n"
-                    "ℹ️ В базе нет контактов для экспорта.",
-                    reply_markup=contacts_menu_keyboard(),
-                    parse_mode=ParseMode.HTML,
-                    fallback_message="Экспорт контактов уже отображается"
-                )
-        except Exception as e:
-            logger.error(f"❌ Ошибка при экспорте контактов: {e}")
+            # Файл пишется в потоке, чтобы не блокировать бота на большой базе
+            path, count = await asyncio.to_thread(export_contacts, contacts, export_format)
+        except ImportError:
             await self._safe_edit_message(
                 query,
-                "❌ Произошла ошибка при экспорте контактов",
-                reply_markup=contacts_menu_keyboard(),
-                fallback_message="Ошибка экспорта"
+                "❌ Экспорт в Excel недоступен: не установлен пакет openpyxl. Выберите CSV.",
+                reply_markup=contacts_export_keyboard(),
+                fallback_message="Экспорт в Excel недоступен"
+            )
+            return
+        
+        try:
+            await context.bot.send_document(
+                chat_id=query.message.chat_id,
+                document=Path(path),
+                filename=export_filename(export_format, category),
+                caption=f"📤 Контакты: {count} ({category_title}), {EXPORT_FORMATS[export_format]['title']}",
             )
+        finally:
+            os.remove(path)
+        logger.info(f"📤 Экспорт контактов {export_format}: {count} записей для {query.from_user.id}")
     
     async def _handle_main_menu(self, query, context):
         """Возврат в главное меню"""
@@ -545,62 +668,9 @@ class ContactsHandler:
         )
     
     async def _handle_category_selection(self, query, context, callback_data):
-        """Обработка выбора категории"""
-        try:
-            category = callback_data.replace("category_", "")
-            category_names = {
-                'supplier': 'Поставщики',
-                'contractor': 'Подрядчики', 
-                'employee': 'Сотрудники'
-            }
-            
-            # Получаем контакты по выбранной категории
-            contacts = self.knowledge_collector.get_contacts_by_category(category)
-            
-            if contacts:
-                category_text = f"🏷️ <b>КАТЕГОРИЯ: {category_names.get(category, category)}</b>\n\n"
-                category_text += f"Найдено контактов: {len(contacts)}\n\n"
-                
-                for i, contact in enumerate(contacts[:10], 1):  # Показываем первые 10
-                    category_text += f"{i}. <b>{contact['name']}</b>\n"
-                    category_text += f"   📱 {contact['phone']}\n"
-                    if contact.get('email'):
-                        category_text += f"   📧 {contact['email']}\n"
-                    if contact.get('description'):
-                        category_text += f"   📝 {contact['description']}\n"
-                    category_text += "\n"
-                
-                if len(contacts) > 10:
-                    category_text += f"... и еще {len(contacts) - 10} контактов"
-                
-                # Ограничиваем длину сообщения
-                if len(category_text) > 4000:
-                    category_text = category_text[:4000] + "\n\n... (показаны первые контакты)"
-                
-                await self._safe_edit_message(
-                    query,
-                    category_text,
-                    reply_markup=contact_categories_keyboard(),
-                    parse_mode=ParseMode.HTML,
-                    fallback_message=f"Категория {category_names.get(category, category)} уже отображается"
-                )
-            else:
-                await self._safe_edit_message(
-                    query,
-                    f"🏷️ <b>КАТЕГОРИЯ: {category_names.get(category, category)}</b>\n\n"
-                    f"ℹ️ В этой категории пока нет контактов.",
-                    reply_markup=contact_categories_keyboard(),
-                    parse_mode=ParseMode.HTML,
-                    fallback_message=f"Категория {category_names.get(category, category)} уже отображается"
-                )
-        except Exception as e:
-            logger.error(f"❌ Ошибка при выборе категории: {e}")
-            await self._safe_edit_message(
-                query,
-                "❌ Произошла ошибка при загрузке категории",
-                reply_markup=contact_categories_keyboard(),
-                fallback_message="Произошла ошибка"
-            )
+        """Обработка выбора категории (первая страница категории)"""
+        category = callback_data.replace("category_", "")
+        await self._show_contacts_page(query, category, SORT_NAME)
     
     # Добавляем недостающие методы для ConversationHandler
     async def handle_contact_name_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -817,7 +887,7 @@ class ContactsHandler:
                 return SEARCHING_CONTACT
             
             # Ищем контакты
-            results = self.knowledge_collector.search_contacts_advanced(query_text)
+            results = self.knowledge_collector.search_contacts_advanced(query_text, limit=10)
             
             if results:
                 # Показываем результаты
@@ -901,6 +971,17 @@ class ContactsHandler:
             logger.error(f"❌ Ошибка отмены операции: {e}")
             return ConversationHandler.END
 
+async def sync_contacts_job(context: ContextTypes.DEFAULT_TYPE):
+    """Периодическая синхронизация с базой AI ассистента (в потоке, чтобы не блокировать бота)"""
+    try:
+        report = await asyncio.to_thread(contact_sync.run, knowledge_collector)
+        if report.conflicts:
+            logger.warning(report.format())
+    except FileNotFoundError as e:
+        logger.warning(f"⚠️ Синхронизация контактов пропущена: {e}")
+    except Exception as e:
+        logger.error(f"❌ Ошибка синхронизации контактов: {e}")
+
 def register_contacts_handlers(application: Application) -> None:
     """Регистрация обработчиков команд по контактам"""
     contacts_handler = ContactsHandler()
@@ -950,4 +1031,11 @@ def register_contacts_handlers(application: Application) -> None:
     # Регистрируем ConversationHandler
     application.add_handler(contacts_conversation)
     
+    if CONTACTS_SYNC_INTERVAL > 0:
+        if application.job_queue:
+            application.job_queue.run_repeating(sync_contacts_job, interval=CONTACTS_SYNC_INTERVAL, first=60)
+            logger.info(f"🔄 Синхронизация контактов с AI ассистентом каждые {CONTACTS_SYNC_INTERVAL} с")
+        else:
+            logger.error("❌ JobQueue недоступен — синхронизация контактов из бота не запущена")
+    
     logger.info("✅ Обработчики команд по контактам зарегистрированы с ConversationHandler")
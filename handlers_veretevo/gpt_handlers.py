@@ -1,15 +1,164 @@
+import asyncio
 import logging
 import urllib.parse
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ContextTypes, CallbackContext, MessageHandler, CallbackQueryHandler, CommandHandler, filters
 from config_veretevo.constants import GENERAL_DIRECTOR_ID
-from services_veretevo.gpt_service import gpt_service
+from services_veretevo.gpt_service import gpt_service, GPT_ERROR_FAILED, GPT_ERROR_MESSAGES, KB_MAINTENANCE_INTERVAL
+from services_veretevo import department_service
 from services_veretevo.department_service import DEPARTMENTS
+from services_veretevo.chat_history_service import chat_history
+from services_veretevo.hint_digest_service import hint_digest, is_urgent
+from utils_veretevo.progressive_message import ProgressiveMessage
+from utils_veretevo.completion_cache import completion_cache, GPT_CACHE_FLUSH_INTERVAL
+from utils_veretevo.deadline import with_request_deadline
 import json
+from collections import OrderedDict
 
 # Глобальные переменные для хранения состояния
 gpt_contexts = {}  # {chat_id: {"question": "...", "answer": "...", "department": "..."}}
 
+auto_answers = OrderedDict()  # {(chat_id, ответ бота): {"question": ..., "message_id": ...}}
+AUTO_ANSWERS_LOG_SIZE = 500
+
+PLACEHOLDER_TEXT = "Сообщение из группового чата"  # если сообщения уже нет в истории
+
+# Бюджет времени на запросы к GPT из одного нажатия кнопки (варианты укладываются в VARIANTS_DEADLINE)
+GPT_HANDLER_BUDGET = 30
+
+def get_original_message(chat_id: int, message_id: int) -> tuple:
+    """Текст сообщения под подсказкой и предшествующая переписка (из истории чата, без запросов к API)"""
+    message = chat_history.get_message(chat_id, message_id)
+    if not message or not message.get("text"):
+        logging.warning(f"[GPT DEBUG] Сообщение {message_id} чата {chat_id} не найдено в истории")
+        return PLACEHOLDER_TEXT, ""
+    return message["text"], chat_history.format_context(chat_id, message_id)
+
+DIGEST_TITLE = "🗂 Сводка сообщений"
+DIGEST_ITEM_LENGTH = 300  # символов текста на пункт сводки
+
+def build_hint_buttons(message_id: int, chat_id: int, text: str, label: str = "") -> list:
+    """Кнопки подсказки для одного сообщения: GPT-ответ и быстрые варианты"""
+    buttons = [InlineKeyboardButton(f"{label}💡 GPT-ответ", callback_data=f"gpt_gen:{message_id}:{chat_id}")]
+    for variant in gpt_service.get_answer_variants(text):
+        buttons.append(InlineKeyboardButton(
+            f"{label}{variant['text']}",
+            callback_data=f"gpt_variant:{message_id}:{chat_id}:{variant['callback_data']}"
+        ))
+    return buttons
+
+async def send_single_hint(bot, item: dict, urgent: bool = False):
+    """Отдельная подсказка директору по одному сообщению"""
+    buttons = build_hint_buttons(item["message_id"], item["chat_id"], item["text"])
+    # Как и раньше: GPT-ответ в первом ряду, быстрые варианты во втором
+    keyboard = [buttons[:1]] + ([buttons[1:]] if len(buttons) > 1 else [])
+    title = "🚨 Срочное сообщение" if urgent else "🤖 GPT-подсказка"
+    await bot.send_message(
+        chat_id=GENERAL_DIRECTOR_ID,
+        text=f"{title} из чата {item['chat_title']}:\n\n💬 Сообщение: {item['text']}\n\nЧто ответить?",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def send_hint_digest(bot, items: list):
+    """Одна сводка по накопленным сообщениям группы (одно сообщение — обычная подсказка)"""
+    if not items:
+        return
+    if len(items) == 1:
+        await send_single_hint(bot, items[0])
+        return
+    lines = [f"{DIGEST_TITLE} из чата {items[0]['chat_title']} ({len(items)}):", ""]
+    keyboard = []
+    for i, item in enumerate(items, 1):
+        text = item["text"] if len(item["text"]) <= DIGEST_ITEM_LENGTH else item["text"][:DIGEST_ITEM_LENGTH] + "…"
+        lines.append(f"{i}. {item['author'] or 'Сотрудник'}: {text}")
+        keyboard.append(build_hint_buttons(item["message_id"], item["chat_id"], item["text"], label=f"{i}. "))
+    lines.extend(["", "Что ответить?"])
+    await bot.send_message(
+        chat_id=GENERAL_DIRECTOR_ID,
+        text="\n".join(lines),
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+    logging.info(f"[GPT DEBUG] Сводка из {len(items)} сообщений чата {items[0]['chat_id']} отправлена директору")
+
+def _digest_job_name(chat_id: int) -> str:
+    return f"gpt_digest:{chat_id}"
+
+async def flush_hint_digest(context: CallbackContext):
+    """Задача JobQueue: окно сводки закрылось — отправляем накопленное"""
+    chat_id = context.job.data
+    try:
+        await send_hint_digest(context.bot, hint_digest.pop(chat_id))
+    except Exception as e:
+        logging.error(f"Ошибка отправки сводки GPT-подсказок для чата {chat_id}: {e}")
+
+async def queue_hint(context, item: dict):
+    """Срочное — сразу, остальное — в сводку чата (без JobQueue или с окном 0 — сразу)"""
+    job_queue = getattr(context, "job_queue", None)
+    urgent = is_urgent(item["text"])
+    if urgent or not hint_digest.enabled or not job_queue:
+        if urgent:
+            hint_digest.stats["urgent"] += 1
+        await send_single_hint(context.bot, item, urgent=urgent)
+        return
+    chat_id = item["chat_id"]
+    if hint_digest.add(chat_id, item):
+        job_queue.run_once(flush_hint_digest, when=hint_digest.window, data=chat_id, name=_digest_job_name(chat_id))
+    elif hint_digest.is_full(chat_id):
+        # Сводка заполнена — отправляем досрочно, таймер окна больше не нужен
+        for job in job_queue.get_jobs_by_name(_digest_job_name(chat_id)):
+            job.schedule_removal()
+        await send_hint_digest(context.bot, hint_digest.pop(chat_id))
+
+async def try_auto_answer(context, message, department: str) -> bool:
+    """
+    Отвечает в группе шаблоном из базы знаний, если для отдела включен автоответ
+    и вопрос почти дословно совпадает с известным. Директор получает отчет с кнопкой отмены.
+    """
+    text = message.text or ""
+    if not department or not department_service.is_auto_answer_enabled(department) or is_urgent(text):
+        return False
+    match = gpt_service.find_auto_answer(text, department)
+    if not match:
+        return False
+    
+    sent = await context.bot.send_message(
+        chat_id=message.chat.id,
+        text=f"📚 Ответ из базы знаний:\n\n{match['answer']}",
+        reply_to_message_id=message.message_id
+    )
+    auto_answers[(message.chat.id, sent.message_id)] = {"question": match["question"], "message_id": message.message_id}
+    while len(auto_answers) > AUTO_ANSWERS_LOG_SIZE:
+        auto_answers.popitem(last=False)
+    logging.info(f"[GPT DEBUG] Автоответ в чате {message.chat.id} (сходство {match['similarity']:.0%})")
+    
+    keyboard = [[InlineKeyboardButton(
+        "↩️ Отменить", callback_data=f"gpt_undo:{message.chat.id}:{sent.message_id}"
+    )]]
+    await context.bot.send_message(
+        chat_id=GENERAL_DIRECTOR_ID,
+        text=(
+            f"⚡ Автоответ в чате {message.chat.title}:\n\n"
+            f"💬 Сообщение: {text}\n"
+            f"📚 Похожий вопрос ({match['similarity']:.0%}): {match['question']}\n\n"
+            f"Ответ: {match['answer']}"
+        ),
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+    return True
+
+def is_digest_message(message) -> bool:
+    return (getattr(message, "text", None) or "").startswith(DIGEST_TITLE)
+
+async def remove_hint_buttons(query, message_id: int, chat_id: int):
+    """Убирает кнопки одного сообщения (в сводке остальные пункты остаются)"""
+    markup = getattr(query.message, "reply_markup", None)
+    rows = []
+    for row in (markup.inline_keyboard if markup else []):
+        kept = [b for b in row if (b.callback_data or "").split(":")[1:3] != [str(message_id), str(chat_id)]]
+        if kept:
+            rows.append(kept)
+    await query.edit_message_reply_markup(reply_markup=InlineKeyboardMarkup(rows) if rows else None)
+
 async def handle_message_in_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обрабатывает сообщения в группах и предлагает GPT-подсказки"""
     
@@ -36,6 +185,17 @@ async def handle_message_in_group(update: Update, context: ContextTypes.DEFAULT_
         logging.info(f"[GPT DEBUG] Пропускаем - сообщение от бота")
         return
     
+    # Запоминаем сообщение (и директора тоже) — это контекст для будущих подсказок
+    reply = update.message.reply_to_message
+    chat_history.add_message(
+        update.message.chat.id,
+        update.message.message_id,
+        update.message.text or "",
+        author=update.message.from_user.first_name or "",
+        reply_to=reply.message_id if reply else None,
+        thread_id=update.message.message_thread_id,
+    )
+    
     # Проверяем, что это НЕ директор (подсказки появляются для сообщений других людей)
     if update.message.from_user.id == GENERAL_DIRECTOR_ID:
         logging.info(f"[GPT DEBUG] Пропускаем - сообщение от директора")
@@ -56,43 +216,27 @@ async def handle_message_in_group(update: Update, context: ContextTypes.DEFAULT_
         logging.info(f"[GPT DEBUG] Пропускаем - GPT подсказки отключены для чата Ассистентов")
         return
     
-    # Отправляем GPT-подсказку директору в личный чат (приватно)
+    # Почти дословно известный вопрос в отделе с автоответом — отвечаем сразу
     try:
-        logging.info(f"[GPT DEBUG] Создаем GPT-подсказку для директора")
-        # Создаем клавиатуру с GPT-подсказкой
-        # Используем только ID сообщения и чата, текст будем получать отдельно
-        callback_data = f"gpt_gen:{update.message.message_id}:{update.message.chat.id}"
-        logging.info(f"[GPT DEBUG] Создаем кнопку с callback_data: {callback_data}")
-        logging.info(f"[GPT DEBUG] Message ID: {update.message.message_id}, Chat ID: {update.message.chat.id}")
-        keyboard = [
-            [InlineKeyboardButton("💡 GPT-ответ", callback_data=callback_data)]
-        ]
-        
-        # Добавляем варианты ответа если есть
-        variants = gpt_service.get_answer_variants(message_text)
-        if variants:
-            variant_buttons = []
-            for variant in variants:
-                variant_buttons.append(InlineKeyboardButton(
-                    variant["text"], 
-                    callback_data=f"gpt_variant:{update.message.message_id}:{update.message.chat.id}:{variant['callback_data']}"
-                ))
-            keyboard.append(variant_buttons)
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # Отправляем подсказку директору в личный чат
-        await context.bot.send_message(
-            chat_id=GENERAL_DIRECTOR_ID,
-            text=f"🤖 GPT-подсказка из чата {update.message.chat.title}:\n\n💬 Сообщение: {message_text}\n\nЧто ответить?",
-            reply_markup=reply_markup
-        )
-        
-        logging.info(f"[GPT DEBUG] Подсказка отправлена директору в личный чат")
-        
+        if await try_auto_answer(context, update.message, department):
+            return
+    except Exception as e:
+        logging.error(f"Ошибка автоответа из базы знаний: {e}")
+    
+    # Подсказка директору в личный чат: срочное — сразу, остальное — сводкой
+    try:
+        await queue_hint(context, {
+            "message_id": update.message.message_id,
+            "chat_id": update.message.chat.id,
+            "chat_title": update.message.chat.title,
+            "text": message_text,
+            "author": update.message.from_user.first_name or "",
+        })
+        logging.info(f"[GPT DEBUG] Подсказка для сообщения {update.message.message_id} поставлена директору")
     except Exception as e:
         logging.error(f"Ошибка отправки GPT-подсказки: {e}")
 
+@with_request_deadline(GPT_HANDLER_BUDGET)
 async def handle_gpt_generate(update: Update, context: CallbackContext):
     """Обрабатывает нажатие кнопки GPT-ответ"""
     
@@ -112,8 +256,8 @@ async def handle_gpt_generate(update: Update, context: CallbackContext):
     message_id = int(data_parts[1])
     chat_id = int(data_parts[2])
     
-    # Используем заглушку для текста (в реальной реализации нужно сохранять в базе)
-    original_text = "Сообщение из группового чата"
+    # Текст вопроса и переписка перед ним — из истории чата
+    original_text, history = get_original_message(chat_id, message_id)
     
     # Получаем информацию о чате
     try:
@@ -127,26 +271,43 @@ async def handle_gpt_generate(update: Update, context: CallbackContext):
     # Получаем отдел
     department = get_department_from_chat(chat_id)
     
-    # Генерируем 3 варианта ответа через GPT
-    responses = []
+    # Сводку не затираем: варианты для ее пункта выводим отдельным сообщением
+    target_chat_id = update.callback_query.message.chat_id
+    target_message_id = update.callback_query.message.message_id
+    if is_digest_message(update.callback_query.message):
+        await remove_hint_buttons(update.callback_query, message_id, chat_id)
+        target = await context.bot.send_message(
+            chat_id=update.callback_query.from_user.id,
+            text=f"🤖 Генерирую ответ на: '{original_text}'..."
+        )
+        target_chat_id, target_message_id = target.chat_id, target.message_id
+    
+    # Генерируем 3 варианта ответа одновременно (разные температуры, общий дедлайн)
     logging.info(f"[GPT DEBUG] Начинаем генерацию для чата {chat_id}, отдел: {department}")
-    for i in range(3):
-        try:
-            logging.info(f"[GPT DEBUG] Генерируем вариант {i+1}")
-            response_data = await gpt_service.get_smart_response(original_text, department)
-            responses.append(response_data['answer'])
-            logging.info(f"[GPT DEBUG] Вариант {i+1} успешно сгенерирован")
-        except Exception as e:
-            logging.error(f"[GPT DEBUG] Ошибка генерации варианта {i+1}: {e}")
-            responses.append(f"Вариант {i+1}: Ошибка генерации")
-    
-    # Создаем клавиатуру с цифрами
+    # Первый вариант показываем по мере генерации, правки сообщения прореживаются
+    progress = ProgressiveMessage(
+        context.bot, target_chat_id, target_message_id,
+        prefix=f"🤖 Варианты ответа на: '{original_text}'\n\n1. "
+    )
+    try:
+        responses = await gpt_service.generate_variants(
+            original_text, department, count=3, on_partial=progress.update, history=history
+        )
+    except Exception as e:
+        logging.error(f"[GPT DEBUG] Ошибка генерации вариантов: {e}")
+        responses = []
+    finally:
+        progress.close()
+    if not responses:
+        responses = [GPT_ERROR_FAILED]
+    logging.info(f"[GPT DEBUG] Готово вариантов: {len(responses)}")
+    
+    # Создаем клавиатуру с цифрами (только для готовых вариантов; ошибку выбрать нельзя)
     keyboard = [
-        [InlineKeyboardButton("1", callback_data=f"gpt_choose:{chat_id}:1")],
-        [InlineKeyboardButton("2", callback_data=f"gpt_choose:{chat_id}:2")],
-        [InlineKeyboardButton("3", callback_data=f"gpt_choose:{chat_id}:3")],
-        [InlineKeyboardButton("🔄 Другие варианты", callback_data=f"gpt_regenerate:{message_id}:{chat_id}")]
+        [InlineKeyboardButton(str(i), callback_data=f"gpt_choose:{chat_id}:{i}")]
+        for i, response in enumerate(responses, 1) if response not in GPT_ERROR_MESSAGES
     ]
+    keyboard.append([InlineKeyboardButton("🔄 Другие варианты", callback_data=f"gpt_regenerate:{message_id}:{chat_id}")])
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
@@ -157,13 +318,16 @@ async def handle_gpt_generate(update: Update, context: CallbackContext):
     variants_text += "Выберите вариант:"
     
     # Обновляем сообщение с вариантами ответов
-    await update.callback_query.edit_message_text(
+    await context.bot.edit_message_text(
+        chat_id=target_chat_id,
+        message_id=target_message_id,
         text=variants_text,
         reply_markup=reply_markup
     )
     
     logging.info(f"[GPT DEBUG] Показаны варианты ответов для чата {chat_id}")
 
+@with_request_deadline(GPT_HANDLER_BUDGET)
 async def handle_gpt_variant(update: Update, context: CallbackContext):
     """Обрабатывает нажатие кнопки с вариантом ответа"""
     
@@ -212,8 +376,7 @@ async def handle_gpt_variant(update: Update, context: CallbackContext):
     # Получаем отдел
     department = get_department_from_chat(chat_id)
     
-    # Для демонстрации используем заглушку текста
-    original_text = "Сообщение из группового чата"
+    original_text, history = get_original_message(chat_id, message_id)
     
     # Формируем ответ в зависимости от варианта
     if variant == "gpt_yes":
@@ -225,7 +388,7 @@ async def handle_gpt_variant(update: Update, context: CallbackContext):
         await update.callback_query.answer("🤖 Анализирую вопрос...")
         
         # Генерируем варианты ответов через GPT
-        response_data = await gpt_service.get_smart_response(original_text, department)
+        response_data = await gpt_service.get_smart_response(original_text, department, history=history)
         
         # Создаем клавиатуру с вариантами
         keyboard = [
@@ -248,8 +411,8 @@ async def handle_gpt_variant(update: Update, context: CallbackContext):
             reply_markup=reply_markup
         )
         
-        # Удаляем исходную подсказку
-        await update.callback_query.edit_message_reply_markup(reply_markup=None)
+        # Убираем кнопки этого сообщения из подсказки
+        await remove_hint_buttons(update.callback_query, message_id, chat_id)
         
         logging.info(f"[GPT DEBUG] Варианты GPT отправлены в личный чат")
         return
@@ -279,8 +442,8 @@ async def handle_gpt_variant(update: Update, context: CallbackContext):
         reply_markup=reply_markup
     )
     
-    # Удаляем подсказку (убираем кнопки)
-    await update.callback_query.edit_message_reply_markup(reply_markup=None)
+    # Убираем кнопки этого сообщения из подсказки (в сводке остальные пункты остаются)
+    await remove_hint_buttons(update.callback_query, message_id, chat_id)
     
     logging.info(f"[GPT DEBUG] Вариант ответа отправлен в чат {chat_id}")
 
@@ -324,6 +487,68 @@ async def handle_save_template(update: Update, context: CallbackContext):
     else:
         await update.callback_query.answer("❌ Ошибка сохранения", show_alert=True)
 
+async def handle_auto_answer_undo(update: Update, context: CallbackContext):
+    """Отменяет автоответ: удаляет его из группы и передает сообщение директору"""
+    
+    # Проверяем права доступа
+    if update.callback_query.from_user.id != GENERAL_DIRECTOR_ID:
+        await update.callback_query.answer("❌ Доступ запрещен", show_alert=True)
+        return
+    
+    data_parts = update.callback_query.data.split(":")
+    chat_id = int(data_parts[1])
+    answer_message_id = int(data_parts[2])
+    record = auto_answers.pop((chat_id, answer_message_id), None)
+    
+    try:
+        await context.bot.delete_message(chat_id=chat_id, message_id=answer_message_id)
+    except Exception as e:
+        logging.warning(f"[GPT DEBUG] Не удалось удалить автоответ {answer_message_id}: {e}")
+    await update.callback_query.answer("↩️ Автоответ отменен")
+    await update.callback_query.edit_message_text(
+        text=update.callback_query.message.text + "\n\n↩️ Отменено",
+        reply_markup=None
+    )
+    if not record:
+        return
+    
+    gpt_service.record_auto_answer_undo(record["question"])
+    # Сообщение снова ждет директора — обычная подсказка
+    original = chat_history.get_message(chat_id, record["message_id"])
+    if original:
+        await send_single_hint(context.bot, {
+            "message_id": record["message_id"],
+            "chat_id": chat_id,
+            "chat_title": (await context.bot.get_chat(chat_id)).title,
+            "text": original["text"],
+            "author": original["author"],
+        })
+
+async def handle_auto_answer_command(update: Update, context: CallbackContext):
+    """/auto_answer [отдел on|off] — автоответы из базы знаний по отделам"""
+    
+    # Проверяем права доступа
+    if update.message.from_user.id != GENERAL_DIRECTOR_ID:
+        return
+    
+    args = context.args or []
+    if len(args) == 2 and args[1].lower() in ("on", "off"):
+        enabled = args[1].lower() == "on"
+        if not department_service.set_auto_answer(args[0], enabled):
+            await update.message.reply_text(f"Отдел '{args[0]}' не найден.")
+            return
+        await update.message.reply_text(
+            f"{'✅ Автоответ включен' if enabled else '⏸️ Автоответ выключен'} для отдела {DEPARTMENTS[args[0]]['name']}"
+        )
+        return
+    
+    lines = ["📚 Автоответ из базы знаний по отделам:", ""]
+    for dep_key, dep in DEPARTMENTS.items():
+        status = "✅" if department_service.is_auto_answer_enabled(dep_key) else "⏸️"
+        lines.append(f"{status} {dep['name']} ({dep_key})")
+    lines.extend(["", "Использование: /auto_answer <отдел> on|off"])
+    await update.message.reply_text("\n".join(lines))
+
 async def handle_gpt_stats(update: Update, context: CallbackContext):
     """Показывает статистику базы знаний"""
     
@@ -332,13 +557,19 @@ async def handle_gpt_stats(update: Update, context: CallbackContext):
         return
     
     stats = gpt_service.get_cache_stats()
+    cache = stats['completion_cache']
     
     stats_text = f"""
 📊 Статистика базы знаний GPT:
 
 📝 Всего ответов: {stats['total_answers']}
+🗄️ В архиве: {stats['archived_answers']}
 💾 Размер файла: {stats['file_size']} байт
 🕒 Последнее сохранение: {stats['last_save']}
+
+⚡ Кэш ответов GPT: {cache['entries']} записей
+   попаданий: {cache['hits']}, промахов: {cache['misses']} ({cache['hit_rate']:.0%})
+   перегенераций: {cache['bypassed']}, вытеснено: {cache['evicted']}
     """
     
     await update.message.reply_text(stats_text)
@@ -363,6 +594,17 @@ def get_department_from_chat(chat_id: int) -> str:
     else:
         return ""
 
+async def run_kb_maintenance(context: CallbackContext):
+    """Периодическое обслуживание базы знаний (вне event loop)"""
+    try:
+        await asyncio.to_thread(gpt_service.run_maintenance)
+    except Exception as e:
+        logging.error(f"❌ Ошибка обслуживания базы знаний: {e}")
+
+async def flush_completion_cache(context: CallbackContext):
+    """Периодическая запись кэша ответов GPT на диск (вне event loop)"""
+    await asyncio.to_thread(completion_cache.flush)
+
 def register_gpt_handlers(application):
     """Регистрирует обработчики GPT-подсказок"""
     
@@ -403,11 +645,27 @@ def register_gpt_handlers(application):
         CallbackQueryHandler(handle_save_template, pattern="^gpt_save_template$")
     )
     
+    application.add_handler(
+        CallbackQueryHandler(handle_auto_answer_undo, pattern="^gpt_undo:")
+    )
+    
+    application.add_handler(
+        CommandHandler("auto_answer", handle_auto_answer_command)
+    )
+    
     # Обработчик статистики
     application.add_handler(
         CommandHandler("gpt_stats", handle_gpt_stats)
     )
     
+    # Слияние дублей и вытеснение редких ответов базы знаний
+    if application.job_queue:
+        application.job_queue.run_repeating(run_kb_maintenance, interval=KB_MAINTENANCE_INTERVAL, first=300)
+        application.job_queue.run_repeating(flush_completion_cache, interval=GPT_CACHE_FLUSH_INTERVAL,
+                                            first=GPT_CACHE_FLUSH_INTERVAL)
+    else:
+        logging.error("[GPT] JobQueue недоступен — обслуживание базы знаний не запланировано")
+    
     logging.info("✅ Обработчики GPT-подсказок зарегистрированы")
 
 async def handle_gpt_send(update: Update, context: CallbackContext):
@@ -447,6 +705,7 @@ async def handle_gpt_send(update: Update, context: CallbackContext):
     
     logging.info(f"[GPT DEBUG] Ответ отправлен в чат {chat_id}")
 
+@with_request_deadline(GPT_HANDLER_BUDGET)
 async def handle_gpt_quick(update: Update, context: CallbackContext):
     """Отправляет быстрый ответ в чат"""
     
@@ -475,7 +734,7 @@ async def handle_gpt_quick(update: Update, context: CallbackContext):
         department = get_department_from_chat(chat_id)
         
         # Генерируем варианты ответов через GPT
-        response_data = await gpt_service.get_smart_response("Сообщение из группового чата", department)
+        response_data = await gpt_service.get_smart_response(PLACEHOLDER_TEXT, department)
         
         # Создаем клавиатуру с вариантами
         keyboard = [
@@ -519,6 +778,7 @@ async def handle_gpt_quick(update: Update, context: CallbackContext):
     
     logging.info(f"[GPT DEBUG] Быстрый ответ отправлен в чат {chat_id}")
 
+@with_request_deadline(GPT_HANDLER_BUDGET)
 async def handle_gpt_regenerate(update: Update, context: CallbackContext):
     """Генерирует новый вариант ответа"""
     
@@ -533,31 +793,38 @@ async def handle_gpt_regenerate(update: Update, context: CallbackContext):
     data_parts = update.callback_query.data.split(":")
     message_id = int(data_parts[1])
     chat_id = int(data_parts[2])
-    original_text = "Сообщение из группового чата"
+    original_text, history = get_original_message(chat_id, message_id)
     
     # Получаем отдел
     department = get_department_from_chat(chat_id)
     
-    # Генерируем 3 новых варианта ответа
-    responses = []
+    # Генерируем 3 варианта ответа одновременно (разные температуры, общий дедлайн)
     logging.info(f"[GPT DEBUG] Начинаем генерацию для чата {chat_id}, отдел: {department}")
-    for i in range(3):
-        try:
-            logging.info(f"[GPT DEBUG] Генерируем вариант {i+1}")
-            response_data = await gpt_service.get_smart_response(original_text, department)
-            responses.append(response_data['answer'])
-            logging.info(f"[GPT DEBUG] Вариант {i+1} успешно сгенерирован")
-        except Exception as e:
-            logging.error(f"[GPT DEBUG] Ошибка генерации варианта {i+1}: {e}")
-            responses.append(f"Вариант {i+1}: Ошибка генерации")
-    
-    # Создаем клавиатуру с цифрами
+    # Первый вариант показываем по мере генерации, правки сообщения прореживаются
+    progress = ProgressiveMessage(
+        context.bot, update.callback_query.message.chat_id, update.callback_query.message.message_id,
+        prefix=f"🤖 Новые варианты ответа на: '{original_text}'\n\n1. "
+    )
+    try:
+        responses = await gpt_service.generate_variants(
+            original_text, department, count=3, use_cache=False, on_partial=progress.update,
+            history=history
+        )
+    except Exception as e:
+        logging.error(f"[GPT DEBUG] Ошибка генерации вариантов: {e}")
+        responses = []
+    finally:
+        progress.close()
+    if not responses:
+        responses = [GPT_ERROR_FAILED]
+    logging.info(f"[GPT DEBUG] Готово вариантов: {len(responses)}")
+    
+    # Создаем клавиатуру с цифрами (только для готовых вариантов; ошибку выбрать нельзя)
     keyboard = [
-        [InlineKeyboardButton("1", callback_data=f"gpt_choose:{chat_id}:1")],
-        [InlineKeyboardButton("2", callback_data=f"gpt_choose:{chat_id}:2")],
-        [InlineKeyboardButton("3", callback_data=f"gpt_choose:{chat_id}:3")],
-        [InlineKeyboardButton("🔄 Еще варианты", callback_data=f"gpt_regenerate:{message_id}:{chat_id}")]
+        [InlineKeyboardButton(str(i), callback_data=f"gpt_choose:{chat_id}:{i}")]
+        for i, response in enumerate(responses, 1) if response not in GPT_ERROR_MESSAGES
     ]
+    keyboard.append([InlineKeyboardButton("🔄 Еще варианты", callback_data=f"gpt_regenerate:{message_id}:{chat_id}")])
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
@@ -0,0 +1,144 @@
+"""
+Inline-режим: "@бот запрос" в любом чате ищет задачи и контакты поставщиков.
+
+Задачи ищутся по индексу task_search_index, контакты — по триграммному
+индексу KnowledgeCollector (ContactIndex, как поиск в меню контактов). Задачи видны только участникам их отдела (как в
+show_department_tasks), контакты — участникам любого отдела и директору:
+inline-запрос можно отправить из любого чата, не запуская бота, поэтому
+посторонний пользователь не должен видеть базу поставщиков.
+Ответы кэшируются по (пользователь, запрос) на INLINE_CACHE_TIME секунд:
+в процессе бота и на стороне Telegram (cache_time, is_personal).
+Inline-режим должен быть включен у бота в @BotFather (/setinline).
+"""
+import html
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.constants import ParseMode
+from telegram.ext import Application, ContextTypes, InlineQueryHandler
+
+from handlers_veretevo.contacts import has_contacts_access, knowledge_collector
+from config_veretevo.constants import GENERAL_DIRECTOR_ID
+from services_veretevo import department_service
+from services_veretevo.task_search_service import task_search_index
+from services_veretevo.task_service import reload_tasks_if_changed
+from utils_veretevo.formatting import format_task_message
+
+INLINE_CACHE_TIME = 30
+INLINE_CACHE_SIZE = 1000
+MAX_TASK_RESULTS = 20
+MAX_CONTACT_RESULTS = 10
+MIN_CONTACT_QUERY_LENGTH = 2
+
+
+class InlineResultCache:
+    """Готовые ответы по (user_id, запрос) с ограничением времени жизни и размера"""
+
+    def __init__(self, ttl: float = INLINE_CACHE_TIME, max_size: int = INLINE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[Tuple[int, str], Tuple[float, List]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id: int, query: str) -> Optional[List]:
+        key = (user_id, query)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, user_id: int, query: str, results: List):
+        with self.lock:
+            self.entries[(user_id, query)] = (time.monotonic(), results)
+            self.entries.move_to_end((user_id, query))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+inline_cache = InlineResultCache()
+
+
+def user_department_keys(user_id: int) -> set:
+    """Отделы, задачи которых пользователь видит в show_department_tasks"""
+    user_id_str = str(user_id)
+    return {key for key, dep in department_service.DEPARTMENTS.items() if user_id_str in dep.get("members", {})}
+
+
+def can_see_contacts(user_id: int, departments: set) -> bool:
+    """Контакты в inline-режиме — только сотрудникам (участникам отделов) и директору"""
+    if user_id != GENERAL_DIRECTOR_ID and not departments:
+        return False
+    return has_contacts_access(user_id)
+
+
+def task_result(task: Dict[str, Any]) -> InlineQueryResultArticle:
+    dep_name = department_service.DEPARTMENTS.get(task.get("department"), {}).get("name", "—")
+    text = (task.get("text") or "(без текста)").replace("\n", " ")
+    return InlineQueryResultArticle(
+        id=f"task:{task.get('id')}",
+        title=f"📝 {text[:60]}",
+        description=f"{dep_name} · {task.get('status', '')} · {str(task.get('created_at', ''))[:10]}",
+        input_message_content=InputTextMessageContent(format_task_message(task), parse_mode=ParseMode.HTML),
+    )
+
+
+def contact_result(phone: str, data: Dict[str, Any]) -> InlineQueryResultArticle:
+    name = data.get("name", "Unknown")
+    lines = [f"📞 <b>{html.escape(name)}</b>", f"Телефон: {html.escape(phone)}"]
+    for field, label in (("email", "Email"), ("address", "Адрес"), ("website", "Сайт"), ("description", "Описание")):
+        if data.get(field):
+            lines.append(f"{label}: {html.escape(str(data[field]))}")
+    return InlineQueryResultArticle(
+        id=f"contact:{phone}"[:64],
+        title=f"📞 {name}",
+        description=f"{phone} · {data.get('category', 'supplier')}",
+        input_message_content=InputTextMessageContent("\n".join(lines), parse_mode=ParseMode.HTML),
+    )
+
+
+def build_inline_results(user_id: int, query: str) -> List[InlineQueryResultArticle]:
+    """Задачи отделов пользователя и контакты по запросу"""
+    results: List[InlineQueryResultArticle] = []
+    departments = user_department_keys(user_id)
+    if departments:
+        tasks = task_search_index.search(
+            query, limit=MAX_TASK_RESULTS,
+            visible=lambda task: task.get("department") in departments,
+        )
+        results.extend(task_result(task) for task in tasks)
+    if len(query) >= MIN_CONTACT_QUERY_LENGTH and can_see_contacts(user_id, departments):
+        for phone, data in knowledge_collector.search_contacts_indexed(query, limit=MAX_CONTACT_RESULTS):
+            results.append(contact_result(phone, data))
+    return results
+
+
+async def handle_inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Отвечает на inline-запрос найденными задачами и контактами"""
+    inline_query = update.inline_query
+    user_id = inline_query.from_user.id
+    query = " ".join(inline_query.query.split()).lower()
+
+    results = inline_cache.get(user_id, query)
+    if results is None:
+        started = time.perf_counter()
+        reload_tasks_if_changed()  # при изменении tasks.json синхронизирует индекс
+        results = build_inline_results(user_id, query)
+        inline_cache.put(user_id, query, results)
+        logging.info(f"🔎 Inline «{query}» от {user_id}: {len(results)} результатов "
+                     f"за {(time.perf_counter() - started) * 1000:.1f} мс")
+    await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=True)
+
+
+def register_inline_handlers(application: Application) -> None:
+    """Регистрирует обработчик inline-запросов"""
+    application.add_handler(InlineQueryHandler(handle_inline_query))
+    logging.info("✅ Обработчик inline-поиска зарегистрирован")
@@ -7,6 +7,9 @@ from telegram.ext import ChatMemberHandler
 from services_veretevo import department_service
 from telegram.constants import ChatType
 from services_veretevo.notification_service import NotificationService
+from utils_veretevo.circuit_breaker import format_breakers_status
+
+BROADCAST_REQUEST_INTERVAL = 30  # секунд между проверками рассылок, переданных скриптом
 
 
 def register_menu_handlers(application: Application) -> None:
@@ -26,6 +29,47 @@ def register_menu_handlers(application: Application) -> None:
     application.add_handler(CommandHandler("sync_members", sync_members))
     application.add_handler(CommandHandler("notify_update", notify_update))
     application.add_handler(CommandHandler("notify_all", notify_all))
+    application.add_handler(CommandHandler("services", services_status))
+    # Рассылки, прерванные перезапуском, продолжаются после старта
+    if application.job_queue:
+        application.job_queue.run_once(resume_broadcasts, when=1)
+        application.job_queue.run_repeating(start_requested_broadcasts, interval=BROADCAST_REQUEST_INTERVAL,
+                                            first=BROADCAST_REQUEST_INTERVAL)
+    else:
+        logging.error("[NOTIFICATION] JobQueue недоступен — прерванные рассылки не будут продолжены")
+
+
+async def resume_broadcasts(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Продолжает рассылки уведомлений, прерванные перезапуском бота"""
+    resumed = NotificationService(context.bot).resume_broadcasts()
+    if resumed:
+        logging.info(f"[NOTIFICATION] Возобновлено рассылок: {resumed}")
+
+
+async def start_requested_broadcasts(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Запускает рассылки, которые scripts/auto_notify.py передал работающему боту"""
+    started = NotificationService(context.bot).start_requested_broadcasts()
+    if started:
+        logging.info(f"[NOTIFICATION] Запущено переданных рассылок: {started}")
+
+
+async def _start_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                           notification_service: NotificationService, notification_id: int) -> None:
+    """Запускает фоновую рассылку; сообщение директору показывает ее ход"""
+    progress_message = await update.message.reply_text(f"📣 Рассылка #{notification_id}: подготовка...")
+    task = notification_service.start_broadcast(
+        notification_id,
+        progress_chat_id=progress_message.chat_id,
+        progress_message_id=progress_message.message_id
+    )
+    if task is not None:
+        return
+    if notification_service.is_broadcast_requested(notification_id):
+        text = f"📨 Рассылка #{notification_id} передана процессу, который ведет рассылки"
+    else:
+        text = f"❌ Рассылка #{notification_id} не запущена: уведомление не найдено"
+    await context.bot.edit_message_text(chat_id=progress_message.chat_id,
+                                        message_id=progress_message.message_id, text=text)
 
 
 async def go_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -102,6 +146,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             "/remove_member <b>отдел</b> <b>user_id</b> — удалить участника из отдела\n"
             "/list_members <b>отдел</b> — показать участников отдела\n"
             "/set_department <b>отдел</b> — привязать этот групповой чат к отделу (для авто-добавления участников)\n"
+            "/services — состояние внешних сервисов (GPT, SpeechKit, Todoist)\n"
+            "/auto_answer <b>отдел</b> on|off — автоответ из базы знаний на типовые вопросы\n"
+            "/find <b>текст</b> [отдел:охрана] [статус:в_работе] [с:ГГГГ-ММ-ДД] — поиск задач, включая архив\n"
             "\n<b>Пример:</b>\n"
             "/add_member assistants 123456789 Иван Иванов\n"
             "/remove_member finance 123456789\n"
@@ -121,6 +168,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             "- 📌 Новая задача — создать задачу\n"
             "- 📋 Список задач — посмотреть задачи отдела\n"
             "- Мои задачи — ваши личные задачи\n"
+            "- /find <b>текст</b> — поиск по задачам ваших отделов\n"
         )
     if update.effective_chat and update.effective_chat.type == "private":
         reply_markup = main_menu_keyboard("private", user_id)
@@ -227,6 +275,14 @@ async def sync_members(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     except Exception as e:
         await update.message.reply_text(f"Ошибка при синхронизации: {e}")
 
+async def services_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает директору состояние выключателей внешних сервисов"""
+    user_id = update.effective_user.id if update.effective_user else None
+    if user_id != GENERAL_DIRECTOR_ID:
+        await update.message.reply_text("Только генеральный директор может выполнять эту команду.")
+        return
+    await update.message.reply_text(format_breakers_status())
+
 async def notify_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Отправляет уведомление об обновлении бота всем пользователям"""
     user_id = update.effective_user.id if update.effective_user else None
@@ -247,10 +303,8 @@ async def notify_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     
     try:
         notification_service = NotificationService(context.bot)
-        notification_id = await notification_service.send_update_notification(title, description)
-        await update.message.reply_text(
-            f"✅ Уведомление об обновлении отправлено всем пользователям (ID: {notification_id})"
-        )
+        notification_id = notification_service.create_update_notification(title, description)
+        await _start_broadcast(update, context, notification_service, notification_id)
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка отправки уведомления: {e}")
 
@@ -279,9 +333,6 @@ async def notify_all(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
             message=message,
             notification_type="announcement"
         )
-        await notification_service.send_notification_to_all(notification_id)
-        await update.message.reply_text(
-            f"✅ Уведомление отправлено всем пользователям (ID: {notification_id})"
-        )
+        await _start_broadcast(update, context, notification_service, notification_id)
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка отправки уведомления: {e}")
\ No newline at end of file
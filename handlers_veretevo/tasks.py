@@ -7,26 +7,19 @@ import services_veretevo.department_service as department_service
 from services_veretevo.department_service import DEPARTMENTS
 from utils_veretevo.keyboards import main_menu_keyboard
 from config_veretevo.constants import GENERAL_DIRECTOR_ID
-from services_veretevo.task_service import tasks, save_tasks, get_task_by_id, add_or_update_task
+from services_veretevo.task_service import tasks, save_tasks, get_task_by_id, add_or_update_task, reload_tasks_if_changed
+from services_veretevo.task_search_service import (
+    task_search_index, parse_find_query, resolve_department,
+    FILTER_DEPARTMENT, FILTER_STATUS, FILTER_DATE_FROM, FILTER_DATE_TO,
+)
 from utils_veretevo.keyboards import get_task_action_keyboard
 from utils_veretevo.todoist_sync_polling import force_update_task_messages
 from utils_veretevo.media import send_task_with_media, update_task_messages, send_task_action_comment
 import datetime
+import time
 from utils_veretevo.formatting import format_task_message
-from utils_veretevo.todoist_service import close_task, delete_task
-from utils_veretevo.yandex_speechkit import YandexSpeechKitTranscriber
-import tempfile
-import os
-import re
-from utils_veretevo.yandex_gpt import improve_task_text
-
-# Инициализируем Yandex SpeechKit транскрайбер
-try:
-    voice_transcriber = YandexSpeechKitTranscriber()
-    print("[INFO] Yandex SpeechKit транскрайбер инициализирован успешно")
-except Exception as e:
-    print(f"[ОШИБКА] Не удалось инициализировать Yandex SpeechKit: {e}")
-    voice_transcriber = None
+from utils_veretevo.deadline import request_deadline
+from utils_veretevo.todoist_service import close_task, delete_task, HANDLER_BUDGET as TODOIST_BUDGET
 
 # Состояния ConversationHandler
 WAITING_FOR_TASK_TEXT = 1
@@ -470,10 +463,11 @@ async def assign_department(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if assistant_id == GENERAL_DIRECTOR_ID:
         try:
             from utils_veretevo.todoist_service import create_task
-            todoist_id = create_task(
-                content=task["text"],
-                description=f"Поставил: {author_name} (id: {user_id})"
-            )
+            with request_deadline(TODOIST_BUDGET):
+                todoist_id = create_task(
+                    content=task["text"],
+                    description=f"Поставил: {author_name} (id: {user_id})"
+                )
             task["todoist_task_id"] = todoist_id
         except Exception as e:
             logging.error(f"[TODOIST] Ошибка создания задачи в Todoist: {e}")
@@ -719,7 +713,8 @@ async def task_action_callback(update: Update, context: ContextTypes.DEFAULT_TYP
             # --- Синхронизация завершения с Todoist ---
             if task.get("todoist_task_id"):
                 try:
-                    close_task(task["todoist_task_id"])
+                    with request_deadline(TODOIST_BUDGET):
+                        close_task(task["todoist_task_id"])
                 except Exception as e:
                     logging.error(f"[TODOIST] Ошибка при завершении задачи в Todoist: {e}")
             # --- Конец синхронизации ---
@@ -742,7 +737,8 @@ async def task_action_callback(update: Update, context: ContextTypes.DEFAULT_TYP
             # --- Синхронизация отмены с Todoist ---
             if task.get("todoist_task_id"):
                 try:
-                    delete_task(task["todoist_task_id"])
+                    with request_deadline(TODOIST_BUDGET):
+                        delete_task(task["todoist_task_id"])
                 except Exception as e:
                     logging.error(f"[TODOIST] Ошибка при удалении задачи в Todoist: {e}")
             # --- Конец синхронизации ---
@@ -862,63 +858,17 @@ async def tasks_type_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def handle_voice_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обрабатывает голосовые сообщения в любом контексте.
-    Если пользователь в процессе создания задачи - транскрибирует и предлагает создать задачу.
-    Иначе показывает только транскрипцию.
+    Распознавание выполняется через очередь заданий универсального обработчика,
+    чтобы медленный SpeechKit и перезапуски бота не теряли сообщения.
     """
-    # Получаем актуальные отделы напрямую из модуля
-    from services_veretevo.department_service import DEPARTMENTS
+    from handlers_veretevo.voice_handler import handle_voice_message_universal
     
     logging.info(f"[DEBUG] handle_voice_message вызван")
     if not update.message.voice:
         logging.info(f"[DEBUG] Нет голосового сообщения")
         return
     
-    file_id = update.message.voice.file_id
-    logging.info(f"[DEBUG] Получено голосовое сообщение: file_id={file_id}")
-    
-    # Скачиваем файл
-    file = await context.bot.get_file(file_id)
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as temp_audio:
-        await file.download_to_drive(temp_audio.name)
-        logging.info(f"[DEBUG] Аудиофайл сохранен: {temp_audio.name}")
-        
-        if voice_transcriber:
-            try:
-                transcript = voice_transcriber.process_audio_file(temp_audio.name)
-            except Exception as e:
-                logging.error(f"[ОШИБКА] Ошибка при транскрипции: {e}")
-                transcript = None
-        else:
-            transcript = None
-            logging.error(f"[DEBUG] voice_transcriber равен None!")
-            await update.message.reply_text("⚠️ Служба распознавания речи недоступна.")
-    
-    os.unlink(temp_audio.name)
-    logging.info(f"[DEBUG] Временный файл удален")
-    
-    if transcript and transcript.strip():
-        # Проверяем, есть ли отдел в тексте
-        improved = improve_task_text(transcript)
-        dep_key = extract_department_from_text(improved)
-        
-        logging.info(f"[DEBUG] Транскрипция: '{transcript}'")
-        logging.info(f"[DEBUG] Улучшенный текст: '{improved}'")
-        logging.info(f"[DEBUG] Найденный отдел: '{dep_key}'")
-        
-        if dep_key and dep_key in DEPARTMENTS:
-            # Если отдел определен - предлагаем создать задачу
-            dep_name = DEPARTMENTS[dep_key]['name']
-            keyboard = [[InlineKeyboardButton("📌 Создать задачу", callback_data=f"create_task_from_voice_{dep_key}")]]
-            logging.info(f"[DEBUG] Создаем кнопку для отдела: {dep_name}")
-            await update.message.reply_text(
-                f"🎤 Распознанный текст:\n\n{improved}\n\nОбнаружен отдел: {dep_name}\nХотите создать задачу?",
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-        else:
-            logging.info(f"[DEBUG] Отдел не найден, показываем только транскрипцию")
-            await update.message.reply_text(f"🎤 Распознанный текст:\n\n{transcript}")
-    else:
-        await update.message.reply_text("⚠️ Не удалось распознать речь. Попробуйте еще раз.")
+    await handle_voice_message_universal(update, context)
 
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -1106,6 +1056,57 @@ async def update_messages_command(update: Update, context: ContextTypes.DEFAULT_
     except Exception as e:
         await update.message.reply_text(f"Ошибка: {e}")
 
+async def find_tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Полнотекстовый поиск задач: /find текст [отдел:..] [статус:..] [с:ГГГГ-ММ-ДД] [по:ГГГГ-ММ-ДД]"""
+    user_id = update.effective_user.id
+    query, filters = parse_find_query(" ".join(context.args or []))
+    if not query and not filters:
+        await update.message.reply_text(
+            "Использование: /find <текст> [отдел:охрана] [статус:в_работе] [с:2025-01-01] [по:2025-01-31]"
+        )
+        return
+    
+    department = None
+    if FILTER_DEPARTMENT in filters:
+        department = resolve_department(filters[FILTER_DEPARTMENT])
+        if not department:
+            await update.message.reply_text(f"Отдел «{filters[FILTER_DEPARTMENT]}» не найден.")
+            return
+    
+    # Директор видит все задачи, остальные — задачи своих отделов и свои
+    visible = None
+    if user_id != GENERAL_DIRECTOR_ID:
+        user_deps = {dep_key for dep_key, _ in department_service.get_user_departments(user_id)}
+        visible = lambda task: (task.get("department") in user_deps
+                                or user_id in (task.get("author_id"), task.get("assistant_id"), task.get("department_member")))
+    
+    reload_tasks_if_changed()
+    started = time.perf_counter()
+    found = task_search_index.search(
+        query,
+        department=department,
+        status=filters.get(FILTER_STATUS),
+        date_from=filters.get(FILTER_DATE_FROM),
+        date_to=filters.get(FILTER_DATE_TO),
+        visible=visible,
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logging.info(f"🔎 /find «{query}» {filters}: {len(found)} задач за {elapsed_ms:.1f} мс")
+    
+    if not found:
+        await update.message.reply_text("Ничего не найдено.")
+        return
+    lines = [f"🔎 Найдено задач: {len(found)}"]
+    for task in found:
+        dep_name = DEPARTMENTS.get(task.get("department"), {}).get("name", "—")
+        text = (task.get("text") or "").replace("\n", " ")
+        if len(text) > 80:
+            text = text[:80] + "…"
+        archived = " 🗄️" if task_search_index.is_archived(task.get("id")) else ""
+        lines.append(f"\n#{task.get('id')} [{task.get('status', '')}] {dep_name}, "
+                     f"{str(task.get('created_at', ''))[:10]}{archived}\n{text}")
+    await update.message.reply_text("\n".join(lines))
+
 # Регистрация обработчика для кнопки 'Мои задачи'
 def register_task_handlers(application: Application) -> None:
     """
@@ -1142,58 +1143,9 @@ def register_task_handlers(application: Application) -> None:
     # Команда для обновления сообщений (только для директора)
     from telegram.ext import CommandHandler
     application.add_handler(CommandHandler("update_messages", update_messages_command))
+    # Полнотекстовый поиск задач
+    application.add_handler(CommandHandler("find", find_tasks_command))
     # Обработчик голосовых сообщений
     application.add_handler(MessageHandler(filters.VOICE, handle_voice_message))
     # Обработчик текстовых команд меню (только для личных чатов)
     application.add_handler(MessageHandler(filters.ChatType.PRIVATE & filters.TEXT & ~filters.COMMAND, handle_text))
-
-def extract_department_from_text(text: str) -> str:
-    """
-    Пытается найти отдел по ключу 'отдел' и сокращениям в тексте.
-    Возвращает ключ отдела или None.
-    """
-    text = text.lower()
-    # Словарь сокращений и альтернативных названий
-    dep_map = {
-        'assistants': ['ассистенты', 'ассистент', 'ассист', 'помощник', 'помощники', 'помощь', 'помогите'],
-        'carpenters': ['плотники', 'плотник', 'плотницкие', 'плотницкая'],
-        'maintenance': ['эксплуатация', 'эксплуат', 'техэксплуатация', 'техобслуживание', 'обслуживание'],
-        'tech': ['тех команда', 'техкоманда', 'тех', 'технический', 'техники', 'техник'],
-        'maids': ['горничные', 'горничная', 'уборка', 'уборщицы', 'уборщица', 'клининг'],
-        'reception': ['ресепшен', 'ресеп', 'приём', 'прием', 'администрация', 'админ'],
-        'security': ['охрана', 'охранник', 'безопасность', 'секьюрити', 'сторож'],
-        'finance': ['финансы', 'финанс', 'бухгалтерия', 'бухгалтер', 'касса', 'деньги', 'оплата'],
-    }
-    
-    # Ищем фразу "отдел ..." или "в отдел ..."
-    match = re.search(r'(?:отдел|в отдел)\s+([\w\-]+)', text)
-    if match:
-        word = match.group(1)
-        for dep_key, variants in dep_map.items():
-            if word in variants or word in dep_key or word in DEPARTMENTS.get(dep_key, {}).get('name', '').lower():
-                return dep_key
-    
-    # Ищем просто упоминание отдела по сокращениям
-    for dep_key, variants in dep_map.items():
-        for v in variants:
-            if v in text:
-                return dep_key
-    
-    # Ищем по ключевым словам в контексте
-    context_keywords = {
-        'assistants': ['помощь', 'помогите', 'вопрос', 'консультация'],
-        'carpenters': ['дерево', 'мебель', 'ремонт', 'постройка'],
-        'maintenance': ['ремонт', 'обслуживание', 'техника', 'оборудование'],
-        'tech': ['компьютер', 'интернет', 'сеть', 'программа'],
-        'maids': ['уборка', 'чистота', 'постель', 'белье'],
-        'reception': ['регистрация', 'гость', 'номер', 'бронирование'],
-        'security': ['безопасность', 'пропуск', 'контроль', 'досмотр'],
-        'finance': ['оплата', 'счет', 'деньги', 'бухгалтерия'],
-    }
-    
-    for dep_key, keywords in context_keywords.items():
-        for keyword in keywords:
-            if keyword in text:
-                return dep_key
-    
-    return None
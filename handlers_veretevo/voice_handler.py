@@ -2,15 +2,28 @@
 Универсальный обработчик голосовых сообщений для всех групп.
 Обеспечивает транскрипцию голосовых сообщений в любом чате.
 """
+import asyncio
 import logging
-import tempfile
 import os
+import time
+from typing import Optional, Tuple
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, MessageHandler, filters
 from utils_veretevo.yandex_speechkit import YandexSpeechKitTranscriber
 from utils_veretevo.yandex_gpt import improve_task_text
+from utils_veretevo.telegram_api import fetch_telegram_file
+from utils_veretevo.deadline import request_deadline
 from services_veretevo.department_service import DEPARTMENTS, load_departments
-import re
+from services_veretevo.classifier_service import extract_department_from_text
+from services_veretevo.voice_job_service import voice_job_store, MAX_ATTEMPTS, VOICE_JOB_FAILED
+
+VOICE_JOBS_POLL_INTERVAL = 5  # секунд между проверками очереди
+MAX_PARALLEL_VOICE_JOBS = 3
+# Бюджет одной попытки: распознавание и улучшение текста делят его между собой;
+# если на улучшение времени не осталось, показываем исходную транскрипцию
+VOICE_JOB_BUDGET = 60
+_voice_jobs_lock = asyncio.Lock()
 
 # Инициализируем Yandex SpeechKit транскрайбер
 try:
@@ -23,7 +36,8 @@ except Exception as e:
 async def handle_voice_message_universal(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Универсальный обработчик голосовых сообщений для всех чатов.
-    Транскрибирует голосовые сообщения и показывает результат.
+    Отвечает сообщением-заглушкой и ставит распознавание в очередь заданий:
+    результат будет вписан в заглушку, даже если SpeechKit медленный или бот перезапустится.
     """
     if not update.message.voice:
         return
@@ -34,187 +48,163 @@ async def handle_voice_message_universal(update: Update, context: ContextTypes.D
     
     logging.info(f"[VOICE] Получено голосовое сообщение в чате {chat_id} ({chat_type}) от пользователя {user.id if user else 'Unknown'}")
     
-    # Скачиваем файл
+    if not voice_transcriber:
+        logging.error(f"[VOICE] voice_transcriber равен None!")
+        await update.message.reply_text("⚠️ Служба распознавания речи недоступна.")
+        return
+    
     try:
-        file = await context.bot.get_file(update.message.voice.file_id)
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as temp_audio:
-            await file.download_to_drive(temp_audio.name)
-            logging.info(f"[VOICE] Аудиофайл сохранен: {temp_audio.name}")
-            
-            # Транскрибируем
-            transcript = None
-            if voice_transcriber:
-                try:
-                    transcript = voice_transcriber.process_audio_file(temp_audio.name)
-                    logging.info(f"[VOICE] Транскрипция успешна: '{transcript}'")
-                except Exception as e:
-                    logging.error(f"[ОШИБКА] Ошибка при транскрипции: {e}")
-                    transcript = None
-            else:
-                logging.error(f"[VOICE] voice_transcriber равен None!")
-                await update.message.reply_text("⚠️ Служба распознавания речи недоступна.")
-                return
-            
-            # Удаляем временный файл
-            os.unlink(temp_audio.name)
-            
-            if transcript and transcript.strip():
-                # Улучшаем текст через Yandex GPT
-                try:
-                    improved = improve_task_text(transcript)
-                    logging.info(f"[VOICE] Улучшенный текст: '{improved}'")
-                except Exception as e:
-                    logging.error(f"[ОШИБКА] Ошибка улучшения текста: {e}")
-                    improved = transcript
-                
-                # Определяем отдел по тексту
-                dep_key = extract_department_from_text(improved)
-                dep_name = None
-                if dep_key and dep_key in DEPARTMENTS:
-                    dep_name = DEPARTMENTS[dep_key]['name']
-                    logging.info(f"[VOICE] Найден отдел: {dep_name}")
-                
-                # Формируем ответ
-                response_text = f"🎤 **Распознанный текст:**\n\n{improved}"
-                
-                if dep_name:
-                    response_text += f"\n\n🏢 **Обнаружен отдел:** {dep_name}"
-                    
-                    # В личных чатах предлагаем создать задачу
-                    if chat_type == "private":
-                        keyboard = [[InlineKeyboardButton("📌 Создать задачу", callback_data=f"create_task_from_voice_{dep_key}")]]
-                        await update.message.reply_text(
-                            response_text + "\n\nХотите создать задачу?",
-                            reply_markup=InlineKeyboardMarkup(keyboard),
-                            parse_mode="Markdown"
-                        )
-                    else:
-                        # В группах просто показываем транскрипцию
-                        await update.message.reply_text(
-                            response_text,
-                            parse_mode="Markdown"
-                        )
-                else:
-                    # Отдел не определен
-                    await update.message.reply_text(
-                        response_text,
-                        parse_mode="Markdown"
-                    )
-            else:
-                await update.message.reply_text("❌ Не удалось распознать речь в голосовом сообщении.")
-                
+        placeholder = await update.message.reply_text("🎤 Распознаю голосовое сообщение...")
+        job = voice_job_store.create_job(
+            file_id=update.message.voice.file_id,
+            chat_id=chat_id,
+            chat_type=chat_type,
+            user_id=user.id if user else None,
+            reply_to_message_id=update.message.message_id,
+            placeholder_message_id=placeholder.message_id if placeholder else None,
+        )
+        logging.info(f"[VOICE] Создано задание {job['id']} для чата {chat_id}")
     except Exception as e:
-        logging.error(f"[ОШИБКА] Ошибка обработки голосового сообщения: {e}")
+        logging.error(f"[ОШИБКА] Ошибка постановки голосового сообщения в очередь: {e}")
         await update.message.reply_text("❌ Произошла ошибка при обработке голосового сообщения.")
+        return
+    
+    # Не ждем периодического запуска — обрабатываем новое задание сразу
+    context.application.create_task(run_due_voice_jobs(context.bot))
 
-def extract_department_from_text(text: str) -> str:
+def build_voice_response(transcript: str, chat_type: str) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
     """
-    Пытается найти отдел по ключевым словам в тексте.
-    Возвращает ключ отдела или None.
+    Улучшает распознанный текст, определяет отдел и формирует ответ.
+    Выполняет блокирующий запрос к Yandex GPT, поэтому вызывается из потока.
     """
-    if not text:
-        return None
-        
-    text = text.lower()
-    
-    # Словарь сокращений и альтернативных названий для всех возможных отделов
-    # Приоритет: более специфичные ключевые слова идут первыми
-    dep_map = {
-        'assistants': ['ассистенты', 'ассистент', 'ассист', 'помощник', 'помощники', 'помощь', 'помогите'],
-        'carpenters': ['плотники', 'плотник', 'плотницкие', 'плотницкая'],
-        'maintenance': ['эксплуатация', 'эксплуат', 'техэксплуатация', 'техобслуживание', 'обслуживание'],
-        'tech': ['тех команда', 'техкоманда', 'тех', 'технический', 'техники', 'техник'],
-        'maids': ['горничные', 'горничная', 'уборка', 'уборщицы', 'уборщица', 'клининг'],
-        'reception': ['ресепшен', 'ресеп', 'приём', 'прием', 'администрация', 'админ'],
-        'security': ['охрана', 'охранник', 'безопасность', 'секьюрити', 'сторож'],
-        'finance': ['финансы', 'финанс', 'бухгалтерия', 'бухгалтер', 'касса', 'деньги', 'оплата'],
-        # Новые группы из shared
-        'construction': ['стройка', 'строительный', 'строители', 'строительство', 'постройка', 'вопрос по стройке'],
-        'management': ['руководители', 'руководство', 'менеджмент', 'управление', 'директор'],
-        'info': ['инфо', 'информация', 'уведомления', 'брифинги'],
-        # Добавляем поддержку для возможных будущих отделов
-        'kitchen': ['кухня', 'повар', 'повара', 'кулинария', 'готовка'],
-        'housekeeping': ['хозяйство', 'хозяйственный', 'хозяйственные'],
-        'engineering': ['инженерия', 'инженер', 'инженеры', 'технический'],
-        'sales': ['продажи', 'продавец', 'продавцы', 'коммерция'],
-        'marketing': ['маркетинг', 'реклама', 'продвижение'],
-        'hr': ['hr', 'hr-отдел', 'кадры', 'персонал', 'человеческие ресурсы'],
-        'legal': ['юридический', 'юрист', 'юристы', 'правовой'],
-        'it': ['it', 'айти', 'информационные технологии', 'программисты'],
-    }
-    
-    # Ищем фразы "отдел ...", "в отдел ...", "вопрос по ...", "проблема с ..."
-    match = re.search(r'(?:отдел|в отдел|вопрос по|проблема с|нужна|нужен)\s+([\w\-]+)', text)
-    if match:
-        word = match.group(1)
-        for dep_key, variants in dep_map.items():
-            if word in variants or word in dep_key or word in DEPARTMENTS.get(dep_key, {}).get('name', '').lower():
-                return dep_key
+    try:
+        improved = improve_task_text(transcript)
+        logging.info(f"[VOICE] Улучшенный текст: '{improved}'")
+    except Exception as e:
+        logging.error(f"[ОШИБКА] Ошибка улучшения текста: {e}")
+        improved = transcript
     
-    # Ищем по специфичным ключевым словам (более точное определение)
-    specific_keywords = {
-        'assistants': ['помогите', 'консультация'],
-        'carpenters': ['плотник', 'дерево', 'мебель'],
-        'maintenance': ['эксплуатация', 'техобслуживание'],
-        'tech': ['тех команда', 'техкоманда'],
-        'maids': ['горничная', 'клининг'],
-        'reception': ['ресепшен', 'регистрация', 'гость'],
-        'security': ['охрана', 'охранник', 'сторож'],
-        'finance': ['финансы', 'бухгалтерия', 'касса'],
-        'construction': ['стройка', 'строители', 'строительство', 'строительный'],
-        'management': ['руководители', 'менеджмент', 'управление'],
-        'info': ['инфо', 'уведомления', 'брифинги'],
-        'kitchen': ['кухня', 'повар', 'кулинария'],
-        'housekeeping': ['хозяйство', 'инвентарь'],
-        'engineering': ['инженерия', 'инженер'],
-        'sales': ['продажи', 'продавец'],
-        'marketing': ['маркетинг', 'реклама'],
-        'hr': ['hr-отдел', 'кадры', 'персонал'],
-        'legal': ['юридический', 'юрист'],
-        'it': ['it', 'айти', 'программисты'],
-    }
+    # Определяем отдел по тексту
+    dep_key = extract_department_from_text(improved)
+    dep_name = None
+    if dep_key and dep_key in DEPARTMENTS:
+        dep_name = DEPARTMENTS[dep_key]['name']
+        logging.info(f"[VOICE] Найден отдел: {dep_name}")
     
-    # Сначала ищем по специфичным ключевым словам
-    for dep_key, keywords in specific_keywords.items():
-        for keyword in keywords:
-            if keyword in text:
-                return dep_key
+    response_text = f"🎤 **Распознанный текст:**\n\n{improved}"
+    if not dep_name:
+        return response_text, None
     
-    # Затем ищем по общим ключевым словам (менее приоритетно)
-    general_keywords = {
-        'assistants': ['помощь', 'помощник'],
-        'carpenters': ['ремонт', 'постройка'],
-        'maintenance': ['обслуживание', 'техника', 'оборудование'],
-        'tech': ['тех', 'технический', 'техники'],
-        'maids': ['уборщицы', 'чистота', 'постель', 'белье'],
-        'reception': ['администрация', 'админ', 'номер', 'бронирование'],
-        'security': ['безопасность', 'секьюрити', 'пропуск', 'контроль', 'досмотр'],
-        'finance': ['финанс', 'деньги', 'оплата', 'счет'],
-        'construction': ['строительство', 'постройка', 'ремонт'],
-        'management': ['руководство', 'директор', 'начальник'],
-        'info': ['информация', 'новости', 'объявления'],
-        'kitchen': ['еда', 'готовка', 'рецепт'],
-        'housekeeping': ['хозяйственный', 'снабжение'],
-        'engineering': ['проект', 'чертеж', 'конструкция'],
-        'sales': ['клиент', 'заказ', 'договор', 'сделка'],
-        'marketing': ['продвижение', 'бренд'],
-        'hr': ['отпуск', 'больничный', 'увольнение'],
-        'legal': ['документ', 'договор', 'соглашение', 'закон'],
-        'it': ['компьютер', 'программа', 'система', 'база данных'],
-    }
+    response_text += f"\n\n🏢 **Обнаружен отдел:** {dep_name}"
+    # В личных чатах предлагаем создать задачу, в группах просто показываем транскрипцию
+    if chat_type == "private":
+        keyboard = [[InlineKeyboardButton("📌 Создать задачу", callback_data=f"create_task_from_voice_{dep_key}")]]
+        return response_text + "\n\nХотите создать задачу?", InlineKeyboardMarkup(keyboard)
+    return response_text, None
+
+async def _transcribe_voice_file(bot, file_id: str) -> Optional[str]:
+    """Получает голосовое сообщение (локально или скачиванием) и распознает его вне event loop"""
+    path, is_temp = await fetch_telegram_file(bot, file_id, suffix='.ogg')
+    try:
+        logging.info(f"[VOICE] Аудиофайл: {path}")
+        return await asyncio.to_thread(voice_transcriber.process_audio_file, path)
+    finally:
+        if is_temp and os.path.exists(path):
+            os.unlink(path)
+
+async def _deliver_voice_result(bot, job: dict, text: str, reply_markup=None, parse_mode=None):
+    """Вписывает результат в сообщение-заглушку (или отправляет новое, если заглушки нет)"""
+    try:
+        await _send_voice_result(bot, job, text, reply_markup, parse_mode)
+    except BadRequest as e:
+        if not parse_mode:
+            raise
+        # Непарные * _ [ в распознанном тексте ломают разметку — отправляем как есть,
+        # а не распознаем то же аудио заново
+        logging.warning(f"[VOICE] Разметка результата задания {job['id']} отклонена ({e}), отправляю текстом")
+        await _send_voice_result(bot, job, text, reply_markup, None)
+
+async def _send_voice_result(bot, job: dict, text: str, reply_markup=None, parse_mode=None):
+    if job.get("placeholder_message_id"):
+        try:
+            await bot.edit_message_text(
+                chat_id=job["chat_id"],
+                message_id=job["placeholder_message_id"],
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode
+            )
+            return
+        except Exception as e:
+            logging.warning(f"[VOICE] Не удалось обновить заглушку задания {job['id']}: {e}")
+    await bot.send_message(
+        chat_id=job["chat_id"],
+        text=text,
+        reply_markup=reply_markup,
+        parse_mode=parse_mode,
+        reply_to_message_id=job.get("reply_to_message_id")
+    )
+
+async def process_voice_job(bot, job: dict):
+    """Выполняет одну попытку задания: скачивание, распознавание, ответ"""
+    with request_deadline(VOICE_JOB_BUDGET):
+        await _process_voice_job(bot, job)
+
+async def _process_voice_job(bot, job: dict):
+    job = voice_job_store.mark_processing(job["id"]) or job
+    logging.info(f"[VOICE] Задание {job['id']}: попытка {job['attempts']} из {MAX_ATTEMPTS}")
     
-    # Ищем по общим ключевым словам, но исключаем слишком общие
-    for dep_key, keywords in general_keywords.items():
-        for keyword in keywords:
-            if keyword in text:
-                # Исключаем слишком общие слова для assistants
-                if dep_key == 'assistants' and keyword in ['помощь', 'помощник']:
-                    # Проверяем, нет ли более специфичных указаний на другие отделы
-                    if any(other_keyword in text for other_keyword in ['плотник', 'горничная', 'ресепшен', 'охрана', 'финансы', 'кухня', 'инженер', 'стройка', 'руководители']):
-                        continue
-                return dep_key
+    transcript = None
+    error = "SpeechKit не вернул результат"
+    try:
+        transcript = await _transcribe_voice_file(bot, job["file_id"])
+    except Exception as e:
+        logging.error(f"[ОШИБКА] Ошибка при транскрипции задания {job['id']}: {e}")
+        error = str(e)
     
-    return None
+    try:
+        if transcript is None:
+            retry = voice_job_store.schedule_retry(job["id"], error)
+            if retry is None:
+                # Задание успели удалить (очистка старых заданий) — повторять нечего
+                logging.warning(f"[VOICE] Задание {job['id']} не найдено, повтор невозможен")
+            job = retry or job
+            if retry is None or job["state"] == VOICE_JOB_FAILED:
+                await _deliver_voice_result(bot, job, "❌ Произошла ошибка при обработке голосового сообщения.")
+            else:
+                delay = max(int(job["next_attempt_at"] - time.time()), 1)
+                await _deliver_voice_result(
+                    bot, job,
+                    f"⏳ Служба распознавания отвечает медленно. Повторю попытку через {delay} с "
+                    f"(попытка {job['attempts']} из {MAX_ATTEMPTS})."
+                )
+            return
+        
+        logging.info(f"[VOICE] Транскрипция успешна: '{transcript}'")
+        if transcript.strip():
+            text, reply_markup = await asyncio.to_thread(build_voice_response, transcript, job["chat_type"])
+            await _deliver_voice_result(bot, job, text, reply_markup, parse_mode="Markdown")
+        else:
+            await _deliver_voice_result(bot, job, "❌ Не удалось распознать речь в голосовом сообщении.")
+        voice_job_store.mark_done(job["id"])
+    except Exception as e:
+        logging.error(f"[ОШИБКА] Ошибка отправки результата задания {job['id']}: {e}")
+        voice_job_store.schedule_retry(job["id"], str(e))
+
+async def run_due_voice_jobs(bot):
+    """Обрабатывает все задания, время которых подошло"""
+    if _voice_jobs_lock.locked():
+        return
+    async with _voice_jobs_lock:
+        jobs = voice_job_store.get_due_jobs(limit=MAX_PARALLEL_VOICE_JOBS)
+        while jobs:
+            await asyncio.gather(*(process_voice_job(bot, job) for job in jobs))
+            jobs = voice_job_store.get_due_jobs(limit=MAX_PARALLEL_VOICE_JOBS)
+
+async def process_voice_jobs(context: ContextTypes.DEFAULT_TYPE):
+    """Периодическая задача JobQueue: повторы и задания, пережившие перезапуск"""
+    await run_due_voice_jobs(context.bot)
+    voice_job_store.cleanup_finished()
 
 def register_voice_handlers(application):
     """
@@ -226,6 +216,13 @@ def register_voice_handlers(application):
     # Регистрируем универсальный обработчик голосовых сообщений
     application.add_handler(MessageHandler(filters.VOICE, handle_voice_message_universal))
     
+    # Фоновая обработка очереди: повторы и задания, прерванные перезапуском
+    voice_job_store.recover_interrupted()
+    if application.job_queue:
+        application.job_queue.run_repeating(process_voice_jobs, interval=VOICE_JOBS_POLL_INTERVAL, first=1)
+    else:
+        logging.error("[VOICE] JobQueue недоступен — повторы распознавания работать не будут")
+    
     logging.info("✅ Обработчики голосовых сообщений зарегистрированы для всех чатов")
     
     # Логируем информацию о доступных группах
@@ -14,12 +14,16 @@ from handlers_veretevo.reports import register_report_handlers, send_morning_rep
 from handlers_veretevo.gpt_handlers import register_gpt_handlers
 from handlers_veretevo.voice_handler import register_voice_handlers
 from handlers_veretevo.contacts import register_contacts_handlers
+from handlers_veretevo.inline_search import register_inline_handlers
 from services_veretevo.department_service import load_departments, DEPARTMENTS
 import requests
 from config_veretevo.constants import GENERAL_DIRECTOR_ID
 import threading
 from utils_veretevo.todoist_sync_polling import sync_todoist_to_bot
+from utils_veretevo.todoist_service import SYNC_BUDGET as TODOIST_SYNC_BUDGET
+from utils_veretevo.deadline import request_deadline
 from utils_veretevo.group_monitor import GroupMonitor
+from utils_veretevo.telegram_api import configure_application_builder, api_method_url
 import json
 
 # Устанавливаем часовой пояс для московского времени
@@ -42,7 +46,7 @@ def notify_start():
         return
     
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+        url = api_method_url(TELEGRAM_TOKEN, "sendMessage")
         call_time = time.time()
         hostname = socket.gethostname()
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
@@ -71,7 +75,8 @@ def periodic_todoist_sync(application=None):
     # Запускаем синхронизацию в отдельном потоке, чтобы не блокировать основной поток
     def sync_worker():
         try:
-            sync_todoist_to_bot(tasks, GENERAL_DIRECTOR_ID, application)
+            with request_deadline(TODOIST_SYNC_BUDGET):
+                sync_todoist_to_bot(tasks, GENERAL_DIRECTOR_ID, application)
             # Сохраняем только если синхронизация прошла успешно
             with open(TASKS_FILE, 'w', encoding='utf-8') as f:
                 json.dump(tasks, f, ensure_ascii=False, indent=2)
@@ -182,7 +187,7 @@ def main():
     print("Инициализация Telegram бота...")
     if not TELEGRAM_TOKEN:
         raise ValueError("TELEGRAM_TOKEN не установлен")
-    application = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    application = configure_application_builder(ApplicationBuilder().token(TELEGRAM_TOKEN)).build()
 
     # Глобальный error handler
     async def error_handler(update, context):
@@ -200,6 +205,7 @@ def main():
     register_report_handlers(application)
     register_voice_handlers(application)  # Голосовые сообщения для всех чатов
     register_contacts_handlers(application)  # Обработчики команд по контактам
+    register_inline_handlers(application)  # Inline-поиск задач и контактов (@бот запрос)
 
     # Настройка планировщика отчетов
     print("Настройка планировщика отчетов...")
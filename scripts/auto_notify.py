@@ -33,7 +33,6 @@ async def send_update_notification(update_type: str, title: str, description: st
     try:
         if update_type == "update":
             notification_id = await notification_service.send_update_notification(title, description)
-            print(f"✅ Уведомление об обновлении отправлено (ID: {notification_id})")
         else:
             notification_id = notification_service.create_notification(
                 title=title,
@@ -41,6 +40,10 @@ async def send_update_notification(update_type: str, title: str, description: st
                 notification_type=update_type
             )
             await notification_service.send_notification_to_all(notification_id)
+        if notification_service.is_broadcast_requested(notification_id):
+            # Рассылками управляет запущенный бот: он и разошлет уведомление
+            print(f"📨 Бот запущен — рассылка передана ему и начнется в течение минуты (ID: {notification_id})")
+        else:
             print(f"✅ Уведомление отправлено (ID: {notification_id})")
         
         # Статистика
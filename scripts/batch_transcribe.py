@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Пакетная транскрипция архива голосовых файлов через Yandex SpeechKit
+Использование:
+    python3 scripts/batch_transcribe.py /path/to/archive
+    python3 scripts/batch_transcribe.py /path/to/archive --output result.jsonl --workers 8 --concurrency 4 --rps 5
+    python3 scripts/batch_transcribe.py /path/to/archive --retry-failed       # повторить файлы с ошибками
+
+Конвертация (декодирование, нормализация, обрезка тишины, кодирование в OGG)
+выполняется в пуле процессов на всех ядрах, распознавание — параллельно
+с ограничением частоты запросов. Результаты дописываются в JSONL по мере готовности,
+поэтому повторный запуск продолжает с того места, где работа остановилась.
+
+Для проверки без настоящего API:
+    python3 -m utils_veretevo.speechkit_stub --port 8765
+    python3 scripts/batch_transcribe.py /path/to/archive --base-url http://127.0.0.1:8765/speech/v1/stt:recognize \\
+        --api-key stub --folder-id stub
+
+Настройки бота (TELEGRAM_TOKEN, ASSISTANTS_CHAT_ID) скрипту не нужны: ключ и
+каталог берутся из --api-key/--folder-id или YANDEX_SPEECHKIT_API_KEY/YANDEX_FOLDER_ID.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Set
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils_veretevo.audio_preprocessing import convert_for_recognition
+from utils_veretevo.yandex_speechkit import YandexSpeechKitTranscriber
+
+AUDIO_EXTENSIONS = {".ogg", ".oga", ".opus", ".mp3", ".m4a", ".wav", ".flac", ".webm", ".mp4", ".aac"}
+DEFAULT_OUTPUT = "transcripts.jsonl"
+
+
+def find_audio_files(directory: Path) -> Iterator[Path]:
+    """Обходит каталог и возвращает аудиофайлы в стабильном порядке"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if Path(name).suffix.lower() in AUDIO_EXTENSIONS:
+                yield Path(root) / name
+
+
+def load_processed(output_path: Path, retry_failed: bool) -> Set[str]:
+    """Читает уже записанные результаты, чтобы продолжить с места остановки"""
+    processed = set()
+    if not output_path.exists():
+        return processed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # недописанная строка после аварийной остановки
+            if record.get("status") == "ok" or not retry_failed:
+                processed.add(record["path"])
+    return processed
+
+
+class RateLimiter:
+    """Ограничивает частоту запусков запросов (не чаще rate в секунду)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BatchTranscriber:
+    """Конвейер: пул процессов для конвертации -> ограниченное распознавание -> JSONL"""
+
+    def __init__(self, transcriber: YandexSpeechKitTranscriber, output_path: Path, base_dir: Path,
+                 workers: int, concurrency: int, rate: float, timeout: float = 30):
+        self.transcriber = transcriber
+        self.output_path = output_path
+        self.base_dir = base_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.recognize_semaphore = asyncio.Semaphore(concurrency)
+        # Не держим в памяти больше сконвертированных файлов, чем успеваем распознать
+        self.inflight = asyncio.Semaphore(workers + concurrency * 2)
+        self.rate_limiter = RateLimiter(rate)
+        self.stats = {"ok": 0, "error": 0, "skipped": 0}
+
+    def _write(self, output, record: dict):
+        record["processed_at"] = datetime.now().isoformat()
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        self.stats[record["status"]] += 1
+
+    async def _process(self, pool, output, path: Path, relative: str):
+        loop = asyncio.get_running_loop()
+        record = {"path": relative}
+        try:
+            audio_data, duration = await loop.run_in_executor(pool, convert_for_recognition, str(path))
+            record["duration"] = round(duration, 2)
+            async with self.recognize_semaphore:
+                await self.rate_limiter.wait()
+                text = await asyncio.to_thread(self.transcriber.recognize, audio_data, self.timeout)
+            record.update(status="ok", text=text)
+        except Exception as e:
+            record.update(status="error", error=str(e))
+        finally:
+            self.inflight.release()
+        self._write(output, record)
+        print(f"[{record['status']}] {relative}")
+
+    async def run(self, retry_failed: bool = False) -> dict:
+        processed = load_processed(self.output_path, retry_failed)
+        tasks = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, \
+                open(self.output_path, 'a', encoding='utf-8') as output:
+            for path in find_audio_files(self.base_dir):
+                relative = str(path.relative_to(self.base_dir))
+                if relative in processed:
+                    self.stats["skipped"] += 1
+                    continue
+                await self.inflight.acquire()
+                tasks.append(asyncio.create_task(self._process(pool, output, path, relative)))
+            await asyncio.gather(*tasks)
+        return self.stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Пакетная транскрипция голосовых файлов")
+    parser.add_argument("directory", help="каталог с аудиофайлами (обходится рекурсивно)")
+    parser.add_argument("--output", help=f"JSONL с результатами (по умолчанию <directory>/{DEFAULT_OUTPUT})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="процессов для конвертации")
+    parser.add_argument("--concurrency", type=int, default=4, help="одновременных запросов к SpeechKit")
+    parser.add_argument("--rps", type=float, default=5.0, help="не больше запросов в секунду (0 — без ограничения)")
+    parser.add_argument("--timeout", type=float, default=30, help="таймаут запроса распознавания, с")
+    parser.add_argument("--retry-failed", action="store_true", help="повторить файлы, завершившиеся ошибкой")
+    parser.add_argument("--base-url", help="адрес API распознавания (например, локальная заглушка)")
+    parser.add_argument("--api-key", help="API ключ SpeechKit (по умолчанию из окружения)")
+    parser.add_argument("--folder-id", help="Folder ID (по умолчанию из окружения)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base_dir = Path(args.directory).resolve()
+    if not base_dir.is_dir():
+        print(f"❌ Каталог не найден: {base_dir}")
+        sys.exit(1)
+    output_path = Path(args.output) if args.output else base_dir / DEFAULT_OUTPUT
+
+    transcriber = YandexSpeechKitTranscriber(api_key=args.api_key, folder_id=args.folder_id, base_url=args.base_url)
+    batch = BatchTranscriber(transcriber, output_path, base_dir, workers=max(args.workers, 1),
+                             concurrency=max(args.concurrency, 1), rate=args.rps, timeout=args.timeout)
+
+    started = time.time()
+    stats = asyncio.run(batch.run(retry_failed=args.retry_failed))
+    print(f"\n✅ Готово за {time.time() - started:.1f} с: успешно {stats['ok']}, "
+          f"с ошибкой {stats['error']}, пропущено (уже обработаны) {stats['skipped']}")
+    print(f"📄 Результаты: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
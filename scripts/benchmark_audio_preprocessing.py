@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк предобработки аудио: pydub normalize()/strip_silence() против NumPy
+Использование:
+    python3 scripts/benchmark_audio_preprocessing.py            # 3, 10, 30, 60 секунд
+    python3 scripts/benchmark_audio_preprocessing.py 5 120      # свои длительности
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from pydub import AudioSegment
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils_veretevo.audio_preprocessing import (
+    SAMPLE_RATE, SILENCE_LEN_MS, SILENCE_THRESH_DB, preprocess_samples
+)
+from utils_veretevo.synthetic_audio import make_speech_like
+
+DEFAULT_DURATIONS = [3, 10, 30, 60]
+
+
+def run_pydub(samples: np.ndarray) -> np.ndarray:
+    """Прежняя цепочка из YandexSpeechKitTranscriber._convert_audio_to_ogg_pydub"""
+    audio = AudioSegment(samples.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+    audio = audio.normalize().strip_silence(silence_len=SILENCE_LEN_MS, silence_thresh=SILENCE_THRESH_DB)
+    return np.frombuffer(audio.raw_data, dtype=np.int16)
+
+
+def measure(func, samples: np.ndarray):
+    """Возвращает (результат, время в секундах)"""
+    start = time.perf_counter()
+    result = func(samples)
+    return result, time.perf_counter() - start
+
+
+def main():
+    durations = [float(arg) for arg in sys.argv[1:]] or DEFAULT_DURATIONS
+
+    print(f"{'длит., с':>9} | {'pydub, с':>9} | {'numpy, с':>9} | {'ускорение':>9} | {'макс. откл.':>11}")
+    print("-" * 60)
+    for seconds in durations:
+        samples = make_speech_like(seconds)
+        reference, pydub_time = measure(run_pydub, samples)
+        processed, numpy_time = measure(preprocess_samples, samples)
+
+        common = min(reference.size, processed.size)
+        max_diff = int(np.max(np.abs(reference[:common].astype(np.int32) - processed[:common]))) if common else 0
+        length_note = "" if reference.size == processed.size else f" (длина {reference.size} vs {processed.size})"
+
+        print(f"{seconds:>9.1f} | {pydub_time:>9.3f} | {numpy_time:>9.4f} | "
+              f"{pydub_time / max(numpy_time, 1e-9):>8.1f}x | {max_diff:>11}{length_note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк классификатора: автомат Ахо-Корасик против прежних последовательных проверок
+Использование:
+    python3 scripts/benchmark_classifier.py              # 2000 текстов, словарь x1, x5, x20
+    python3 scripts/benchmark_classifier.py 5000 1 50    # число текстов и множители словаря
+
+Прежний алгоритм (extract_department_from_text + detect_priority +
+detect_category — три функции, каждая перебирает свои ключевые слова
+подстрокой) воспроизведен по тем же таблицам из classifier_keywords.json.
+Множитель словаря добавляет синтетические отделы, чтобы показать, как время
+растет с числом ключевых слов. Совпадение ответов считается на словаре x1.
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from services_veretevo import department_service
+from services_veretevo.classifier_service import TextClassifier, load_keywords
+
+DEFAULT_TEXTS = 2000
+DEFAULT_MULTIPLIERS = [1, 5, 20]
+
+FILLER = ["нужно", "сегодня", "в корпусе", "у въезда", "проверить", "после обеда", "пожалуйста",
+          "номер 12", "завтра утром", "кто может", "посмотреть", "на территории", "коттедж"]
+
+
+def legacy_classify(keywords, text):
+    """Прежние функции: явная фраза, специфичные слова, общие слова, затем приоритет и категория"""
+    text = text.lower()
+    departments = keywords["departments"]
+    department = None
+    match = re.search(r'(?:отдел|в отдел|вопрос по|проблема с|нужна|нужен)\s+([\w\-]+)', text)
+    if match:
+        word = match.group(1)
+        for dep_key, tiers in departments.items():
+            if word in tiers["aliases"] or word in dep_key:
+                department = dep_key
+                break
+    if department is None:
+        department = next((dep_key for dep_key, tiers in departments.items()
+                           if any(keyword in text for keyword in tiers["specific"])), None)
+    if department is None:
+        department = next((dep_key for dep_key, tiers in departments.items()
+                           if any(keyword in text for keyword in tiers["general"])), None)
+    priority = next((label for label, words in keywords["priority"].items()
+                     if any(word in text for word in words)), None)
+    category = next((label for label, words in keywords["category"].items()
+                     if any(word in text for word in words)), None)
+    return department, priority, category
+
+
+def expand_keywords(keywords, multiplier: int):
+    """Добавляет синтетические отделы со словами, которых нет в текстах"""
+    expanded = {**keywords, "departments": dict(keywords["departments"])}
+    for copy in range(1, multiplier):
+        for dep_key, tiers in keywords["departments"].items():
+            expanded["departments"][f"{dep_key}_{copy}"] = {
+                tier: [f"{word}{copy}ъ" for word in words] for tier, words in tiers.items()
+            }
+    return expanded
+
+
+def make_texts(keywords, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocabulary = [word for tiers in keywords["departments"].values() for words in tiers.values() for word in words]
+    vocabulary += [word for words in keywords["priority"].values() for word in words]
+    vocabulary += [word for words in keywords["category"].values() for word in words]
+    texts = []
+    for _ in range(count):
+        words = rng.sample(FILLER, 4) + rng.sample(vocabulary, rng.randint(0, 2))
+        rng.shuffle(words)
+        texts.append(" ".join(words).capitalize())
+    return texts
+
+
+def measure(function, texts):
+    started = time.perf_counter()
+    results = [function(text) for text in texts]
+    return (time.perf_counter() - started) / len(texts) * 1e6, results
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:]]
+    count = args[0] if args else DEFAULT_TEXTS
+    multipliers = args[1:] or DEFAULT_MULTIPLIERS
+    # Только таблицы из конфига, без названий отделов — условия как у прежних функций
+    department_service.DEPARTMENTS = {}
+    keywords = load_keywords()
+    texts = make_texts(keywords, count)
+
+    print(f"{'словарь':>7} | {'шаблонов':>8} | {'сборка, мс':>10} | {'автомат, мкс':>12} | {'прежние, мкс':>12} | {'ускорение':>9}")
+    print("-" * 75)
+    agreement = None
+    for multiplier in multipliers:
+        expanded = expand_keywords(keywords, multiplier)
+        classifier = TextClassifier(expanded)
+        started = time.perf_counter()
+        classifier._ensure_built()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        new_us, new_results = measure(classifier.classify, texts)
+        old_us, old_results = measure(lambda text: legacy_classify(expanded, text), texts)
+        print(f"{'x' + str(multiplier):>7} | {classifier._automaton.patterns:>8} | {build_ms:>10.1f} | "
+              f"{new_us:>12.1f} | {old_us:>12.1f} | {old_us / max(new_us, 1e-9):>8.1f}x")
+        if multiplier == 1:
+            agreement = [sum(1 for new, old in zip(new_results, old_results)
+                             if getattr(new, field) == old[index]) / len(texts)
+                         for index, field in enumerate(("department", "priority", "category"))]
+
+    if agreement:
+        print(f"\nСовпадение с прежними функциями: отдел {agreement[0]:.0%}, "
+              f"приоритет {agreement[1]:.0%}, категория {agreement[2]:.0%}")
+        print("Расхождения: прежние функции находили подстроки внутри слов (\"еда\" в \"обеда\", "
+              "\"стройка\" в \"настройка\") и не учитывали сокращения отделов без слова \"отдел\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска контактов: ContactIndex против прежнего перебора базы
+Использование:
+    python3 scripts/benchmark_contact_search.py                # 1k, 10k, 50k контактов
+    python3 scripts/benchmark_contact_search.py 20000 100000   # свои размеры
+
+Контакты синтетические. Запросы — часть названия, слово из описания и
+часть телефона. Для перебора, как раньше, на каждый результат создается
+новый словарь; get_all_contacts и get_contacts_by_category сравниваются
+с прежним построением списка из всей базы, страница списка по курсору —
+с прежней сортировкой всей базы.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils_veretevo.contact_index import ContactIndex
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+QUERIES = 200
+
+PREFIXES = ["ООО", "ИП", "АО", "Бригада", "Мастерская"]
+NAMES = ["Орион", "Стройсервис", "Металлторг", "Аквамир", "Электрон", "Зодчий", "Лесоторг",
+         "Теплодом", "Светлый", "Кровельщик", "Гранит", "Стекломаркет"]
+GOODS = ["металлопрокат", "кровля", "сантехника", "электрика", "пиломатериалы", "окна",
+         "фурнитура", "краска", "бетон", "утеплитель", "плитка", "инструмент"]
+CATEGORIES = ["supplier", "contractor", "employee"]
+
+
+def make_database(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    database = {}
+    for i in range(count):
+        phone = f"+79{i:09d}"
+        database[phone] = {
+            "name": f"{rng.choice(PREFIXES)} {rng.choice(NAMES)}-{i}",
+            "phone": phone,
+            "email": "",
+            "description": f"{rng.choice(GOODS)}, {rng.choice(GOODS)}",
+            "category": rng.choice(CATEGORIES),
+        }
+    return database
+
+
+def make_queries(rng: random.Random, count: int):
+    queries = []
+    for _ in range(QUERIES):
+        kind = rng.randrange(3)
+        if kind == 0:
+            queries.append(f"{rng.choice(NAMES)[:5]}-{rng.randrange(count)}")
+        elif kind == 1:
+            queries.append(rng.choice(GOODS))
+        else:
+            queries.append(f"{rng.randrange(count):09d}"[-6:])
+    return queries
+
+
+def contact_dict(phone, data):
+    return {
+        "name": data.get("name", "Unknown"),
+        "phone": phone,
+        "email": data.get("email", ""),
+        "address": data.get("address", ""),
+        "website": data.get("website", ""),
+        "description": data.get("description", ""),
+        "category": data.get("category", "supplier"),
+    }
+
+
+def linear_search(database, query: str):
+    """Прежний KnowledgeCollector.search_contacts_advanced"""
+    query_lower = query.lower()
+    return [contact_dict(phone, data) for phone, data in database.items()
+            if query_lower in data.get("name", "").lower() or query_lower in phone.lower()
+            or query_lower in data.get("description", "").lower()]
+
+
+def per_call_ms(func, calls):
+    started = time.perf_counter()
+    for args in calls:
+        func(*args)
+    return (time.perf_counter() - started) / len(calls) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    rng = random.Random(1)
+
+    print(f"{'контактов':>9} | {'сборка, с':>9} | {'поиск, мс':>9} | {'перебор, мс':>11} | "
+          f"{'все, мс':>7} | {'прежние все, мс':>15} | {'категория, мс':>13} | {'прежняя, мс':>11} | "
+          f"{'страница, мс':>12} | {'сортировка, мс':>14}")
+    print("-" * 137)
+    for size in sizes:
+        database = make_database(size)
+        queries = [(query,) for query in make_queries(rng, size)]
+
+        index = ContactIndex()
+        started = time.perf_counter()
+        index.build(database)
+        build_time = time.perf_counter() - started
+
+        index_ms = per_call_ms(lambda query: list(index.search(query, limit=10)), queries)
+        linear_ms = per_call_ms(lambda query: linear_search(database, query)[:10], queries[:20])
+        all_ms = per_call_ms(lambda: index.all(), [()] * 100)
+        old_all_ms = per_call_ms(lambda: [contact_dict(p, d) for p, d in database.items()], [()] * 5)
+        category_ms = per_call_ms(lambda: index.by_category_view("supplier")[:10], [()] * 100)
+        old_category_ms = per_call_ms(
+            lambda: [contact_dict(p, d) for p, d in database.items() if d.get("category") == "supplier"][:10],
+            [()] * 5)
+
+        index.page()  # отсортированные списки строятся при первом запросе страницы
+        cursors = [(rng.choice(index.order),) for _ in range(100)]
+        page_ms = per_call_ms(lambda cursor: list(index.page("supplier", cursor=cursor).contacts), cursors)
+        sort_ms = per_call_ms(
+            lambda: sorted((d.get("name", "").lower(), p) for p, d in database.items())[:10], [()] * 5)
+
+        print(f"{size:>9} | {build_time:>9.2f} | {index_ms:>9.3f} | {linear_ms:>11.2f} | {all_ms:>7.4f} | "
+              f"{old_all_ms:>15.2f} | {category_ms:>13.4f} | {old_category_ms:>11.2f} | "
+              f"{page_ms:>12.4f} | {sort_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска по базе знаний: BM25-индекс против полного перебора difflib
+Использование:
+    python3 scripts/benchmark_kb_retrieval.py                  # 1k, 10k, 50k записей
+    python3 scripts/benchmark_kb_retrieval.py 5000 100000      # свои размеры базы
+
+Синтетические вопросы собираются из словаря рабочих фраз. Запросы — сохраненные
+вопросы с опечатками и перестановкой слов. Для difflib при больших базах
+прогоняется меньше запросов, иначе бенчмарк идет слишком долго.
+"""
+
+import random
+import sys
+import time
+from difflib import get_close_matches
+from pathlib import Path
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils_veretevo.text_index import BM25Index
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+QUERIES = 200
+DIFFLIB_BUDGET = 500_000  # записей * запросов для полного перебора
+
+VERBS = ["проверить", "починить", "заказать", "убрать", "закрыть", "открыть", "согласовать",
+         "оплатить", "перенести", "заменить", "настроить", "подготовить", "отправить", "принять"]
+OBJECTS = ["ворота", "шлагбаум", "котел", "номер", "счет", "камеры", "сигнализацию", "кровать",
+           "беседку", "баню", "ресепшен", "договор", "пропуск", "генератор", "насос", "окна",
+           "двери", "бассейн", "парковку", "склад", "кухню", "освещение", "забор", "крышу"]
+PLACES = ["в корпусе", "на территории", "у въезда", "в ресторане", "на складе", "в бане",
+          "в коттедже", "на парковке", "в офисе", "у бассейна", "в прачечной", "на кухне"]
+TIMES = ["сегодня", "завтра", "до обеда", "к вечеру", "на выходных", "срочно", "после заезда"]
+STARTS = ["Можно", "Нужно ли", "Когда", "Кто будет", "Как", "Стоит ли", "Разрешите"]
+
+
+def make_questions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    questions = set()
+    while len(questions) < count:
+        number = rng.randint(1, 40)
+        questions.add(f"{rng.choice(STARTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+                      f"{rng.choice(PLACES)} №{number} {rng.choice(TIMES)}?")
+    return list(questions)
+
+
+def distort(question: str, rng: random.Random) -> str:
+    """Опечатка в одном слове и перестановка двух соседних слов"""
+    words = question.rstrip("?").split()
+    i = rng.randrange(len(words))
+    if len(words[i]) > 3:
+        j = rng.randrange(1, len(words[i]) - 1)
+        words[i] = words[i][:j] + words[i][j + 1:]
+    k = rng.randrange(len(words) - 1)
+    words[k], words[k + 1] = words[k + 1], words[k]
+    return " ".join(words)
+
+
+def run_difflib(questions, query: str):
+    """Прежний алгоритм GPTService.find_similar_question"""
+    matches = get_close_matches(query.lower(), [q.lower() for q in questions], n=1, cutoff=0.6)
+    if matches:
+        for original in questions:
+            if original.lower() == matches[0]:
+                return original
+    return None
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    rng = random.Random(1)
+
+    print(f"{'записей':>8} | {'индекс, с':>9} | {'BM25, мс':>9} | {'difflib, мс':>11} | {'ускорение':>9} | {'top-1 BM25':>10} | {'top-1 difflib':>13}")
+    print("-" * 90)
+    for size in sizes:
+        questions = make_questions(size)
+        targets = rng.sample(questions, min(QUERIES, size))
+        queries = [distort(question, rng) for question in targets]
+
+        started = time.perf_counter()
+        index = BM25Index()
+        index.add_many((question, question) for question in questions)
+        build_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        bm25_hits = sum(1 for query, target in zip(queries, targets)
+                        if any(doc_id == target for doc_id, _ in index.search(query, 1)))
+        bm25_ms = (time.perf_counter() - started) / len(queries) * 1000
+
+        difflib_count = max(1, min(len(queries), DIFFLIB_BUDGET // size))
+        started = time.perf_counter()
+        difflib_hits = sum(1 for query, target in zip(queries[:difflib_count], targets)
+                           if run_difflib(questions, query) == target)
+        difflib_ms = (time.perf_counter() - started) / difflib_count * 1000
+
+        print(f"{size:>8} | {build_time:>9.2f} | {bm25_ms:>9.2f} | {difflib_ms:>11.1f} | "
+              f"{difflib_ms / max(bm25_ms, 1e-9):>8.0f}x | {bm25_hits / len(queries):>10.0%} | "
+              f"{difflib_hits / difflib_count:>13.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска задач: индекс TaskSearchIndex против прежнего перебора подстрокой
+Использование:
+    python3 scripts/benchmark_task_search.py                # 1k, 10k, 50k задач
+    python3 scripts/benchmark_task_search.py 20000 100000   # свои размеры
+
+Задачи синтетические, треть из них попадает в архив. Запросы — слово
+из задачи целиком, его начало и слово с опечаткой. Время синхронизации —
+повторный sync после изменения одной задачи (как при save_tasks).
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from services_veretevo.task_search_service import TaskSearchIndex
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+QUERIES = 100
+
+VERBS = ["проверить", "починить", "заказать", "убрать", "закрыть", "согласовать", "оплатить",
+         "перенести", "заменить", "настроить", "подготовить", "отправить"]
+OBJECTS = ["ворота", "шлагбаум", "котел", "счет", "камеры", "сигнализацию", "кровать", "беседку",
+           "баню", "договор", "пропуск", "генератор", "насос", "окна", "бассейн", "освещение"]
+PLACES = ["в корпусе", "на территории", "у въезда", "в ресторане", "на складе", "в коттедже"]
+NAMES = ["Иван Петров", "Мария Соколова", "Алина Орлова", "Никита Смирнов", "Софья Волкова"]
+DEPARTMENTS = ["security", "maids", "carpenters", "reception", "finance"]
+
+
+def make_tasks(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [{
+        "id": task_id,
+        "text": f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(PLACES)} №{rng.randint(1, 40)}",
+        "department": rng.choice(DEPARTMENTS),
+        "status": rng.choice(["новая", "в работе", "завершено"]),
+        "created_at": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00",
+        "author_name": rng.choice(NAMES),
+        "assistant_name": rng.choice(NAMES),
+        "tags": [],
+    } for task_id in range(1, count + 1)]
+
+
+def make_queries(rng: random.Random):
+    queries = []
+    for _ in range(QUERIES):
+        word = rng.choice(OBJECTS + VERBS)
+        kind = rng.randrange(3)
+        if kind == 1:
+            word = word[:4]
+        elif kind == 2:
+            i = rng.randrange(1, len(word) - 1)
+            word = word[:i] + word[i + 1:]
+        queries.append(word)
+    return queries
+
+
+def linear_search(tasks, query: str):
+    """Прежний EnhancedTaskService.search_tasks"""
+    query_lower = query.lower()
+    results = []
+    for task in tasks:
+        if query_lower in task.get("text", "").lower():
+            results.append(task)
+            continue
+        category = task.get("category", "")
+        if query_lower in category.lower():
+            results.append(task)
+            continue
+        if query_lower in task.get("author_name", "").lower() or query_lower in task.get("assistant_name", "").lower():
+            results.append(task)
+    return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    rng = random.Random(1)
+
+    print(f"{'задач':>7} | {'сборка, с':>9} | {'sync, мс':>8} | {'индекс, мс':>10} | {'перебор, мс':>11} | {'найдено индексом':>16} | {'перебором':>9}")
+    print("-" * 90)
+    for size in sizes:
+        tasks = make_tasks(size)
+        queries = make_queries(rng)
+        active, archived = tasks[size // 3:], tasks[:size // 3]
+
+        index = TaskSearchIndex(archive_file=None)
+        started = time.perf_counter()
+        index.archive(archived)
+        index.sync(active)
+        build_time = time.perf_counter() - started
+
+        active[0]["text"] += " срочно"
+        started = time.perf_counter()
+        index.sync(active)
+        sync_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        index_hits = sum(1 for query in queries if index.search(query))
+        index_ms = (time.perf_counter() - started) / len(queries) * 1000
+
+        started = time.perf_counter()
+        linear_hits = sum(1 for query in queries if linear_search(tasks, query))
+        linear_ms = (time.perf_counter() - started) / len(queries) * 1000
+
+        print(f"{size:>7} | {build_time:>9.2f} | {sync_ms:>8.1f} | {index_ms:>10.2f} | {linear_ms:>11.1f} | "
+              f"{index_hits / len(queries):>16.0%} | {linear_hits / len(queries):>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
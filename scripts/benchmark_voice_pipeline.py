@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк голосового конвейера: от скачивания файла до получения транскрипции
+Использование:
+    python3 scripts/benchmark_voice_pipeline.py
+    python3 scripts/benchmark_voice_pipeline.py --durations 5 30 120 --formats ogg mp3 --runs 10 --latency 0.3
+    python3 scripts/benchmark_voice_pipeline.py --json logs/voice_benchmark.json   # сохранить для сравнения
+
+Синтетическое речеподобное аудио раздается локальным HTTP-сервером (имитация
+скачивания из Telegram), проходит этапы decode -> trim -> encode и отправляется
+в локальную заглушку SpeechKit с заданной задержкой (upload -> recognize).
+Для каждого этапа выводятся p50/p95 в миллисекундах и CPU-секунды на секунду
+аудио (включая дочерние процессы ffmpeg), чтобы регрессии конвертации были видны.
+Настоящие API не вызываются.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils_veretevo.audio_preprocessing import SAMPLE_RATE, decode_to_pcm, encode_pcm_to_ogg, preprocess_samples
+from utils_veretevo.speechkit_stub import SpeechKitStub
+from utils_veretevo.synthetic_audio import AUDIO_FORMATS, encode_samples, make_speech_like
+
+STAGES = ["download", "decode", "trim", "encode", "upload", "recognize"]
+DEFAULT_DURATIONS = [3, 15, 60]
+DEFAULT_FORMATS = ["ogg", "mp3", "wav"]
+
+
+def cpu_time() -> float:
+    """CPU-время процесса вместе с завершившимися дочерними процессами (ffmpeg)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class StageTimer:
+    """Замеряет время и CPU каждого этапа одного прогона"""
+
+    def __init__(self):
+        self.wall: Dict[str, float] = {}
+        self.cpu: Dict[str, float] = {}
+
+    def run(self, stage: str, func, *args):
+        wall_start, cpu_start = time.perf_counter(), cpu_time()
+        result = func(*args)
+        self.wall[stage] = time.perf_counter() - wall_start
+        self.cpu[stage] = cpu_time() - cpu_start
+        return result
+
+
+class QuietFileHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FileServer:
+    """Локальный HTTP-сервер, раздающий синтетические файлы"""
+
+    def __init__(self, directory: str):
+        handler = partial(QuietFileHandler, directory=directory)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, name: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{name}"
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def download(session: requests.Session, url: str, path: str):
+    with session.get(url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(64 * 1024):
+                f.write(chunk)
+
+
+def encode(samples: np.ndarray, path: str) -> bytes:
+    encode_pcm_to_ogg(samples, path, SAMPLE_RATE)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def upload(base_url: str, audio_data: bytes) -> http.client.HTTPConnection:
+    """Отправляет тело запроса; ответ читается отдельно на этапе recognize"""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    connection.request(
+        "POST", f"{parts.path}?folderId=bench&lang=ru-RU", body=audio_data,
+        headers={"Authorization": "Api-Key bench", "Content-Type": "application/octet-stream"}
+    )
+    return connection
+
+
+def recognize(connection: http.client.HTTPConnection) -> str:
+    try:
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"Заглушка вернула {response.status}: {payload}")
+        return payload["result"]
+    finally:
+        connection.close()
+
+
+def run_once(session: requests.Session, url: str, stub_url: str, workdir: str) -> StageTimer:
+    """Один прогон конвейера от скачивания до транскрипции"""
+    timer = StageTimer()
+    downloaded = os.path.join(workdir, "downloaded")
+    converted = os.path.join(workdir, "converted.ogg")
+    timer.run("download", download, session, url, downloaded)
+    samples = timer.run("decode", decode_to_pcm, downloaded, SAMPLE_RATE)
+    trimmed = timer.run("trim", preprocess_samples, samples, SAMPLE_RATE)
+    audio_data = timer.run("encode", encode, trimmed, converted)
+    connection = timer.run("upload", upload, stub_url, audio_data)
+    timer.run("recognize", recognize, connection)
+    return timer
+
+
+def percentile_ms(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q) * 1000) if values else 0.0
+
+
+def summarize(timers: List[StageTimer], audio_seconds: float) -> Dict:
+    """p50/p95 по этапам и CPU-секунды на секунду аудио"""
+    summary = {"stages": {}, "audio_seconds": audio_seconds}
+    for stage in STAGES + ["total"]:
+        if stage == "total":
+            wall = [sum(t.wall.values()) for t in timers]
+            cpu = [sum(t.cpu.values()) for t in timers]
+        else:
+            wall = [t.wall[stage] for t in timers]
+            cpu = [t.cpu[stage] for t in timers]
+        summary["stages"][stage] = {
+            "p50_ms": round(percentile_ms(wall, 50), 2),
+            "p95_ms": round(percentile_ms(wall, 95), 2),
+            "cpu_per_audio_sec": round(float(np.mean(cpu)) / audio_seconds, 5),
+        }
+    return summary
+
+
+def print_summary(audio_format: str, seconds: float, summary: Dict):
+    print(f"\n🎧 {audio_format}, {seconds:g} с")
+    print(f"  {'этап':<10} | {'p50, мс':>9} | {'p95, мс':>9} | {'CPU-с/с аудио':>13}")
+    for stage, values in summary["stages"].items():
+        print(f"  {stage:<10} | {values['p50_ms']:>9.1f} | {values['p95_ms']:>9.1f} | {values['cpu_per_audio_sec']:>13.5f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк голосового конвейера на синтетическом аудио")
+    parser.add_argument("--durations", type=float, nargs="+", default=DEFAULT_DURATIONS, help="длительности, с")
+    parser.add_argument("--formats", nargs="+", default=DEFAULT_FORMATS, choices=sorted(AUDIO_FORMATS))
+    parser.add_argument("--runs", type=int, default=5, help="прогонов на каждую комбинацию")
+    parser.add_argument("--latency", type=float, default=0.2, help="задержка заглушки распознавания, с")
+    parser.add_argument("--json", help="сохранить результаты в JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, SpeechKitStub(latency=args.latency) as stub:
+        server = FileServer(workdir)
+        session = requests.Session()
+        try:
+            for seconds in args.durations:
+                samples = make_speech_like(seconds)
+                for audio_format in args.formats:
+                    name = f"voice_{seconds:g}s.{audio_format}"
+                    with open(os.path.join(workdir, name), 'wb') as f:
+                        f.write(encode_samples(samples, audio_format))
+
+                    # Первый прогон прогревает кэши и не учитывается
+                    run_once(session, server.url(name), stub.base_url, workdir)
+                    timers = [run_once(session, server.url(name), stub.base_url, workdir) for _ in range(args.runs)]
+
+                    summary = summarize(timers, seconds)
+                    summary.update(format=audio_format, runs=args.runs, stub_latency=args.latency)
+                    results.append(summary)
+                    print_summary(audio_format, seconds, summary)
+        finally:
+            server.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 Результаты сохранены: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
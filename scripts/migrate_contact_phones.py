@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Перевод базы контактов на телефоны в формате E.164
+Использование:
+    python3 scripts/migrate_contact_phones.py                 # data/suppliers_database.json
+    python3 scripts/migrate_contact_phones.py --file PATH     # другая база
+    python3 scripts/migrate_contact_phones.py --dry-run       # только показать, что изменится
+
+Ключи и поле phone приводятся к E.164, записи одного номера в разных
+форматах ("+7 (900) ...", "8900...") объединяются. Перед записью рядом
+сохраняется резервная копия. Бот, если запущен, перечитает базу, увидев,
+что файл изменился.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Добавляем корневую папку проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config_veretevo.constants import SUPPLIERS_FILE
+from utils_veretevo.json_files import write_json_atomic
+from utils_veretevo.contact_index import normalize_contacts_database
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def migrate_contact_phones(suppliers_file=SUPPLIERS_FILE, dry_run=False):
+    """
+    Переводит базу на E.164
+
+    Returns:
+        Число измененных или объединенных записей (0 — база уже в E.164)
+    """
+    with open(suppliers_file, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    normalized, changed = normalize_contacts_database(database)
+    if not changed:
+        logger.info("✅ Все телефоны уже в формате E.164")
+        return 0
+    logger.info(f"📞 Изменено записей: {changed}, объединено дубликатов: {len(database) - len(normalized)}")
+    if dry_run:
+        return changed
+    backup_path = f"{suppliers_file}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    shutil.copy2(suppliers_file, backup_path)
+    write_json_atomic(suppliers_file, normalized)
+    logger.info(f"💾 База сохранена, резервная копия: {backup_path}")
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перевод телефонов базы контактов в E.164")
+    parser.add_argument("--file", default=SUPPLIERS_FILE, help="база контактов")
+    parser.add_argument("--dry-run", action="store_true", help="ничего не записывать")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        logger.error(f"❌ База контактов не найдена: {args.file}")
+        sys.exit(1)
+    migrate_contact_phones(args.file, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,8 @@ def main():
     try:
         # Импортируем необходимые модули
         from utils_veretevo.todoist_sync_polling import sync_todoist_to_bot
+        from utils_veretevo.todoist_service import SYNC_BUDGET
+        from utils_veretevo.deadline import request_deadline
         from config_veretevo.constants import GENERAL_DIRECTOR_ID
         from config_veretevo.env import TELEGRAM_TOKEN
         
@@ -45,7 +47,8 @@ def main():
         logging.info(f"Запуск синхронизации с Todoist. Загружено {len(tasks)} задач")
         
         # Запускаем синхронизацию (без application, так как это отдельный процесс)
-        sync_todoist_to_bot(tasks, GENERAL_DIRECTOR_ID, application=None)
+        with request_deadline(SYNC_BUDGET):
+            sync_todoist_to_bot(tasks, GENERAL_DIRECTOR_ID, application=None)
         
         # Сохраняем обновленные задачи
         with open(TASKS_FILE, 'w', encoding='utf-8') as f:
@@ -0,0 +1,335 @@
+"""
+Фоновые рассылки уведомлений всем пользователям бота.
+
+Рассылка — это задание со списком получателей и строкой состояний, по
+одному символу на получателя (ожидает, доставлено, бот заблокирован,
+ошибка). Задания хранятся в JSON-снимке (data/broadcasts.json), а каждый
+результат доставки сразу дописывается короткой строкой в журнал
+(data/broadcasts.log) — после падения процесса журнал проигрывается поверх
+снимка, и рассылка продолжается с тех, кому сообщение еще не доставлено.
+По завершении задания журнал уплотняется в снимок.
+
+Отправка идет несколькими воркерами через общий ограничитель скорости,
+настроенный под глобальный лимит Telegram (~30 сообщений в секунду).
+RetryAfter приостанавливает всех воркеров на указанное время, Forbidden
+(пользователь заблокировал бота) отмечает получателя заблокированным — по
+окончании рассылки все такие пользователи разом отмечаются неактивными, —
+сетевые ошибки повторяются с экспоненциальной задержкой. Ход рассылки директор
+видит в сообщении, которое обновляется по мере отправки.
+
+Писатель у снимка и журнала один: процесс, создавший движок, держит
+блокировку data/broadcasts.lock до завершения. Обычно это бот; скрипт
+scripts/auto_notify.py при запущенном боте не трогает файлы рассылок, а
+передает рассылку боту через notifications.json. Завершенные рассылки при
+уплотнении сворачиваются до итогов и через BROADCAST_DONE_RETENTION_DAYS
+удаляются из снимка.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from utils_veretevo.json_files import write_json_atomic
+from utils_veretevo.progressive_message import ProgressiveMessage
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки нет, рассылки ведет только бот
+    fcntl = None
+
+# Состояние доставки получателю — один символ в строке state
+PENDING = "."
+SENT = "+"
+BLOCKED = "x"
+FAILED = "!"
+
+BROADCAST_RUNNING = "running"
+BROADCAST_DONE = "done"
+
+BROADCAST_RATE = 25  # сообщений в секунду, с запасом до лимита Telegram в 30
+BROADCAST_CONCURRENCY = 8
+MAX_NETWORK_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0  # секунд, удваивается с каждой попыткой
+PROGRESS_POLL_INTERVAL = 1.0
+PROGRESS_EDIT_INTERVAL = 3.0
+BROADCAST_DONE_RETENTION_DAYS = 30
+
+# Файлы блокировок по пути: блокировка берется один раз на процесс и держится до его завершения
+_store_locks: Dict[str, Any] = {}
+
+
+class BroadcastStoreBusy(RuntimeError):
+    """Рассылками этого каталога данных уже управляет другой процесс"""
+
+
+def lock_store(lock_path: str):
+    """Делает текущий процесс единственным писателем снимка и журнала рассылок"""
+    lock_path = os.path.abspath(lock_path)
+    if fcntl is None or lock_path in _store_locks:
+        return
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    lock_file = open(lock_path, 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise BroadcastStoreBusy(f"Рассылками в {os.path.dirname(lock_path)} управляет другой процесс")
+    _store_locks[lock_path] = lock_file
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return float(retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else retry_after)
+
+
+class RateLimiter:
+    """Равномерные слоты отправки: не больше rate сообщений в секунду на всех воркеров"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot, self._paused_until)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        """Приостанавливает выдачу слотов (ответ Telegram RetryAfter)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class BroadcastStore:
+    """Снимок заданий рассылки плюс журнал результатов доставки"""
+
+    def __init__(self, snapshot_path: str, log_path: str, lock_path: str):
+        lock_store(lock_path)
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.broadcasts: Dict[str, Dict[str, Any]] = {}
+        # Состояния получателей в памяти; в снимке — строкой
+        self.states: Dict[str, bytearray] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    self.broadcasts = json.load(f)
+        except Exception as e:
+            logging.error(f"[BROADCAST] Ошибка загрузки рассылок: {e}")
+            self.broadcasts = {}
+        self.states = {key: bytearray(record["state"], "ascii")
+                       for key, record in self.broadcasts.items() if "state" in record}
+        if not os.path.exists(self.log_path):
+            return
+        replayed = 0
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # Строка журнала: "<рассылка> <номер получателя> <состояние>"
+                parts = line.split()
+                if len(parts) != 3 or parts[0] not in self.states or not parts[1].isdigit():
+                    continue
+                state, index = self.states[parts[0]], int(parts[1])
+                if index < len(state):
+                    state[index] = ord(parts[2])
+                    replayed += 1
+        if replayed:
+            logging.info(f"[BROADCAST] Из журнала восстановлено {replayed} результатов доставки")
+            self.compact()
+
+    def compact(self):
+        """
+        Атомарно записывает снимок и очищает журнал
+
+        От завершенной рассылки в снимке остаются только итоги: получатели и
+        их состояния больше не нужны. Итоги старше BROADCAST_DONE_RETENTION_DAYS
+        удаляются.
+        """
+        expire_before = (datetime.now() - timedelta(days=BROADCAST_DONE_RETENTION_DAYS)).isoformat()
+        for key in list(self.broadcasts):
+            record = self.broadcasts[key]
+            if record["status"] != BROADCAST_DONE:
+                record["state"] = self.states[key].decode("ascii")
+                continue
+            if key in self.states:
+                record["counts"] = self.counts(key)
+                for field in ("text", "recipients", "state"):
+                    record.pop(field, None)
+                del self.states[key]
+            if (record.get("finished_at") or "") < expire_before:
+                del self.broadcasts[key]
+        write_json_atomic(self.snapshot_path, self.broadcasts)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def create(self, key: str, record: Dict[str, Any]):
+        self.broadcasts[key] = record
+        self.states[key] = bytearray(PENDING * len(record["recipients"]), "ascii")
+        self.compact()
+
+    def mark(self, key: str, index: int, code: str):
+        """Запоминает результат доставки и сразу дописывает его в журнал"""
+        self.states[key][index] = ord(code)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{key} {index} {code}\n")
+
+    def counts(self, key: str) -> Dict[str, int]:
+        if key not in self.states:
+            return dict(self.broadcasts[key]["counts"])
+        state = self.states[key]
+        return {code: state.count(code.encode("ascii")) for code in (PENDING, SENT, BLOCKED, FAILED)}
+
+
+def format_progress(record: Dict[str, Any], counts: Dict[str, int]) -> str:
+    total = sum(counts.values())
+    done = total - counts[PENDING]
+    if record["status"] == BROADCAST_DONE:
+        header = f"✅ Рассылка #{record['notification_id']} завершена: {done}/{total}"
+    else:
+        header = f"📣 Рассылка #{record['notification_id']}: {done}/{total}"
+    return (f"{header}\n"
+            f"✉️ Доставлено: {counts[SENT]}\n"
+            f"🚫 Заблокировали бота: {counts[BLOCKED]}\n"
+            f"❌ Ошибки: {counts[FAILED]}")
+
+
+class BroadcastEngine:
+    """Запуск, выполнение и возобновление рассылок одного каталога данных"""
+
+    def __init__(self, bot, data_dir: str = "data", rate: float = BROADCAST_RATE,
+                 concurrency: int = BROADCAST_CONCURRENCY,
+                 on_finished: Optional[Callable[[int, List[int], List[int]], None]] = None):
+        self.bot = bot
+        self.store = BroadcastStore(os.path.join(data_dir, "broadcasts.json"),
+                                    os.path.join(data_dir, "broadcasts.log"),
+                                    os.path.join(data_dir, "broadcasts.lock"))
+        self.rate = rate
+        self.concurrency = concurrency
+        self.on_finished = on_finished
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, notification_id: int, text: str, recipients: List[int],
+              progress_chat_id: Optional[int] = None,
+              progress_message_id: Optional[int] = None) -> asyncio.Task:
+        """Сохраняет задание рассылки и запускает его в фоне"""
+        key = str(notification_id)
+        if key in self.tasks:
+            return self.tasks[key]
+        self.store.create(key, {
+            "notification_id": notification_id,
+            "text": text,
+            "recipients": recipients,
+            "state": "",
+            "status": BROADCAST_RUNNING,
+            "progress_chat_id": progress_chat_id,
+            "progress_message_id": progress_message_id,
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+        })
+        logging.info(f"[BROADCAST] Рассылка #{notification_id}: {len(recipients)} получателей")
+        return self._spawn(key)
+
+    def resume(self) -> int:
+        """Продолжает рассылки, прерванные перезапуском бота"""
+        resumed = 0
+        for key, record in self.store.broadcasts.items():
+            if record["status"] == BROADCAST_RUNNING and key not in self.tasks:
+                pending = self.store.counts(key)[PENDING]
+                logging.info(f"[BROADCAST] Возобновляю рассылку #{key}: осталось {pending} получателей")
+                self._spawn(key)
+                resumed += 1
+        return resumed
+
+    def _spawn(self, key: str) -> asyncio.Task:
+        task = asyncio.create_task(self.run(key))
+        self.tasks[key] = task
+        task.add_done_callback(lambda _: self.tasks.pop(key, None))
+        return task
+
+    async def run(self, key: str) -> Dict[str, int]:
+        """Доставляет рассылку всем получателям в состоянии «ожидает»"""
+        record = self.store.broadcasts[key]
+        state = self.store.states[key]
+        queue = [index for index in range(len(state)) if state[index] == ord(PENDING)]
+        queue.reverse()
+        limiter = RateLimiter(self.rate)
+        progress = None
+        if record.get("progress_chat_id") and record.get("progress_message_id"):
+            progress = ProgressiveMessage(self.bot, record["progress_chat_id"], record["progress_message_id"],
+                                          interval=PROGRESS_EDIT_INTERVAL)
+
+        async def worker():
+            while queue:
+                index = queue.pop()
+                code = await self._deliver(limiter, record["recipients"][index], record["text"])
+                self.store.mark(key, index, code)
+
+        async def report_progress():
+            while True:
+                try:
+                    await progress.update(format_progress(record, self.store.counts(key)))
+                except Exception as e:
+                    logging.warning(f"[BROADCAST] Не удалось обновить прогресс рассылки #{key}: {e}")
+                await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+
+        progress_task = asyncio.create_task(report_progress()) if progress else None
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(queue)))))
+        finally:
+            if progress_task:
+                progress_task.cancel()
+
+        counts = self.store.counts(key)
+        sent = [user_id for user_id, code in zip(record["recipients"], state) if code == ord(SENT)]
+        blocked = [user_id for user_id, code in zip(record["recipients"], state) if code == ord(BLOCKED)]
+        record["status"] = BROADCAST_DONE
+        record["finished_at"] = datetime.now().isoformat()
+        self.store.compact()
+        if self.on_finished:
+            self.on_finished(record["notification_id"], sent, blocked)
+        if progress:
+            progress.close()
+            try:
+                await self.bot.edit_message_text(chat_id=progress.chat_id, message_id=progress.message_id,
+                                                 text=format_progress(record, counts))
+            except Exception as e:
+                logging.warning(f"[BROADCAST] Не удалось обновить прогресс рассылки #{key}: {e}")
+        logging.info(f"[BROADCAST] Рассылка #{key} завершена: доставлено {counts[SENT]}, "
+                     f"заблокировали {counts[BLOCKED]}, ошибок {counts[FAILED]}")
+        return counts
+
+    async def _deliver(self, limiter: RateLimiter, chat_id: int, text: str) -> str:
+        attempts = 0
+        while True:
+            await limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
+                return SENT
+            except RetryAfter as e:
+                seconds = retry_after_seconds(e)
+                logging.warning(f"[BROADCAST] Лимит Telegram: пауза {seconds:.0f} с")
+                limiter.pause(seconds)
+            except Forbidden as e:
+                logging.info(f"[BROADCAST] Пользователь {chat_id} недоступен: {e}")
+                return BLOCKED
+            except BadRequest as e:
+                logging.error(f"[BROADCAST] Ошибка отправки пользователю {chat_id}: {e}")
+                return FAILED
+            except NetworkError as e:
+                attempts += 1
+                if attempts >= MAX_NETWORK_ATTEMPTS:
+                    logging.error(f"[BROADCAST] Сеть недоступна для {chat_id} после {attempts} попыток: {e}")
+                    return FAILED
+                await asyncio.sleep(RETRY_BASE_DELAY * 2 ** (attempts - 1))
+            except Exception as e:
+                logging.error(f"[BROADCAST] Ошибка отправки пользователю {chat_id}: {e}")
+                return FAILED
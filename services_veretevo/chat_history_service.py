@@ -0,0 +1,193 @@
+"""
+Кольцевой буфер последних сообщений групповых чатов.
+
+Кнопки GPT-подсказок несут в callback_data только message_id и chat_id, поэтому
+текст вопроса и предшествующую переписку берем отсюда, без запросов к Telegram.
+Память ограничена: не больше max_per_chat сообщений на чат и max_chats чатов,
+текст обрезается до MAX_TEXT_LENGTH. Вытесненные сообщения (если задан
+spill_file) дописываются в JSONL-файл и находятся там, когда директор
+нажимает кнопку под старой подсказкой; файл периодически ужимается.
+Смещения строк файла хранятся в памяти, поэтому поиск читает одну строку.
+У глобального экземпляра файл включается переменной CHAT_HISTORY_SPILL
+(по умолчанию выключен: переписка групп на диск не пишется).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from config_veretevo.constants import CHAT_HISTORY_SPILL_FILE
+from config_veretevo.env import CHAT_HISTORY_SPILL
+from utils_veretevo.json_files import atomic_open
+
+MAX_PER_CHAT = 200
+MAX_CHATS = 100
+MAX_TEXT_LENGTH = 1000
+MAX_SPILL_LINES = 5000  # при превышении вдвое файл ужимается до этого числа строк
+CONTEXT_MESSAGES = 5
+
+
+class ChatHistory:
+    """Последние сообщения групп: (chat_id, message_id) -> сообщение"""
+
+    def __init__(self, max_per_chat: int = MAX_PER_CHAT, max_chats: int = MAX_CHATS,
+                 spill_file: Optional[str] = None, max_spill_lines: int = MAX_SPILL_LINES):
+        self.max_per_chat = max_per_chat
+        self.max_chats = max_chats
+        self.spill_file = spill_file
+        self.max_spill_lines = max_spill_lines
+        self.chats: "OrderedDict[int, OrderedDict[int, Dict]]" = OrderedDict()
+        self.lock = threading.Lock()
+        # (chat_id, message_id) -> смещение строки в файле вытесненных
+        self._spill_offsets: Dict[Tuple[int, int], int] = {}
+        self._spill_lines = 0
+        self._index_spill()
+
+    def add_message(self, chat_id: int, message_id: int, text: str, author: str = "",
+                    reply_to: Optional[int] = None, thread_id: Optional[int] = None,
+                    date: Optional[float] = None):
+        """Запоминает сообщение; самые старые вытесняются на диск"""
+        message = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "text": (text or "")[:MAX_TEXT_LENGTH],
+            "author": author,
+            "reply_to": reply_to,
+            "thread_id": thread_id,
+            "date": date if date is not None else time.time(),
+        }
+        evicted: List[Dict] = []
+        with self.lock:
+            messages = self.chats.get(chat_id)
+            if messages is None:
+                messages = self.chats[chat_id] = OrderedDict()
+            self.chats.move_to_end(chat_id)
+            messages[message_id] = message
+            while len(messages) > self.max_per_chat:
+                evicted.append(messages.popitem(last=False)[1])
+            while len(self.chats) > self.max_chats:
+                evicted.extend(self.chats.popitem(last=False)[1].values())
+            if evicted:
+                self._spill(evicted)
+
+    def get_message(self, chat_id: int, message_id: int) -> Optional[Dict]:
+        """Сообщение из памяти или из файла вытесненных"""
+        with self.lock:
+            message = self.chats.get(chat_id, {}).get(message_id)
+        if message is not None:
+            return message
+        return self._find_spilled(chat_id, message_id)
+
+    def get_context(self, chat_id: int, message_id: int, limit: int = CONTEXT_MESSAGES) -> List[Dict]:
+        """
+        Переписка перед сообщением: цепочка ответов (на что отвечали) и последние
+        сообщения той же ветки чата, в хронологическом порядке, не больше limit
+        """
+        with self.lock:
+            messages = self.chats.get(chat_id)
+            if not messages or message_id not in messages:
+                return []
+            target = messages[message_id]
+            selected: Dict[int, Dict] = {}
+
+            # Сначала цепочка ответов — она важнее соседних сообщений
+            reply_to = target.get("reply_to")
+            while reply_to is not None and len(selected) < limit:
+                parent = messages.get(reply_to)
+                if parent is None or reply_to in selected:
+                    break
+                selected[reply_to] = parent
+                reply_to = parent.get("reply_to")
+
+            recent = deque(maxlen=limit)
+            for other_id, other in messages.items():
+                if other_id == message_id:
+                    break
+                if other.get("thread_id") == target.get("thread_id"):
+                    recent.append(other)
+            for other in reversed(recent):
+                if len(selected) >= limit:
+                    break
+                selected.setdefault(other["message_id"], other)
+
+        return sorted(selected.values(), key=lambda m: (m["date"], m["message_id"]))
+
+    def format_context(self, chat_id: int, message_id: int, limit: int = CONTEXT_MESSAGES) -> str:
+        """Переписка перед сообщением в виде строк «Автор: текст» для промпта"""
+        return "\n".join(
+            f"{m['author'] or 'Сотрудник'}: {m['text']}" for m in self.get_context(chat_id, message_id, limit)
+        )
+
+    def _index_spill(self):
+        """Запоминает смещения строк файла вытесненных (последняя запись побеждает)"""
+        self._spill_offsets = {}
+        self._spill_lines = 0
+        if not self.spill_file or not os.path.exists(self.spill_file):
+            return
+        try:
+            with open(self.spill_file, 'rb') as f:
+                offset = f.tell()
+                for line in iter(f.readline, b""):
+                    self._spill_lines += 1
+                    try:
+                        message = json.loads(line)
+                        self._spill_offsets[(message["chat_id"], message["message_id"])] = offset
+                    except (ValueError, KeyError):
+                        pass  # оборванная строка после сбоя
+                    offset = f.tell()
+        except Exception as e:
+            logging.error(f"[CHAT HISTORY] Ошибка чтения {self.spill_file}: {e}")
+
+    def _spill(self, messages: List[Dict]):
+        """Дописывает вытесненные сообщения в файл (вызывать под self.lock)"""
+        if not self.spill_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.spill_file) or ".", exist_ok=True)
+            with open(self.spill_file, 'ab') as f:
+                for message in messages:
+                    self._spill_offsets[(message["chat_id"], message["message_id"])] = f.tell()
+                    f.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            self._spill_lines += len(messages)
+            if self._spill_lines > 2 * self.max_spill_lines:
+                self._compact_spill()
+        except Exception as e:
+            logging.error(f"[CHAT HISTORY] Ошибка записи вытесненных сообщений: {e}")
+
+    def _compact_spill(self):
+        """Оставляет в файле только последние max_spill_lines строк (вызывать под self.lock)"""
+        with open(self.spill_file, 'rb') as f:
+            lines = deque(f, maxlen=self.max_spill_lines)
+        with atomic_open(self.spill_file, 'wb') as f:
+            f.writelines(lines)
+        self._index_spill()
+        logging.info(f"[CHAT HISTORY] Файл вытесненных сообщений ужат до {len(lines)} строк")
+
+    def _find_spilled(self, chat_id: int, message_id: int) -> Optional[Dict]:
+        """Читает сообщение из файла вытесненных по смещению из индекса"""
+        with self.lock:
+            offset = self._spill_offsets.get((chat_id, message_id))
+            if offset is None:
+                return None
+            try:
+                with open(self.spill_file, 'rb') as f:
+                    f.seek(offset)
+                    return json.loads(f.readline())
+            except Exception as e:
+                logging.error(f"[CHAT HISTORY] Ошибка поиска в вытесненных сообщениях: {e}")
+                return None
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                "chats": len(self.chats),
+                "messages": sum(len(m) for m in self.chats.values()),
+                "spilled": self._spill_lines,
+            }
+
+
+# Глобальный экземпляр
+chat_history = ChatHistory(spill_file=CHAT_HISTORY_SPILL_FILE if CHAT_HISTORY_SPILL else None)
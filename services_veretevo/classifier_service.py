@@ -0,0 +1,235 @@
+"""
+Классификатор текста задач и сообщений: отдел, приоритет и категория за один проход.
+
+Все ключевые слова из config_veretevo/classifier_keywords.json и названия
+отделов из departments_config.json компилируются в один автомат Ахо-Корасик.
+Текст и ключевые слова приводятся к основам тем же стеммером, что и поиск
+по базе знаний, поэтому "охраной", "охраннику" и "охрана" находятся одним
+шаблоном. Ключевое слово совпадает с начала слова; короткие основы
+(hr, it, тех, "при" от "прием") — только целиком.
+
+Каждое совпадение дает метке вес по уровню: явное указание ("отдел кадров",
+"проблема с охраной") > название отдела и специфичное слово > сокращение >
+общее слово. Побеждает метка с наибольшей суммой, при равенстве — та, что
+раньше в конфиге (как в прежних последовательных проверках). Уверенность —
+доля веса победителя, уменьшенная, если найдено только слабое совпадение.
+"""
+import bisect
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import services_veretevo.department_service as department_service
+from config_veretevo.constants import CLASSIFIER_KEYWORDS_PATH
+from utils_veretevo.aho_corasick import AhoCorasick
+from utils_veretevo.text_index import stem_word
+
+DIMENSION_DEPARTMENT = "department"
+DIMENSION_PRIORITY = "priority"
+DIMENSION_CATEGORY = "category"
+
+# Веса совпадений по уровням
+WEIGHT_EXPLICIT = 3.0   # "отдел кадров", "вопрос по стройке"
+WEIGHT_NAME = 2.0       # название отдела из departments_config.json
+WEIGHT_SPECIFIC = 2.0
+WEIGHT_ALIAS = 1.5
+WEIGHT_GENERAL = 1.0
+WEIGHT_KEYWORD = 2.0    # ключевые слова приоритета и категории
+
+# Сумма весов, начиная с которой совпадение считается уверенным
+CONFIDENT_SCORE = 2.0
+# Основы не длиннее этой совпадают только целым словом
+WHOLE_WORD_MAX_LENGTH = 3
+
+# Слова и эмодзи (🔥, ⚡, ❗ в ключевых словах приоритета)
+TOKEN_RE = re.compile(r"[0-9a-zа-я]+|[\u2190-\u2bff\U0001f000-\U0001faff]")
+
+
+@dataclass
+class KeywordMatch:
+    """Найденное ключевое слово: метка, позиция в тексте и вес"""
+    dimension: str
+    label: str
+    keyword: str
+    start: int
+    end: int
+    weight: float
+
+
+@dataclass
+class Classification:
+    """Результат классификации; None — метка не найдена"""
+    department: Optional[str] = None
+    priority: Optional[str] = None
+    category: Optional[str] = None
+    confidence: Dict[str, float] = field(default_factory=dict)
+    matches: List[KeywordMatch] = field(default_factory=list)
+
+
+@lru_cache(maxsize=50000)
+def _stem(word: str) -> str:
+    return stem_word(word)
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Основы слов с позициями (начало, конец) в исходном тексте"""
+    lowered = text.lower().replace("ё", "е")
+    return [(_stem(m.group()), m.start(), m.end()) for m in TOKEN_RE.finditer(lowered)]
+
+
+def compile_pattern(keyword: str) -> Optional[str]:
+    """
+    Шаблон для автомата: основы слов через пробел с ведущим пробелом
+    (совпадение с начала слова), короткие основы — с пробелом в конце.
+    """
+    words = TOKEN_RE.findall(keyword.lower().replace("ё", "е"))
+    if not words:
+        return None
+    stems = [_stem(word) for word in words]
+    pattern = " " + " ".join(stems)
+    if len(stems[-1]) <= WHOLE_WORD_MAX_LENGTH:
+        pattern += " "
+    return pattern
+
+
+def load_keywords(path: str = CLASSIFIER_KEYWORDS_PATH) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error(f"❌ Ошибка загрузки ключевых слов классификатора {path}: {e}")
+        return {}
+
+
+class TextClassifier:
+    """Скомпилированный набор ключевых слов; пересобирается при изменении отделов"""
+
+    def __init__(self, keywords: Optional[Dict] = None):
+        self.keywords = keywords if keywords is not None else load_keywords()
+        self._lock = threading.Lock()
+        self._automaton: Optional[AhoCorasick] = None
+        self._order: Dict[str, Dict[str, int]] = {}
+        self._departments_signature = None
+
+    def _departments_snapshot(self) -> Tuple[Tuple[str, str], ...]:
+        return tuple((key, str(dep.get('name', ''))) for key, dep in department_service.DEPARTMENTS.items())
+
+    def _collect(self, departments: Tuple[Tuple[str, str], ...]) -> List[Tuple[str, str, str, float]]:
+        """Все ключевые слова в виде (измерение, метка, слово, вес)"""
+        entries = []
+        config_departments = self.keywords.get("departments", {})
+        names = dict(departments)
+        triggers = self.keywords.get("department_triggers", [])
+        for dep_key in list(config_departments) + [key for key in names if key not in config_departments]:
+            tiers = config_departments.get(dep_key, {})
+            variants = list(tiers.get("aliases", []))
+            if names.get(dep_key):
+                variants.append(names[dep_key])
+                entries.append((DIMENSION_DEPARTMENT, dep_key, names[dep_key], WEIGHT_NAME))
+            for word in tiers.get("specific", []):
+                entries.append((DIMENSION_DEPARTMENT, dep_key, word, WEIGHT_SPECIFIC))
+            for word in tiers.get("aliases", []):
+                entries.append((DIMENSION_DEPARTMENT, dep_key, word, WEIGHT_ALIAS))
+            for word in tiers.get("general", []):
+                entries.append((DIMENSION_DEPARTMENT, dep_key, word, WEIGHT_GENERAL))
+            for trigger in triggers:
+                for variant in variants:
+                    entries.append((DIMENSION_DEPARTMENT, dep_key, f"{trigger} {variant}", WEIGHT_EXPLICIT))
+        for dimension in (DIMENSION_PRIORITY, DIMENSION_CATEGORY):
+            for label, words in self.keywords.get(dimension, {}).items():
+                for word in words:
+                    entries.append((dimension, label, word, WEIGHT_KEYWORD))
+        return entries
+
+    def _build(self, departments: Tuple[Tuple[str, str], ...]):
+        # Одинаковые шаблоны одной метки (слово и в сокращениях, и в специфичных) — с наибольшим весом
+        patterns: Dict[str, Dict[Tuple[str, str], Tuple[str, float]]] = {}
+        order: Dict[str, Dict[str, int]] = {}
+        for dimension, label, keyword, weight in self._collect(departments):
+            order.setdefault(dimension, {}).setdefault(label, len(order[dimension]))
+            pattern = compile_pattern(keyword)
+            if not pattern:
+                continue
+            labels = patterns.setdefault(pattern, {})
+            if weight > labels.get((dimension, label), ("", 0.0))[1]:
+                labels[(dimension, label)] = (keyword, weight)
+        automaton = AhoCorasick()
+        for pattern, labels in patterns.items():
+            automaton.add(pattern, [(dimension, label, keyword, weight)
+                                    for (dimension, label), (keyword, weight) in labels.items()])
+        self._automaton = automaton.build()
+        self._order = order
+        self._departments_signature = departments
+        logging.info(f"🔤 Классификатор собран: {automaton.patterns} шаблонов")
+
+    def _ensure_built(self) -> AhoCorasick:
+        departments = self._departments_snapshot()
+        if self._automaton is None or departments != self._departments_signature:
+            with self._lock:
+                if self._automaton is None or departments != self._departments_signature:
+                    self._build(departments)
+        return self._automaton
+
+    def classify(self, text: str) -> Classification:
+        """Отдел, приоритет и категория текста одним проходом автомата"""
+        result = Classification()
+        if not text:
+            return result
+        automaton = self._ensure_built()
+        tokens = tokenize(text)
+        if not tokens:
+            return result
+
+        # Поток основ " осн1 осн2 ... " и смещения начала каждой основы в нем
+        offsets = []
+        position = 1
+        for stem, _, _ in tokens:
+            offsets.append(position)
+            position += len(stem) + 1
+        stream = " " + " ".join(stem for stem, _, _ in tokens) + " "
+
+        # На одном слове метка получает вес лучшего совпадения ("охранник" не считается дважды)
+        best: Dict[Tuple[str, str, int], KeywordMatch] = {}
+        for start, end, payload in automaton.iter_matches(stream):
+            first = bisect.bisect_left(offsets, start + 1)
+            last_char = end - 2 if stream[end - 1] == " " else end - 1
+            last = bisect.bisect_right(offsets, last_char) - 1
+            for dimension, label, keyword, weight in payload:
+                key = (dimension, label, first)
+                if key not in best or weight > best[key].weight:
+                    best[key] = KeywordMatch(dimension, label, keyword, tokens[first][1], tokens[last][2], weight)
+
+        result.matches = sorted(best.values(), key=lambda m: (m.start, -m.weight))
+        scores: Dict[str, Dict[str, float]] = {}
+        for match in result.matches:
+            dimension_scores = scores.setdefault(match.dimension, {})
+            dimension_scores[match.label] = dimension_scores.get(match.label, 0.0) + match.weight
+
+        for dimension, dimension_scores in scores.items():
+            order = self._order.get(dimension, {})
+            label = max(dimension_scores, key=lambda l: (dimension_scores[l], -order.get(l, len(order))))
+            top = dimension_scores[label]
+            share = top / sum(dimension_scores.values())
+            setattr(result, dimension, label)
+            result.confidence[dimension] = round(share * min(1.0, top / CONFIDENT_SCORE), 3)
+        return result
+
+
+text_classifier = TextClassifier()
+
+
+def classify_text(text: str) -> Classification:
+    """Классифицирует текст общим экземпляром классификатора"""
+    return text_classifier.classify(text)
+
+
+def extract_department_from_text(text: str) -> Optional[str]:
+    """
+    Пытается найти отдел по ключевым словам в тексте.
+    Возвращает ключ отдела или None.
+    """
+    return text_classifier.classify(text).department
@@ -0,0 +1,325 @@
+"""
+Синхронизация базы контактов бота (data/suppliers_database.json) с базой
+AI-ассистента (../shared/data/suppliers_database.json).
+
+Слияние трехстороннее, по записям: базой служит состояние каждого контакта
+на момент прошлой синхронизации (файл контрольной точки). Контакт, который
+изменился только с одной стороны, копируется на другую; изменения разных
+полей с двух сторон объединяются; если одно поле изменено по-разному,
+побеждает более свежая запись (last_updated, затем update_count), а
+конфликт попадает в отчет и в журнал конфликтов. Удаление переносится,
+только если другая сторона контакт не меняла.
+
+Если ни один файл не менялся с прошлого запуска, синхронизация
+пропускается. Если изменился только один, второй не читается: после прошлой
+синхронизации он совпадает с контрольной точкой. Измененный файл читается
+целиком (JSON), но сравниваются с контрольной точкой только его записи.
+
+Перед записью каждого файла проверяется, что его не изменили с момента
+чтения (правка AI-ассистента или бота во время слияния). Если изменили,
+проход начинается заново (до SYNC_MAX_ATTEMPTS раз), а чужая правка не
+затирается.
+Запускается из cron (scripts/sync_contacts.py) или периодической задачей
+бота (CONTACTS_SYNC_INTERVAL) — тогда изменения применяются к базе в памяти
+KnowledgeCollector.
+"""
+import json
+import logging
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config_veretevo.constants import (
+    CONTACTS_SYNC_CONFLICTS_FILE,
+    CONTACTS_SYNC_STATE_FILE,
+    SHARED_SUPPLIERS_FILE,
+    SUPPLIERS_FILE,
+)
+from utils_veretevo.contact_index import normalize_contacts_database
+from utils_veretevo.json_files import write_json_atomic
+
+# Служебные поля: сливаются отдельно и конфликтом не считаются
+VERSION_FIELDS = ('last_updated', 'update_count')
+
+LOCAL = 'local'
+REMOTE = 'remote'
+
+SYNC_MAX_ATTEMPTS = 3  # проходов, если файлы меняют во время синхронизации
+
+
+class ConcurrentChangeError(RuntimeError):
+    """Файл базы изменили во время синхронизации"""
+
+
+@dataclass
+class SyncConflict:
+    """Поля контакта, измененные по-разному с двух сторон"""
+    phone: str
+    fields: List[str]
+    winner: str
+
+
+@dataclass
+class SyncReport:
+    skipped: bool = False
+    total: int = 0
+    processed: int = 0
+    pulled: int = 0
+    pushed: int = 0
+    merged: int = 0
+    deleted: int = 0
+    conflicts: List[SyncConflict] = field(default_factory=list)
+
+    def format(self) -> str:
+        if self.skipped:
+            return "🔄 Контакты: изменений с прошлой синхронизации нет"
+        lines = [
+            "📊 ОТЧЕТ СИНХРОНИЗАЦИИ КОНТАКТОВ",
+            f"📱 Всего контактов: {self.total}",
+            f"🔎 Изменено с прошлой синхронизации: {self.processed}",
+            f"⬇️ Получено от AI ассистента: {self.pulled}",
+            f"⬆️ Отправлено AI ассистенту: {self.pushed}",
+            f"🔀 Объединено: {self.merged}",
+            f"🗑️ Удалено: {self.deleted}",
+            f"⚠️ Конфликтов: {len(self.conflicts)}",
+        ]
+        for conflict in self.conflicts:
+            source = "бота" if conflict.winner == LOCAL else "AI ассистента"
+            lines.append(f"   • {conflict.phone}: {', '.join(conflict.fields)} — оставлена версия {source}")
+        return "\n".join(lines)
+
+
+def record_version(record: Dict[str, Any]) -> Tuple[str, int]:
+    return (str(record.get('last_updated') or ''), int(record.get('update_count') or 0))
+
+
+def merge_record(base: Optional[Dict[str, Any]], local: Dict[str, Any],
+                 remote: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str], str]:
+    """
+    Трехстороннее слияние одного контакта, измененного с обеих сторон
+
+    Returns:
+        (объединенная запись, поля в конфликте, чья версия победила в конфликте)
+    """
+    base = base or {}
+    winner = LOCAL if record_version(local) >= record_version(remote) else REMOTE
+    merged: Dict[str, Any] = {}
+    conflicts = []
+    for key in list(dict.fromkeys([*local, *remote])):
+        if key in VERSION_FIELDS:
+            continue
+        base_value, local_value, remote_value = base.get(key), local.get(key), remote.get(key)
+        if local_value == remote_value or remote_value == base_value:
+            value = local_value
+        elif local_value == base_value:
+            value = remote_value
+        else:
+            value = local_value if winner == LOCAL else remote_value
+            conflicts.append(key)
+        if value is not None:
+            merged[key] = value
+    merged['last_updated'] = max(record_version(local)[0], record_version(remote)[0])
+    local_count, remote_count = record_version(local)[1], record_version(remote)[1]
+    if base:
+        # Обновления с обеих сторон после прошлой синхронизации складываются
+        merged['update_count'] = local_count + remote_count - record_version(base)[1]
+    else:
+        merged['update_count'] = max(local_count, remote_count)
+    return merged, conflicts, winner
+
+
+def file_signature(path: str) -> Optional[List[int]]:
+    """(mtime_ns, размер) файла — признак изменения с прошлой синхронизации"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_database(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return normalize_contacts_database(json.load(f))[0]
+
+
+class ContactSync:
+    """Синхронизация двух баз контактов с контрольной точкой"""
+
+    def __init__(self, local_file: str = SUPPLIERS_FILE, remote_file: str = SHARED_SUPPLIERS_FILE,
+                 state_file: str = CONTACTS_SYNC_STATE_FILE,
+                 conflicts_file: Optional[str] = CONTACTS_SYNC_CONFLICTS_FILE):
+        self.local_file = local_file
+        self.remote_file = remote_file
+        self.state_file = state_file
+        self.conflicts_file = conflicts_file
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"❌ Ошибка чтения контрольной точки синхронизации контактов: {e}")
+        return {}
+
+    def _log_conflicts(self, conflicts: List[SyncConflict]):
+        for conflict in conflicts:
+            logging.warning(f"⚠️ Конфликт синхронизации контакта {conflict.phone}: "
+                            f"{', '.join(conflict.fields)} — победила версия {conflict.winner}")
+        if not conflicts or not self.conflicts_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.conflicts_file) or ".", exist_ok=True)
+            with open(self.conflicts_file, 'a', encoding='utf-8') as f:
+                now = datetime.now().isoformat()
+                for conflict in conflicts:
+                    f.write(json.dumps({'time': now, **asdict(conflict)}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logging.error(f"❌ Ошибка записи журнала конфликтов контактов: {e}")
+
+    def run(self, collector=None) -> SyncReport:
+        """
+        Синхронизация; повторяется, если файл изменили во время прохода
+
+        Args:
+            collector: KnowledgeCollector бота; если передан, изменения базы бота
+                применяются к нему в памяти и сохраняются через него
+
+        Raises:
+            FileNotFoundError: Нет базы AI ассистента
+            ConcurrentChangeError: Файлы меняли во время каждой из SYNC_MAX_ATTEMPTS попыток
+        """
+        for attempt in range(1, SYNC_MAX_ATTEMPTS + 1):
+            try:
+                return self._run_once(collector)
+            except ConcurrentChangeError as e:
+                if attempt == SYNC_MAX_ATTEMPTS:
+                    raise
+                logging.warning(f"🔄 {e} — повторяю синхронизацию (попытка {attempt + 1} из {SYNC_MAX_ATTEMPTS})")
+
+    @staticmethod
+    def _check_unchanged(path: str, signature: Optional[List[int]]):
+        if file_signature(path) != signature:
+            raise ConcurrentChangeError(f"Файл {path} изменен во время синхронизации")
+
+    def _run_once(self, collector=None) -> SyncReport:
+        """Один проход синхронизации"""
+        if not os.path.exists(self.remote_file):
+            raise FileNotFoundError(f"База AI ассистента не найдена: {self.remote_file}")
+        if collector is not None:
+            collector.reload_if_changed()
+
+        local_file = collector.suppliers_file if collector is not None else self.local_file
+        state = self._load_state()
+        signatures = [file_signature(local_file), file_signature(self.remote_file)]
+        base: Dict[str, Dict[str, Any]] = state.get('records', {})
+        previous = state.get('signatures') or [None, None]
+        if previous == signatures:
+            return SyncReport(skipped=True, total=len(base))
+
+        # Неизменившаяся сторона совпадает с контрольной точкой — ее файл не читаем
+        local_changed = previous[0] is None or previous[0] != signatures[0]
+        remote_changed = previous[1] is None or previous[1] != signatures[1]
+        remote = read_database(self.remote_file) if remote_changed else dict(base)
+        if not local_changed:
+            local = dict(base)
+        else:
+            local = collector.snapshot() if collector is not None else read_database(local_file)
+
+        report = SyncReport()
+        # Только контакты, отличающиеся от контрольной точки в изменившихся файлах
+        sides = [side for side, side_changed in ((local, local_changed), (remote, remote_changed)) if side_changed]
+        changed = [phone for phone in dict.fromkeys([*(phone for side in sides for phone in side), *base])
+                   if any(side.get(phone) != base.get(phone) for side in sides)]
+        previous_base = dict(base)
+        local_updates: Dict[str, Optional[Dict[str, Any]]] = {}
+        remote_updates: Dict[str, Optional[Dict[str, Any]]] = {}
+        for phone in changed:
+            base_record, local_record, remote_record = base.get(phone), local.get(phone), remote.get(phone)
+            if local_record == remote_record:
+                result = local_record
+            elif local_record == base_record:
+                result = local_updates[phone] = remote_record
+                report.pulled += remote_record is not None
+            elif remote_record == base_record:
+                result = remote_updates[phone] = local_record
+                report.pushed += local_record is not None
+            elif local_record is None or remote_record is None:
+                # Удален с одной стороны, изменен с другой — сохраняем измененный
+                result = local_record or remote_record
+                side = LOCAL if local_record is not None else REMOTE
+                (remote_updates if side == LOCAL else local_updates)[phone] = result
+                report.conflicts.append(SyncConflict(phone, ['удален'], side))
+            else:
+                result, fields, winner = merge_record(base_record, local_record, remote_record)
+                if result != local_record:
+                    local_updates[phone] = result
+                if result != remote_record:
+                    remote_updates[phone] = result
+                report.merged += 1
+                if fields:
+                    report.conflicts.append(SyncConflict(phone, fields, winner))
+            if result is None:
+                if base.pop(phone, None) is not None:
+                    report.deleted += 1
+            else:
+                base[phone] = dict(result)
+        report.processed = len(changed)
+
+        # Обе стороны проверяются до первой записи, чтобы при чужой правке не
+        # записать ни одного файла; базу бота в памяти проверяет сам collector
+        write_local = bool(local_updates) and collector is None
+        if remote_updates:
+            self._check_unchanged(self.remote_file, signatures[1])
+        if write_local:
+            self._check_unchanged(local_file, signatures[0])
+
+        if remote_updates:
+            self._apply(remote, remote_updates)
+            backup_path = f"{self.remote_file}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            shutil.copy2(self.remote_file, backup_path)
+            write_json_atomic(self.remote_file, remote)
+            signatures[1] = file_signature(self.remote_file)
+        if local_updates:
+            if collector is not None:
+                # Контакт изменили в боте, пока шло слияние: оставляем прежнюю
+                # контрольную точку, и следующий запуск сольет его заново
+                deferred = collector.apply_sync_changes(local_updates, expected=local)
+                for phone in deferred:
+                    if previous_base.get(phone) is None:
+                        base.pop(phone, None)
+                    else:
+                        base[phone] = previous_base[phone]
+                # Файл бота отличается от контрольной точки — следующий запуск его перечитает
+                signatures[0] = None if deferred else file_signature(local_file)
+            else:
+                self._check_unchanged(local_file, signatures[0])
+                self._apply(local, local_updates)
+                write_json_atomic(local_file, local)
+                signatures[0] = file_signature(local_file)
+
+        report.total = len(base)
+        write_json_atomic(self.state_file, {
+            'synced_at': datetime.now().isoformat(),
+            'signatures': signatures,
+            'records': base,
+        }, indent=None)
+        self._log_conflicts(report.conflicts)
+        logging.info(f"🔄 Синхронизация контактов: обработано {report.processed}, получено {report.pulled}, "
+                     f"отправлено {report.pushed}, объединено {report.merged}, конфликтов {len(report.conflicts)}")
+        return report
+
+    @staticmethod
+    def _apply(database: Dict[str, Dict[str, Any]], updates: Dict[str, Optional[Dict[str, Any]]]):
+        for phone, record in updates.items():
+            if record is None:
+                database.pop(phone, None)
+            else:
+                database[phone] = record
+
+
+contact_sync = ContactSync()
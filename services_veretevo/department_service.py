@@ -44,6 +44,23 @@ def save_departments() -> None:
         import logging
         logging.error(f'Ошибка сохранения departments_config.json: {e}')
 
+def is_auto_answer_enabled(dep_key: str) -> bool:
+    """
+    Включен ли для отдела автоответ из базы знаний (по умолчанию выключен).
+    """
+    return bool(DEPARTMENTS.get(dep_key, {}).get("auto_answer", False))
+
+def set_auto_answer(dep_key: str, enabled: bool) -> bool:
+    """
+    Включает или выключает автоответ для отдела и сохраняет настройку.
+    Возвращает False, если отдел не найден.
+    """
+    if dep_key not in DEPARTMENTS:
+        return False
+    DEPARTMENTS[dep_key]["auto_answer"] = enabled
+    save_departments()
+    return True
+
 def migrate_departments_to_json(assistants, finance_members, assistants_chat_id, finance_chat_id) -> None:
     """
     Мигрирует старую структуру отделов в новый JSON-файл, если он ещё не существует или пустой.
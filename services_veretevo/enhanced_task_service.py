@@ -10,6 +10,8 @@ from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from services_veretevo.classifier_service import Classification, classify_text
+
 class Priority(Enum):
     """Приоритеты задач"""
     LOW = "low"
@@ -45,45 +47,21 @@ class EnhancedTaskService:
     """Расширенный сервис для работы с задачами"""
     
     def __init__(self):
-        self.priority_keywords = {
-            Priority.URGENT: ["срочно", "urgent", "критично", "немедленно", "asap", "🔥", "⚡"],
-            Priority.HIGH: ["важно", "important", "высокий", "приоритет", "❗", "⚠️"],
-            Priority.MEDIUM: ["обычно", "normal", "средний", "📋"],
-            Priority.LOW: ["неважно", "low", "низкий", "📝"]
-        }
-        
-        self.category_keywords = {
-            TaskCategory.DEVELOPMENT: ["код", "программирование", "разработка", "bug", "feature", "dev", "💻"],
-            TaskCategory.DESIGN: ["дизайн", "design", "ui", "ux", "макет", "🎨"],
-            TaskCategory.MARKETING: ["маркетинг", "marketing", "реклама", "продвижение", "📢"],
-            TaskCategory.ADMINISTRATION: ["админ", "admin", "управление", "настройка", "⚙️"],
-            TaskCategory.SUPPORT: ["поддержка", "support", "помощь", "help", "🆘"],
-            TaskCategory.PLANNING: ["планирование", "planning", "планы", "стратегия", "📅"],
-        }
-        
         self.reminders: List[TaskReminder] = []
         self.tags: Dict[str, TaskTag] = {}
     
-    def detect_priority(self, text: str) -> Priority:
+    def detect_priority(self, text: str, classification: Optional[Classification] = None) -> Priority:
         """Автоматически определяет приоритет задачи на основе текста"""
-        text_lower = text.lower()
-        
-        for priority, keywords in self.priority_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in text_lower:
-                    return priority
-        
+        classification = classification or classify_text(text)
+        if classification.priority:
+            return Priority(classification.priority)
         return Priority.MEDIUM  # По умолчанию средний приоритет
     
-    def detect_category(self, text: str) -> TaskCategory:
+    def detect_category(self, text: str, classification: Optional[Classification] = None) -> TaskCategory:
         """Автоматически определяет категорию задачи"""
-        text_lower = text.lower()
-        
-        for category, keywords in self.category_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in text_lower:
-                    return category
-        
+        classification = classification or classify_text(text)
+        if classification.category:
+            return TaskCategory(classification.category)
         return TaskCategory.OTHER
     
     def extract_tags(self, text: str) -> List[str]:
@@ -94,11 +72,13 @@ class EnhancedTaskService:
     def create_enhanced_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Создает задачу с расширенными полями"""
         text = task_data.get('text', '')
+        # Приоритет и категория — одним проходом классификатора
+        classification = classify_text(text)
         
         enhanced_task = task_data.copy()
         enhanced_task.update({
-            'priority': self.detect_priority(text).value,
-            'category': self.detect_category(text).value,
+            'priority': self.detect_priority(text, classification).value,
+            'category': self.detect_category(text, classification).value,
             'tags': self.extract_tags(text),
             'created_at': datetime.now().isoformat(),
             'reminders': [],
@@ -212,40 +192,13 @@ class EnhancedTaskService:
         
         return stats
     
-    def search_tasks(self, query: str) -> List[Dict[str, Any]]:
-        """Поиск задач по тексту, тегам, категориям"""
-        from services_veretevo.task_service import get_tasks
-        
-        tasks = get_tasks()
-        query_lower = query.lower()
-        
-        results = []
-        for task in tasks:
-            # Поиск по тексту
-            if query_lower in task.get('text', '').lower():
-                results.append(task)
-                continue
-            
-            # Поиск по тегам
-            tags = task.get('tags', [])
-            for tag in tags:
-                if query_lower in tag.lower():
-                    results.append(task)
-                    break
-            
-            # Поиск по категории
-            category = task.get('category', '')
-            if query_lower in category.lower():
-                results.append(task)
-                continue
-            
-            # Поиск по автору/исполнителю
-            author_name = task.get('author_name', '')
-            assistant_name = task.get('assistant_name', '')
-            if query_lower in author_name.lower() or query_lower in assistant_name.lower():
-                results.append(task)
+    def search_tasks(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Поиск задач по тексту, тегам, категориям, автору и исполнителю"""
+        from services_veretevo.task_service import reload_tasks_if_changed
+        from services_veretevo.task_search_service import task_search_index
         
-        return results
+        reload_tasks_if_changed()  # при изменении tasks.json синхронизирует индекс
+        return task_search_index.search(query, limit=limit)
 
 # Глобальный экземпляр сервиса
 enhanced_service = EnhancedTaskService() 
\ No newline at end of file
@@ -4,19 +4,70 @@ import logging
 import asyncio
 import threading
 import time
-from typing import Dict, List, Optional, Tuple
-from difflib import get_close_matches
-import requests
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from difflib import SequenceMatcher
 from config_veretevo.constants import GENERAL_DIRECTOR_ID
-from config_veretevo.env import YANDEX_GPT_API_KEY
+from utils_veretevo.text_index import BM25Index, normalize_text
+from utils_veretevo.minhash import find_duplicate_clusters
+from utils_veretevo.json_files import write_json_atomic
+from utils_veretevo.json_log_store import JsonLogStore
+from utils_veretevo.completion_cache import completion_cache, make_cache_key
+from utils_veretevo.single_flight import AsyncSingleFlight
+from utils_veretevo.gpt_providers import HedgedRouter, OpenAIProvider, YandexGPTProvider, YANDEX_MODEL_URI
+
+GPT_MODEL_URI = YANDEX_MODEL_URI
+GPT_TEMPERATURE = 0.6
+
+# Температуры вариантов ответа: первый — прежняя 0.6, остальные сдержаннее и смелее,
+# чтобы варианты действительно отличались
+VARIANT_TEMPERATURES = (GPT_TEMPERATURE, 0.3, 0.9)
+VARIANTS_DEADLINE = 12  # секунд на все варианты; что не успело — не показываем
+
+gpt_single_flight = AsyncSingleFlight("GPT")
+
+# Провайдеры: Yandex GPT основной, OpenAI — резерв для хеджирования (если задан ключ)
+yandex_provider = YandexGPTProvider()
+openai_provider = OpenAIProvider()
+gpt_router = HedgedRouter([yandex_provider, openai_provider])
+
+# Сколько кандидатов из индекса проверяется точным сравнением строк
+SIMILAR_CANDIDATES = 10
+
+# Автоответ из базы знаний (для отделов, где он включен): только при почти дословном совпадении
+AUTO_ANSWER_THRESHOLD = 0.9   # сходство строк, как в find_similar_question
+AUTO_ANSWER_MIN_LENGTH = 10   # у коротких сообщений совпадение слишком случайно
+AUTO_ANSWER_MAX_UNDOS = 2     # после стольких отмен директором запись больше не отвечает сама
+
+# Обслуживание базы знаний: слияние дублей и вытеснение редко используемых ответов
+KB_MAX_ENTRIES = 2000               # сколько записей держать в рабочей базе
+KB_DUPLICATE_THRESHOLD = 0.8        # оценка сходства Жаккара для слияния вопросов
+KB_ANSWER_MATCH_THRESHOLD = 0.9     # сходство ответов, при котором дубли вопроса сливаются
+KB_MAINTENANCE_INTERVAL = 6 * 3600  # секунд между запусками обслуживания
+KB_LOG_COMPACT_ENTRIES = 1000       # строк в журнале изменений до уплотнения в снимок
+
+GPT_ERROR_NOT_CONFIGURED = "❌ Ошибка: API ключ Yandex GPT не настроен"
+GPT_ERROR_UNAVAILABLE = "⏳ GPT временно недоступен, попробуйте позже"
+GPT_ERROR_FAILED = "❌ Ошибка генерации ответа"
+GPT_ERROR_MESSAGES = (GPT_ERROR_NOT_CONFIGURED, GPT_ERROR_UNAVAILABLE, GPT_ERROR_FAILED)
+
+
+class GPTResponseError(Exception):
+    """Ответ GPT не получен; текст исключения — сообщение для пользователя"""
+
 
 class GPTService:
     def __init__(self):
         self.answers_file = "data/answers.json"
+        self.archive_file = "data/answers_archive.json"
+        self.max_entries = KB_MAX_ENTRIES
         self.answers_cache = {}
+        self.answers_index = BM25Index()
         self.cache_lock = threading.Lock()
         self.last_save_time = time.time()
         self.autosave_interval = 600  # 10 минут
+        # Изменения в памяти, не попавшие в журнал (счетчики использования, слияния)
+        self.dirty = False
+        self._kb_store: Optional[JsonLogStore] = None
         
         # Создаем директорию data если её нет
         os.makedirs("data", exist_ok=True)
@@ -27,73 +78,188 @@ class GPTService:
         # Запускаем автосохранение в фоне
         self._start_autosave()
     
+    @property
+    def kb_store(self) -> JsonLogStore:
+        """Снимок answers.json и журнал изменений рядом с ним (answers.log.jsonl)"""
+        if self._kb_store is None or self._kb_store.snapshot_path != self.answers_file:
+            log_path = os.path.splitext(self.answers_file)[0] + ".log.jsonl"
+            self._kb_store = JsonLogStore(self.answers_file, log_path)
+        return self._kb_store
+    
     def _load_answers(self):
-        """Загружает базу знаний из файла в память"""
+        """Загружает базу знаний (снимок и журнал изменений) в память"""
         try:
-            if os.path.exists(self.answers_file):
-                with open(self.answers_file, 'r', encoding='utf-8') as f:
-                    self.answers_cache = json.load(f)
-                logging.info(f"✅ Загружено {len(self.answers_cache)} записей из базы знаний")
+            self.answers_cache = self.kb_store.load()
+            if self.answers_cache or self.kb_store.log_entries:
+                logging.info(f"✅ Загружено {len(self.answers_cache)} записей из базы знаний "
+                             f"(журнал: {self.kb_store.log_entries})")
             else:
-                self.answers_cache = {}
                 logging.info("✅ Создана новая база знаний")
         except Exception as e:
             logging.error(f"❌ Ошибка загрузки базы знаний: {e}")
             self.answers_cache = {}
+        self._rebuild_index()
+    
+    def _rebuild_index(self):
+        """Строит поисковый индекс по вопросам базы знаний и их слитым дублям (aliases)"""
+        started = time.perf_counter()
+        self.answers_index.clear()
+        for question, entry in self.answers_cache.items():
+            self._index_entry(question, entry)
+        logging.info(f"🔎 Индекс базы знаний построен за {time.perf_counter() - started:.2f} с")
+    
+    def _index_entry(self, question: str, entry: Dict):
+        """Индексирует вопрос записи и каждый ее alias (id документа alias — пара (вопрос, alias))"""
+        self.answers_index.add(question, question)
+        for alias in entry.get("aliases", []):
+            self.answers_index.add((question, alias), alias)
+    
+    def _unindex_entry(self, question: str, entry: Dict):
+        """Убирает из индекса вопрос записи и все ее aliases"""
+        self.answers_index.remove(question)
+        for alias in entry.get("aliases", []):
+            self.answers_index.remove((question, alias))
     
     def _save_answers(self):
-        """Сохраняет базу знаний на диск"""
+        """Уплотняет базу знаний: атомарно записывает полный снимок и очищает журнал"""
         try:
             with self.cache_lock:
-                with open(self.answers_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.answers_cache, f, ensure_ascii=False, indent=2)
+                self.kb_store.compact(self.answers_cache)
+                self.dirty = False
                 self.last_save_time = time.time()
                 logging.info(f"✅ База знаний сохранена ({len(self.answers_cache)} записей)")
         except Exception as e:
             logging.error(f"❌ Ошибка сохранения базы знаний: {e}")
     
+    def _log_entry(self, question: str):
+        """Дописывает одну запись в журнал изменений (вызывать под cache_lock)"""
+        entry = self.answers_cache.get(question)
+        if entry is None:
+            self.kb_store.delete(question)
+        else:
+            self.kb_store.put(question, entry)
+        self.last_save_time = time.time()
+    
     def _start_autosave(self):
         """Запускает автосохранение в фоне"""
         def autosave_worker():
             while True:
                 time.sleep(self.autosave_interval)
-                if time.time() - self.last_save_time > self.autosave_interval:
+                # Пишем только если есть что: изменения в памяти или длинный журнал
+                if self.dirty or self.kb_store.log_entries >= KB_LOG_COMPACT_ENTRIES:
                     self._save_answers()
         
         autosave_thread = threading.Thread(target=autosave_worker, daemon=True)
         autosave_thread.start()
     
+    def search_questions(self, question: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Возвращает top_k вопросов из базы знаний с оценками BM25
+        
+        Совпадение с alias засчитывается записи, в которую он слит; у записи
+        берется лучшая оценка из ее вопроса и aliases.
+        """
+        limit = top_k
+        while True:
+            hits = self.answers_index.search(question, limit)
+            best: Dict[str, float] = {}
+            for doc_id, score in hits:
+                canonical = doc_id[0] if isinstance(doc_id, tuple) else doc_id
+                best[canonical] = max(best.get(canonical, 0.0), score)
+            # Несколько документов одной записи могут вытеснить другие записи — добираем
+            if len(best) >= top_k or len(hits) < limit:
+                return sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            limit *= 2
+    
     def find_similar_question(self, question: str, threshold: float = 0.6) -> Optional[Dict]:
         """Ищет похожий вопрос в базе знаний"""
         if not self.answers_cache:
             return None
         
-        # Получаем все вопросы из базы
-        questions = list(self.answers_cache.keys())
-        
-        # Ищем похожие вопросы
-        matches = get_close_matches(question.lower(), [q.lower() for q in questions], n=1, cutoff=threshold)
+        # Кандидаты берем из индекса, а порог проверяем тем же сравнением строк,
+        # что и раньше (difflib), но только для нескольких кандидатов
+        query = normalize_text(question)
+        best_question, best_ratio = None, 0.0
+        for original_q, _ in self.search_questions(question, SIMILAR_CANDIDATES):
+            entry = self.answers_cache.get(original_q, {})
+            for variant in [original_q] + entry.get("aliases", []):
+                ratio = SequenceMatcher(None, query, normalize_text(variant)).ratio()
+                if ratio > best_ratio:
+                    best_question, best_ratio = original_q, ratio
         
-        if matches:
-            # Находим оригинальный вопрос (с правильным регистром)
-            for original_q in questions:
-                if original_q.lower() == matches[0]:
-                    return {
-                        "question": original_q,
-                        "answer": self.answers_cache[original_q]["answer"],
-                        "department": self.answers_cache[original_q].get("department", ""),
-                        "similarity": matches[0]
-                    }
+        entry = self.answers_cache.get(best_question) if best_question else None
+        if entry and best_ratio >= threshold:
+            return {
+                "question": best_question,
+                "answer": entry["answer"],
+                "department": entry.get("department", ""),
+                "similarity": round(best_ratio, 3)
+            }
         
         return None
     
-    async def generate_gpt_response(self, question: str, context: str = "") -> str:
-        """Генерирует ответ с помощью Yandex GPT"""
+    def find_auto_answer(self, question: str, department: str = "") -> Optional[Dict]:
+        """
+        Ответ из базы знаний, достаточно надежный, чтобы отправить его без директора
+        
+        Запись должна относиться к тому же отделу (или быть общей) и не должна
+        быть часто отменяемой. Найденный ответ учитывается как использование.
+        """
+        if len(normalize_text(question)) < AUTO_ANSWER_MIN_LENGTH:
+            return None
+        similar = self.find_similar_question(question, threshold=AUTO_ANSWER_THRESHOLD)
+        if not similar:
+            return None
+        if similar["department"] and department and similar["department"] != department:
+            return None
+        with self.cache_lock:
+            entry = self.answers_cache.get(similar["question"], {})
+            if entry.get("auto_undos", 0) >= AUTO_ANSWER_MAX_UNDOS:
+                return None
+        self._record_hit(similar["question"])
+        return similar
+    
+    def record_auto_answer_undo(self, question: str):
+        """Директор отменил автоответ: запись теряет доверие"""
+        with self.cache_lock:
+            entry = self.answers_cache.get(question)
+            if entry is None:
+                return
+            entry["auto_undos"] = entry.get("auto_undos", 0) + 1
+            self._log_entry(question)
+    
+    async def generate_gpt_response(self, question: str, context: str = "", use_cache: bool = True,
+                                    variant: int = 0,
+                                    on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+                                    history: str = "") -> str:
+        """
+        Генерирует ответ с помощью Yandex GPT (с хеджированием резервным провайдером)
+        
+        При неудаче возвращает сообщение об ошибке вместо ответа (см. GPT_ERROR_*).
+        
+        Args:
+            question: Вопрос сотрудника
+            context: Контекст вида "Отдел: <код>"
+            use_cache: False — перегенерировать, не заглядывая в кэш (ответ в кэше обновится)
+            variant: Номер варианта ответа; задает температуру из VARIANT_TEMPERATURES
+            on_partial: Если задан — ответ запрашивается потоково, и корутина получает
+                накопленный текст по мере генерации (при ответе из кэша — один раз, целиком)
+            history: Предшествующая переписка в чате («Автор: текст» построчно);
+                попадает в промпт, но не в ключ кэша
+        """
         try:
-            # Получаем API ключ из переменных окружения
-            api_key = YANDEX_GPT_API_KEY
-            if not api_key:
-                return "❌ Ошибка: API ключ Yandex GPT не настроен"
+            return await self._request_gpt_response(question, context, use_cache, variant, on_partial, history)
+        except GPTResponseError as e:
+            return str(e)
+    
+    async def _request_gpt_response(self, question: str, context: str, use_cache: bool, variant: int,
+                                    on_partial: Optional[Callable[[str], Awaitable[None]]],
+                                    history: str) -> str:
+        """Ответ GPT (аргументы — как у generate_gpt_response); при неудаче — GPTResponseError"""
+        try:
+            # Нужен хотя бы один настроенный провайдер (Yandex GPT или OpenAI)
+            if not gpt_router.configured():
+                raise GPTResponseError(GPT_ERROR_NOT_CONFIGURED)
             
             # Формируем промпт с учетом отдела
             department_context = {
@@ -111,11 +277,12 @@ class GPTService:
             department = context.replace("Отдел: ", "") if context.startswith("Отдел: ") else ""
             dept_name = department_context.get(department, "общий отдел")
             
-            prompt = f"""
+            def build_prompt(history_block: str) -> str:
+                return f"""
             Ты помощник директора компании Veretevo. Отвечай от имени директора кратко, профессионально и по делу.
 
             Контекст: Вопрос задан в {dept_name}.
-            Вопрос сотрудника: {question}
+            {history_block}Вопрос сотрудника: {question}
 
             Правила ответа:
             1. Отвечай от имени директора (используй "я", "мне", "мы")
@@ -129,51 +296,83 @@ class GPTService:
             Сгенерируй подходящий ответ директора:
             """
             
-            # Вызываем Yandex GPT API
-            headers = {
-                "Authorization": f"Api-Key {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "modelUri": "gpt://b1g8c7c7c7c7c7c7c7c7/yandexgpt-lite",
-                "completionOptions": {
-                    "temperature": 0.6,
-                    "maxTokens": 200
-                },
-                "messages": [
-                    {
-                        "role": "user",
-                        "text": prompt
-                    }
-                ]
-            }
+            history_block = f"Предыдущие сообщения в чате:\n{history}\n\n            " if history else ""
+            prompt = build_prompt(history_block)
+            temperature = VARIANT_TEMPERATURES[variant % len(VARIANT_TEMPERATURES)]
+            # Ключ кэша и single-flight — по промпту без переписки (вопрос + отдел): тот же
+            # вопрос после других сообщений чата берется из кэша, а не запрашивается заново
+            cache_key = make_cache_key(GPT_MODEL_URI, temperature, build_prompt(""), department, variant)
+            if use_cache:
+                cached = completion_cache.get(cache_key)
+                if cached is not None:
+                    logging.info(f"⚡ Ответ GPT взят из кэша (вариант {variant})")
+                    if on_partial:
+                        await on_partial(cached)
+                    return cached
+            else:
+                completion_cache.record_bypass()
             
-            response = requests.post(
-                "https://llm.api.cloud.yandex.net/foundationModels/v1/completion",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            async def request_and_cache() -> Optional[str]:
+                answer = None
+                if on_partial and yandex_provider.available and yandex_provider.breaker.allow_request():
+                    answer = await self._stream_completion_async(prompt, temperature, on_partial)
+                if answer is None:
+                    # Основной путь: Yandex GPT с хеджированием резервным провайдером
+                    answer = await gpt_router.complete(prompt, temperature)
+                if answer is not None:
+                    completion_cache.put(cache_key, answer)
+                return answer
             
-            if response.status_code == 200:
-                result = response.json()
-                return result["result"]["alternatives"][0]["message"]["text"].strip()
-            else:
-                logging.error(f"❌ Ошибка API Yandex GPT: {response.status_code} - {response.text}")
-                return "❌ Ошибка генерации ответа"
+            # Одинаковые одновременные запросы (двойное нажатие, один вопрос от
+            # нескольких сотрудников) выполняются один раз
+            if not gpt_router.available():
+                # Все провайдеры отключены выключателями — не ждем таймаутов
+                logging.warning("⚡ GPT пропущен: все провайдеры временно отключены")
+                raise GPTResponseError(GPT_ERROR_UNAVAILABLE)
+            answer = await gpt_single_flight.do(cache_key, request_and_cache)
+            if answer is None:
+                raise GPTResponseError(GPT_ERROR_FAILED)
+            return answer
                 
+        except GPTResponseError:
+            raise
         except Exception as e:
             logging.error(f"❌ Ошибка генерации GPT ответа: {e}")
-            return "❌ Ошибка генерации ответа"
+            raise GPTResponseError(GPT_ERROR_FAILED) from e
     
-    async def get_smart_response(self, question: str, department: str = "") -> Dict:
+    async def _stream_completion_async(self, prompt: str, temperature: float,
+                                       on_partial: Callable[[str], Awaitable[None]]) -> Optional[str]:
+        """Запускает потоковый запрос к Yandex GPT в потоке и передает фрагменты в on_partial в event loop"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        worker = asyncio.ensure_future(asyncio.to_thread(
+            yandex_provider.stream, prompt, temperature,
+            lambda text: loop.call_soon_threadsafe(queue.put_nowait, text)
+        ))
+        worker.add_done_callback(lambda _: queue.put_nowait(None))
+        while True:
+            text = await queue.get()
+            if text is None:
+                break
+            try:
+                await on_partial(text)
+            except Exception as e:
+                logging.warning(f"⚠️ Ошибка обработки фрагмента GPT: {e}")
+        try:
+            return await worker
+        except Exception as e:
+            logging.error(f"❌ Ошибка потоковой генерации Yandex GPT: {e}")
+            return None
+    
+    async def get_smart_response(self, question: str, department: str = "", use_cache: bool = True,
+                                 variant: int = 0, history: str = "") -> Dict:
         """Получает умный ответ: сначала ищет в базе, потом генерирует"""
         
         # 1. Ищем похожий вопрос в базе знаний
         similar = self.find_similar_question(question)
         
         if similar:
+            self._record_hit(similar["question"])
             return {
                 "type": "from_cache",
                 "answer": similar["answer"],
@@ -183,7 +382,8 @@ class GPTService:
         
         # 2. Генерируем новый ответ через GPT
         context = f"Отдел: {department}" if department else ""
-        gpt_answer = await self.generate_gpt_response(question, context)
+        gpt_answer = await self.generate_gpt_response(question, context, use_cache=use_cache, variant=variant,
+                                                      history=history)
         
         return {
             "type": "generated",
@@ -191,18 +391,92 @@ class GPTService:
             "department": department
         }
     
+    async def generate_variants(self, question: str, department: str = "", count: int = 3,
+                                use_cache: bool = True, deadline: float = VARIANTS_DEADLINE,
+                                on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+                                history: str = "") -> List[str]:
+        """
+        Параллельно генерирует несколько разных вариантов ответа
+        
+        Ответ из базы знаний (если есть) идет первым вариантом, остальные
+        запрашиваются у GPT одновременно с разными температурами. Через deadline
+        секунд возвращаются готовые варианты; если не готов ни один — ждем первый.
+        Неуспевшие варианты отменяются. Запрос к провайдеру, уже начатый под
+        single-flight, при этом не прерывается (он защищен asyncio.shield):
+        он доработает в фоне, и его ответ попадет в кэш; вариант, который еще
+        не дошел до запроса (например, стоял в очереди), не запрашивается.
+        Если задан on_partial, первый вариант передается в него по мере генерации.
+        history — предшествующая переписка, добавляется в промпт.
+        Варианты, на которые GPT ответил ошибкой, не показываются: сообщение
+        об ошибке возвращается единственным элементом, только если нет ни
+        одного настоящего варианта.
+        
+        Returns:
+            Список вариантов в порядке номеров (без неуспевших и неудачных)
+        """
+        variants: List[str] = []
+        similar = self.find_similar_question(question) if use_cache else None
+        if similar:
+            self._record_hit(similar["question"])
+            variants.append(similar["answer"])
+            if on_partial:
+                await on_partial(similar["answer"])
+                on_partial = None
+        
+        context = f"Отдел: {department}" if department else ""
+        tasks = [
+            asyncio.ensure_future(self._request_gpt_response(
+                question, context, use_cache, i, on_partial if i == 0 else None, history
+            ))
+            for i in range(count - len(variants))
+        ]
+        if not tasks:
+            return variants
+        
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        if not done and not variants:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logging.warning(f"⏱️ Не успели к сроку {len(pending)} из {len(tasks)} вариантов GPT")
+        
+        errors = []
+        for task in tasks:
+            if task not in done or task.cancelled():
+                continue
+            if task.exception() is not None:
+                errors.append(task.exception())
+                continue
+            answer = task.result()
+            if answer not in variants:
+                variants.append(answer)
+        if not variants and errors:
+            error = errors[0]
+            return [str(error) if isinstance(error, GPTResponseError) else GPT_ERROR_FAILED]
+        return variants
+    
     def save_answer_template(self, question: str, answer: str, department: str = "") -> bool:
-        """Сохраняет ответ в базу знаний"""
+        """
+        Сохраняет ответ в базу знаний
+        
+        Существующая запись обновляется на месте: счетчики использования,
+        aliases и отмены автоответов (auto_undos) сохраняются.
+        """
         try:
             with self.cache_lock:
-                self.answers_cache[question] = {
-                    "answer": answer,
-                    "department": department,
-                    "created_at": time.time()
-                }
+                entry = self.answers_cache.get(question)
+                if entry is None:
+                    entry = self.answers_cache[question] = {"created_at": time.time()}
+                entry["answer"] = answer
+                entry["department"] = department
+                self._index_entry(question, entry)
+                # Одна строка в журнал вместо перезаписи всей базы
+                self._log_entry(question)
+                compact = self.kb_store.log_entries >= KB_LOG_COMPACT_ENTRIES
             
-            # Сохраняем на диск
-            self._save_answers()
+            if compact:
+                self._save_answers()
             logging.info(f"✅ Ответ сохранен в базу знаний: {question[:50]}...")
             return True
             
@@ -210,6 +484,142 @@ class GPTService:
             logging.error(f"❌ Ошибка сохранения ответа: {e}")
             return False
     
+    def _record_hit(self, question: str):
+        """Учитывает использование ответа из базы знаний (для вытеснения редких)"""
+        with self.cache_lock:
+            entry = self.answers_cache.get(question)
+            if entry is not None:
+                entry["hits"] = entry.get("hits", 0) + 1
+                entry["last_used"] = time.time()
+                # Счетчики не стоят отдельной записи — попадут в снимок при автосохранении
+                self.dirty = True
+    
+    @staticmethod
+    def _usage_key(entry: Dict) -> Tuple[int, float]:
+        """Чем больше значение, тем ценнее запись: сначала число использований, потом свежесть"""
+        return entry.get("hits", 0), entry.get("last_used") or entry.get("created_at", 0)
+    
+    @staticmethod
+    def _answers_match(first: str, second: str) -> bool:
+        """Ответы совпадают с точностью до регистра, пунктуации и мелких правок"""
+        first, second = normalize_text(first or ""), normalize_text(second or "")
+        return first == second or SequenceMatcher(None, first, second).ratio() >= KB_ANSWER_MATCH_THRESHOLD
+    
+    def merge_duplicates(self, threshold: float = KB_DUPLICATE_THRESHOLD) -> int:
+        """
+        Сливает почти одинаковые вопросы (MinHash/LSH) в одну запись
+        
+        Кластеры ищутся только внутри одного отдела, и сливаются только
+        записи с почти одинаковыми ответами: иначе автоответ мог бы выдать
+        ответ другого отдела или другой по смыслу. Остается самая
+        используемая запись группы, остальные вопросы сохраняются в ней как
+        aliases, счетчики использований суммируются, а сами слитые записи
+        переносятся в архив (merged_into — вопрос, в который они слиты).
+        
+        Returns:
+            Количество удаленных записей-дублей
+        """
+        with self.cache_lock:
+            by_department: Dict[str, List[str]] = {}
+            for question, entry in self.answers_cache.items():
+                by_department.setdefault(entry.get("department", ""), []).append(question)
+        clusters = []
+        for questions in by_department.values():
+            if len(questions) > 1:
+                clusters.extend(find_duplicate_clusters(((q, q) for q in questions), threshold=threshold))
+        
+        merged = 0
+        archived = {}
+        now = time.time()
+        with self.cache_lock:
+            for cluster in clusters:
+                entries = {q: self.answers_cache[q] for q in cluster if q in self.answers_cache}
+                # Группы с одинаковым ответом; первой в группе идет самая используемая запись
+                groups: List[List[str]] = []
+                for question in sorted(entries, key=lambda q: self._usage_key(entries[q]), reverse=True):
+                    for group in groups:
+                        if self._answers_match(entries[group[0]].get("answer"), entries[question].get("answer")):
+                            group.append(question)
+                            break
+                    else:
+                        groups.append([question])
+                for keep, *duplicates in groups:
+                    if not duplicates:
+                        continue
+                    target = entries[keep]
+                    aliases = list(target.get("aliases", []))
+                    for question in duplicates:
+                        entry = entries[question]
+                        aliases.extend([question] + entry.get("aliases", []))
+                        target["hits"] = target.get("hits", 0) + entry.get("hits", 0)
+                        if entry.get("last_used", 0) > target.get("last_used", 0):
+                            target["last_used"] = entry["last_used"]
+                        self._unindex_entry(question, entry)
+                        archived[question] = dict(self.answers_cache.pop(question), archived_at=now, merged_into=keep)
+                        merged += 1
+                    target["aliases"] = aliases
+                    self._index_entry(keep, target)
+                    self.dirty = True
+                    logging.info(f"🔗 Объединены дубли вопроса '{keep[:50]}': {len(duplicates)}")
+        
+        if archived:
+            self._append_to_archive(archived)
+        return merged
+    
+    def evict_cold_entries(self, max_entries: Optional[int] = None) -> int:
+        """
+        Переносит редко используемые записи в архив, если база превышает max_entries
+        
+        Returns:
+            Количество перенесенных в архив записей
+        """
+        max_entries = self.max_entries if max_entries is None else max_entries
+        with self.cache_lock:
+            excess = len(self.answers_cache) - max_entries
+            if excess <= 0:
+                return 0
+            coldest = sorted(self.answers_cache, key=lambda q: self._usage_key(self.answers_cache[q]))[:excess]
+            archived = {}
+            for question in coldest:
+                self._unindex_entry(question, self.answers_cache[question])
+                archived[question] = dict(self.answers_cache.pop(question), archived_at=time.time())
+            self.dirty = True
+        
+        self._append_to_archive(archived)
+        logging.info(f"🗄️ В архив базы знаний перенесено {len(archived)} записей")
+        return len(archived)
+    
+    def _load_archive(self) -> Dict:
+        try:
+            if os.path.exists(self.archive_file):
+                with open(self.archive_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"❌ Ошибка загрузки архива базы знаний: {e}")
+        return {}
+    
+    def _append_to_archive(self, entries: Dict):
+        """Дописывает записи в архив (атомарная перезапись файла)"""
+        archive = self._load_archive()
+        archive.update(entries)
+        write_json_atomic(self.archive_file, archive)
+    
+    def run_maintenance(self) -> Dict:
+        """Слияние дублей и вытеснение редких ответов; сохраняет базу, если она изменилась"""
+        started = time.perf_counter()
+        merged = self.merge_duplicates()
+        archived = self.evict_cold_entries()
+        if merged or archived:
+            self._save_answers()
+        result = {
+            "merged": merged,
+            "archived": archived,
+            "total_answers": len(self.answers_cache),
+            "duration": round(time.perf_counter() - started, 2),
+        }
+        logging.info(f"🧹 Обслуживание базы знаний: {result}")
+        return result
+    
     def get_answer_variants(self, question: str) -> List[Dict]:
         """Определяет возможные варианты ответа для кнопок"""
         question_lower = question.lower()
@@ -238,8 +648,13 @@ class GPTService:
         """Возвращает статистику базы знаний"""
         return {
             "total_answers": len(self.answers_cache),
+            "archived_answers": len(self._load_archive()),
             "last_save": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.last_save_time)),
-            "file_size": os.path.getsize(self.answers_file) if os.path.exists(self.answers_file) else 0
+            "file_size": os.path.getsize(self.answers_file) if os.path.exists(self.answers_file) else 0,
+            "log_entries": self.kb_store.log_entries,
+            "completion_cache": completion_cache.get_stats(),
+            "coalesced_requests": gpt_single_flight.stats["shared"],
+            "providers": gpt_router.get_stats()
         }
 
 # Глобальный экземпляр сервиса
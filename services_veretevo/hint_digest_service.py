@@ -0,0 +1,70 @@
+"""
+Накопление GPT-подсказок директору в сводки по группам.
+
+Вместо отдельного личного сообщения на каждое сообщение группы подсказки
+копятся в течение окна (GPT_DIGEST_WINDOW) и отправляются одной сводкой
+с кнопками для каждого пункта. Срочные сообщения (по ключевым словам)
+в сводку не попадают и отправляются сразу. Отправкой и таймером окна
+занимается обработчик, здесь — только состояние.
+"""
+import threading
+import time
+from typing import Dict, List
+
+from config_veretevo.env import GPT_DIGEST_WINDOW
+
+DIGEST_MAX_ITEMS = 10  # больше пунктов — сводка отправляется досрочно (лимит кнопок и длины)
+URGENT_KEYWORDS = (
+    "срочно", "срочн", "немедленно", "авария", "аварий", "пожар", "потоп", "затоп",
+    "утечка", "критично", "sos", "🆘", "🔥",
+)
+
+
+def is_urgent(text: str) -> bool:
+    """Сообщение требует внимания директора сразу, без ожидания сводки"""
+    text_lower = (text or "").lower()
+    return any(keyword in text_lower for keyword in URGENT_KEYWORDS)
+
+
+class HintDigest:
+    """Подсказки, ожидающие отправки, по чатам"""
+
+    def __init__(self, window: int = GPT_DIGEST_WINDOW, max_items: int = DIGEST_MAX_ITEMS):
+        self.window = window
+        self.max_items = max_items
+        self.pending: Dict[int, List[Dict]] = {}
+        self.lock = threading.Lock()
+        self.stats = {"queued": 0, "digests": 0, "urgent": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def add(self, chat_id: int, item: Dict) -> bool:
+        """
+        Добавляет подсказку в окно чата
+
+        Returns:
+            True, если это первая подсказка окна (нужно запланировать отправку сводки)
+        """
+        with self.lock:
+            items = self.pending.setdefault(chat_id, [])
+            items.append({**item, "queued_at": time.time()})
+            self.stats["queued"] += 1
+            return len(items) == 1
+
+    def is_full(self, chat_id: int) -> bool:
+        with self.lock:
+            return len(self.pending.get(chat_id, [])) >= self.max_items
+
+    def pop(self, chat_id: int) -> List[Dict]:
+        """Забирает накопленные подсказки чата (окно закрывается)"""
+        with self.lock:
+            items = self.pending.pop(chat_id, [])
+            if items:
+                self.stats["digests"] += 1
+            return items
+
+
+# Глобальный экземпляр
+hint_digest = HintDigest()
@@ -6,6 +6,10 @@ from datetime import datetime, timedelta
 import asyncio
 from telegram import Bot
 from config_veretevo.constants import GENERAL_DIRECTOR_ID
+from services_veretevo.broadcast_service import BroadcastEngine, BroadcastStoreBusy
+
+# Один движок рассылок на каталог данных: задания и журнал общие для всех экземпляров сервиса
+_broadcast_engines: Dict[str, BroadcastEngine] = {}
 
 class NotificationService:
     """Сервис для автоматических уведомлений пользователей"""
@@ -35,11 +39,16 @@ class NotificationService:
     
     def _save_data(self):
         """Сохраняет данные о пользователях и уведомлениях"""
+        self._save_users()
+        self._save_notifications()
+
+    def _save_users(self):
         os.makedirs(self.data_dir, exist_ok=True)
-        
         with open(self.users_file, 'w', encoding='utf-8') as f:
             json.dump(self.active_users, f, ensure_ascii=False, indent=2)
-        
+
+    def _save_notifications(self):
+        os.makedirs(self.data_dir, exist_ok=True)
         with open(self.notifications_file, 'w', encoding='utf-8') as f:
             json.dump(self.notifications, f, ensure_ascii=False, indent=2)
     
@@ -69,7 +78,7 @@ class NotificationService:
                 self.active_users["users"][user_id_str]["last_name"] = last_name
         
         self.active_users["last_updated"] = current_time
-        self._save_data()
+        self._save_users()
         logging.info(f"[NOTIFICATION] Зарегистрирован пользователь {user_id}")
     
     def create_notification(self, title: str, message: str, notification_type: str = "update", 
@@ -90,77 +99,157 @@ class NotificationService:
         }
         
         self.notifications["notifications"].append(notification)
-        self._save_data()
+        self._save_notifications()
         
         logging.info(f"[NOTIFICATION] Создано уведомление #{notification_id}: {title}")
         return notification_id
     
-    async def send_notification_to_all(self, notification_id: int, exclude_users: List[int] = None):
-        """Отправляет уведомление всем активным пользователям"""
-        if exclude_users is None:
-            exclude_users = []
-        
-        notification = None
-        for n in self.notifications["notifications"]:
-            if n["id"] == notification_id:
-                notification = n
-                break
-        
-        if not notification:
-            logging.error(f"[NOTIFICATION] Уведомление #{notification_id} не найдено")
-            return
-        
-        exclude_users_str = [str(uid) for uid in exclude_users]
-        success_count = 0
-        error_count = 0
-        
-        for user_id_str, user_data in self.active_users["users"].items():
-            if user_id_str in exclude_users_str:
-                continue
-            
-            if not user_data.get("notifications_enabled", True):
-                continue
-            
-            try:
-                # Формируем сообщение
-                text = f"🔔 <b>{notification['title']}</b>\n\n{notification['message']}"
-                
-                if notification["requires_action"] and notification["action_text"]:
-                    text += f"\n\n{notification['action_text']}"
-                
-                await self.bot.send_message(
-                    chat_id=user_data["user_id"],
-                    text=text,
-                    parse_mode="HTML"
-                )
-                
-                # Отмечаем, что уведомление отправлено
-                if user_data["user_id"] not in notification["sent_to"]:
-                    notification["sent_to"].append(user_data["user_id"])
-                
-                success_count += 1
-                logging.debug(f"[NOTIFICATION] Уведомление #{notification_id} отправлено пользователю {user_data['user_id']}")
-                
-                # Небольшая задержка между отправками
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                error_count += 1
-                logging.error(f"[NOTIFICATION] Ошибка отправки уведомления #{notification_id} пользователю {user_data['user_id']}: {e}")
-        
-        self._save_data()
-        logging.info(f"[NOTIFICATION] Уведомление #{notification_id} отправлено: успешно {success_count}, ошибок {error_count}")
-    
-    async def send_update_notification(self, update_title: str, update_description: str):
-        """Отправляет уведомление об обновлении бота"""
-        notification_id = self.create_notification(
+    def create_update_notification(self, update_title: str, update_description: str) -> int:
+        """Создает уведомление об обновлении бота"""
+        return self.create_notification(
             title=update_title,
             message=update_description,
             notification_type="update",
             requires_action=True,
             action_text="Отправьте /start для обновления меню"
         )
-        
+
+    def _get_notification(self, notification_id: int) -> Optional[Dict]:
+        for notification in self.notifications["notifications"]:
+            if notification["id"] == notification_id:
+                return notification
+        return None
+
+    @staticmethod
+    def format_notification(notification: Dict) -> str:
+        text = f"🔔 <b>{notification['title']}</b>\n\n{notification['message']}"
+        if notification["requires_action"] and notification["action_text"]:
+            text += f"\n\n{notification['action_text']}"
+        return text
+
+    @property
+    def broadcasts(self) -> BroadcastEngine:
+        """Движок фоновых рассылок для каталога данных сервиса"""
+        key = os.path.abspath(self.data_dir)
+        engine = _broadcast_engines.get(key)
+        if engine is None:
+            data_dir = self.data_dir
+            engine = _broadcast_engines[key] = BroadcastEngine(
+                self.bot, data_dir,
+                on_finished=lambda notification_id, sent, blocked: NotificationService(
+                    None, data_dir).finish_broadcast(notification_id, sent, blocked),
+            )
+        elif self.bot is not None:
+            engine.bot = self.bot
+        return engine
+
+    def start_broadcast(self, notification_id: int, exclude_users: List[int] = None,
+                        progress_chat_id: Optional[int] = None,
+                        progress_message_id: Optional[int] = None) -> Optional[asyncio.Task]:
+        """
+        Запускает фоновую рассылку уведомления всем активным пользователям
+
+        Получатели, которым уведомление уже доставлено, пропускаются. Если
+        передано сообщение прогресса, оно обновляется по ходу рассылки.
+
+        Если рассылками каталога управляет другой процесс (скрипт запущен при
+        работающем боте), рассылка передается ему через request_broadcast.
+
+        Returns:
+            Задача рассылки или None, если уведомление не найдено или рассылка передана
+        """
+        notification = self._get_notification(notification_id)
+        if not notification:
+            logging.error(f"[NOTIFICATION] Уведомление #{notification_id} не найдено")
+            return None
+        try:
+            engine = self.broadcasts
+        except BroadcastStoreBusy:
+            self.request_broadcast(notification_id, exclude_users)
+            return None
+
+        skip = {str(uid) for uid in (exclude_users or [])} | {str(uid) for uid in notification["sent_to"]}
+        recipients = [
+            user_data["user_id"] for user_id_str, user_data in self.active_users["users"].items()
+            if user_id_str not in skip and user_data.get("notifications_enabled", True)
+        ]
+        return engine.start(notification_id, self.format_notification(notification), recipients,
+                            progress_chat_id, progress_message_id)
+
+    def request_broadcast(self, notification_id: int, exclude_users: List[int] = None):
+        """Просит процесс, который ведет рассылки (бот), разослать уведомление"""
+        notification = self._get_notification(notification_id)
+        notification["broadcast_requested"] = {
+            "exclude_users": exclude_users or [],
+            "requested_at": datetime.now().isoformat(),
+        }
+        self._save_notifications()
+        logging.info(f"[NOTIFICATION] Рассылка #{notification_id} передана запущенному боту")
+
+    def is_broadcast_requested(self, notification_id: int) -> bool:
+        notification = self._get_notification(notification_id)
+        return bool(notification and "broadcast_requested" in notification)
+
+    def start_requested_broadcasts(self) -> int:
+        """Запускает рассылки, переданные через request_broadcast"""
+        requests = {}
+        for notification in self.notifications["notifications"]:
+            if "broadcast_requested" in notification:
+                requests[notification["id"]] = notification.pop("broadcast_requested")
+        if not requests:
+            return 0
+        self._save_notifications()
+        for notification_id, request in requests.items():
+            self.start_broadcast(notification_id, request["exclude_users"])
+        return len(requests)
+
+    async def send_notification_to_all(self, notification_id: int, exclude_users: List[int] = None):
+        """Отправляет уведомление всем активным пользователям и ждет окончания рассылки"""
+        task = self.start_broadcast(notification_id, exclude_users)
+        if task is None:
+            return None
+        counts = await task
+        self._load_data()
+        return counts
+
+    def resume_broadcasts(self) -> int:
+        """Продолжает рассылки, прерванные перезапуском бота"""
+        return self.broadcasts.resume()
+
+    def finish_broadcast(self, notification_id: int, sent: List[int], blocked: List[int]):
+        """Итоги рассылки: доставленные получатели и заблокировавшие бота пользователи"""
+        self.record_delivery(notification_id, sent)
+        self.mark_users_inactive(blocked)
+
+    def mark_users_inactive(self, user_ids: List[int]):
+        """Отключает уведомления пользователям, заблокировавшим бота (одна запись файла)"""
+        blocked_at = datetime.now().isoformat()
+        changed = []
+        for user_id in user_ids:
+            user_data = self.active_users["users"].get(str(user_id))
+            if not user_data or not user_data.get("notifications_enabled", True):
+                continue
+            user_data["notifications_enabled"] = False
+            user_data["blocked_at"] = blocked_at
+            changed.append(user_id)
+        if not changed:
+            return
+        self._save_users()
+        logging.info(f"[NOTIFICATION] Бота заблокировали {len(changed)} пользователей — уведомления отключены")
+
+    def record_delivery(self, notification_id: int, user_ids: List[int]):
+        """Отмечает получателей, которым уведомление доставлено"""
+        notification = self._get_notification(notification_id)
+        if not notification:
+            return
+        sent_to = set(notification["sent_to"])
+        notification["sent_to"].extend(uid for uid in user_ids if uid not in sent_to)
+        self._save_notifications()
+        logging.info(f"[NOTIFICATION] Уведомление #{notification_id} доставлено {len(user_ids)} пользователям")
+
+    async def send_update_notification(self, update_title: str, update_description: str):
+        """Отправляет уведомление об обновлении бота"""
+        notification_id = self.create_update_notification(update_title, update_description)
         await self.send_notification_to_all(notification_id)
         return notification_id
     
@@ -194,7 +283,7 @@ class NotificationService:
             del self.active_users["users"][user_id_str]
         
         if users_to_remove:
-            self._save_data()
+            self._save_users()
             logging.info(f"[NOTIFICATION] Удалено {len(users_to_remove)} неактивных пользователей")
         
         return len(users_to_remove) 
\ No newline at end of file
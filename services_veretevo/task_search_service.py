@@ -0,0 +1,200 @@
+"""
+Полнотекстовый поиск задач: инвертированный индекс BM25 по тексту, тегам,
+категории, автору и исполнителю.
+
+Индекс синхронизируется с глобальным списком задач при каждой загрузке и
+сохранении (task_service): для каждой задачи хранится индексируемый текст,
+и переиндексируются только задачи, у которых он изменился. Завершенные задачи,
+которые cleanup_finished_tasks убирает из tasks.json, дописываются в архив
+(JSONL) и остаются в индексе. Поиск — по словоформам, по началу слова и с
+опечатками (триграммы), с фильтрами по отделу, статусу и дате создания.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import services_veretevo.department_service as department_service
+from config_veretevo.constants import TASKS_ARCHIVE_FILE
+from utils_veretevo.text_index import BM25Index
+
+SEARCH_LIMIT = 10
+# Доля терминов запроса (слов и триграмм), которая должна найтись в задаче
+MIN_COVERAGE = 0.4
+
+FILTER_DEPARTMENT = "отдел"
+FILTER_STATUS = "статус"
+FILTER_DATE_FROM = "с"
+FILTER_DATE_TO = "по"
+
+
+def task_document(task: Dict[str, Any]) -> str:
+    """Текст задачи для индекса: текст, теги, категория, автор и исполнитель"""
+    parts = [
+        task.get("text") or "",
+        " ".join(task.get("tags") or []),
+        task.get("category") or "",
+        task.get("author_name") or "",
+        task.get("assistant_name") or "",
+    ]
+    return " ".join(part for part in parts if part)
+
+
+def parse_find_query(text: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Разбирает запрос /find: слова вида "отдел:охрана", "статус:в_работе",
+    "с:2025-01-01", "по:2025-01-31" — фильтры, остальное — текст поиска.
+    """
+    words, filters = [], {}
+    for word in text.split():
+        name, sep, value = word.partition(":")
+        if sep and value and name.lower() in (FILTER_DEPARTMENT, FILTER_STATUS, FILTER_DATE_FROM, FILTER_DATE_TO):
+            filters[name.lower()] = value.replace("_", " ").lower()
+        else:
+            words.append(word)
+    return " ".join(words), filters
+
+
+def resolve_department(value: str) -> Optional[str]:
+    """Ключ отдела по ключу или началу названия"""
+    value = value.lower()
+    for key, dep in department_service.DEPARTMENTS.items():
+        if value == key.lower() or str(dep.get("name", "")).lower().startswith(value):
+            return key
+    return None
+
+
+class TaskSearchIndex:
+    """Индекс задач из tasks.json и архива"""
+
+    def __init__(self, archive_file: Optional[str] = TASKS_ARCHIVE_FILE):
+        self.archive_file = archive_file
+        self.index = BM25Index()
+        self.tasks: Dict[int, Dict[str, Any]] = {}
+        self.documents: Dict[int, str] = {}
+        self.archived: set = set()
+        self._archive_loaded = False
+        self._lock = threading.RLock()
+
+    def _index_task(self, task: Dict[str, Any]):
+        task_id = task.get("id")
+        document = task_document(task)
+        self.tasks[task_id] = task
+        if self.documents.get(task_id) != document:
+            self.documents[task_id] = document
+            self.index.add(task_id, document)
+
+    def _drop_task(self, task_id: int):
+        self.tasks.pop(task_id, None)
+        self.documents.pop(task_id, None)
+        self.archived.discard(task_id)
+        self.index.remove(task_id)
+
+    def sync(self, tasks: Iterable[Dict[str, Any]]):
+        """Приводит индекс к списку активных задач; архив не трогает"""
+        with self._lock:
+            current = set()
+            for task in tasks:
+                if task.get("id") is None:
+                    continue
+                current.add(task["id"])
+                self.archived.discard(task["id"])
+                self._index_task(task)
+            for task_id in [t for t in self.tasks if t not in current and t not in self.archived]:
+                self._drop_task(task_id)
+
+    def _load_archive(self):
+        if self._archive_loaded:
+            return
+        self._archive_loaded = True
+        if not self.archive_file or not os.path.exists(self.archive_file):
+            return
+        loaded = 0
+        with open(self.archive_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    task = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if task.get("id") is not None and task["id"] not in self.tasks:
+                    self.archived.add(task["id"])
+                    self._index_task(task)
+                    loaded += 1
+        logging.info(f"🗄️ В индекс поиска загружено {loaded} архивных задач")
+
+    def archive(self, tasks: List[Dict[str, Any]]):
+        """Дописывает задачи в архив и оставляет их в индексе"""
+        if not tasks:
+            return
+        with self._lock:
+            if self.archive_file:
+                try:
+                    os.makedirs(os.path.dirname(self.archive_file) or ".", exist_ok=True)
+                    with open(self.archive_file, "a", encoding="utf-8") as f:
+                        for task in tasks:
+                            f.write(json.dumps(task, ensure_ascii=False) + "\n")
+                except Exception as e:
+                    logging.error(f"❌ Ошибка записи архива задач: {e}")
+            for task in tasks:
+                self.archived.add(task.get("id"))
+                self._index_task(task)
+
+    def is_archived(self, task_id: int) -> bool:
+        return task_id in self.archived
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT, department: Optional[str] = None,
+               status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               visible: Optional[Callable[[Dict[str, Any]], bool]] = None,
+               include_archive: bool = True) -> List[Dict[str, Any]]:
+        """
+        Ищет задачи по тексту с фильтрами
+
+        Args:
+            query: Текст запроса; пустой — последние задачи по фильтрам
+            limit: Сколько задач вернуть
+            department: Ключ отдела
+            status: Статус или его часть ("работ" найдет "в работе")
+            date_from, date_to: Границы даты создания, YYYY-MM-DD включительно
+            visible: Дополнительная проверка доступа к задаче
+            include_archive: Искать и в архиве
+
+        Returns:
+            Задачи по убыванию релевантности (без текста — по убыванию даты)
+        """
+        with self._lock:
+            if include_archive:
+                self._load_archive()
+
+            def accept(task_id) -> bool:
+                task = self.tasks.get(task_id)
+                if task is None or (not include_archive and task_id in self.archived):
+                    return False
+                if department and task.get("department") != department:
+                    return False
+                if status and status not in str(task.get("status", "")).lower():
+                    return False
+                created = str(task.get("created_at", ""))[:10]
+                if date_from and created < date_from:
+                    return False
+                if date_to and created > date_to:
+                    return False
+                return visible is None or visible(task)
+
+            filtered = department or status or date_from or date_to or visible or not include_archive
+            if not query.strip():
+                found = [task for task_id, task in self.tasks.items() if accept(task_id)]
+                found.sort(key=lambda task: str(task.get("created_at", "")), reverse=True)
+                return found[:limit]
+
+            # Сначала только слова и их начала; триграммы (опечатки) — если этого мало
+            accept_id = accept if filtered else None
+            results = self.index.search(query, top_k=limit, prefix=True, accept=accept_id,
+                                        min_coverage=MIN_COVERAGE, ngrams=False)
+            if len(results) < limit:
+                results = self.index.search(query, top_k=limit, prefix=True, accept=accept_id,
+                                            min_coverage=MIN_COVERAGE)
+            return [self.tasks[task_id] for task_id, _ in results]
+
+
+task_search_index = TaskSearchIndex()
@@ -7,6 +7,7 @@ from dataclasses import dataclass, field
 from config_veretevo.constants import TASKS_FILE, TASK_STATUS_NEW, TASK_STATUS_ACTIVE, TASK_STATUS_IN_PROGRESS, TASK_STATUS_FINISHED, TASK_STATUS_CANCELLED, GENERAL_DIRECTOR_ID
 import logging
 import os
+from services_veretevo.task_search_service import task_search_index
 
 @dataclass
 class Task:
@@ -58,6 +59,16 @@ tasks: List[Dict[str, Any]] = []
 Глобальный список задач. Каждый элемент — словарь с данными задачи.
 """
 
+_tasks_file_mtime: Optional[float] = None
+
+
+def _remember_tasks_file_mtime() -> None:
+    global _tasks_file_mtime
+    try:
+        _tasks_file_mtime = os.path.getmtime(TASKS_FILE)
+    except OSError:
+        _tasks_file_mtime = None
+
 def load_tasks() -> None:
     """
     Загружает задачи из JSON-файла в глобальный список tasks.
@@ -83,6 +94,18 @@ def load_tasks() -> None:
     except Exception as e:
         logging.error(f"Ошибка загрузки задач: {e}")
         tasks = []
+    _remember_tasks_file_mtime()
+    # Переиндексируются только изменившиеся задачи
+    task_search_index.sync(tasks)
+
+def reload_tasks_if_changed() -> None:
+    """Перечитывает tasks.json, только если файл изменился после последней загрузки или сохранения"""
+    try:
+        mtime = os.path.getmtime(TASKS_FILE)
+    except OSError:
+        mtime = None
+    if _tasks_file_mtime is None or mtime != _tasks_file_mtime:
+        load_tasks()
 
 def notify_director_critical_loss(bot, prev_count, new_count):
     try:
@@ -124,6 +147,8 @@ def save_tasks(bot=None) -> None:
         
         with open(TASKS_FILE, "w", encoding="utf-8") as f:
             json.dump(tasks, f, ensure_ascii=False, indent=2)
+        _remember_tasks_file_mtime()
+        task_search_index.sync(tasks)
     except Exception as e:
         logging.error(f"Ошибка сохранения задач: {e}")
         if bot:
@@ -246,6 +271,9 @@ def cleanup_finished_tasks() -> int:
                         if task_date < week_ago:
                             tasks_to_remove.append(i)
     
+    # Удаленные задачи уходят в архив и остаются доступны поиску (/find)
+    task_search_index.archive([tasks[i] for i in tasks_to_remove])
+    
     # Удаляем задачи в обратном порядке
     for i in reversed(tasks_to_remove):
         removed_task = tasks.pop(i)
@@ -0,0 +1,181 @@
+"""
+Модуль для отложенной обработки голосовых сообщений.
+
+Каждое голосовое сообщение сохраняется как задание (file_id, чат, сообщение-заглушка,
+состояние) в JSON-файле. Фоновый обработчик забирает задания, повторяет неудачные
+попытки с экспоненциальной задержкой и переживает перезапуск бота.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from config_veretevo.constants import VOICE_JOBS_FILE
+from utils_veretevo.json_files import write_json_atomic
+
+# Состояния задания
+VOICE_JOB_PENDING = "pending"
+VOICE_JOB_PROCESSING = "processing"
+VOICE_JOB_DONE = "done"
+VOICE_JOB_FAILED = "failed"
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_DELAY = 10  # секунд, удваивается с каждой попыткой
+RETRY_MAX_DELAY = 300
+JOB_TTL = 24 * 3600  # задания старше суток не повторяем
+FINISHED_RETENTION = 24 * 3600  # сколько хранить завершенные задания
+
+
+class VoiceJobStore:
+    """Хранилище заданий на распознавание голосовых сообщений"""
+
+    def __init__(self, jobs_file: str = VOICE_JOBS_FILE):
+        self.jobs_file = jobs_file
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Загружает задания с диска"""
+        try:
+            if os.path.exists(self.jobs_file):
+                with open(self.jobs_file, 'r', encoding='utf-8') as f:
+                    self.jobs = json.load(f)
+                logging.info(f"[VOICE JOBS] Загружено {len(self.jobs)} заданий")
+        except Exception as e:
+            logging.error(f"[VOICE JOBS] Ошибка загрузки заданий: {e}")
+            self.jobs = {}
+
+    def _save(self):
+        """Атомарно сохраняет задания на диск (вызывать под self.lock)"""
+        try:
+            write_json_atomic(self.jobs_file, self.jobs)
+        except Exception as e:
+            logging.error(f"[VOICE JOBS] Ошибка сохранения заданий: {e}")
+
+    def create_job(self, file_id: str, chat_id: int, chat_type: str, user_id: Optional[int] = None,
+                   reply_to_message_id: Optional[int] = None,
+                   placeholder_message_id: Optional[int] = None) -> Dict[str, Any]:
+        """Создает новое задание и сразу сохраняет его на диск"""
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "file_id": file_id,
+            "chat_id": chat_id,
+            "chat_type": chat_type,
+            "user_id": user_id,
+            "reply_to_message_id": reply_to_message_id,
+            "placeholder_message_id": placeholder_message_id,
+            "state": VOICE_JOB_PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now,
+            "error": None,
+        }
+        with self.lock:
+            self.jobs[job["id"]] = job
+            self._save()
+        return dict(job)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Возвращает копию задания по ID"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_due_jobs(self, limit: int = 10, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Возвращает задания, которые пора обработать, в порядке создания"""
+        now = now or time.time()
+        with self.lock:
+            due = [job for job in self.jobs.values()
+                   if job["state"] == VOICE_JOB_PENDING and job["next_attempt_at"] <= now]
+            due.sort(key=lambda job: job["created_at"])
+            return [dict(job) for job in due[:limit]]
+
+    def _update(self, job_id: str, **fields) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            job.update(fields)
+            job["updated_at"] = time.time()
+            self._save()
+            return dict(job)
+
+    def mark_processing(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Отмечает начало очередной попытки"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            job["state"] = VOICE_JOB_PROCESSING
+            job["attempts"] += 1
+            job["updated_at"] = time.time()
+            self._save()
+            return dict(job)
+
+    def mark_done(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Отмечает успешное завершение задания"""
+        return self._update(job_id, state=VOICE_JOB_DONE, error=None)
+
+    def mark_failed(self, job_id: str, error: str = "") -> Optional[Dict[str, Any]]:
+        """Отмечает окончательную неудачу"""
+        return self._update(job_id, state=VOICE_JOB_FAILED, error=error)
+
+    def schedule_retry(self, job_id: str, error: str = "", now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Планирует повторную попытку с экспоненциальной задержкой.
+        Если попытки исчерпаны или задание устарело — помечает его как failed.
+        """
+        now = now or time.time()
+        job = self.get_job(job_id)
+        if not job:
+            return None
+        if job["attempts"] >= MAX_ATTEMPTS or now - job["created_at"] > JOB_TTL:
+            return self.mark_failed(job_id, error)
+        delay = min(RETRY_BASE_DELAY * 2 ** (job["attempts"] - 1), RETRY_MAX_DELAY)
+        return self._update(job_id, state=VOICE_JOB_PENDING, next_attempt_at=now + delay, error=error)
+
+    def recover_interrupted(self) -> int:
+        """Возвращает в очередь задания, прерванные перезапуском бота"""
+        recovered = 0
+        with self.lock:
+            for job in self.jobs.values():
+                if job["state"] == VOICE_JOB_PROCESSING:
+                    job["state"] = VOICE_JOB_PENDING
+                    job["next_attempt_at"] = time.time()
+                    recovered += 1
+            if recovered:
+                self._save()
+        if recovered:
+            logging.info(f"[VOICE JOBS] Возвращено в очередь {recovered} прерванных заданий")
+        return recovered
+
+    def cleanup_finished(self, retention: int = FINISHED_RETENTION, now: Optional[float] = None) -> int:
+        """Удаляет давно завершенные задания, чтобы файл не разрастался"""
+        now = now or time.time()
+        with self.lock:
+            stale = [job_id for job_id, job in self.jobs.items()
+                     if job["state"] in (VOICE_JOB_DONE, VOICE_JOB_FAILED)
+                     and now - job["updated_at"] > retention]
+            for job_id in stale:
+                del self.jobs[job_id]
+            if stale:
+                self._save()
+        return len(stale)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Количество заданий по состояниям"""
+        stats = {VOICE_JOB_PENDING: 0, VOICE_JOB_PROCESSING: 0, VOICE_JOB_DONE: 0, VOICE_JOB_FAILED: 0}
+        with self.lock:
+            for job in self.jobs.values():
+                stats[job["state"]] = stats.get(job["state"], 0) + 1
+        return stats
+
+
+# Глобальный экземпляр хранилища
+voice_job_store = VoiceJobStore()
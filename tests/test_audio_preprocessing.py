@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Тесты векторизованной предобработки аудио (сравнение с pydub)
+"""
+
+import numpy as np
+from pydub import AudioSegment
+
+from utils_veretevo.audio_preprocessing import (
+    SAMPLE_RATE, normalize_peak, detect_nonsilent, strip_silence, preprocess_samples
+)
+from utils_veretevo.synthetic_audio import make_speech_like
+from pydub.silence import detect_nonsilent as pydub_detect_nonsilent
+
+
+def to_segment(samples: np.ndarray) -> AudioSegment:
+    return AudioSegment(samples.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+
+
+def to_array(segment: AudioSegment) -> np.ndarray:
+    return np.frombuffer(segment.raw_data, dtype=np.int16)
+
+
+def test_normalize_matches_pydub():
+    """Пиковая нормализация совпадает с pydub с точностью до округления"""
+    samples = make_speech_like(2, seed=1) // 4
+    expected = to_array(to_segment(samples).normalize())
+    result = normalize_peak(samples)
+    assert result.shape == expected.shape
+    assert np.max(np.abs(result.astype(np.int32) - expected)) <= 1
+
+
+def test_detect_nonsilent_matches_pydub():
+    """Границы речи совпадают с pydub.silence.detect_nonsilent"""
+    samples = normalize_peak(make_speech_like(8, seed=2))
+    expected = pydub_detect_nonsilent(to_segment(samples), 500, -40)
+    assert detect_nonsilent(samples, SAMPLE_RATE, 500, -40) == expected
+
+
+def test_preprocess_matches_pydub_chain():
+    """Полная цепочка normalize() + strip_silence() совпадает в пределах допуска"""
+    samples = make_speech_like(10, seed=3)
+    expected = to_array(to_segment(samples).normalize().strip_silence(silence_len=500, silence_thresh=-40))
+    result = preprocess_samples(samples)
+    assert result.shape == expected.shape
+    assert np.max(np.abs(result.astype(np.int32) - expected)) <= 8
+
+
+def test_strip_silence_on_silent_and_short_audio():
+    """Полная тишина обрезается целиком, короткий звук не трогается"""
+    silent = np.zeros(SAMPLE_RATE, dtype=np.int16)
+    assert strip_silence(silent).size == 0
+    assert to_array(to_segment(silent).strip_silence(silence_len=500, silence_thresh=-40)).size == 0
+
+    short = make_speech_like(0.3, seed=4)
+    assert np.array_equal(strip_silence(short), short)
+
+
+def test_synthetic_speech_has_phrases_and_pauses():
+    """Синтетический сигнал для бенчмарков содержит несколько фраз с паузами"""
+    samples = make_speech_like(10, seed=5)
+    assert samples.dtype == np.int16 and samples.size == 10 * SAMPLE_RATE
+    assert len(detect_nonsilent(normalize_peak(samples))) >= 3
+    assert np.array_equal(samples, make_speech_like(10, seed=5))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Тесты автоответа из базы знаний в группах отделов
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from handlers_veretevo import gpt_handlers
+from services_veretevo import department_service
+from services_veretevo.chat_history_service import ChatHistory
+from services_veretevo.gpt_service import AUTO_ANSWER_MAX_UNDOS, GPTService
+from config_veretevo.constants import GENERAL_DIRECTOR_ID
+
+QUESTION = "Где взять ключи от склада?"
+ANSWER = "Ключи у охраны на посту."
+
+
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(GPTService, "_start_autosave", lambda self: None)
+    service = GPTService()
+    service.answers_file = str(tmp_path / "answers.json")
+    service.archive_file = str(tmp_path / "answers_archive.json")
+    service.answers_cache = {}
+    service._rebuild_index()
+    service.save_answer_template(QUESTION, ANSWER, "security")
+    return service
+
+
+def test_only_near_identical_questions_of_same_department_are_auto_answered(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    match = service.find_auto_answer("где взять ключи от склада", "security")
+    assert match["answer"] == ANSWER
+    assert service.answers_cache[QUESTION]["hits"] == 1
+
+    # Похоже, но не настолько, чтобы отвечать без директора
+    assert service.find_similar_question("Где взять ключи от подвала и склада?") is not None
+    assert service.find_auto_answer("Где взять ключи от подвала и склада?", "security") is None
+    # Чужой отдел и слишком короткое сообщение
+    assert service.find_auto_answer(QUESTION, "finance") is None
+    assert service.find_auto_answer("ключи?", "security") is None
+
+    for _ in range(AUTO_ANSWER_MAX_UNDOS):
+        service.record_auto_answer_undo(QUESTION)
+    assert service.find_auto_answer(QUESTION, "security") is None
+
+
+def make_group_update(message_id, text, chat_id=-1002295933154):
+    message = SimpleNamespace(
+        chat=SimpleNamespace(id=chat_id, type="supergroup", title="Охрана"),
+        from_user=SimpleNamespace(id=1, is_bot=False, first_name="Иван", last_name="", username="ivan"),
+        message_id=message_id,
+        text=text,
+        reply_to_message=None,
+        message_thread_id=None,
+    )
+    return SimpleNamespace(message=message)
+
+
+@pytest.mark.asyncio
+async def test_auto_answer_and_undo(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    monkeypatch.setattr(department_service, "DEPARTMENTS", {"security": {"name": "Охрана", "auto_answer": True}})
+    monkeypatch.setattr(department_service, "save_departments", lambda: None)
+    bot = SimpleNamespace(
+        send_message=AsyncMock(side_effect=[SimpleNamespace(message_id=900), SimpleNamespace(message_id=901),
+                                            SimpleNamespace(message_id=902)]),
+        delete_message=AsyncMock(),
+        get_chat=AsyncMock(return_value=SimpleNamespace(title="Охрана")),
+    )
+    context = SimpleNamespace(bot=bot, job_queue=None)
+    with patch.object(gpt_handlers, "gpt_service", service), \
+            patch.object(gpt_handlers, "chat_history", ChatHistory(spill_file=None)):
+        await gpt_handlers.handle_message_in_group(make_group_update(10, "где взять ключи от склада"), context)
+
+        group_reply, director_log = bot.send_message.call_args_list
+        assert group_reply.kwargs["chat_id"] == -1002295933154
+        assert group_reply.kwargs["reply_to_message_id"] == 10
+        assert ANSWER in group_reply.kwargs["text"]
+        assert director_log.kwargs["chat_id"] == GENERAL_DIRECTOR_ID
+        undo_data = director_log.kwargs["reply_markup"].inline_keyboard[0][0].callback_data
+        assert undo_data == "gpt_undo:-1002295933154:900"
+
+        query = SimpleNamespace(
+            data=undo_data,
+            from_user=SimpleNamespace(id=GENERAL_DIRECTOR_ID),
+            message=SimpleNamespace(text=director_log.kwargs["text"]),
+            answer=AsyncMock(),
+            edit_message_text=AsyncMock(),
+        )
+        await gpt_handlers.handle_auto_answer_undo(SimpleNamespace(callback_query=query), context)
+
+    bot.delete_message.assert_called_once_with(chat_id=-1002295933154, message_id=900)
+    assert service.answers_cache[QUESTION]["auto_undos"] == 1
+    # Сообщение вернулось директору обычной подсказкой
+    hint = bot.send_message.call_args.kwargs
+    assert hint["chat_id"] == GENERAL_DIRECTOR_ID and "где взять ключи от склада" in hint["text"]
+    assert hint["reply_markup"].inline_keyboard[0][0].callback_data == "gpt_gen:10:-1002295933154"
+
+
+@pytest.mark.asyncio
+async def test_auto_answer_is_opt_in(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    monkeypatch.setattr(department_service, "DEPARTMENTS", {"security": {"name": "Охрана"}})
+    bot = SimpleNamespace(send_message=AsyncMock())
+    with patch.object(gpt_handlers, "gpt_service", service):
+        answered = await gpt_handlers.try_auto_answer(
+            SimpleNamespace(bot=bot), make_group_update(10, QUESTION).message, "security"
+        )
+    assert answered is False
+    bot.send_message.assert_not_called()
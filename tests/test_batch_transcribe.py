@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Тест пакетной транскрипции против локальной заглушки SpeechKit
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils_veretevo.speechkit_stub import SpeechKitStub
+from utils_veretevo.yandex_speechkit import YandexSpeechKitTranscriber
+
+SCRIPT_PATH = Path(__file__).parent.parent / "scripts" / "batch_transcribe.py"
+spec = importlib.util.spec_from_file_location("batch_transcribe", SCRIPT_PATH)
+batch_transcribe = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(batch_transcribe)
+
+
+def write_wav(path: Path, seconds: float, freq: float = 220):
+    t = np.arange(int(16000 * seconds)) / 16000
+    samples = (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(samples.tobytes())
+
+
+def read_records(path: Path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_load_processed_skips_broken_tail(tmp_path):
+    """Недописанная последняя строка не мешает продолжению"""
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        '{"path": "a.ogg", "status": "ok", "text": "1"}\n'
+        '{"path": "b.ogg", "status": "error", "error": "x"}\n'
+        '{"path": "c.og', encoding="utf-8"
+    )
+    assert batch_transcribe.load_processed(output, retry_failed=False) == {"a.ogg", "b.ogg"}
+    assert batch_transcribe.load_processed(output, retry_failed=True) == {"a.ogg"}
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="нужен ffmpeg")
+def test_batch_run_and_resume(tmp_path):
+    """Файлы распознаются через заглушку, повторный запуск ничего не отправляет"""
+    archive = tmp_path / "archive"
+    write_wav(archive / "a.wav", 1.0)
+    write_wav(archive / "chat" / "b.wav", 1.5, freq=330)
+    (archive / "notes.txt").write_text("не аудио")
+    output = tmp_path / "out.jsonl"
+
+    with SpeechKitStub(text=lambda body: f"{len(body) > 0}") as stub:
+        transcriber = YandexSpeechKitTranscriber(api_key="stub", folder_id="stub", base_url=stub.base_url)
+
+        def make_batch():
+            return batch_transcribe.BatchTranscriber(transcriber, output, archive, workers=2, concurrency=2, rate=50)
+
+        stats = asyncio.run(make_batch().run())
+        assert stats == {"ok": 2, "error": 0, "skipped": 0}
+        assert stub.requests_count == 2
+
+        stats = asyncio.run(make_batch().run())
+        assert stats == {"ok": 0, "error": 0, "skipped": 2}
+        assert stub.requests_count == 2
+
+    records = read_records(output)
+    assert sorted(r["path"] for r in records) == ["a.wav", "chat/b.wav"]
+    assert all(r["status"] == "ok" and r["text"] == "True" for r in records)
+
+
+def test_cli_runs_without_bot_settings(tmp_path):
+    """Скрипту не нужны TELEGRAM_TOKEN и ASSISTANTS_CHAT_ID"""
+    env = {k: v for k, v in os.environ.items() if k not in ("TELEGRAM_TOKEN", "ASSISTANTS_CHAT_ID")}
+    result = subprocess.run([sys.executable, str(SCRIPT_PATH), str(tmp_path), "--api-key", "stub",
+                             "--folder-id", "stub", "--output", str(tmp_path / "out.jsonl")],
+                            env=env, cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "успешно 0" in result.stdout
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Тесты фоновых рассылок уведомлений: лимиты Telegram, блокировки, возобновление
+"""
+
+import fcntl
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from services_veretevo import notification_service as notification_module
+from services_veretevo.broadcast_service import BROADCAST_DONE, PENDING, SENT
+from services_veretevo.notification_service import NotificationService
+
+
+class FakeBot:
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+        self.edits = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        error = self.errors.get(chat_id)
+        if isinstance(error, list):
+            error = error.pop(0) if error else None
+        if error:
+            raise error
+        self.sent.append(chat_id)
+
+    async def edit_message_text(self, chat_id, message_id, text):
+        self.edits.append(text)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(notification_module, "_broadcast_engines", {})
+    users = {str(uid): {"user_id": uid, "last_activity": "2025-01-01T00:00:00", "notifications_enabled": True}
+             for uid in range(1, 7)}
+    users["6"]["notifications_enabled"] = False
+    (tmp_path / "active_users.json").write_text(json.dumps({"users": users}), encoding="utf-8")
+    return str(tmp_path)
+
+
+def read(data_dir, name):
+    with open(f"{data_dir}/{name}", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_handles_retry_after_and_blocked_users(data_dir):
+    bot = FakeBot({3: Forbidden("bot was blocked by the user"), 4: [RetryAfter(0)],
+                   5: BadRequest("Chat not found")})
+    service = NotificationService(bot, data_dir)
+    notification_id = service.create_notification("Обновление", "Новое меню")
+
+    counts = await service.send_notification_to_all(notification_id, exclude_users=[2])
+    assert sorted(bot.sent) == [1, 4]
+    assert counts == {".": 0, "+": 2, "x": 1, "!": 1}
+
+    users = read(data_dir, "active_users.json")["users"]
+    assert users["3"]["notifications_enabled"] is False and "blocked_at" in users["3"]
+    assert sorted(read(data_dir, "notifications.json")["notifications"][0]["sent_to"]) == [1, 4]
+    record = read(data_dir, "broadcasts.json")[str(notification_id)]
+    assert record["counts"] == counts and "recipients" not in record and "state" not in record
+
+    # Повторная рассылка не трогает уже получивших и заблокировавших
+    bot.sent.clear()
+    await NotificationService(bot, data_dir).send_notification_to_all(notification_id)
+    assert bot.sent == [2]
+
+
+@pytest.mark.asyncio
+async def test_blocked_users_are_saved_once_per_broadcast(data_dir, monkeypatch):
+    bot = FakeBot({uid: Forbidden("bot was blocked by the user") for uid in (1, 3, 5)})
+    service = NotificationService(bot, data_dir)
+    notification_id = service.create_notification("Обновление", "Новое меню")
+    saves = []
+    original_save = NotificationService._save_users
+    monkeypatch.setattr(NotificationService, "_save_users", lambda self: (saves.append(1), original_save(self)))
+
+    await service.send_notification_to_all(notification_id)
+
+    assert len(saves) == 1
+    users = read(data_dir, "active_users.json")["users"]
+    assert [uid for uid in ("1", "2", "3", "4", "5") if not users[uid]["notifications_enabled"]] == ["1", "3", "5"]
+
+
+@pytest.mark.asyncio
+async def test_interrupted_broadcast_resumes_from_journal(data_dir, monkeypatch):
+    service = NotificationService(FakeBot(), data_dir)
+    notification_id = service.create_notification("Важно", "Плановые работы")
+    store = service.broadcasts.store
+    store.create(str(notification_id), {
+        "notification_id": notification_id, "text": "Плановые работы", "recipients": [1, 2, 3, 4, 5],
+        "state": "", "status": "running", "progress_chat_id": 100, "progress_message_id": 7,
+        "started_at": "2025-01-01T00:00:00", "finished_at": None,
+    })
+    # До падения успели доставить двоим: результаты есть только в журнале
+    store.mark(str(notification_id), 0, SENT)
+    store.mark(str(notification_id), 3, SENT)
+
+    monkeypatch.setattr(notification_module, "_broadcast_engines", {})
+    bot = FakeBot()
+    restarted = NotificationService(bot, data_dir)
+    assert restarted.broadcasts.store.states[str(notification_id)].decode() == f"+{PENDING}{PENDING}+{PENDING}"
+    assert restarted.resume_broadcasts() == 1
+    await restarted.broadcasts.tasks[str(notification_id)]
+
+    assert sorted(bot.sent) == [2, 3, 5]
+    record = read(data_dir, "broadcasts.json")[str(notification_id)]
+    assert record["status"] == BROADCAST_DONE and record["counts"][SENT] == 5
+    assert bot.edits[-1].startswith(f"✅ Рассылка #{notification_id} завершена: 5/5")
+
+
+@pytest.mark.asyncio
+async def test_notify_all_starts_background_broadcast(data_dir, monkeypatch):
+    from handlers_veretevo import menu
+
+    bot = FakeBot()
+    monkeypatch.setattr(menu, "NotificationService", lambda b: NotificationService(b, data_dir))
+    replies = []
+
+    async def reply_text(text):
+        replies.append(text)
+        return SimpleNamespace(chat_id=100, message_id=len(replies))
+
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=menu.GENERAL_DIRECTOR_ID),
+                             message=SimpleNamespace(reply_text=reply_text))
+    context = SimpleNamespace(bot=bot, args=["Важно", "Плановые", "работы"])
+    await menu.notify_all(update, context)
+
+    assert replies == ["📣 Рассылка #1: подготовка..."]
+    engine = notification_module._broadcast_engines[next(iter(notification_module._broadcast_engines))]
+    await engine.tasks["1"]
+    assert sorted(bot.sent) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_script_hands_broadcast_to_running_bot(data_dir):
+    # Бот держит блокировку рассылок — другой процесс не пишет снимок и журнал
+    with open(f"{data_dir}/broadcasts.lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        script = NotificationService(FakeBot(), data_dir)
+        notification_id = script.create_notification("Обновление", "Новое меню")
+        assert await script.send_notification_to_all(notification_id, exclude_users=[2]) is None
+        assert script.is_broadcast_requested(notification_id)
+        assert not os.path.exists(f"{data_dir}/broadcasts.json")
+
+    bot = FakeBot()
+    assert NotificationService(bot, data_dir).start_requested_broadcasts() == 1
+    engine = notification_module._broadcast_engines[next(iter(notification_module._broadcast_engines))]
+    await engine.tasks[str(notification_id)]
+    assert sorted(bot.sent) == [1, 3, 4, 5]
+    assert NotificationService(bot, data_dir).start_requested_broadcasts() == 0
+
+
+@pytest.mark.asyncio
+async def test_finished_broadcasts_are_pruned(data_dir):
+    with open(f"{data_dir}/broadcasts.json", "w", encoding="utf-8") as f:
+        json.dump({"1": {"notification_id": 1, "status": BROADCAST_DONE, "finished_at": "2020-01-01T00:00:00",
+                         "counts": {".": 0, "+": 3, "x": 0, "!": 0}}}, f)
+    service = NotificationService(FakeBot(), data_dir)
+    notification_id = service.create_notification("Обновление", "Новое меню")
+
+    await service.send_notification_to_all(notification_id)
+
+    assert list(read(data_dir, "broadcasts.json")) == [str(notification_id)]
+    assert service.broadcasts.store.states == {}
+
+
+@pytest.mark.asyncio
+async def test_notify_all_reports_missing_notification(data_dir, monkeypatch):
+    from handlers_veretevo import menu
+
+    bot = FakeBot()
+    monkeypatch.setattr(menu, "NotificationService", lambda b: NotificationService(b, data_dir))
+    monkeypatch.setattr(NotificationService, "_get_notification", lambda self, notification_id: None)
+
+    async def reply_text(text):
+        return SimpleNamespace(chat_id=100, message_id=1)
+
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=menu.GENERAL_DIRECTOR_ID),
+                             message=SimpleNamespace(reply_text=reply_text))
+    context = SimpleNamespace(bot=bot, args=["Важно", "Плановые", "работы"])
+    await menu.notify_all(update, context)
+
+    assert bot.edits == ["❌ Рассылка #1 не запущена: уведомление не найдено"]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Тесты кольцевого буфера сообщений групп и его использования в GPT-подсказках
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from handlers_veretevo import gpt_handlers
+from services_veretevo.chat_history_service import ChatHistory
+from config_veretevo.constants import GENERAL_DIRECTOR_ID
+
+
+def test_ring_buffer_is_bounded_and_spills_to_disk(tmp_path):
+    spill = tmp_path / "history.jsonl"
+    history = ChatHistory(max_per_chat=3, max_chats=2, spill_file=str(spill))
+    for i in range(1, 6):
+        history.add_message(-1, i, f"сообщение {i}")
+    assert history.get_stats()["messages"] == 3
+    assert history.get_stats()["spilled"] == 2
+    # Вытесненное сообщение находится в файле
+    assert history.get_message(-1, 1)["text"] == "сообщение 1"
+    assert history.get_message(-1, 5)["text"] == "сообщение 5"
+    assert history.get_message(-1, 42) is None
+    # После перезапуска смещения вытесненных строк читаются из файла заново
+    assert ChatHistory(spill_file=str(spill)).get_message(-1, 2)["text"] == "сообщение 2"
+    # Без явно заданного файла переписка на диск не пишется
+    assert ChatHistory().spill_file is None
+
+    # Третий чат вытесняет самый давно активный
+    history.add_message(-2, 1, "второй чат")
+    history.add_message(-3, 1, "третий чат")
+    assert history.get_stats()["chats"] == 2
+    assert history.get_message(-1, 4)["text"] == "сообщение 4"
+
+
+def test_buffer_without_spill_forgets_evicted_messages():
+    history = ChatHistory(max_per_chat=2, spill_file=None)
+    for i in range(1, 4):
+        history.add_message(-1, i, f"сообщение {i}")
+    assert history.get_message(-1, 1) is None
+
+
+def test_spill_file_is_compacted(tmp_path):
+    spill = tmp_path / "history.jsonl"
+    history = ChatHistory(max_per_chat=1, spill_file=str(spill), max_spill_lines=5)
+    for i in range(1, 13):
+        history.add_message(-1, i, f"сообщение {i}")
+    assert len(spill.read_text(encoding="utf-8").splitlines()) <= 10
+    assert history.get_message(-1, 11)["text"] == "сообщение 11"
+    assert history.get_message(-1, 1) is None
+    # Счетчик строк восстанавливается после перезапуска
+    assert ChatHistory(spill_file=str(spill)).get_stats()["spilled"] == history.get_stats()["spilled"]
+
+
+def test_context_prefers_reply_chain_and_same_thread():
+    history = ChatHistory(spill_file=None)
+    history.add_message(-1, 1, "Где ключи от склада?", author="Иван", date=1)
+    history.add_message(-1, 2, "Про обед", author="Петр", thread_id=7, date=2)
+    for i in range(3, 9):
+        history.add_message(-1, i, f"болтовня {i}", author="Анна", date=i)
+    history.add_message(-1, 9, "Так где они?", author="Иван", reply_to=1, date=9)
+
+    context = history.get_context(-1, 9, limit=3)
+    assert [m["message_id"] for m in context] == [1, 7, 8]
+    assert "Про обед" not in history.format_context(-1, 9)
+    assert history.format_context(-1, 9, limit=1) == "Иван: Где ключи от склада?"
+    assert history.get_context(-1, 100) == []
+
+
+def make_group_update(message_id, text, reply_to=None):
+    message = SimpleNamespace(
+        chat=SimpleNamespace(id=-100, type="supergroup", title="Охрана"),
+        from_user=SimpleNamespace(id=1, is_bot=False, first_name="Иван", last_name="", username="ivan"),
+        message_id=message_id,
+        text=text,
+        reply_to_message=SimpleNamespace(message_id=reply_to) if reply_to else None,
+        message_thread_id=None,
+    )
+    return SimpleNamespace(message=message)
+
+
+@pytest.mark.asyncio
+async def test_hint_generation_uses_real_text_and_context():
+    """Кнопка «GPT-ответ» генерирует варианты по настоящему тексту с перепиской"""
+    history = ChatHistory(spill_file=None)
+    bot = SimpleNamespace(send_message=AsyncMock(), get_chat=AsyncMock(return_value=SimpleNamespace(title="Охрана")),
+                          edit_message_text=AsyncMock())
+    context = SimpleNamespace(bot=bot)
+    with patch.object(gpt_handlers, "chat_history", history), \
+            patch.object(gpt_handlers.gpt_service, "get_answer_variants", return_value=[]):
+        await gpt_handlers.handle_message_in_group(make_group_update(10, "Камера у ворот не работает"), context)
+        await gpt_handlers.handle_message_in_group(make_group_update(11, "Что делать?", reply_to=10), context)
+
+        query = SimpleNamespace(
+            data="gpt_gen:11:-100",
+            from_user=SimpleNamespace(id=GENERAL_DIRECTOR_ID),
+            message=SimpleNamespace(chat_id=GENERAL_DIRECTOR_ID, message_id=500),
+            answer=AsyncMock(),
+            edit_message_text=AsyncMock(),
+        )
+        with patch.object(gpt_handlers.gpt_service, "generate_variants",
+                          AsyncMock(return_value=["Вызовите мастера"])) as generate:
+            await gpt_handlers.handle_gpt_generate(SimpleNamespace(callback_query=query), context)
+
+    args, kwargs = generate.call_args
+    assert args[0] == "Что делать?"
+    assert kwargs["history"] == "Иван: Камера у ворот не работает"
+    assert "Что делать?" in bot.edit_message_text.call_args.kwargs["text"]
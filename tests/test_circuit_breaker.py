@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Тесты выключателей внешних сервисов и бюджета времени обработчика
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from utils_veretevo import yandex_gpt
+from utils_veretevo.circuit_breaker import (
+    STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker, CircuitOpenError,
+)
+from utils_veretevo.deadline import (
+    DeadlineExceeded, remaining_timeout, request_deadline, time_left, with_request_deadline,
+)
+from utils_veretevo.gpt_providers import GPTProvider, HedgedRouter
+
+
+def fail_call(breaker, exc=None):
+    with pytest.raises(type(exc or requests.ConnectionError())):
+        with breaker.call():
+            raise exc or requests.ConnectionError("нет соединения")
+
+
+def test_breaker_opens_on_failures_and_recovers_after_probe():
+    """Доля ошибок выше порога размыкает выключатель; успешная проба замыкает его"""
+    breaker = CircuitBreaker("test", min_calls=4, failure_rate=0.5, open_seconds=0.2)
+    with breaker.call():
+        pass
+    with breaker.call():
+        pass
+    fail_call(breaker)
+    assert breaker.state == STATE_CLOSED
+    fail_call(breaker)
+    assert breaker.state == STATE_OPEN
+
+    started = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        with breaker.call():
+            pass
+    assert time.perf_counter() - started < 0.05
+    assert breaker.get_status()["rejected"] == 1
+
+    time.sleep(0.25)
+    assert breaker.allow_request()
+    with breaker.call():
+        assert breaker.state == STATE_HALF_OPEN
+        # Пока идет пробный вызов, остальные отклоняются
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=0.1)
+    fail_call(breaker)
+    time.sleep(0.15)
+    fail_call(breaker)
+    assert breaker.state == STATE_OPEN and breaker.retry_in() > 0
+
+
+def test_client_errors_do_not_count_but_server_errors_do():
+    """4xx — ошибка запроса, а не сервиса; 5xx и 429 считаются сбоями"""
+    breaker = CircuitBreaker("test", min_calls=3, failure_rate=0.4)
+    for status in (400, 404, 422):
+        response = requests.Response()
+        response.status_code = status
+        fail_call(breaker, requests.HTTPError(response=response))
+    assert breaker.get_status()["failure_rate"] == 0.0
+
+    for status in (503, 429):
+        with breaker.call() as call:
+            call.check_response(MagicMock(status_code=status))
+    assert breaker.state == STATE_OPEN
+    assert "HTTP 429" in breaker.last_error
+
+
+def test_slow_calls_open_breaker():
+    breaker = CircuitBreaker("test", min_calls=2, slow_call_seconds=0.01, slow_rate=1.0)
+    for _ in range(2):
+        with breaker.call():
+            time.sleep(0.02)
+    assert breaker.state == STATE_OPEN
+
+
+def test_deadline_limits_timeouts_and_nests():
+    assert time_left() is None
+    assert remaining_timeout(30) == 30
+    with request_deadline(5):
+        assert 4 < remaining_timeout(30) <= 5
+        assert remaining_timeout(2) == 2
+        # Вложенный срок не продлевает внешний
+        with request_deadline(100):
+            assert remaining_timeout(30) <= 5
+    with request_deadline(0.1):
+        with pytest.raises(DeadlineExceeded):
+            remaining_timeout(30)
+    assert time_left() is None
+
+
+@pytest.mark.asyncio
+async def test_deadline_propagates_into_threads():
+    with request_deadline(3):
+        left = await asyncio.to_thread(time_left)
+    assert left is not None and left <= 3
+
+
+@pytest.mark.asyncio
+async def test_gpt_button_handlers_run_under_budget():
+    from handlers_veretevo import gpt_handlers
+
+    @with_request_deadline(gpt_handlers.GPT_HANDLER_BUDGET)
+    async def handler():
+        return await asyncio.to_thread(time_left)
+
+    left = await handler()
+    assert 0 < left <= gpt_handlers.GPT_HANDLER_BUDGET and time_left() is None
+    assert gpt_handlers.handle_gpt_generate.__wrapped__.__name__ == "handle_gpt_generate"
+
+
+class CountingProvider(GPTProvider):
+    def __init__(self, name, answer):
+        super().__init__(CircuitBreaker(name, min_calls=1))
+        self.name = name
+        self.answer = answer
+        self.calls = 0
+
+    @property
+    def available(self):
+        return True
+
+    def complete(self, prompt, temperature):
+        self.calls += 1
+        return self.answer
+
+
+@pytest.mark.asyncio
+async def test_router_skips_provider_with_open_breaker():
+    """Отключенный провайдер не вызывается — запрос сразу уходит резервному"""
+    primary, backup = CountingProvider("yandex", "основной"), CountingProvider("openai", "резерв")
+    router = HedgedRouter([primary, backup])
+    primary.breaker.record(0.1, "HTTP 503")
+    assert primary.breaker.state == STATE_OPEN
+
+    assert await router.complete("вопрос", 0.6) == "резерв"
+    assert primary.calls == 0 and router.stats["hedged"] == 0
+    assert router.configured() == [primary, backup]
+    assert router.get_stats()["providers"]["yandex"]["breaker"] == STATE_OPEN
+
+
+def test_improve_task_text_falls_back_to_raw_text_when_gpt_is_open():
+    """Улучшение текста не ждет отключенный GPT и возвращает транскрипцию как есть"""
+    breaker = CircuitBreaker("yandex_gpt", min_calls=1)
+    breaker.record(0.1, "HTTP 500")
+    with patch.object(yandex_gpt, "YANDEX_GPT_API_KEY", "key"), \
+            patch.object(yandex_gpt, "gpt_breaker", breaker), \
+            patch.object(yandex_gpt.requests, "post") as post:
+        assert yandex_gpt.improve_task_text("купить молоко", use_cache=False) == "купить молоко"
+    post.assert_not_called()
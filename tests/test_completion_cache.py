@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Тесты персистентного кэша ответов GPT
+"""
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils_veretevo import gpt_providers
+from utils_veretevo.completion_cache import CompletionCache, make_cache_key
+
+
+def test_key_ignores_case_and_whitespace_but_not_parameters():
+    """Нормализация промпта не меняет ключ, а модель, температура, отдел и вариант — меняют"""
+    key = make_cache_key("yandexgpt-lite", 0.6, "Можно  взять\nключи?", "security")
+    assert key == make_cache_key("yandexgpt-lite", 0.6, "  можно взять ключи? ", "security")
+    assert key != make_cache_key("yandexgpt-lite", 0.3, "можно взять ключи?", "security")
+    assert key != make_cache_key("yandexgpt-lite", 0.6, "можно взять ключи?", "maids")
+    assert key != make_cache_key("yandexgpt-lite", 0.6, "можно взять ключи?", "security", variant=1)
+
+
+def test_ttl_lru_and_persistence(tmp_path):
+    """Записи переживают перезапуск, устаревают по TTL и вытесняются по LRU"""
+    path = str(tmp_path / "gpt_cache.json")
+    cache = CompletionCache(path, ttl=60, max_entries=2)
+    cache.put("a", "ответ A")
+    cache.put("b", "ответ B")
+    assert cache.get("a") == "ответ A"      # "a" становится недавно использованной
+    cache.put("c", "ответ C")               # вытесняется "b"
+    assert cache.get("b") is None
+    assert cache.get_stats()["evicted"] == 1
+    # На диск кэш попадает пакетно, при flush
+    assert not os.path.exists(path)
+    assert cache.flush() and not cache.flush()
+
+    restored = CompletionCache(path, ttl=60, max_entries=2)
+    assert restored.get("a") == "ответ A" and restored.get("c") == "ответ C"
+
+    with patch("utils_veretevo.completion_cache.time.time", return_value=10**10):
+        assert restored.get("a") is None
+    stats = restored.get_stats()
+    assert stats["expired"] == 1 and stats["hits"] == 2 and stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gpt_response_served_from_cache_and_bypassed_on_regenerate(tmp_path):
+    """Повторный вопрос не вызывает API, перегенерация вызывает и обновляет кэш"""
+    from services_veretevo import gpt_service as module
+
+    cache = CompletionCache(str(tmp_path / "gpt_cache.json"))
+    response = MagicMock(status_code=200)
+    response.json.side_effect = [
+        {"result": {"alternatives": [{"message": {"text": "Первый ответ"}}]}},
+        {"result": {"alternatives": [{"message": {"text": "Новый ответ"}}]}},
+    ]
+    with patch.object(module, "completion_cache", cache), \
+            patch.object(module.yandex_provider, "api_key", "test-key"), \
+            patch.object(gpt_providers.requests, "post", return_value=response) as post:
+        service = module.gpt_service
+        assert await service.generate_gpt_response("Можно взять ключи?", "Отдел: security") == "Первый ответ"
+        assert await service.generate_gpt_response("можно взять ключи?", "Отдел: security") == "Первый ответ"
+        assert post.call_count == 1
+
+        assert await service.generate_gpt_response("Можно взять ключи?", "Отдел: security", use_cache=False) == "Новый ответ"
+        assert await service.generate_gpt_response("Можно взять ключи?", "Отдел: security") == "Новый ответ"
+        assert post.call_count == 2
+    assert cache.get_stats()["bypassed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_history_does_not_split_cache_key(tmp_path):
+    """Тот же вопрос после другой переписки берется из кэша, переписка при этом уходит в промпт"""
+    from services_veretevo import gpt_service as module
+
+    cache = CompletionCache(str(tmp_path / "gpt_cache.json"))
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"result": {"alternatives": [{"message": {"text": "Ключи у охраны"}}]}}
+    with patch.object(module, "completion_cache", cache), \
+            patch.object(module.yandex_provider, "api_key", "test-key"), \
+            patch.object(gpt_providers.requests, "post", return_value=response) as post:
+        service = module.gpt_service
+        first = await service.generate_gpt_response("Где ключи?", "Отдел: security", history="Иван: Склад закрыт")
+        second = await service.generate_gpt_response("Где ключи?", "Отдел: security", history="Петр: Привет")
+        assert first == second == "Ключи у охраны"
+        assert post.call_count == 1
+        assert "Склад закрыт" in json.dumps(post.call_args.kwargs.get("json"), ensure_ascii=False)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Тесты экспорта контактов в CSV, vCard и XLSX
+"""
+
+import csv
+import io
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from handlers_veretevo.contacts import ContactsHandler, KnowledgeCollector
+from utils_veretevo import contact_export
+from utils_veretevo.contact_export import export_contacts
+from utils_veretevo.keyboards import contacts_export_keyboard
+
+
+@pytest.fixture
+def collector(tmp_path):
+    collector = KnowledgeCollector(suppliers_file=str(tmp_path / "suppliers.json"))
+    collector.save_supplier_contact({"name": "ООО Орион; металл", "phone": "8 (496) 217-33-33",
+                                     "email": "info@orion.ru", "description": "Прокат,\nарматура"})
+    collector.save_supplier_contact({"name": "Бригада Петрова", "phone": "+7 916 000-11-22",
+                                     "category": "contractor"})
+    return collector
+
+
+def read_export(path):
+    with open(path, "rb") as f:
+        content = f.read()
+    os.remove(path)
+    return content
+
+
+def test_csv_and_vcard(collector):
+    path, count = export_contacts(collector.get_all_contacts(), "csv")
+    rows = list(csv.reader(io.StringIO(read_export(path).decode("utf-8-sig")), delimiter=";"))
+    assert count == 2
+    assert rows[0][:2] == ["Название", "Телефон"]
+    assert rows[1][:3] == ["ООО Орион; металл", "+74962173333", "info@orion.ru"]
+    assert rows[1][5] == "Прокат,\nарматура"
+
+    path, count = export_contacts(collector.get_contacts_by_category("supplier"), "vcf")
+    vcard = read_export(path).decode("utf-8")
+    assert count == 1 and vcard.count("BEGIN:VCARD") == 1
+    assert "FN:ООО Орион\\; металл\r\n" in vcard
+    assert "TEL;TYPE=WORK,VOICE:+74962173333\r\n" in vcard
+    assert "NOTE:Прокат\\,\\nарматура\r\n" in vcard
+
+    with pytest.raises(ValueError):
+        export_contacts([], "pdf")
+
+
+def test_large_export_is_written_to_disk(tmp_path):
+    contacts = ({"name": f"Поставщик {i}", "phone": f"+7900{i:07d}"} for i in range(5000))
+    path, count = export_contacts(contacts, "csv", directory=str(tmp_path))
+    assert count == 5000 and os.path.dirname(path) == str(tmp_path)
+    with open(path, encoding="utf-8-sig") as f:
+        assert sum(1 for _ in f) == 5001
+
+
+def test_failed_export_leaves_no_file(tmp_path):
+    def broken_contacts():
+        yield {"name": "Орион", "phone": "+79001112233"}
+        raise RuntimeError("база недоступна")
+
+    with pytest.raises(RuntimeError):
+        export_contacts(broken_contacts(), "csv", directory=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_excel_button_hidden_without_openpyxl(monkeypatch):
+    monkeypatch.setattr(contact_export.importlib.util, "find_spec", lambda name: None)
+    callbacks = [button.callback_data for row in contacts_export_keyboard().inline_keyboard for button in row]
+    assert "contacts_export_csv_all" in callbacks
+    assert not any(callback.startswith("contacts_export_xlsx_") for callback in callbacks)
+
+
+def test_xlsx_export(collector):
+    openpyxl = pytest.importorskip("openpyxl")
+    path, count = export_contacts(collector.get_all_contacts(), "xlsx")
+    sheet = openpyxl.load_workbook(io.BytesIO(read_export(path))).active
+    assert count == 2 and sheet.max_row == 3
+    assert sheet.cell(row=3, column=1).value == "Бригада Петрова"
+
+
+@pytest.mark.asyncio
+async def test_export_callback_sends_filtered_document(collector):
+    handler = ContactsHandler()
+    handler.knowledge_collector = collector
+    sent = {}
+
+    async def send_document(chat_id, document, filename, caption):
+        # Файл передается путем: python-telegram-bot сам читает его (или отдает путь локальному серверу)
+        sent.update(chat_id=chat_id, path=document, content=document.read_bytes(), filename=filename,
+                    caption=caption)
+
+    context = SimpleNamespace(bot=SimpleNamespace(send_document=send_document))
+    query = SimpleNamespace(message=SimpleNamespace(chat_id=42), from_user=SimpleNamespace(id=7),
+                            edit_message_text=AsyncMock())
+    await handler._handle_export_file(query, context, "contacts_export_vcf_contractor")
+    assert sent["chat_id"] == 42
+    assert sent["filename"].startswith("contacts_contractor_") and sent["filename"].endswith(".vcf")
+    assert b"FN:\xd0\x91" in sent["content"] and "Орион".encode() not in sent["content"]
+    assert sent["caption"].startswith("📤 Контакты: 1 (Подрядчики)")
+    assert not sent["path"].exists()  # временный файл удален после отправки
+
+    sent.clear()
+    await handler._handle_export_file(query, context, "contacts_export_csv_employee")
+    assert not sent
+    assert "Нет контактов" in query.edit_message_text.call_args.kwargs["text"]
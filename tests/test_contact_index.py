@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Тесты индекса контактов: нормализация телефонов, поиск, категории, представления
+"""
+
+import importlib.util
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from handlers_veretevo.contacts import ContactsHandler, KnowledgeCollector
+from utils_veretevo.contact_index import normalize_phone
+
+SCRIPT_PATH = Path(__file__).parent.parent / "scripts" / "migrate_contact_phones.py"
+spec = importlib.util.spec_from_file_location("migrate_contact_phones", SCRIPT_PATH)
+migrate_script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(migrate_script)
+
+
+def make_collector(tmp_path, database=None):
+    suppliers_file = tmp_path / "suppliers.json"
+    if database is not None:
+        suppliers_file.write_text(json.dumps(database, ensure_ascii=False), encoding="utf-8")
+    return KnowledgeCollector(suppliers_file=str(suppliers_file))
+
+
+def test_normalize_phone():
+    assert normalize_phone("+7 (903) 554-87-09") == "+79035548709"
+    assert normalize_phone("8 (903) 554-87-09") == "+79035548709"
+    assert normalize_phone("9035548709") == "+79035548709"
+    assert normalize_phone("8-10-49-30-123456") == "+4930123456"
+    assert normalize_phone("+49 30 123456") == "+4930123456"
+    assert normalize_phone("112") == "112"
+
+
+def test_load_merges_duplicate_phones(tmp_path):
+    collector = make_collector(tmp_path, {
+        "+7 (900) 123-45-67": {"name": "Орион", "phone": "+7 (900) 123-45-67", "email": "",
+                               "category": "supplier", "first_added": "2025-01-01", "last_updated": "2025-01-01",
+                               "update_count": 1, "tags": ["металл"]},
+        "89001234567": {"name": "Орион металл", "phone": "89001234567", "email": "info@orion.ru",
+                        "category": "supplier", "first_added": "2025-02-01", "last_updated": "2025-02-01",
+                        "update_count": 2, "tags": ["прокат"]},
+    })
+    assert list(collector.suppliers_database) == ["+79001234567"]
+    contact = collector.suppliers_database["+79001234567"]
+    assert contact["name"] == "Орион металл" and contact["email"] == "info@orion.ru"
+    assert contact["update_count"] == 3 and contact["first_added"] == "2025-01-01"
+    assert contact["tags"] == ["металл", "прокат"]
+    # Загрузка файл не переписывает — миграция запускается явно
+    suppliers_file = tmp_path / "suppliers.json"
+    assert len(json.loads(suppliers_file.read_text(encoding="utf-8"))) == 2
+    assert migrate_script.migrate_contact_phones(str(suppliers_file)) == 3
+    assert list(json.loads(suppliers_file.read_text(encoding="utf-8"))) == ["+79001234567"]
+    assert migrate_script.migrate_contact_phones(str(suppliers_file)) == 0
+
+    # Тот же номер в другом формате обновляет контакт, а не создает новый
+    collector.save_supplier_contact({"name": "Орион", "phone": "8 (900) 123-45-67"})
+    assert len(collector.suppliers_database) == 1
+    assert collector.suppliers_database["+79001234567"]["update_count"] == 4
+
+
+def test_search_categories_and_views(tmp_path):
+    collector = make_collector(tmp_path)
+    collector.save_supplier_contact({"name": "ИП Замков", "phone": "+79001234567",
+                                     "description": "Замки и фурнитура", "category": "supplier"})
+    collector.save_supplier_contact({"name": "Бригада Петрова", "phone": "8 916 000-11-22",
+                                     "description": "Кровля", "category": "contractor"})
+    collector.save_supplier_contact({"name": "Стекло-Сервис", "phone": "+7 495 111-22-33",
+                                     "category": "supplier"})
+
+    assert [c["name"] for c in collector.search_contacts_advanced("замк")] == ["ИП Замков"]
+    assert [c["name"] for c in collector.search_contacts_advanced("КРОВ")] == ["Бригада Петрова"]
+    assert [c["phone"] for c in collector.search_contacts_advanced("(916) 000-11")] == ["+79160001122"]
+    assert [c["phone"] for c in collector.search_contacts_advanced("9160001122")] == ["+79160001122"]
+    assert [c["phone"] for c in collector.search_contacts_advanced("89160001122")] == ["+79160001122"]
+    assert [c["name"] for c in collector.search_contacts_advanced("с")] == ["Стекло-Сервис"]
+    assert [c["name"] for c in collector.search_contacts_advanced("фурнитура замки")] == ["ИП Замков"]
+    assert len(collector.search_contacts_advanced("и", limit=1)) == 1
+
+    suppliers = collector.get_contacts_by_category("supplier")
+    assert [c["name"] for c in suppliers] == ["ИП Замков", "Стекло-Сервис"]
+    assert len(collector.get_contacts_by_category("employee")) == 0
+
+    # Представление читает запись базы: поля с умолчаниями, без копирования
+    contact = collector.get_all_contacts()[2]
+    assert contact["email"] == "" and contact.get("website") == "" and contact["category"] == "supplier"
+    assert dict(contact)["phone"] == "+74951112233"
+    collector.suppliers_database["+74951112233"]["email"] = "info@steklo.ru"
+    assert contact["email"] == "info@steklo.ru"
+
+    # Смена категории не сдвигает уже выданный список
+    contractors_before = collector.get_contacts_by_category("contractor")
+    collector.suppliers_database["+79001234567"]["category"] = "contractor"
+    collector.index.add("+79001234567", collector.suppliers_database["+79001234567"])
+    assert [c["name"] for c in contractors_before] == ["Бригада Петрова"]
+    assert [c["name"] for c in suppliers] == ["ИП Замков", "Стекло-Сервис"]
+    assert [c["name"] for c in collector.get_contacts_by_category("supplier")] == ["Стекло-Сервис"]
+    assert len(collector.get_all_contacts()[:2]) == 2
+
+
+def test_cursor_pagination_is_stable(tmp_path):
+    collector = make_collector(tmp_path)
+    for i in range(25):
+        collector.save_supplier_contact({"name": f"Поставщик {i:02d}", "phone": f"+7900000{i:04d}",
+                                         "category": "contractor" if i % 5 == 0 else "supplier"})
+    collector.get_contacts_page()  # отсортированные списки строятся здесь, дальше обновляются по одному
+
+    page = collector.get_contacts_page(size=10)
+    assert [c["name"] for c in page.contacts][:2] == ["Поставщик 00", "Поставщик 01"]
+    assert (page.offset, page.total, page.has_prev, page.has_next) == (0, 25, False, True)
+
+    # Новый контакт в начале алфавита не сдвигает следующую страницу
+    collector.save_supplier_contact({"name": "Аквамир", "phone": "+79990000000"})
+    page = collector.get_contacts_page(cursor=page.last_phone, size=10)
+    assert [c["name"] for c in page.contacts][0] == "Поставщик 10"
+    page = collector.get_contacts_page(cursor=page.last_phone, size=10)
+    assert [c["name"] for c in page.contacts] == [f"Поставщик {i}" for i in range(20, 25)]
+    assert not page.has_next and page.offset == 21
+    page = collector.get_contacts_page(cursor=page.first_phone, forward=False, size=10)
+    assert [c["name"] for c in page.contacts][0] == "Поставщик 10"
+
+    # Категория и порядок "сначала новые"
+    page = collector.get_contacts_page("contractor", size=2)
+    assert [c["name"] for c in page.contacts] == ["Поставщик 00", "Поставщик 05"]
+    collector.save_supplier_contact({"name": "Поставщик 05", "phone": "+79000000005"})
+    page = collector.get_contacts_page("contractor", "updated", size=2)
+    assert page.contacts[0]["name"] == "Поставщик 05" and page.has_next and not page.has_prev
+    page = collector.get_contacts_page("contractor", "updated", cursor=page.last_phone, size=2)
+    assert page.offset == 2 and page.has_prev
+    assert [c["name"] for c in page.contacts] == ["Поставщик 15", "Поставщик 10"]
+
+
+@pytest.mark.asyncio
+async def test_list_callback_edits_page_in_place(tmp_path):
+    collector = make_collector(tmp_path)
+    for i in range(12):
+        collector.save_supplier_contact({"name": f"Поставщик {i:02d}", "phone": f"+7900000{i:04d}"})
+    handler = ContactsHandler()
+    handler.knowledge_collector = collector
+    query = SimpleNamespace(edit_message_text=AsyncMock())
+
+    await handler._handle_list_contacts(query, None)
+    kwargs = query.edit_message_text.call_args.kwargs
+    assert "Контакты 1–10 из 12" in kwargs["text"]
+    buttons = [b.callback_data for row in kwargs["reply_markup"].inline_keyboard for b in row]
+    assert buttons[0] == "contacts_page_all_name_n_+79000000009"
+
+    await handler._handle_contacts_page(query, None, buttons[0])
+    kwargs = query.edit_message_text.call_args.kwargs
+    assert "Контакты 11–12 из 12" in kwargs["text"] and "Поставщик 11" in kwargs["text"]
+    buttons = [b.callback_data for row in kwargs["reply_markup"].inline_keyboard for b in row]
+    assert buttons[0] == "contacts_page_all_name_p_+79000000010"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Тесты трехсторонней синхронизации контактов с базой AI ассистента
+"""
+
+import json
+import os
+
+import pytest
+
+from handlers_veretevo.contacts import KnowledgeCollector
+from services_veretevo.contact_sync_service import ContactSync
+
+
+def contact(name, phone, updated, count=1, **extra):
+    return {"name": name, "phone": phone, "email": "", "address": "", "category": "supplier",
+            "last_updated": updated, "update_count": count, **extra}
+
+
+def write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    # Время изменения должно отличаться от записанного в контрольной точке
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def env(tmp_path):
+    local, remote = tmp_path / "local.json", tmp_path / "remote.json"
+    write(local, {
+        "+7 (900) 111-11-11": contact("Орион", "+7 (900) 111-11-11", "2025-01-01"),
+        "+79002222222": contact("Бригада", "+79002222222", "2025-01-02"),
+    })
+    write(remote, {
+        "89001111111": contact("Орион", "89001111111", "2025-01-01"),
+        "+79003333333": contact("Стекло", "+79003333333", "2025-01-03"),
+    })
+    sync = ContactSync(local_file=str(local), remote_file=str(remote),
+                       state_file=str(tmp_path / "state.json"), conflicts_file=str(tmp_path / "conflicts.jsonl"))
+    report = sync.run()
+    assert report.total == 3 and not report.conflicts
+    return sync, local, remote, tmp_path
+
+
+def test_first_run_unions_bases_and_second_is_skipped(env):
+    sync, local, remote, _ = env
+    assert set(read(local)) == set(read(remote)) == {"+79001111111", "+79002222222", "+79003333333"}
+    assert sync.run().skipped
+
+
+def test_field_merge_conflicts_and_deletes(env):
+    sync, local, remote, tmp_path = env
+    local_db, remote_db = read(local), read(remote)
+    # Разные поля одного контакта — объединяются без конфликта
+    local_db["+79001111111"].update(email="info@orion.ru", last_updated="2025-02-01", update_count=2)
+    remote_db["+79001111111"].update(address="Москва", last_updated="2025-02-02", update_count=2)
+    # Одно поле по-разному — побеждает более свежая версия
+    local_db["+79002222222"].update(name="Бригада Петрова", last_updated="2025-02-05", update_count=2)
+    remote_db["+79002222222"].update(name="Бригада Иванова", last_updated="2025-02-03", update_count=2)
+    # Удален у ассистента, у бота не менялся — удаляется и у бота
+    del remote_db["+79003333333"]
+    write(local, local_db)
+    write(remote, remote_db)
+
+    report = sync.run()
+    assert report.processed == 3 and report.merged == 2 and report.deleted == 1
+    assert [(c.phone, c.fields, c.winner) for c in report.conflicts] == [("+79002222222", ["name"], "local")]
+    for db in (read(local), read(remote)):
+        assert set(db) == {"+79001111111", "+79002222222"}
+        assert db["+79001111111"]["email"] == "info@orion.ru" and db["+79001111111"]["address"] == "Москва"
+        assert db["+79001111111"]["update_count"] == 3
+        assert db["+79002222222"]["name"] == "Бригада Петрова"
+    conflicts = [json.loads(line) for line in (tmp_path / "conflicts.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert conflicts[0]["phone"] == "+79002222222" and conflicts[0]["winner"] == "local"
+
+
+def test_in_process_sync_updates_collector(env):
+    sync, local, remote, _ = env
+    collector = KnowledgeCollector(suppliers_file=str(local))
+    remote_db = read(remote)
+    remote_db["+79004444444"] = contact("Новый поставщик", "+79004444444", "2025-03-01")
+    write(remote, remote_db)
+    collector.save_supplier_contact({"name": "Кровля", "phone": "8 900 555-55-55"})
+
+    report = sync.run(collector)
+    assert report.pulled == 1 and report.pushed == 1
+    assert [c["name"] for c in collector.search_contacts_advanced("новый")] == ["Новый поставщик"]
+    assert "+79005555555" in read(remote) and "+79004444444" in read(local)
+    assert sync.run(collector).skipped
+
+
+def test_collector_reads_see_external_sync(env):
+    _, local, _, _ = env
+    collector = KnowledgeCollector(suppliers_file=str(local))
+    local_db = read(local)
+    local_db["+79006666666"] = contact("Бетон", "+79006666666", "2025-04-01")
+    write(local, local_db)
+
+    assert [c["name"] for c in collector.search_contacts_advanced("бетон")] == ["Бетон"]
+    assert len(collector.get_all_contacts()) == 4
+    assert collector.get_contacts_page().total == 4
+
+
+def test_concurrent_edit_during_sync_is_not_overwritten(env, monkeypatch):
+    from services_veretevo import contact_sync_service
+
+    sync, local, remote, _ = env
+    local_db = read(local)
+    local_db["+79007777777"] = contact("Окна", "+79007777777", "2025-05-01")
+    write(local, local_db)
+    read_database = contact_sync_service.read_database
+    edited = []
+
+    def read_and_edit(path):
+        data = read_database(path)
+        if path == str(local) and not edited:
+            # AI ассистент дописал контакт, пока шло слияние
+            remote_db = read(remote)
+            remote_db["+79008888888"] = contact("Двери", "+79008888888", "2025-05-02")
+            write(remote, remote_db)
+            edited.append(path)
+        return data
+
+    monkeypatch.setattr(contact_sync_service, "read_database", read_and_edit)
+    report = sync.run()
+
+    assert report.pushed == 1 and report.pulled == 1
+    assert {"+79007777777", "+79008888888"} <= set(read(remote)) <= set(read(local))
+
+
+def test_unchanged_side_is_not_read(env, monkeypatch):
+    from services_veretevo import contact_sync_service
+
+    sync, local, remote, _ = env
+    remote_db = read(remote)
+    remote_db["+79009999999"] = contact("Плитка", "+79009999999", "2025-06-01")
+    write(remote, remote_db)
+    read_paths = []
+    read_database = contact_sync_service.read_database
+    monkeypatch.setattr(contact_sync_service, "read_database",
+                        lambda path: read_paths.append(path) or read_database(path))
+
+    report = sync.run()
+    assert read_paths == [str(remote)]
+    assert report.pulled == 1 and report.processed == 1
+    assert "+79009999999" in read(local)
+    assert sync.run().skipped
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Тесты хеджирования запросов между GPT-провайдерами
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils_veretevo import gpt_providers
+from utils_veretevo.gpt_providers import GPTProvider, HedgedRouter, YandexGPTProvider
+from utils_veretevo.gpt_stub import YandexGPTStub
+
+
+class FakeProvider(GPTProvider):
+    def __init__(self, name, delay=0.0, answer="ответ"):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.answer = answer
+        self.calls = 0
+
+    @property
+    def available(self):
+        return True
+
+    def complete(self, prompt, temperature):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.answer
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_by_backup():
+    """Основной провайдер не успел к хедж-задержке — побеждает резервный"""
+    primary, backup = FakeProvider("yandex", delay=1.0, answer="медленно"), FakeProvider("openai", answer="быстро")
+    router = HedgedRouter([primary, backup])
+    with patch.object(gpt_providers, "HEDGE_DEFAULT_DELAY", 0.1):
+        started = time.perf_counter()
+        assert await router.complete("вопрос", 0.6) == "быстро"
+    assert time.perf_counter() - started < 0.5
+    assert router.stats["hedged"] == 1 and backup.stats["wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged_and_failure_falls_back():
+    """Быстрый ответ не вызывает резерв, а ошибка основного — вызывает сразу"""
+    primary, backup = FakeProvider("yandex"), FakeProvider("openai", answer="резерв")
+    router = HedgedRouter([primary, backup])
+    assert await router.complete("вопрос", 0.6) == "ответ"
+    assert backup.calls == 0
+
+    primary.answer = None
+    started = time.perf_counter()
+    assert await router.complete("вопрос", 0.6) == "резерв"
+    assert time.perf_counter() - started < gpt_providers.HEDGE_DEFAULT_DELAY
+    assert router.stats["fallbacks"] == 1 and router.stats["hedged"] == 0
+
+
+def test_hedge_delay_follows_p95_and_routing_prefers_faster():
+    """Хедж-задержка — p95 в заданных пределах, основным становится более быстрый провайдер"""
+    slow, fast = FakeProvider("yandex"), FakeProvider("openai")
+    router = HedgedRouter([slow, fast])
+    assert router.hedge_delay(slow) == gpt_providers.HEDGE_DEFAULT_DELAY
+    for seconds in [1.0, 1.2, 1.1, 0.9, 4.0, 1.0]:
+        slow.latency.record(seconds)
+    for seconds in [0.01] * 6:
+        fast.latency.record(seconds)
+    assert router.hedge_delay(slow) == 4.0
+    assert router.hedge_delay(fast) == gpt_providers.HEDGE_MIN_DELAY
+    assert router.available() == [fast, slow]
+
+
+@pytest.mark.asyncio
+async def test_yandex_provider_against_stub():
+    """Yandex-провайдер разбирает ответ заглушки, недоступный провайдер пропускается"""
+    with YandexGPTStub(text="Хорошо.") as stub:
+        provider = YandexGPTProvider(api_key="test-key", url=stub.base_url)
+        router = HedgedRouter([provider, YandexGPTProvider(api_key=None)])
+        assert await router.complete("вопрос", 0.3) == "Хорошо."
+        assert stub.requests[0]["completionOptions"]["temperature"] == 0.3
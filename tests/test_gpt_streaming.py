@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Тесты потоковой генерации GPT на локальной заглушке и прореживания правок сообщения
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services_veretevo import gpt_service as module
+from utils_veretevo.completion_cache import CompletionCache
+from utils_veretevo.gpt_stub import YandexGPTStub
+from utils_veretevo.progressive_message import ProgressiveMessage
+
+ANSWER = "Да, можно взять ключи на ресепшене, только предупредите охрану заранее."
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_from_stub(tmp_path):
+    """Фрагменты приходят накопительно, итог совпадает с ответом и попадает в кэш"""
+    partials = []
+
+    async def on_partial(text):
+        partials.append(text)
+
+    cache = CompletionCache(str(tmp_path / "gpt_cache.json"))
+    with YandexGPTStub(text=ANSWER, chunk_delay=0.01) as stub, \
+            patch.object(module.yandex_provider, "url", stub.base_url), \
+            patch.object(module.yandex_provider, "api_key", "test-key"), \
+            patch.object(module, "completion_cache", cache):
+        answer = await module.gpt_service.generate_gpt_response("Можно взять ключи?", "Отдел: security",
+                                                               on_partial=on_partial)
+        assert stub.requests[0]["completionOptions"]["stream"] is True
+
+        # Повтор берется из кэша и отдается одним фрагментом
+        cached_partials = []
+        await module.gpt_service.generate_gpt_response("Можно взять ключи?", "Отдел: security",
+                                                       on_partial=AsyncMock(side_effect=cached_partials.append))
+        assert stub.requests_count == 1
+
+    assert answer == ANSWER
+    assert len(partials) > 3 and partials[-1] == ANSWER
+    assert all(ANSWER.startswith(part) for part in partials)
+    assert cached_partials == [ANSWER]
+
+
+@pytest.mark.asyncio
+async def test_progressive_message_throttles_edits():
+    """Частые фрагменты не превращаются в частые правки, после close правок нет"""
+    bot = AsyncMock()
+    progress = ProgressiveMessage(bot, chat_id=1, message_id=2, prefix="1. ", interval=60)
+    for i in range(1, 50):
+        await progress.update("слово " * i)
+    assert bot.edit_message_text.await_count == 1
+    assert bot.edit_message_text.await_args.kwargs["text"].startswith("1. слово")
+
+    progress.interval = 0
+    progress._next_edit_at = 0
+    await progress.update("новый текст")
+    progress.close()
+    await progress.update("после закрытия")
+    assert bot.edit_message_text.await_count == 2
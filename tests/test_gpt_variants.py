@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Тесты параллельной генерации вариантов ответа GPT
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services_veretevo import gpt_service as module
+from utils_veretevo import gpt_providers
+from utils_veretevo.completion_cache import CompletionCache
+
+
+def fake_post(delays):
+    """requests.post, отвечающий текстом с температурой после задержки для этой температуры"""
+    def post(url, headers=None, json=None, timeout=None):
+        temperature = json["completionOptions"]["temperature"]
+        time.sleep(delays.get(temperature, 0.1))
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"result": {"alternatives": [{"message": {"text": f"Ответ t={temperature}"}}]}}
+        return response
+    return post
+
+
+def patched(tmp_path, delays):
+    return (patch.object(module, "completion_cache", CompletionCache(str(tmp_path / "gpt_cache.json"))),
+            patch.object(module.yandex_provider, "api_key", "test-key"),
+            patch.object(gpt_providers.requests, "post", side_effect=fake_post(delays)))
+
+
+@pytest.mark.asyncio
+async def test_variants_are_concurrent_and_distinct(tmp_path, monkeypatch):
+    """Три варианта запрашиваются одновременно с разными температурами"""
+    monkeypatch.setattr(module.gpt_service, "find_similar_question", lambda question: None)
+    cache_patch, key_patch, post_patch = patched(tmp_path, {})
+    with cache_patch, key_patch, post_patch as post:
+        started = time.perf_counter()
+        variants = await module.gpt_service.generate_variants("Когда вывезут мусор?", "maids", count=3)
+        elapsed = time.perf_counter() - started
+    assert variants == [f"Ответ t={t}" for t in module.VARIANT_TEMPERATURES]
+    assert post.call_count == 3
+    assert elapsed < 0.25  # одна задержка, а не три подряд
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_ready_variants(tmp_path, monkeypatch):
+    """По дедлайну показываются только готовые варианты"""
+    monkeypatch.setattr(module.gpt_service, "find_similar_question", lambda question: None)
+    cache_patch, key_patch, post_patch = patched(tmp_path, {0.9: 1.0})
+    with cache_patch, key_patch, post_patch:
+        variants = await module.gpt_service.generate_variants("Кто дежурит ночью?", "security", count=3, deadline=0.3)
+        assert variants == ["Ответ t=0.6", "Ответ t=0.3"]
+        # Опоздавший запрос не отменяется и дописывает ответ в кэш
+        while module.gpt_single_flight.inflight():
+            await asyncio.sleep(0.05)
+        assert module.completion_cache.get_stats()["entries"] == 3
+
+
+@pytest.mark.asyncio
+async def test_knowledge_base_answer_is_first_variant_only_once(tmp_path, monkeypatch):
+    """Ответ из базы знаний становится первым вариантом, остальные — от GPT"""
+    monkeypatch.setattr(module.gpt_service, "find_similar_question",
+                        lambda question: {"question": question, "answer": "Из базы", "department": "", "similarity": 1.0})
+    cache_patch, key_patch, post_patch = patched(tmp_path, {})
+    with cache_patch, key_patch, post_patch as post:
+        variants = await module.gpt_service.generate_variants("Можно взять ключи?", count=3)
+    assert variants == ["Из базы", "Ответ t=0.6", "Ответ t=0.3"]
+    assert post.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_variants_are_not_offered(monkeypatch):
+    """Ошибка GPT не попадает в варианты; сообщение об ошибке — только если вариантов нет"""
+    monkeypatch.setattr(module.gpt_service, "find_similar_question", lambda question: None)
+    failing = {1}
+
+    async def request(question, context, use_cache, variant, on_partial, history):
+        if variant in failing:
+            raise module.GPTResponseError(module.GPT_ERROR_UNAVAILABLE)
+        return f"Вариант {variant}"
+
+    monkeypatch.setattr(module.gpt_service, "_request_gpt_response", request)
+    assert await module.gpt_service.generate_variants("Когда уборка?", count=3) == ["Вариант 0", "Вариант 2"]
+
+    failing.update({0, 2})
+    assert await module.gpt_service.generate_variants("Когда уборка?", count=3) == [module.GPT_ERROR_UNAVAILABLE]
@@ -81,7 +81,7 @@ def test_voice_transcriber_availability():
     print("\n🔍 Тестирование доступности voice_transcriber...")
     
     try:
-        from handlers_veretevo.tasks import voice_transcriber
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if voice_transcriber:
             print("✅ voice_transcriber доступен")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Тесты сводок GPT-подсказок директору
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from handlers_veretevo import gpt_handlers
+from services_veretevo.hint_digest_service import HintDigest, is_urgent
+from config_veretevo.constants import GENERAL_DIRECTOR_ID
+
+
+def make_item(message_id, text, chat_id=-100):
+    return {"message_id": message_id, "chat_id": chat_id, "chat_title": "Охрана", "text": text, "author": "Иван"}
+
+
+def make_context():
+    job_queue = MagicMock()
+    job_queue.get_jobs_by_name.return_value = []
+    return SimpleNamespace(bot=SimpleNamespace(send_message=AsyncMock()), job_queue=job_queue)
+
+
+def callbacks(markup):
+    return [[b.callback_data for b in row] for row in markup.inline_keyboard]
+
+
+def test_urgent_keywords():
+    assert is_urgent("СРОЧНО нужен электрик")
+    assert is_urgent("В номере 12 потоп!")
+    assert not is_urgent("Кто дежурит ночью?")
+
+
+@pytest.mark.asyncio
+async def test_messages_are_batched_into_one_digest():
+    digest = HintDigest(window=120)
+    context = make_context()
+    with patch.object(gpt_handlers, "hint_digest", digest):
+        await gpt_handlers.queue_hint(context, make_item(1, "Кто дежурит ночью?"))
+        await gpt_handlers.queue_hint(context, make_item(2, "Можно взять выходной в пятницу?"))
+        context.bot.send_message.assert_not_called()
+        context.job_queue.run_once.assert_called_once()
+        job_kwargs = context.job_queue.run_once.call_args.kwargs
+        assert job_kwargs["when"] == 120 and job_kwargs["data"] == -100
+
+        # Окно закрылось — одна сводка с кнопками для каждого пункта
+        context.job = SimpleNamespace(data=-100)
+        await gpt_handlers.flush_hint_digest(context)
+
+    context.bot.send_message.assert_called_once()
+    kwargs = context.bot.send_message.call_args.kwargs
+    assert kwargs["chat_id"] == GENERAL_DIRECTOR_ID
+    assert kwargs["text"].startswith(gpt_handlers.DIGEST_TITLE)
+    assert "1. Иван: Кто дежурит ночью?" in kwargs["text"]
+    rows = callbacks(kwargs["reply_markup"])
+    assert rows[0] == ["gpt_gen:1:-100", "gpt_variant:1:-100:gpt_analyze"]
+    assert rows[1] == ["gpt_gen:2:-100", "gpt_variant:2:-100:gpt_yes", "gpt_variant:2:-100:gpt_no"]
+    assert digest.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_urgent_message_is_sent_immediately_and_full_digest_early():
+    digest = HintDigest(window=120, max_items=2)
+    context = make_context()
+    with patch.object(gpt_handlers, "hint_digest", digest):
+        await gpt_handlers.queue_hint(context, make_item(1, "Срочно! Потоп во втором корпусе"))
+        assert context.bot.send_message.call_count == 1
+        assert "🚨" in context.bot.send_message.call_args.kwargs["text"]
+        assert digest.stats["urgent"] == 1
+
+        await gpt_handlers.queue_hint(context, make_item(2, "Где ключи от склада?"))
+        await gpt_handlers.queue_hint(context, make_item(3, "Где пульт от ворот?"))
+    assert context.bot.send_message.call_count == 2
+    assert context.bot.send_message.call_args.kwargs["text"].startswith(gpt_handlers.DIGEST_TITLE)
+    context.job_queue.get_jobs_by_name.assert_called_once_with("gpt_digest:-100")
+
+
+@pytest.mark.asyncio
+async def test_single_item_window_and_disabled_digest_send_plain_hint():
+    context = make_context()
+    with patch.object(gpt_handlers, "hint_digest", HintDigest(window=0)):
+        await gpt_handlers.queue_hint(context, make_item(1, "Где ключи от склада?"))
+    assert context.bot.send_message.call_args.kwargs["text"].startswith("🤖 GPT-подсказка")
+    context.job_queue.run_once.assert_not_called()
+
+    await gpt_handlers.send_hint_digest(context.bot, [make_item(2, "Кто дежурит ночью?")])
+    rows = callbacks(context.bot.send_message.call_args.kwargs["reply_markup"])
+    assert rows == [["gpt_gen:2:-100"], ["gpt_variant:2:-100:gpt_analyze"]]
+
+
+@pytest.mark.asyncio
+async def test_answering_digest_item_keeps_other_items():
+    bot = SimpleNamespace(send_message=AsyncMock())
+    await gpt_handlers.send_hint_digest(bot, [make_item(1, "Где ключи?"), make_item(11, "Можно уйти пораньше?", chat_id=-1001)])
+    markup = bot.send_message.call_args.kwargs["reply_markup"]
+    query = SimpleNamespace(message=SimpleNamespace(reply_markup=markup), edit_message_reply_markup=AsyncMock())
+
+    await gpt_handlers.remove_hint_buttons(query, 1, -100)
+    remaining = query.edit_message_reply_markup.call_args.kwargs["reply_markup"]
+    assert callbacks(remaining) == callbacks(markup)[1:]
+
+    query.message.reply_markup = remaining
+    await gpt_handlers.remove_hint_buttons(query, 11, -1001)
+    assert query.edit_message_reply_markup.call_args.kwargs["reply_markup"] is None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Тесты inline-поиска задач и контактов
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from handlers_veretevo import inline_search
+from handlers_veretevo.contacts import KnowledgeCollector
+from services_veretevo import department_service
+from services_veretevo.task_search_service import TaskSearchIndex
+
+DEPARTMENTS = {
+    "security": {"name": "Охрана", "members": {"100": "Иван"}},
+    "maids": {"name": "Горничные", "members": {"200": "Мария"}},
+}
+
+
+@pytest.fixture
+def search_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(department_service, "DEPARTMENTS", DEPARTMENTS)
+    index = TaskSearchIndex(archive_file=None)
+    index.sync([
+        {"id": 1, "text": "Проверить замок на воротах", "department": "security", "status": "новая",
+         "created_at": "2025-03-01T10:00:00"},
+        {"id": 2, "text": "Заменить замок в номере 5", "department": "maids", "status": "новая",
+         "created_at": "2025-03-02T10:00:00"},
+    ])
+    collector = KnowledgeCollector()
+    collector.suppliers_file = str(tmp_path / "suppliers.json")
+    collector.suppliers_database = {}
+    collector.save_supplier_contact({"name": "ИП Замков", "phone": "+79001234567",
+                                     "description": "Замки и фурнитура", "category": "supplier"})
+    monkeypatch.setattr(inline_search, "task_search_index", index)
+    monkeypatch.setattr(inline_search, "knowledge_collector", collector)
+    monkeypatch.setattr(inline_search, "reload_tasks_if_changed", lambda: None)
+    monkeypatch.setattr(inline_search, "inline_cache", inline_search.InlineResultCache())
+    return collector
+
+
+def make_update(user_id, query):
+    return SimpleNamespace(inline_query=SimpleNamespace(
+        from_user=SimpleNamespace(id=user_id), query=query, answer=AsyncMock()))
+
+
+@pytest.mark.asyncio
+async def test_inline_results_respect_department_membership(search_env):
+    update = make_update(100, "  Замок ")
+    await inline_search.handle_inline_query(update, None)
+    results = update.inline_query.answer.call_args.args[0]
+    kwargs = update.inline_query.answer.call_args.kwargs
+    assert [r.id for r in results] == ["task:1"]
+    assert kwargs == {"cache_time": inline_search.INLINE_CACHE_TIME, "is_personal": True}
+
+    update = make_update(200, "зам")
+    await inline_search.handle_inline_query(update, None)
+    results = update.inline_query.answer.call_args.args[0]
+    assert [r.id for r in results] == ["task:2", "contact:+79001234567"]
+    assert "Замков" in results[1].input_message_content.message_text
+
+    # Посторонний пользователь (не состоит ни в одном отделе) не видит ни задач, ни контактов
+    update = make_update(999, "фурнитура")
+    await inline_search.handle_inline_query(update, None)
+    assert update.inline_query.answer.call_args.args[0] == []
+
+    # Директор видит контакты, даже не состоя в отделах
+    update = make_update(inline_search.GENERAL_DIRECTOR_ID, "фурнитура")
+    await inline_search.handle_inline_query(update, None)
+    assert [r.id for r in update.inline_query.answer.call_args.args[0]] == ["contact:+79001234567"]
+
+
+@pytest.mark.asyncio
+async def test_inline_results_are_cached_per_user(search_env, monkeypatch):
+    calls = []
+    original = inline_search.build_inline_results
+    monkeypatch.setattr(inline_search, "build_inline_results",
+                        lambda user_id, query: calls.append((user_id, query)) or original(user_id, query))
+    for user_id in (100, 100, 200):
+        await inline_search.handle_inline_query(make_update(user_id, "замок"), None)
+    assert calls == [(100, "замок"), (200, "замок")]
+
+    # Новый контакт попадает в индекс без полной пересборки
+    search_env.save_supplier_contact({"name": "Стекольщик", "phone": "+79007654321", "description": "Окна"})
+    assert [phone for phone, _ in search_env.search_contacts_indexed("стекольщик")] == ["+79007654321"]
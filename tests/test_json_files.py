@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Тесты атомарной записи файлов данных
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+from utils_veretevo.json_files import atomic_open, write_json_atomic
+
+
+def test_concurrent_writers_do_not_share_temp_file(tmp_path):
+    """Два писателя одного файла не затирают временные файлы друг друга"""
+    path = tmp_path / "broadcasts.json"
+    errors = []
+
+    def writer(name):
+        try:
+            for i in range(50):
+                write_json_atomic(str(path), {"writer": name, "i": i, "payload": "x" * 2000})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in ("bot", "cron")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert json.loads(path.read_text(encoding="utf-8"))["i"] == 49
+    assert [p.name for p in tmp_path.iterdir()] == ["broadcasts.json"]
+
+
+def test_replace_keeps_mode_and_failure_keeps_old_file(tmp_path):
+    path = tmp_path / "answers.json"
+    path.write_text("{}", encoding="utf-8")
+    os.chmod(path, 0o640)
+
+    write_json_atomic(str(path), {"a": 1})
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(str(path)) as f:
+            f.write('{"a": ')
+            raise RuntimeError("сбой во время записи")
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["answers.json"]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Тесты хранения базы знаний: журнал изменений, флаг изменений, уплотнение
+"""
+
+import json
+import os
+
+from services_veretevo.gpt_service import GPTService
+from utils_veretevo.json_log_store import JsonLogStore
+
+
+def make_service(tmp_path, monkeypatch, existing=None):
+    monkeypatch.setattr(GPTService, "_start_autosave", lambda self: None)
+    answers_file = tmp_path / "answers.json"
+    if existing is not None:
+        answers_file.write_text(json.dumps(existing, ensure_ascii=False), encoding="utf-8")
+    service = GPTService()
+    service.answers_file = str(answers_file)
+    service._load_answers()
+    return service
+
+
+def test_store_replays_log_over_snapshot_and_skips_torn_line(tmp_path):
+    store = JsonLogStore(str(tmp_path / "kb.json"), str(tmp_path / "kb.log.jsonl"))
+    store.compact({"a": 1, "b": 2})
+    store.put("c", 3)
+    store.put("a", 10)
+    store.delete("b")
+    with open(store.log_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "key": "d"')  # запись оборвалась при сбое
+
+    reopened = JsonLogStore(store.snapshot_path, store.log_path)
+    assert reopened.load() == {"a": 10, "c": 3}
+    assert reopened.log_entries == 3
+
+    reopened.compact({"a": 10, "c": 3})
+    assert not os.path.exists(store.log_path)
+    assert JsonLogStore(store.snapshot_path, store.log_path).load() == {"a": 10, "c": 3}
+
+
+def test_saving_template_appends_one_line_instead_of_rewriting(tmp_path, monkeypatch):
+    existing = {f"Вопрос {i}?": {"answer": f"Ответ {i}", "department": "", "created_at": 0} for i in range(200)}
+    service = make_service(tmp_path, monkeypatch, existing)
+    snapshot_before = (tmp_path / "answers.json").read_bytes()
+
+    assert service.save_answer_template("Где ключи от склада?", "У охраны.", "security")
+    assert (tmp_path / "answers.json").read_bytes() == snapshot_before
+    log_lines = (tmp_path / "answers.log.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(log_lines) == 1 and json.loads(log_lines[0])["key"] == "Где ключи от склада?"
+    assert not service.dirty
+
+    # После перезапуска запись на месте
+    restarted = make_service(tmp_path, monkeypatch)
+    assert restarted.answers_cache["Где ключи от склада?"]["answer"] == "У охраны."
+    assert len(restarted.answers_cache) == 201
+    assert restarted.find_similar_question("где ключи от склада")["answer"] == "У охраны."
+
+
+def test_hits_mark_dirty_and_compaction_is_triggered_by_log_size(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    monkeypatch.setattr("services_veretevo.gpt_service.KB_LOG_COMPACT_ENTRIES", 3)
+    service.save_answer_template("Где ключи от склада?", "У охраны.")
+    service._record_hit("Где ключи от склада?")
+    assert service.dirty
+
+    service.save_answer_template("Когда обед?", "В 13:00.")
+    service.save_answer_template("Кто дежурит?", "Иван.")
+    # Третья запись в журнал — уплотнение в снимок вместе со счетчиками
+    assert service.kb_store.log_entries == 0 and not service.dirty
+    snapshot = json.loads((tmp_path / "answers.json").read_text(encoding="utf-8"))
+    assert len(snapshot) == 3 and snapshot["Где ключи от склада?"]["hits"] == 1
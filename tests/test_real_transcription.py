@@ -80,12 +80,12 @@ def test_real_transcription():
                 print(f"⚠️ Не удалось удалить тестовый файл: {e}")
 
 def test_voice_transcriber_in_tasks():
-    """Тестирует voice_transcriber в контексте tasks.py"""
-    print("\n🔍 Тестирование voice_transcriber в tasks.py...")
+    """Тестирует voice_transcriber в контексте voice_handler.py"""
+    print("\n🔍 Тестирование voice_transcriber в voice_handler.py...")
     
     try:
-        # Импортируем модуль tasks
-        from handlers_veretevo.tasks import voice_transcriber
+        # Импортируем модуль голосовых сообщений
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if voice_transcriber is not None:
             print("✅ voice_transcriber инициализирован успешно")
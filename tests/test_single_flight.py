@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Тесты объединения одинаковых одновременных запросов (single-flight)
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils_veretevo import gpt_providers
+from utils_veretevo.completion_cache import CompletionCache
+from utils_veretevo.single_flight import AsyncSingleFlight, SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_async_callers_share_one_call_and_errors():
+    """Одновременные вызовы с одним ключом получают один результат, ошибка тоже общая"""
+    flight = AsyncSingleFlight("test")
+    calls = []
+
+    async def slow(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        if value == "boom":
+            raise RuntimeError("ошибка API")
+        return value.upper()
+
+    results = await asyncio.gather(*[flight.do("k", lambda: slow("ответ")) for _ in range(5)],
+                                   flight.do("other", lambda: slow("другой")))
+    assert results == ["ОТВЕТ"] * 5 + ["ДРУГОЙ"]
+    assert calls == ["ответ", "другой"] and flight.inflight() == 0
+
+    errors = await asyncio.gather(*[flight.do("e", lambda: slow("boom")) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert calls.count("boom") == 1
+
+    # После завершения ключ освобождается — следующий вызов снова идет в API
+    assert await flight.do("k", lambda: slow("ответ")) == "ОТВЕТ"
+    assert calls.count("ответ") == 2
+
+
+def test_threads_share_one_call():
+    """Потоки с одинаковым ключом ждут результат первого"""
+    flight = SingleFlight("test")
+    counter = {"calls": 0}
+    started = threading.Event()
+
+    def work():
+        counter["calls"] += 1
+        started.set()
+        time.sleep(0.1)
+        return "текст"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(flight.do, "audio", work)
+        started.wait()
+        others = [pool.submit(flight.do, "audio", work) for _ in range(3)]
+        assert [f.result() for f in [first] + others] == ["текст"] * 4
+    assert counter["calls"] == 1 and flight.stats["shared"] == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_questions_hit_gpt_once(tmp_path):
+    """Несколько одинаковых вопросов одновременно — один запрос к Yandex GPT"""
+    from services_veretevo import gpt_service as module
+
+    def slow_post(*args, **kwargs):
+        time.sleep(0.1)
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"result": {"alternatives": [{"message": {"text": "Да, можно."}}]}}
+        return response
+
+    with patch.object(module, "completion_cache", CompletionCache(str(tmp_path / "gpt_cache.json"))), \
+            patch.object(module.yandex_provider, "api_key", "test-key"), \
+            patch.object(gpt_providers.requests, "post", side_effect=slow_post) as post:
+        answers = await asyncio.gather(*[
+            module.gpt_service.generate_gpt_response("Можно уйти пораньше?", "Отдел: maids") for _ in range(4)
+        ])
+    assert answers == ["Да, можно."] * 4
+    assert post.call_count == 1
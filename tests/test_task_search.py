@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Тесты полнотекстового поиска задач и команды /find
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from config_veretevo.constants import GENERAL_DIRECTOR_ID
+from handlers_veretevo import tasks as task_handlers
+from services_veretevo import department_service
+from services_veretevo.task_search_service import TaskSearchIndex, parse_find_query
+
+
+def make_task(task_id, text, department="security", status="новая", created_at="2025-03-01T10:00:00", **extra):
+    return {"id": task_id, "text": text, "department": department, "status": status,
+            "created_at": created_at, "author_name": "Иван Петров", "author_id": 1, **extra}
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task(1, "Проверить сигнализацию на складе", tags=["склад"]),
+        make_task(2, "Заменить замок на воротах", department="carpenters", status="в работе",
+                  created_at="2025-03-05T09:00:00", assistant_name="Мария"),
+        make_task(3, "Купить корм для собак", department="maids", created_at="2025-02-01T09:00:00"),
+    ]
+
+
+def test_search_by_word_forms_prefix_typos_and_names(tmp_path, tasks):
+    index = TaskSearchIndex(archive_file=str(tmp_path / "archive.jsonl"))
+    index.sync(tasks)
+    assert [t["id"] for t in index.search("сигнализация")] == [1]
+    assert [t["id"] for t in index.search("сигн")] == [1]          # начало слова
+    assert [t["id"] for t in index.search("замак ворот")] == [2]   # опечатка и словоформа
+    assert [t["id"] for t in index.search("мария")] == [2]         # исполнитель
+    # Задача, совпавшая и по тексту, и по тегу, выдается один раз
+    assert [t["id"] for t in index.search("склад")] == [1]
+
+
+def test_filters_and_empty_query(tmp_path, tasks):
+    index = TaskSearchIndex(archive_file=str(tmp_path / "archive.jsonl"))
+    index.sync(tasks)
+    assert index.search("замок", department="security") == []
+    assert [t["id"] for t in index.search("", status="работ")] == [2]
+    assert [t["id"] for t in index.search("", date_from="2025-03-01")] == [2, 1]
+    assert [t["id"] for t in index.search("", date_to="2025-02-28")] == [3]
+    assert [t["id"] for t in index.search("", visible=lambda t: t["department"] == "maids")] == [3]
+
+
+def test_sync_reindexes_only_changed_tasks_and_keeps_archive(tmp_path, tasks):
+    archive_file = tmp_path / "archive.jsonl"
+    index = TaskSearchIndex(archive_file=str(archive_file))
+    index.sync(tasks)
+    with patch.object(index.index, "add", wraps=index.index.add) as add:
+        tasks[0]["text"] = "Проверить камеры на складе"
+        index.sync(tasks)
+    assert add.call_count == 1
+    assert index.search("сигнализация") == []
+
+    # Задача ушла из tasks.json в архив — ищется и после перезапуска
+    index.archive([tasks[2]])
+    index.sync(tasks[:2])
+    assert [t["id"] for t in index.search("корм")] == [3]
+    assert index.search("корм", include_archive=False) == []
+
+    restarted = TaskSearchIndex(archive_file=str(archive_file))
+    restarted.sync(tasks[:2])
+    assert [t["id"] for t in restarted.search("собаки")] == [3]
+    assert restarted.is_archived(3)
+
+    del tasks[1]
+    index.sync(tasks[:1])
+    assert index.search("замок") == []
+
+
+def test_parse_find_query():
+    assert parse_find_query("замок отдел:плотники статус:в_работе с:2025-03-01") == (
+        "замок", {"отдел": "плотники", "статус": "в работе", "с": "2025-03-01"})
+    assert parse_find_query("время 10:00") == ("время 10:00", {})
+
+
+@pytest.mark.asyncio
+async def test_find_command_limits_results_to_user_departments(tmp_path, tasks, monkeypatch):
+    index = TaskSearchIndex(archive_file=str(tmp_path / "archive.jsonl"))
+    index.sync(tasks)
+    monkeypatch.setattr(task_handlers, "task_search_index", index)
+    monkeypatch.setattr(task_handlers, "reload_tasks_if_changed", lambda: None)
+    monkeypatch.setattr(department_service, "get_user_departments", lambda user_id: [("maids", "Горничные")])
+
+    def make_update(user_id):
+        return SimpleNamespace(effective_user=SimpleNamespace(id=user_id),
+                               message=SimpleNamespace(reply_text=AsyncMock()))
+
+    update = make_update(555)
+    await task_handlers.find_tasks_command(update, SimpleNamespace(args=["замок"]))
+    update.message.reply_text.assert_called_once_with("Ничего не найдено.")
+
+    update = make_update(GENERAL_DIRECTOR_ID)
+    await task_handlers.find_tasks_command(update, SimpleNamespace(args=["замок", "статус:в_работе"]))
+    reply = update.message.reply_text.call_args.args[0]
+    assert reply.startswith("🔎 Найдено задач: 1") and "#2 [в работе]" in reply
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Тесты настроек собственного сервера Bot API и чтения файлов в локальном режиме
+"""
+
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from utils_veretevo.telegram_api import build_bot, fetch_telegram_file
+
+
+def test_build_bot_uses_custom_server():
+    """Bot собирается с переданным адресом сервера и локальным режимом"""
+    bot = build_bot("123:abc", base_url="http://127.0.0.1:8081/bot",
+                    base_file_url="http://127.0.0.1:8081/file/bot", local_mode=True)
+    assert bot.base_url == "http://127.0.0.1:8081/bot123:abc"
+    assert bot.base_file_url == "http://127.0.0.1:8081/file/bot123:abc"
+    assert bot.local_mode is True
+
+
+def test_build_bot_derives_file_url_from_custom_server():
+    """Без base_file_url файлы скачиваются с того же сервера, что и запросы API"""
+    bot = build_bot("123:abc", base_url="http://127.0.0.1:8081/bot")
+    assert bot.base_file_url == "http://127.0.0.1:8081/file/bot123:abc"
+
+
+@pytest.mark.asyncio
+async def test_fetch_file_reads_local_path_without_download(tmp_path):
+    """В локальном режиме файл не копируется и не удаляется после обработки"""
+    local_file = tmp_path / "voice.oga"
+    local_file.write_bytes(b"OggS")
+    file = MagicMock(file_path=str(local_file))
+    file.download_to_drive = AsyncMock()
+    bot = MagicMock(local_mode=True, get_file=AsyncMock(return_value=file))
+
+    path, is_temp = await fetch_telegram_file(bot, "file-id", suffix=".ogg")
+
+    assert (path, is_temp) == (str(local_file), False)
+    file.download_to_drive.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_file_downloads_to_temp_file():
+    """С публичным API файл скачивается во временный файл"""
+    file = MagicMock(file_path="https://api.telegram.org/file/bot123/voice.oga")
+    file.download_to_drive = AsyncMock()
+    bot = MagicMock(local_mode=False, get_file=AsyncMock(return_value=file))
+
+    path, is_temp = await fetch_telegram_file(bot, "file-id", suffix=".ogg")
+    try:
+        assert is_temp and path.endswith(".ogg")
+        file.download_to_drive.assert_awaited_once_with(path)
+    finally:
+        os.unlink(path)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Тесты классификатора текста: автомат Ахо-Корасик, отдел, приоритет и категория
+"""
+
+import pytest
+
+from services_veretevo import department_service
+from services_veretevo.classifier_service import TextClassifier, load_keywords
+from services_veretevo.enhanced_task_service import EnhancedTaskService, Priority, TaskCategory
+from utils_veretevo.aho_corasick import AhoCorasick
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(department_service, "DEPARTMENTS", {
+        "security": {"name": "Охрана"},
+        "tech": {"name": "Тех команда"},
+        "pool": {"name": "Бассейн"},
+    })
+    return TextClassifier(load_keywords())
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick()
+    for pattern in ["he", "she", "his", "hers"]:
+        automaton.add(pattern, pattern)
+    matches = sorted(automaton.iter_matches("ushers"))
+    assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_department_by_word_forms_and_explicit_phrase(classifier):
+    result = classifier.classify("Проблема с охраной у ворот")
+    assert result.department == "security"
+    assert result.confidence["department"] == 1.0
+    explicit = result.matches[0]
+    assert explicit.keyword == "проблема с охрана"
+    assert "Проблема с охраной у ворот"[explicit.start:explicit.end] == "Проблема с охраной"
+
+    # Специфичное слово важнее общего, общий "помощник" не перебивает другой отдел
+    assert classifier.classify("Помощник охранника потерял пропуск").department == "security"
+    assert classifier.classify("Пусть тех команда посмотрит интернет").department == "tech"
+    # Отдел без ключевых слов в конфиге находится по названию
+    assert classifier.classify("В бассейне грязная вода").department == "pool"
+    assert classifier.classify("Когда привезут саженцы?").department is None
+
+
+def test_keywords_match_from_word_start_only(classifier):
+    # Прежние проверки подстрокой находили "еда" в "обеда" и "важно" в "неважно"
+    result = classifier.classify("После обеда, неважно когда")
+    assert result.department is None
+    assert result.priority == "low"
+    assert classifier.classify("Site is down").department is None
+    assert classifier.classify("Сломался компьютер, позовите IT").department == "it"
+
+
+def test_priority_and_category_in_one_pass(classifier):
+    result = classifier.classify("🔥 Срочно поправить макет для рекламы на ресепшен")
+    assert (result.department, result.priority, result.category) == ("reception", "urgent", "design")
+    assert {m.dimension for m in result.matches} == {"department", "priority", "category"}
+
+
+def test_classifier_rebuilds_when_departments_change(classifier, monkeypatch):
+    assert classifier.classify("Нужен садовник").department is None
+    monkeypatch.setattr(department_service, "DEPARTMENTS", {"garden": {"name": "Садовник"}})
+    assert classifier.classify("Нужен садовник").department == "garden"
+
+
+def test_enhanced_task_defaults():
+    service = EnhancedTaskService()
+    task = service.create_enhanced_task({"text": "Важно: обновить код бота #bot"})
+    assert task["priority"] == Priority.HIGH.value
+    assert task["category"] == TaskCategory.DEVELOPMENT.value
+    assert service.detect_priority("Купить воду") == Priority.MEDIUM
+    assert service.detect_category("Купить воду") == TaskCategory.OTHER
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Тесты BM25-индекса, поиска похожих вопросов и обслуживания базы знаний
+"""
+
+from services_veretevo.gpt_service import GPTService
+from utils_veretevo.minhash import find_duplicate_clusters
+from utils_veretevo.text_index import BM25Index, normalize_text, stem_word
+
+
+def test_normalization_and_stemming():
+    """Регистр, ё и пунктуация не влияют, словоформы сводятся к одной основе"""
+    assert normalize_text("Ещё раз: ПРОВЕРИТЬ ворота!") == "еще раз проверить ворота"
+    assert stem_word("проверить") == stem_word("проверил") == stem_word("проверит")
+    assert stem_word("охраны") == stem_word("охрана")
+
+
+def test_search_ranks_relevant_question_first():
+    """Запрос с опечаткой и другой словоформой находит нужный вопрос"""
+    index = BM25Index()
+    index.add_many([
+        (1, "Как проверить безопасность объекта?"),
+        (2, "Когда заказать продукты на кухню?"),
+        (3, "Можно ли перенести уборку номера?"),
+    ])
+    results = index.search("проверка безопастности объекта", top_k=2)
+    assert results[0][0] == 1
+    assert results[0][1] > (results[1][1] if len(results) > 1 else 0)
+
+
+def test_incremental_update_and_remove():
+    """Повторное добавление заменяет документ, удаление убирает его из выдачи"""
+    index = BM25Index()
+    index.add("q", "починить шлагбаум")
+    index.add("q", "оплатить счет")
+    assert len(index) == 1
+    assert index.search("шлагбаум") == []
+    assert index.search("счет")[0][0] == "q"
+    index.remove("q")
+    assert "q" not in index and index.search("счет") == []
+
+
+def test_find_similar_question_uses_index(tmp_path, monkeypatch):
+    """GPTService находит сохраненный вопрос и возвращает числовую похожесть"""
+    service = make_service(tmp_path, monkeypatch)
+    service.save_answer_template("Как проверить безопасность объекта?", "Обойти территорию.", "security")
+    service.save_answer_template("Когда привезут продукты?", "Завтра утром.", "maids")
+
+    similar = service.find_similar_question("как проверить безопасность объекта")
+    assert similar["question"] == "Как проверить безопасность объекта?"
+    assert similar["department"] == "security"
+    assert similar["similarity"] >= 0.6
+    assert service.find_similar_question("график отпусков бухгалтерии") is None
+
+
+def test_aliases_are_searchable(tmp_path, monkeypatch):
+    """Слитый вопрос (alias) находится поиском и выдает запись, в которую он слит"""
+    service = make_service(tmp_path, monkeypatch)
+    service.save_answer_template("Когда вывоз мусора?", "По вторникам.", "maids")
+    service.save_answer_template("Кто дежурит на парковке?", "Охрана.", "security")
+    service.answers_cache["Когда вывоз мусора?"]["aliases"] = ["Во сколько приезжает машина за отходами?"]
+    service._rebuild_index()
+
+    assert service.search_questions("машина за отходами")[0][0] == "Когда вывоз мусора?"
+    similar = service.find_similar_question("во сколько приезжает машина за отходами")
+    assert similar["question"] == "Когда вывоз мусора?" and similar["answer"] == "По вторникам."
+
+
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(GPTService, "_start_autosave", lambda self: None)
+    service = GPTService()
+    service.answers_file = str(tmp_path / "answers.json")
+    service.archive_file = str(tmp_path / "answers_archive.json")
+    service.answers_cache = {}
+    service._rebuild_index()
+    return service
+
+
+def test_minhash_clusters_near_duplicates():
+    """Переформулировки одного вопроса попадают в один кластер, другой вопрос — нет"""
+    clusters = find_duplicate_clusters([
+        (1, "Как проверить безопасность объекта?"),
+        (2, "как проверить безопасность объекта"),
+        (3, "Как проверять безопасность объектов?"),
+        (4, "Когда привезут продукты на кухню?"),
+    ])
+    assert [sorted(cluster) for cluster in clusters] == [[1, 2, 3]]
+
+
+def test_maintenance_merges_duplicates_and_archives_cold(tmp_path, monkeypatch):
+    """Дубли сливаются в самую используемую запись, лишние редкие уходят в архив"""
+    service = make_service(tmp_path, monkeypatch)
+    service.save_answer_template("Как проверить безопасность объекта?", "Обойти территорию.", "security")
+    service.save_answer_template("как проверить безопасность объекта", "Обойти территорию", "security")
+    service.save_answer_template("Когда привезут продукты?", "Завтра.", "maids")
+    service.save_answer_template("Кто дежурит на парковке?", "Охрана.", "security")
+    service._record_hit("как проверить безопасность объекта")
+    service._record_hit("Кто дежурит на парковке?")
+
+    service.max_entries = 2
+    result = service.run_maintenance()
+
+    assert result == {**result, "merged": 1, "archived": 1, "total_answers": 2}
+    kept = service.answers_cache["как проверить безопасность объекта"]
+    assert kept["aliases"] == ["Как проверить безопасность объекта?"] and kept["hits"] == 1
+    assert "Когда привезут продукты?" in service._load_archive()
+    assert "Когда привезут продукты?" not in dict(service.search_questions("продукты"))
+    assert service.find_similar_question("Как проверить безопасность объекта?")["answer"] == "Обойти территорию"
+    assert service._load_archive()["Как проверить безопасность объекта?"]["merged_into"] == \
+        "как проверить безопасность объекта"
+
+
+def test_merge_keeps_other_departments_and_different_answers(tmp_path, monkeypatch):
+    """Похожие вопросы разных отделов или с разными ответами не сливаются"""
+    service = make_service(tmp_path, monkeypatch)
+    service.save_answer_template("Как проверить безопасность объекта?", "Обойти территорию.", "security")
+    service.save_answer_template("как проверить безопасность объекта", "Позвонить в охрану.", "security")
+    service.save_answer_template("Как проверить безопасность объекта", "Проверить замки в номерах.", "maids")
+
+    assert service.merge_duplicates() == 0
+    assert len(service.answers_cache) == 3
+    assert service.answers_cache["Как проверить безопасность объекта"]["department"] == "maids"
+    assert service._load_archive() == {}
+
+
+def test_saving_existing_question_keeps_metadata(tmp_path, monkeypatch):
+    """Новый ответ на известный вопрос не сбрасывает счетчики, aliases и отмены"""
+    service = make_service(tmp_path, monkeypatch)
+    service.save_answer_template("Когда вывоз мусора?", "По вторникам.", "maids")
+    service._record_hit("Когда вывоз мусора?")
+    service.record_auto_answer_undo("Когда вывоз мусора?")
+    service.answers_cache["Когда вывоз мусора?"]["aliases"] = ["Во сколько приезжает машина за отходами?"]
+
+    service.save_answer_template("Когда вывоз мусора?", "По средам.", "maids")
+
+    entry = service.kb_store.load()["Когда вывоз мусора?"]
+    assert entry["answer"] == "По средам."
+    assert entry["hits"] == 1 and entry["auto_undos"] == 1 and "last_used" in entry
+    assert entry["aliases"] == ["Во сколько приезжает машина за отходами?"]
+    assert service.search_questions("машина за отходами")[0][0] == "Когда вывоз мусора?"
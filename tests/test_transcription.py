@@ -84,12 +84,12 @@ def test_transcription():
                 print(f"⚠️ Не удалось удалить тестовый файл: {e}")
 
 def test_voice_transcriber_initialization():
-    """Тестирует инициализацию voice_transcriber в tasks.py"""
+    """Тестирует инициализацию voice_transcriber в voice_handler.py"""
     print("\n🔍 Тестирование инициализации voice_transcriber...")
     
     try:
-        # Импортируем модуль tasks
-        from handlers_veretevo.tasks import voice_transcriber
+        # Импортируем модуль голосовых сообщений
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if voice_transcriber is not None:
             print("✅ voice_transcriber инициализирован успешно")
@@ -100,7 +100,7 @@ async def test_voice_transcriber_integration():
     print("\n🔍 Тестирование интеграции voice_transcriber...")
     
     try:
-        from handlers_veretevo.tasks import voice_transcriber
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if not voice_transcriber:
             print("❌ voice_transcriber не инициализирован")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Тесты очереди заданий на распознавание голосовых сообщений
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services_veretevo.voice_job_service import (
+    VoiceJobStore, MAX_ATTEMPTS, RETRY_BASE_DELAY,
+    VOICE_JOB_PENDING, VOICE_JOB_PROCESSING, VOICE_JOB_DONE, VOICE_JOB_FAILED
+)
+
+
+def make_store(tmp_path):
+    return VoiceJobStore(jobs_file=str(tmp_path / "voice_jobs.json"))
+
+
+def test_job_survives_restart(tmp_path):
+    """Прерванное задание после перезапуска снова попадает в очередь"""
+    store = make_store(tmp_path)
+    job = store.create_job("file-1", chat_id=-100, chat_type="group", placeholder_message_id=7)
+    store.mark_processing(job["id"])
+
+    restarted = make_store(tmp_path)
+    assert restarted.get_job(job["id"])["state"] == VOICE_JOB_PROCESSING
+    assert restarted.recover_interrupted() == 1
+
+    due = restarted.get_due_jobs()
+    assert [j["id"] for j in due] == [job["id"]]
+    assert due[0]["placeholder_message_id"] == 7
+
+
+def test_retry_backoff_and_failure(tmp_path):
+    """Повторы идут с растущей задержкой, после MAX_ATTEMPTS задание падает"""
+    store = make_store(tmp_path)
+    job = store.create_job("file-2", chat_id=1, chat_type="private")
+    now = job["created_at"]
+
+    delays = []
+    for _ in range(MAX_ATTEMPTS - 1):
+        store.mark_processing(job["id"])
+        retried = store.schedule_retry(job["id"], "timeout", now=now)
+        assert retried["state"] == VOICE_JOB_PENDING
+        delays.append(retried["next_attempt_at"] - now)
+    assert delays[0] == RETRY_BASE_DELAY
+    assert delays == sorted(delays)
+    assert store.get_due_jobs(now=now) == []
+
+    store.mark_processing(job["id"])
+    assert store.schedule_retry(job["id"], "timeout", now=now)["state"] == VOICE_JOB_FAILED
+
+
+@pytest.mark.asyncio
+async def test_worker_edits_placeholder(tmp_path):
+    """Результат вписывается в заглушку; неудача оставляет задание в очереди"""
+    from handlers_veretevo import voice_handler
+
+    store = make_store(tmp_path)
+    job = store.create_job("file-3", chat_id=-100, chat_type="group", placeholder_message_id=42)
+
+    bot = AsyncMock()
+    bot.get_file.return_value = MagicMock(download_to_drive=AsyncMock())
+    transcriber = MagicMock()
+    transcriber.process_audio_file.side_effect = [None, "проверка связи"]
+
+    with patch.object(voice_handler, "voice_job_store", store), \
+         patch.object(voice_handler, "voice_transcriber", transcriber), \
+         patch.object(voice_handler, "improve_task_text", lambda text: text):
+        await voice_handler.process_voice_job(bot, store.get_job(job["id"]))
+        assert store.get_job(job["id"])["state"] == VOICE_JOB_PENDING
+        assert "медленно" in bot.edit_message_text.call_args.kwargs["text"]
+
+        await voice_handler.process_voice_job(bot, store.get_job(job["id"]))
+
+    assert store.get_job(job["id"])["state"] == VOICE_JOB_DONE
+    kwargs = bot.edit_message_text.call_args.kwargs
+    assert kwargs["message_id"] == 42
+    assert "проверка связи" in kwargs["text"]
+
+
+@pytest.mark.asyncio
+async def test_broken_markdown_is_sent_as_plain_text(tmp_path):
+    """Непарная разметка в транскрипции не приводит к повторному распознаванию"""
+    from telegram.error import BadRequest
+    from handlers_veretevo import voice_handler
+
+    store = make_store(tmp_path)
+    job = store.create_job("file-4", chat_id=-100, chat_type="group", placeholder_message_id=42)
+
+    bot = AsyncMock()
+    bot.get_file.return_value = MagicMock(download_to_drive=AsyncMock())
+    bot.edit_message_text.side_effect = [BadRequest("Can't parse entities"), None]
+    bot.send_message.side_effect = BadRequest("Can't parse entities")
+    transcriber = MagicMock()
+    transcriber.process_audio_file.return_value = "цена *со скидкой_"
+
+    with patch.object(voice_handler, "voice_job_store", store), \
+         patch.object(voice_handler, "voice_transcriber", transcriber), \
+         patch.object(voice_handler, "improve_task_text", lambda text: text):
+        await voice_handler.process_voice_job(bot, store.get_job(job["id"]))
+
+    assert store.get_job(job["id"])["state"] == VOICE_JOB_DONE
+    assert transcriber.process_audio_file.call_count == 1
+    kwargs = bot.edit_message_text.call_args.kwargs
+    assert kwargs["parse_mode"] is None and "цена *со скидкой_" in kwargs["text"]
+
+
+@pytest.mark.asyncio
+async def test_user_is_told_when_job_disappears(tmp_path):
+    """Задание удалили во время распознавания — пользователь все равно получает ответ"""
+    from handlers_veretevo import voice_handler
+
+    store = make_store(tmp_path)
+    job = store.create_job("file-5", chat_id=-100, chat_type="group", placeholder_message_id=42)
+
+    def transcribe_and_lose_job(path):
+        with store.lock:
+            store.jobs.pop(job["id"])
+        return None
+
+    bot = AsyncMock()
+    bot.get_file.return_value = MagicMock(download_to_drive=AsyncMock())
+    transcriber = MagicMock()
+    transcriber.process_audio_file.side_effect = transcribe_and_lose_job
+
+    with patch.object(voice_handler, "voice_job_store", store), \
+         patch.object(voice_handler, "voice_transcriber", transcriber):
+        await voice_handler.process_voice_job(bot, store.get_job(job["id"]))
+
+    kwargs = bot.edit_message_text.call_args.kwargs
+    assert kwargs["message_id"] == 42 and "ошибка" in kwargs["text"]
@@ -51,7 +51,8 @@ async def test_voice_message_simulation():
     
     try:
         # Импортируем необходимые модули
-        from handlers_veretevo.tasks import handle_voice_message, voice_transcriber
+        from handlers_veretevo.tasks import handle_voice_message
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         # Создаем реалистичный голосовой файл
         voice_file_path = create_realistic_voice_file()
@@ -135,7 +136,7 @@ async def test_voice_transcriber_with_real_file():
     print("\n🔍 Тестирование voice_transcriber с реалистичным файлом...")
     
     try:
-        from handlers_veretevo.tasks import voice_transcriber
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if not voice_transcriber:
             print("❌ voice_transcriber недоступен")
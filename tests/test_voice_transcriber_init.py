@@ -14,8 +14,8 @@ def test_voice_transcriber_initialization():
     print("🔍 Тестирование инициализации voice_transcriber...")
     
     try:
-        # Импортируем модуль tasks
-        from handlers_veretevo.tasks import voice_transcriber
+        # Импортируем модуль голосовых сообщений
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if voice_transcriber:
             print("✅ voice_transcriber инициализирован успешно")
@@ -72,7 +72,7 @@ def test_voice_transcriber_methods():
     print("\n🔍 Тестирование методов voice_transcriber...")
     
     try:
-        from handlers_veretevo.tasks import voice_transcriber
+        from handlers_veretevo.voice_handler import voice_transcriber
         
         if not voice_transcriber:
             print("❌ voice_transcriber не инициализирован")
@@ -0,0 +1,72 @@
+"""
+Автомат Ахо-Корасик: поиск всех вхождений множества шаблонов за один проход.
+
+Шаблоны складываются в префиксное дерево, затем строятся ссылки неудач
+(обход в ширину) и к каждому узлу присоединяются выходы его суффиксов.
+Поиск проходит по тексту один раз, время не зависит от числа шаблонов —
+только от длины текста и количества найденных вхождений.
+"""
+from collections import deque
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """Набор шаблонов с произвольными данными (payload) для каждого"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+        self.patterns = 0
+
+    def add(self, pattern: str, payload: Any):
+        """Добавляет шаблон; после build() добавлять нельзя"""
+        if self._built:
+            raise RuntimeError("Автомат уже построен")
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._out[node].append((len(pattern), payload))
+        self.patterns += 1
+
+    def build(self) -> "AhoCorasick":
+        """Строит ссылки неудач и объединяет выходы суффиксов"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Все вхождения в виде (начало, конец, payload), конец не включается"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                end = index + 1
+                for length, payload in out[node]:
+                    yield end - length, end, payload
@@ -0,0 +1,285 @@
+"""
+Векторизованная предобработка аудио для Yandex SpeechKit.
+
+Заменяет pydub `normalize()` и `strip_silence()`, которые обходят аудио
+в чистом Python по миллисекундам. Здесь PCM декодируется один раз через
+ffmpeg в массив NumPy, энергия окон считается через кумулятивные суммы,
+а обрезанный буфер передается кодеку через stdin без промежуточных файлов.
+
+Параметры и результат совпадают с прежней цепочкой pydub
+(set_channels(1) -> set_frame_rate(48000) -> normalize() -> strip_silence()).
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 48000
+MAX_AMPLITUDE = 32768  # int16, как AudioSegment.max_possible_amplitude
+
+# Параметры, которые раньше передавались в pydub
+SILENCE_LEN_MS = 500
+SILENCE_THRESH_DB = -40
+SILENCE_PADDING_MS = 100
+NORMALIZE_HEADROOM_DB = 0.1
+
+OPUS_PARAMETERS = ["-c:a", "libopus", "-ac", "1", "-ar", str(SAMPLE_RATE), "-b:a", "64k"]
+
+
+def get_ffmpeg_path() -> str:
+    """Возвращает путь к ffmpeg (тот же бинарник, что использует pydub)"""
+    return shutil.which("ffmpeg") or "ffmpeg"
+
+
+def decode_to_pcm(input_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Декодирует аудиофайл в моно PCM int16 одним вызовом ffmpeg
+
+    Args:
+        input_path: Путь к входному аудиофайлу
+        sample_rate: Частота дискретизации результата
+
+    Returns:
+        Массив сэмплов int16
+    """
+    command = [
+        get_ffmpeg_path(), "-nostdin", "-v", "error",
+        "-i", input_path,
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", "1", "-ar", str(sample_rate),
+        "-",
+    ]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg не смог декодировать {input_path}: {result.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def encode_pcm_to_ogg(samples: np.ndarray, output_path: str, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    Кодирует PCM int16 в OGG/Opus, передавая буфер в ffmpeg через stdin
+
+    Args:
+        samples: Массив сэмплов int16 (моно)
+        output_path: Путь к выходному OGG файлу
+        sample_rate: Частота дискретизации сэмплов
+    """
+    command = [
+        get_ffmpeg_path(), "-nostdin", "-v", "error", "-y",
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate),
+        "-i", "-",
+        *OPUS_PARAMETERS,
+        "-f", "ogg", output_path,
+    ]
+    data = np.ascontiguousarray(samples, dtype=np.int16).tobytes()
+    result = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg не смог закодировать OGG: {result.stderr.decode(errors='ignore').strip()}")
+
+
+def db_to_amplitude(db: float) -> float:
+    """Переводит dBFS в долю от максимальной амплитуды"""
+    return 10 ** (db / 20)
+
+
+def normalize_peak(samples: np.ndarray, headroom: float = NORMALIZE_HEADROOM_DB) -> np.ndarray:
+    """
+    Пиковая нормализация громкости (аналог pydub `normalize()`)
+
+    Args:
+        samples: Массив сэмплов int16
+        headroom: Запас до максимальной громкости в dB
+
+    Returns:
+        Нормализованный массив int16
+    """
+    if samples.size == 0:
+        return samples
+    peak = int(np.max(np.abs(samples.astype(np.int32))))
+    if peak == 0:
+        return samples
+    gain = MAX_AMPLITUDE * db_to_amplitude(-headroom) / peak
+    scaled = samples.astype(np.float64) * gain
+    return np.clip(scaled, -MAX_AMPLITUDE, MAX_AMPLITUDE - 1).astype(np.int16)
+
+
+def _ms_to_sample(positions: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Переводит позиции в миллисекундах в индексы сэмплов (как срезы pydub)"""
+    return (positions * sample_rate // 1000).astype(np.int64)
+
+
+def detect_silence(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                   min_silence_len: int = SILENCE_LEN_MS, silence_thresh: float = SILENCE_THRESH_DB,
+                   seek_step: int = 1) -> List[List[int]]:
+    """
+    Находит участки тишины в миллисекундах (аналог pydub.silence.detect_silence)
+
+    RMS всех скользящих окон считается разом через кумулятивную сумму квадратов,
+    вместо отдельного среза и audioop.rms на каждую миллисекунду.
+
+    Args:
+        samples: Массив сэмплов int16
+        sample_rate: Частота дискретизации
+        min_silence_len: Минимальная длина тишины в мс
+        silence_thresh: Порог тишины в dBFS
+        seek_step: Шаг поиска в мс
+
+    Returns:
+        Список участков [начало, конец] в мс
+    """
+    seg_len = int(round(1000 * samples.size / sample_rate))
+    if seg_len < min_silence_len:
+        return []
+
+    thresh = db_to_amplitude(silence_thresh) * MAX_AMPLITUDE
+
+    last_slice_start = seg_len - min_silence_len
+    slice_starts = np.arange(0, last_slice_start + 1, seek_step, dtype=np.int64)
+    if last_slice_start % seek_step:
+        slice_starts = np.append(slice_starts, last_slice_start)
+
+    squares = samples.astype(np.int64) ** 2
+    cumulative = np.concatenate(([0], np.cumsum(squares)))
+    begin = np.minimum(_ms_to_sample(slice_starts, sample_rate), samples.size)
+    end = np.minimum(_ms_to_sample(slice_starts + min_silence_len, sample_rate), samples.size)
+    counts = np.maximum(end - begin, 1)
+    # audioop.rms возвращает целое, поэтому округляем вниз для совпадения порога
+    rms = np.floor(np.sqrt((cumulative[end] - cumulative[begin]) / counts))
+
+    silence_starts = slice_starts[rms <= thresh]
+    if silence_starts.size == 0:
+        return []
+
+    gaps = np.diff(silence_starts)
+    breaks = np.nonzero((gaps != seek_step) & (gaps > min_silence_len))[0]
+    range_starts = np.concatenate(([silence_starts[0]], silence_starts[breaks + 1]))
+    range_ends = np.concatenate((silence_starts[breaks], [silence_starts[-1]])) + min_silence_len
+
+    return [[int(s), int(e)] for s, e in zip(range_starts, range_ends)]
+
+
+def detect_nonsilent(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                     min_silence_len: int = SILENCE_LEN_MS, silence_thresh: float = SILENCE_THRESH_DB,
+                     seek_step: int = 1) -> List[List[int]]:
+    """Находит участки речи в миллисекундах (аналог pydub.silence.detect_nonsilent)"""
+    silent_ranges = detect_silence(samples, sample_rate, min_silence_len, silence_thresh, seek_step)
+    seg_len = int(round(1000 * samples.size / sample_rate))
+
+    if not silent_ranges:
+        return [[0, seg_len]]
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == seg_len:
+        return []
+
+    nonsilent_ranges = []
+    prev_end = 0
+    for start, end in silent_ranges:
+        nonsilent_ranges.append([prev_end, start])
+        prev_end = end
+    if prev_end != seg_len:
+        nonsilent_ranges.append([prev_end, seg_len])
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+    return nonsilent_ranges
+
+
+def _crossfade_join(chunks: List[np.ndarray], crossfade_samples: int) -> np.ndarray:
+    """Склеивает фрагменты с линейным кроссфейдом (как AudioSegment.append)"""
+    pieces = []
+    tail = chunks[0]
+    for chunk in chunks[1:]:
+        overlap = min(crossfade_samples, tail.size, chunk.size)
+        ramp = np.linspace(1.0, 0.0, overlap, endpoint=False)
+        mixed = tail[tail.size - overlap:] * ramp + chunk[:overlap] * (1.0 - ramp)
+        pieces.append(tail[:tail.size - overlap])
+        pieces.append(np.clip(mixed, -MAX_AMPLITUDE, MAX_AMPLITUDE - 1).astype(np.int16))
+        tail = chunk[overlap:]
+    pieces.append(tail)
+    return np.concatenate(pieces)
+
+
+def strip_silence(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                  silence_len: int = SILENCE_LEN_MS, silence_thresh: float = SILENCE_THRESH_DB,
+                  padding: int = SILENCE_PADDING_MS) -> np.ndarray:
+    """
+    Удаляет участки тишины (аналог pydub `strip_silence()`)
+
+    Args:
+        samples: Массив сэмплов int16
+        sample_rate: Частота дискретизации
+        silence_len: Минимальная длина тишины в мс
+        silence_thresh: Порог тишины в dBFS
+        padding: Сколько тишины оставлять по краям фрагментов в мс
+
+    Returns:
+        Массив int16 без длинных пауз
+    """
+    if padding > silence_len:
+        raise ValueError("padding не может быть длиннее silence_len")
+
+    seg_len = int(round(1000 * samples.size / sample_rate))
+    ranges = [[start - padding, end + padding]
+              for start, end in detect_nonsilent(samples, sample_rate, silence_len, silence_thresh)]
+    if not ranges:
+        return samples[:0]
+
+    for current, following in zip(ranges, ranges[1:]):
+        if following[0] < current[1]:
+            current[1] = (current[1] + following[0]) // 2
+            following[0] = current[1]
+
+    chunks = []
+    for start, end in ranges:
+        begin, finish = _ms_to_sample(np.array([max(start, 0), min(end, seg_len)]), sample_rate)
+        chunks.append(samples[begin:finish])
+
+    crossfade_samples = int((padding / 2) * sample_rate // 1000)
+    return _crossfade_join(chunks, crossfade_samples)
+
+
+def preprocess_samples(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Нормализует громкость и убирает тишину в уже декодированном буфере"""
+    return strip_silence(normalize_peak(samples), sample_rate)
+
+
+def preprocess_audio_file(input_path: str, output_path: str) -> float:
+    """
+    Полная цепочка: декодирование, нормализация, обрезка тишины, кодирование в OGG
+
+    Args:
+        input_path: Путь к входному аудиофайлу
+        output_path: Путь к выходному OGG файлу
+
+    Returns:
+        Длительность результата в секундах
+    """
+    samples = decode_to_pcm(input_path, SAMPLE_RATE)
+    processed = preprocess_samples(samples, SAMPLE_RATE)
+    encode_pcm_to_ogg(processed, output_path, SAMPLE_RATE)
+    duration = processed.size / SAMPLE_RATE
+    logging.debug(f"[AUDIO] {input_path}: {samples.size / SAMPLE_RATE:.2f}s -> {duration:.2f}s после обрезки тишины")
+    return duration
+
+
+def convert_for_recognition(input_path: str) -> Tuple[bytes, float]:
+    """
+    Готовит файл к распознаванию и возвращает содержимое OGG вместо пути.
+    Функция верхнего уровня, чтобы ее можно было запускать в ProcessPoolExecutor.
+
+    Args:
+        input_path: Путь к входному аудиофайлу
+
+    Returns:
+        (данные OGG, длительность в секундах)
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as temp_file:
+        output_path = temp_file.name
+    try:
+        duration = preprocess_audio_file(input_path, output_path)
+        with open(output_path, 'rb') as f:
+            return f.read(), duration
+    finally:
+        os.unlink(output_path)
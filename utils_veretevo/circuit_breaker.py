@@ -0,0 +1,216 @@
+"""
+Автоматические выключатели (circuit breaker) для внешних сервисов.
+
+Выключатель считает исходы последних вызовов сервиса. Если доля ошибок или
+слишком медленных ответов превышает порог, он «размыкается»: вызовы сразу
+получают CircuitOpenError, не дожидаясь таймаута, и код переходит на запасной
+вариант. Через open_seconds пропускается пробный вызов (half-open): успех
+замыкает выключатель, ошибка снова размыкает.
+
+Использование:
+    with todoist_breaker.call() as call:
+        response = requests.post(...)
+        call.check_response(response)
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import requests
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+STATE_LABELS = {
+    STATE_CLOSED: "🟢 работает",
+    STATE_OPEN: "🔴 отключен",
+    STATE_HALF_OPEN: "🟡 проверка",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Сервис временно отключен выключателем"""
+
+    def __init__(self, breaker: "CircuitBreaker"):
+        super().__init__(f"Сервис {breaker.name} временно недоступен (повтор через {breaker.retry_in():.0f} с)")
+        self.breaker = breaker
+
+
+def is_upstream_status(status_code: int) -> bool:
+    """Коды ответа, говорящие о проблемах сервиса (4xx — ошибка самого запроса)"""
+    return status_code >= 500 or status_code == 429
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Исключения, говорящие о проблемах сервиса (а не о неверном запросе)"""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return is_upstream_status(exc.response.status_code)
+    return isinstance(exc, (requests.RequestException, OSError))
+
+
+class BreakerCall:
+    """Один вызов сервиса под выключателем (контекстный менеджер)"""
+
+    def __init__(self, breaker: "CircuitBreaker"):
+        self.breaker = breaker
+        self.failure: Optional[str] = None
+        self._started = 0.0
+
+    def fail(self, reason: str):
+        """Отмечает вызов неудачным без исключения (например, API вернуло 503)"""
+        self.failure = reason
+
+    def check_response(self, response):
+        """Отмечает вызов неудачным, если код ответа говорит о сбое сервиса"""
+        if is_upstream_status(response.status_code):
+            self.fail(f"HTTP {response.status_code}")
+
+    def __enter__(self):
+        self.breaker.before_call()
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        failure = self.failure
+        if exc is not None and is_upstream_failure(exc):
+            failure = f"{type(exc).__name__}: {exc}"
+        self.breaker.record(time.monotonic() - self._started, failure)
+        return False
+
+
+class CircuitBreaker:
+    """Выключатель одного внешнего сервиса"""
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 10.0, slow_rate: float = 0.8, open_seconds: float = 30.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.state = STATE_CLOSED
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+        self._outcomes = deque(maxlen=window)  # (ошибка, медленный)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Можно ли сейчас обращаться к сервису (без изменения состояния)"""
+        with self._lock:
+            if self.state == STATE_OPEN:
+                return self.retry_in() == 0
+            if self.state == STATE_HALF_OPEN:
+                return not self._probe_in_flight
+            return True
+
+    def before_call(self):
+        """Пропускает вызов или бросает CircuitOpenError"""
+        with self._lock:
+            if self.state == STATE_OPEN:
+                if self.retry_in() > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self)
+                self.state = STATE_HALF_OPEN
+                logging.info(f"🟡 [{self.name}] Пробный запрос после отключения")
+            if self.state == STATE_HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(self)
+                self._probe_in_flight = True
+
+    def call(self) -> BreakerCall:
+        """Контекстный менеджер для одного вызова сервиса"""
+        return BreakerCall(self)
+
+    def record(self, duration: float, failure: Optional[str] = None):
+        """Учитывает исход вызова (failure — описание сбоя) и переключает состояние"""
+        failed = failure is not None
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if failed:
+                self.last_error = failure[:200]
+            if self.state == STATE_HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = STATE_CLOSED
+                    self._outcomes.clear()
+                    logging.info(f"🟢 [{self.name}] Сервис снова доступен")
+                return
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f) / len(self._outcomes)
+            slows = sum(1 for _, s in self._outcomes if s) / len(self._outcomes)
+            if failures >= self.failure_rate or slows >= self.slow_rate:
+                self._open()
+
+    def _open(self):
+        self.state = STATE_OPEN
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+        logging.warning(f"🔴 [{self.name}] Сервис отключен на {self.open_seconds:.0f} с: {self.last_error}")
+
+    def reset(self):
+        with self._lock:
+            self.state = STATE_CLOSED
+            self._outcomes.clear()
+            self._probe_in_flight = False
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self.state,
+                "calls": len(outcomes),
+                "failure_rate": round(sum(1 for f, _ in outcomes if f) / len(outcomes), 2) if outcomes else 0.0,
+                "slow_rate": round(sum(1 for _, s in outcomes if s) / len(outcomes), 2) if outcomes else 0.0,
+                "retry_in": round(self.retry_in()) if self.state == STATE_OPEN else 0,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Выключатель сервиса по имени (создается при первом обращении)"""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+
+def all_breakers() -> List[CircuitBreaker]:
+    with _registry_lock:
+        return list(_breakers.values())
+
+
+def format_breakers_status() -> str:
+    """Текст о состоянии внешних сервисов для директора"""
+    lines = ["🩺 Состояние внешних сервисов:", ""]
+    for breaker in sorted(all_breakers(), key=lambda b: b.name):
+        status = breaker.get_status()
+        line = f"{STATE_LABELS[status['state']]} — {status['name']}"
+        if status["calls"]:
+            line += f" (ошибок {status['failure_rate']:.0%}, медленных {status['slow_rate']:.0%})"
+        if status["state"] == STATE_OPEN:
+            line += f", повтор через {status['retry_in']} с"
+        lines.append(line)
+        if status["state"] != STATE_CLOSED and status["last_error"]:
+            lines.append(f"   ↳ {status['last_error']}")
+    return "\n".join(lines)
@@ -0,0 +1,140 @@
+"""
+Кэш ответов Yandex GPT на диске.
+
+Ключ — (модель, температура, нормализованный промпт, отдел, номер варианта).
+Записи живут ttl секунд, при переполнении вытесняются давно не
+использованные (LRU). Кэш сохраняется в JSON и переживает перезапуск бота.
+Запись на диск пакетная: put только помечает кэш измененным, а flush
+(периодическая задача бота раз в GPT_CACHE_FLUSH_INTERVAL секунд, вне
+event loop, и при выходе процесса) записывает его целиком.
+Явная перегенерация (use_cache=False у вызывающего кода) идет мимо кэша,
+но обновляет сохраненный ответ.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config_veretevo.constants import GPT_CACHE_FILE
+from utils_veretevo.json_files import write_json_atomic
+
+GPT_CACHE_TTL = 7 * 24 * 3600
+GPT_CACHE_MAX_ENTRIES = 2000
+GPT_CACHE_FLUSH_INTERVAL = 60  # секунд между записями измененного кэша на диск
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Регистр, ё и пробелы не влияют на ключ кэша"""
+    return WHITESPACE_RE.sub(" ", prompt.lower().replace("ё", "е")).strip()
+
+
+def make_cache_key(model: str, temperature: float, prompt: str, department: str = "", variant: int = 0) -> str:
+    payload = json.dumps([model, round(float(temperature), 3), normalize_prompt(prompt), department or "", variant],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Персистентный LRU-кэш с TTL для ответов GPT"""
+
+    def __init__(self, path: str = GPT_CACHE_FILE, ttl: float = GPT_CACHE_TTL,
+                 max_entries: int = GPT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "expired": 0, "evicted": 0}
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                now = time.time()
+                # В файле записи лежат от давно использованных к недавним
+                for key, entry in data.items():
+                    if now - entry.get("created_at", 0) < self.ttl:
+                        self._entries[key] = entry
+                logging.info(f"✅ Загружено {len(self._entries)} ответов из кэша GPT")
+        except Exception as e:
+            logging.error(f"❌ Ошибка загрузки кэша GPT: {e}")
+            self._entries = OrderedDict()
+
+    def flush(self) -> bool:
+        """Атомарно записывает кэш на диск, если он менялся с прошлой записи"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                data = dict(self._entries)
+                self._dirty = False
+            try:
+                write_json_atomic(self.path, data, indent=None)
+                return True
+            except Exception as e:
+                logging.error(f"❌ Ошибка сохранения кэша GPT: {e}")
+                with self._lock:
+                    self._dirty = True
+                return False
+
+    def get(self, key: str) -> Optional[str]:
+        """Возвращает ответ из кэша или None (промах или запись устарела)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if time.time() - entry["created_at"] >= self.ttl:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry["text"]
+
+    def put(self, key: str, text: str):
+        """Сохраняет ответ, вытесняя давно не использованные записи"""
+        with self._lock:
+            self._entries[key] = {"text": text, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+            self._dirty = True
+
+    def record_bypass(self):
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Глобальный экземпляр кэша
+completion_cache = CompletionCache()
+atexit.register(completion_cache.flush)
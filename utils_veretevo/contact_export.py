@@ -0,0 +1,145 @@
+"""
+Экспорт контактов поставщиков в файл: CSV, vCard или XLSX.
+
+Контакты читаются по одному из представления базы (ContactListView) и сразу
+пишутся во временный файл на диске, так что при выгрузке память не растет с
+размером базы. Файл отправляется по пути: с локальным сервером Bot API
+(TELEGRAM_LOCAL_MODE) сервер читает его сам, а с api.telegram.org
+python-telegram-bot один раз читает файл целиком при отправке (multipart).
+XLSX пишется в режиме write_only openpyxl (необязательная зависимость,
+импортируется только при выгрузке в этом формате).
+"""
+import codecs
+import csv
+import importlib.util
+import os
+import tempfile
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+EXPORT_FIELDS = ['name', 'phone', 'email', 'address', 'website', 'description', 'category']
+EXPORT_HEADERS = ['Название', 'Телефон', 'Email', 'Адрес', 'Сайт', 'Описание', 'Категория']
+
+CATEGORY_NAMES = {
+    'supplier': 'Поставщики',
+    'contractor': 'Подрядчики',
+    'employee': 'Сотрудники',
+}
+
+
+def contact_rows(contacts: Iterable[Mapping[str, Any]]) -> Iterator[List[str]]:
+    """Строки выгрузки по одной на контакт"""
+    for contact in contacts:
+        yield [str(contact.get(field) or '') for field in EXPORT_FIELDS]
+
+
+def vcard_escape(value: str) -> str:
+    """Экранирование значения vCard 3.0 (RFC 2426)"""
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def vcard_entry(contact: Mapping[str, Any]) -> str:
+    """Одна карточка vCard 3.0"""
+    name = vcard_escape(str(contact.get('name') or ''))
+    lines = ['BEGIN:VCARD', 'VERSION:3.0', f'FN:{name}', f'N:{name};;;;', f'ORG:{name}']
+    if contact.get('phone'):
+        lines.append(f"TEL;TYPE=WORK,VOICE:{contact['phone']}")
+    if contact.get('email'):
+        lines.append(f"EMAIL;TYPE=INTERNET:{vcard_escape(contact['email'])}")
+    if contact.get('address'):
+        lines.append(f"ADR;TYPE=WORK:;;{vcard_escape(contact['address'])};;;;")
+    if contact.get('website'):
+        lines.append(f"URL:{vcard_escape(contact['website'])}")
+    if contact.get('description'):
+        lines.append(f"NOTE:{vcard_escape(contact['description'])}")
+    category = contact.get('category') or ''
+    lines.append(f"CATEGORIES:{vcard_escape(CATEGORY_NAMES.get(category, category))}")
+    lines.append('END:VCARD')
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def write_csv(contacts: Iterable[Mapping[str, Any]], buffer: IO[bytes]) -> int:
+    """CSV с BOM и разделителем ';' — открывается в Excel с кириллицей"""
+    writer_stream = codecs.getwriter('utf-8')(buffer)
+    writer_stream.write('\ufeff')
+    writer = csv.writer(writer_stream, delimiter=';')
+    writer.writerow(EXPORT_HEADERS)
+    count = 0
+    for row in contact_rows(contacts):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_vcard(contacts: Iterable[Mapping[str, Any]], buffer: IO[bytes]) -> int:
+    count = 0
+    for contact in contacts:
+        buffer.write(vcard_entry(contact).encode('utf-8'))
+        count += 1
+    return count
+
+
+def write_xlsx(contacts: Iterable[Mapping[str, Any]], buffer: IO[bytes]) -> int:
+    from openpyxl import Workbook  # необязательная зависимость
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Контакты')
+    sheet.append(EXPORT_HEADERS)
+    count = 0
+    for row in contact_rows(contacts):
+        sheet.append(row)
+        count += 1
+    workbook.save(buffer)
+    return count
+
+
+EXPORT_FORMATS: Dict[str, Dict[str, Any]] = {
+    'csv': {'extension': 'csv', 'title': 'CSV', 'writer': write_csv},
+    'vcf': {'extension': 'vcf', 'title': 'vCard', 'writer': write_vcard},
+    'xlsx': {'extension': 'xlsx', 'title': 'Excel', 'writer': write_xlsx},
+}
+
+
+def available_export_formats() -> List[str]:
+    """Форматы, доступные в этой установке (XLSX — только если установлен openpyxl)"""
+    return [export_format for export_format in EXPORT_FORMATS
+            if export_format != 'xlsx' or importlib.util.find_spec('openpyxl') is not None]
+
+
+def export_filename(export_format: str, category: Optional[str] = None) -> str:
+    extension = EXPORT_FORMATS[export_format]['extension']
+    return f"contacts_{category or 'all'}_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+
+
+def export_contacts(contacts: Iterable[Mapping[str, Any]], export_format: str,
+                    directory: Optional[str] = None):
+    """
+    Выгружает контакты во временный файл
+
+    Args:
+        contacts: Контакты (читаются по одному)
+        export_format: 'csv', 'vcf' или 'xlsx'
+        directory: Каталог для временного файла (по умолчанию системный)
+
+    Returns:
+        (путь к файлу, число контактов); файл удаляет вызывающий
+
+    Raises:
+        ValueError: Неизвестный формат
+        ImportError: Для XLSX не установлен openpyxl
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {export_format}")
+    writer: Callable[[Iterable[Mapping[str, Any]], IO[bytes]], int] = EXPORT_FORMATS[export_format]['writer']
+    extension = EXPORT_FORMATS[export_format]['extension']
+    with tempfile.NamedTemporaryFile(suffix=f'.{extension}', prefix='contacts_', dir=directory,
+                                     delete=False) as buffer:
+        path = buffer.name
+        try:
+            count = writer(contacts, buffer)
+        except BaseException:
+            buffer.close()
+            os.remove(path)
+            raise
+    return path, count
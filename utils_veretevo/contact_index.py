@@ -0,0 +1,442 @@
+"""
+Индекс базы контактов поставщиков (KnowledgeCollector).
+
+Телефоны приводятся к виду E.164 (+7XXXXXXXXXX), поэтому "+7 (900) 123-45-67"
+и "89001234567" — один контакт. Для поиска по подстроке имени, описания и
+телефона хранятся позиции контактов по символьным триграммам: кандидаты —
+пересечение множеств триграмм запроса, затем точная проверка подстроки
+в порядке позиций, пока не набран лимит.
+Контакты по категориям и общий порядок хранятся списками телефонов.
+
+Для постраничного просмотра контакты всей базы и каждой категории хранятся
+в отсортированных списках (по имени или по last_updated); страница находится
+двоичным поиском от курсора — телефона крайнего контакта соседней страницы.
+
+Результаты возвращаются представлениями (ContactView, ContactListView)
+поверх записей базы — словари контактов не копируются. Списки телефонов
+только дополняются в конце, а при удалении заменяются новыми, поэтому уже
+выданное представление остается согласованным снимком.
+"""
+import bisect
+import heapq
+import re
+import threading
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+NGRAM_SIZE = 3
+# Когда кандидатов осталось столько, дальше не пересекаем — проверяем подстрокой
+MAX_VERIFY_CANDIDATES = 64
+# Поиск с лимитом по частой триграмме: сначала проверяются первые
+# limit * LAZY_FACTOR позиций ее списка, без пересечения и полной сортировки
+LAZY_MIN_POSTING = 512
+LAZY_FACTOR = 4
+
+# Поля контакта в результатах и их значения по умолчанию
+CONTACT_DEFAULTS = {
+    'name': 'Unknown',
+    'email': '',
+    'address': '',
+    'website': '',
+    'description': '',
+    'category': 'supplier',
+}
+
+# Порядок страниц: по имени (А-Я) или по дате изменения (сначала новые)
+SORT_NAME = 'name'
+SORT_UPDATED = 'updated'
+SORT_ORDERS = (SORT_NAME, SORT_UPDATED)
+SCOPE_ALL = 'all'
+PAGE_SIZE = 10
+
+NON_DIGIT_RE = re.compile(r"\D")
+PHONE_QUERY_RE = re.compile(r"^\+?[\d\s()\-]+$")
+
+
+def normalize_phone(phone: str) -> str:
+    """
+    Приводит телефон к E.164: "8 (900) 123-45-67" -> "+79001234567"
+
+    Российские номера с 8, 7 или без кода страны получают +7, международные
+    с "+", "00" или "810" сохраняют свой код. Короткие и непонятные номера
+    возвращаются только цифрами.
+    """
+    raw = (phone or '').strip()
+    digits = NON_DIGIT_RE.sub('', raw)
+    if not digits:
+        return raw
+    if raw.startswith('+'):
+        return '+' + digits
+    if digits.startswith('810') and len(digits) > 11:
+        return '+' + digits[3:]
+    if digits.startswith('00') and len(digits) > 11:
+        return '+' + digits[2:]
+    if len(digits) == 11 and digits[0] in '78':
+        return '+7' + digits[1:]
+    if len(digits) == 10:
+        return '+7' + digits
+    return digits
+
+
+def merge_contacts(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Объединяет две записи одного телефона: за основу берется более свежая
+    (last_updated), пустые поля заполняются из другой, счетчики складываются
+    """
+    newer, older = (first, second) if first.get('last_updated', '') >= second.get('last_updated', '') else (second, first)
+    merged = dict(older)
+    merged.update({key: value for key, value in newer.items() if value not in ('', None, [])})
+    merged['tags'] = list(dict.fromkeys((older.get('tags') or []) + (newer.get('tags') or [])))
+    added = [value for value in (first.get('first_added'), second.get('first_added')) if value]
+    if added:
+        merged['first_added'] = min(added)
+    merged['update_count'] = first.get('update_count', 0) + second.get('update_count', 0)
+    return merged
+
+
+def normalize_contacts_database(database: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    Переводит ключи базы на E.164 и объединяет дубликаты
+
+    Returns:
+        Новая база и число записей, которые изменились или были объединены
+    """
+    normalized: Dict[str, Dict[str, Any]] = {}
+    changed = 0
+    for key, data in database.items():
+        phone = normalize_phone(data.get('phone') or key)
+        if phone != key or data.get('phone') != phone:
+            changed += 1
+        data = dict(data, phone=phone)
+        if phone in normalized:
+            data = merge_contacts(normalized[phone], data)
+            changed += 1
+        normalized[phone] = data
+    return normalized, changed
+
+
+def contact_text(phone: str, data: Dict[str, Any]) -> str:
+    """Текст для поиска подстрокой: имя, описание и цифры телефона"""
+    return "\n".join([
+        str(data.get('name') or '').lower(),
+        str(data.get('description') or '').lower(),
+        NON_DIGIT_RE.sub('', phone),
+    ])
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Слова запроса в нижнем регистре; телефон ("8 900 123") — одним словом из
+    цифр, с 8 в начале полного номера, замененной на 7, как в normalize_phone
+    """
+    query = query.strip().lower()
+    if PHONE_QUERY_RE.match(query) and any(ch.isdigit() for ch in query):
+        digits = NON_DIGIT_RE.sub('', query)
+        if len(digits) == 11 and digits[0] == '8':
+            digits = '7' + digits[1:]
+        return [digits]
+    return query.split()
+
+
+def sort_key(sort: str, phone: str, data: Dict[str, Any]) -> Tuple[str, str]:
+    """Ключ сортировки; телефон в конце делает порядок однозначным"""
+    if sort == SORT_UPDATED:
+        return (str(data.get('last_updated') or ''), phone)
+    return (str(data.get('name') or '').lower().replace('ё', 'е'), phone)
+
+
+def ngrams(text: str) -> set:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class ContactView(Mapping):
+    """Контакт из базы только для чтения: поля с умолчаниями, телефон — ключ базы"""
+
+    __slots__ = ('phone', '_data')
+
+    def __init__(self, phone: str, data: Dict[str, Any]):
+        self.phone = phone
+        self._data = data
+
+    def __getitem__(self, key):
+        if key == 'phone':
+            return self.phone
+        value = self._data.get(key)
+        if value is None:
+            if key in CONTACT_DEFAULTS:
+                return CONTACT_DEFAULTS[key]
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'phone'
+        yield from CONTACT_DEFAULTS
+        for key in self._data:
+            if key != 'phone' and key not in CONTACT_DEFAULTS:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ContactView({self.phone!r}, {self['name']!r})"
+
+
+class ContactListView(Sequence):
+    """Список контактов по телефонам без копирования записей"""
+
+    __slots__ = ('_phones', '_database', '_start', '_stop')
+
+    def __init__(self, phones: List[str], database: Dict[str, Dict[str, Any]],
+                 start: int = 0, stop: Optional[int] = None):
+        self._phones = phones
+        self._database = database
+        self._start = start
+        self._stop = len(phones) if stop is None else stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return ContactListView(self._phones, self._database, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        phone = self._phones[self._start + index]
+        return ContactView(phone, self._database.get(phone, {}))
+
+    def __iter__(self) -> Iterator[ContactView]:
+        database = self._database
+        for i in range(self._start, self._stop):
+            phone = self._phones[i]
+            yield ContactView(phone, database.get(phone, {}))
+
+    def phones(self) -> List[str]:
+        return self._phones[self._start:self._stop]
+
+
+@dataclass
+class ContactPage:
+    """Страница контактов и курсоры для соседних страниц"""
+    contacts: ContactListView
+    offset: int
+    total: int
+    has_prev: bool
+    has_next: bool
+
+    @property
+    def first_phone(self) -> Optional[str]:
+        return self.contacts[0].phone if self.contacts else None
+
+    @property
+    def last_phone(self) -> Optional[str]:
+        return self.contacts[-1].phone if self.contacts else None
+
+
+class ContactIndex:
+    """Триграммы, категории и порядок контактов базы"""
+
+    def __init__(self):
+        self.database: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.by_category: Dict[str, List[str]] = {}
+        self.categories: Dict[str, str] = {}
+        self.texts: Dict[str, str] = {}
+        self.postings: Dict[str, set] = {}
+        # (раздел, порядок) -> отсортированные ключи; строятся при первом запросе страницы
+        self.sorted: Optional[Dict[Tuple[str, str], List[Tuple[str, str]]]] = None
+        self.sort_keys: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._lock = threading.RLock()
+
+    def build(self, database: Dict[str, Dict[str, Any]]):
+        """Строит индекс по всей базе заново"""
+        with self._lock:
+            self.database = database
+            self.order = []
+            self.positions = {}
+            self.by_category = {}
+            self.categories = {}
+            self.texts = {}
+            self.postings = {}
+            self.sorted = None
+            self.sort_keys = {}
+            for phone, data in database.items():
+                self.add(phone, data)
+
+    def add(self, phone: str, data: Dict[str, Any]):
+        """Добавляет контакт или обновляет его после изменения"""
+        with self._lock:
+            if phone not in self.positions:
+                self.positions[phone] = len(self.order)
+                self.order.append(phone)
+
+            category = data.get('category') or CONTACT_DEFAULTS['category']
+            old_category = self.categories.get(phone)
+            self._update_sorted(phone, data, old_category, category)
+            if old_category != category:
+                if old_category is not None:
+                    # Новый список, а не remove(): выданные представления не сдвигаются
+                    self.by_category[old_category] = [p for p in self.by_category[old_category] if p != phone]
+                self.by_category.setdefault(category, []).append(phone)
+                self.categories[phone] = category
+
+            text = contact_text(phone, data)
+            old_text = self.texts.get(phone)
+            if old_text == text:
+                return
+            position = self.positions[phone]
+            old_grams = ngrams(old_text) if old_text else set()
+            new_grams = ngrams(text)
+            for gram in old_grams - new_grams:
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    posting.discard(position)
+                    if not posting:
+                        del self.postings[gram]
+            for gram in new_grams - old_grams:
+                self.postings.setdefault(gram, set()).add(position)
+            self.texts[phone] = text
+
+    def _update_sorted(self, phone: str, data: Dict[str, Any], old_category: Optional[str], category: str):
+        """Переставляет контакт в отсортированных списках, если они уже построены"""
+        if self.sorted is None:
+            return
+        old_keys = self.sort_keys.get(phone, {})
+        for sort in SORT_ORDERS:
+            key = sort_key(sort, phone, data)
+            old_key = old_keys.get(sort)
+            if old_key == key and old_category == category:
+                continue
+            if old_key is not None:
+                for scope in (SCOPE_ALL, old_category):
+                    keys = self.sorted.get((scope, sort), [])
+                    i = bisect.bisect_left(keys, old_key)
+                    if i < len(keys) and keys[i] == old_key:
+                        del keys[i]
+            bisect.insort(self.sorted.setdefault((SCOPE_ALL, sort), []), key)
+            bisect.insort(self.sorted.setdefault((category, sort), []), key)
+        self.sort_keys[phone] = {sort: sort_key(sort, phone, data) for sort in SORT_ORDERS}
+
+    def _build_sorted(self):
+        self.sorted = {}
+        self.sort_keys = {}
+        for phone in self.order:
+            data = self.database.get(phone, {})
+            keys = {sort: sort_key(sort, phone, data) for sort in SORT_ORDERS}
+            self.sort_keys[phone] = keys
+            for sort, key in keys.items():
+                self.sorted.setdefault((SCOPE_ALL, sort), []).append(key)
+                self.sorted.setdefault((self.categories[phone], sort), []).append(key)
+        for keys in self.sorted.values():
+            keys.sort()
+
+    def page(self, scope: str = SCOPE_ALL, sort: str = SORT_NAME, cursor: Optional[str] = None,
+             forward: bool = True, size: int = PAGE_SIZE) -> ContactPage:
+        """
+        Страница контактов за O(log n + size)
+
+        Args:
+            scope: SCOPE_ALL или категория
+            sort: SORT_NAME (А-Я) или SORT_UPDATED (сначала новые)
+            cursor: Телефон последнего (forward) или первого (назад) контакта
+                текущей страницы; None — первая страница
+            forward: Листать вперед или назад от курсора
+            size: Контактов на странице
+        """
+        with self._lock:
+            if self.sorted is None:
+                self._build_sorted()
+            keys = self.sorted.get((scope, sort), [])
+            total = len(keys)
+            # Списки по возрастанию ключа; "по дате" показывается с конца, от новых
+            descending = sort == SORT_UPDATED
+            cursor_key = self.sort_keys.get(cursor, {}).get(sort) if cursor else None
+            if cursor_key is None:
+                start, end = (max(0, total - size), total) if descending else (0, min(size, total))
+            elif forward != descending:
+                start = bisect.bisect_right(keys, cursor_key)
+                end = min(start + size, total)
+            else:
+                end = bisect.bisect_left(keys, cursor_key)
+                start = max(0, end - size)
+            phones = [key[-1] for key in keys[start:end]]
+            if descending:
+                phones.reverse()
+                offset, has_prev, has_next = total - end, end < total, start > 0
+            else:
+                offset, has_prev, has_next = start, start > 0, end < total
+            return ContactPage(ContactListView(phones, self.database), offset, total, has_prev, has_next)
+
+    def all(self) -> ContactListView:
+        return ContactListView(self.order, self.database)
+
+    def by_category_view(self, category: str) -> ContactListView:
+        return ContactListView(self.by_category.get(category, []), self.database)
+
+    def _postings(self, terms: List[str]) -> Optional[List[set]]:
+        """Множества позиций для триграмм запроса от меньшего к большему; None — триграмм нет"""
+        grams = set()
+        for term in terms:
+            grams |= ngrams(term)
+        if not grams:
+            return None
+        return sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+
+    @staticmethod
+    def _intersect(postings: List[set]) -> set:
+        """Позиции контактов со всеми триграммами (пока кандидатов много)"""
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) <= MAX_VERIFY_CANDIDATES:
+                break
+            candidates = candidates & posting
+        return candidates
+
+    def _verify(self, positions: Iterable[int], terms: List[str], limit: Optional[int]) -> List[str]:
+        """Телефоны контактов, в тексте которых есть все слова; позиции — по возрастанию"""
+        order, texts = self.order, self.texts
+        found = []
+        for position in positions:
+            phone = order[position]
+            text = texts[phone]
+            if all(term in text for term in terms):
+                found.append(phone)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def search(self, query: str, limit: Optional[int] = None) -> ContactListView:
+        """
+        Контакты, в имени, описании или телефоне которых есть каждое слово запроса
+
+        Args:
+            query: Текст или часть телефона в любом формате
+            limit: Сколько контактов вернуть (None — все)
+
+        Returns:
+            Контакты в порядке добавления в базу
+        """
+        terms = query_terms(query)
+        if not terms:
+            return ContactListView([], self.database)
+        with self._lock:
+            postings = self._postings(terms)
+            if postings is None:
+                # Слова короче триграммы — проверяем все контакты
+                return ContactListView(self._verify(range(len(self.order)), terms, limit), self.database)
+            if not postings[0]:
+                return ContactListView([], self.database)
+            if limit is not None and len(postings[0]) >= LAZY_MIN_POSTING:
+                head = heapq.nsmallest(limit * LAZY_FACTOR, postings[0])
+                found = self._verify(head, terms, limit)
+                if len(found) >= limit:
+                    return ContactListView(found, self.database)
+            found = self._verify(sorted(self._intersect(postings)), terms, limit)
+            return ContactListView(found, self.database)
@@ -0,0 +1,61 @@
+"""
+Бюджет времени обработчика, передаваемый во внешние вызовы.
+
+Обработчик задает срок: with request_deadline(15): ... (или декоратор
+@with_request_deadline(15) для корутины-обработчика) — и все клиенты внутри
+(в том числе в потоках asyncio.to_thread, которые копируют contextvars)
+берут таймаут запроса через remaining_timeout(...), не больше оставшегося
+времени. Если срок уже истек, вызов не выполняется (DeadlineExceeded).
+"""
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+MIN_REQUEST_TIMEOUT = 0.5  # меньше этого запрос заведомо не успеет
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Бюджет времени обработчика исчерпан"""
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Ограничивает время всех внешних вызовов внутри блока (вложенный срок не продлевает внешний)"""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(deadline, current) if current is not None else deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def with_request_deadline(seconds: float):
+    """Декоратор корутины-обработчика: выполняет ее под request_deadline(seconds)"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            with request_deadline(seconds):
+                return await handler(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def time_left() -> Optional[float]:
+    """Сколько секунд осталось до срока (None — срок не задан)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def remaining_timeout(default: float) -> float:
+    """Таймаут запроса с учетом срока обработчика"""
+    left = time_left()
+    if left is None:
+        return default
+    if left < MIN_REQUEST_TIMEOUT:
+        raise DeadlineExceeded("Время на обработку запроса истекло")
+    return min(default, left)
@@ -0,0 +1,289 @@
+"""
+Провайдеры генерации текста (Yandex GPT, OpenAI) и хеджирование запросов.
+
+HedgedRouter отправляет запрос основному провайдеру; если тот не ответил за
+«хедж-задержку» (p95 его недавних ответов), параллельно запрашивается
+резервный провайдер, и берется первый успешный ответ. Если основной
+провайдер упал сразу, резервный вызывается без ожидания. Основным считается
+провайдер с меньшим p95, пока статистики нет — порядок из настроек.
+
+Запросы синхронные (requests) и выполняются в потоках: проигравший запрос
+отменяется со стороны asyncio, его результат отбрасывается. У каждого
+провайдера свой выключатель (circuit breaker): пока он разомкнут, провайдер
+пропускается, и запрос сразу уходит резервному.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from config_veretevo.env import OPENAI_API_KEY, OPENAI_MODEL, YANDEX_GPT_API_KEY, YANDEX_GPT_URL
+from utils_veretevo.circuit_breaker import CircuitBreaker, get_breaker
+from utils_veretevo.deadline import remaining_timeout
+
+YANDEX_MODEL_URI = "gpt://b1g8c7c7c7c7c7c7c7c7/yandexgpt-lite"
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+REQUEST_TIMEOUT = 30
+MAX_TOKENS = 200
+
+# Хедж-задержка: p95 последних ответов основного провайдера в этих пределах
+HEDGE_DEFAULT_DELAY = 3.0   # пока ответов меньше HEDGE_MIN_SAMPLES
+HEDGE_MIN_DELAY = 0.5
+HEDGE_MAX_DELAY = 10.0
+HEDGE_MIN_SAMPLES = 5
+LATENCY_WINDOW = 100
+
+
+class LatencyTracker:
+    """Скользящее окно длительностей успешных ответов"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class GPTProvider:
+    """Базовый провайдер: синхронный complete() для вызова из потока"""
+
+    name = "base"
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None):
+        self.latency = LatencyTracker()
+        self.stats = {"requests": 0, "errors": 0, "wins": 0}
+        self.breaker = breaker or get_breaker(f"{self.name}_gpt")
+
+    @property
+    def available(self) -> bool:
+        return False
+
+    def complete(self, prompt: str, temperature: float) -> Optional[str]:
+        """Текст ответа или None при ошибке API"""
+        raise NotImplementedError
+
+
+class YandexGPTProvider(GPTProvider):
+    name = "yandex"
+
+    def __init__(self, api_key: Optional[str] = YANDEX_GPT_API_KEY, url: str = YANDEX_GPT_URL,
+                 model_uri: str = YANDEX_MODEL_URI, breaker: Optional[CircuitBreaker] = None):
+        super().__init__(breaker)
+        self.api_key = api_key
+        self.url = url
+        self.model_uri = model_uri
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _request(self, prompt: str, temperature: float, stream: bool = False) -> Dict:
+        """Заголовки и тело запроса к Yandex GPT"""
+        return {
+            "headers": {
+                "Authorization": f"Api-Key {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "modelUri": self.model_uri,
+                "completionOptions": {
+                    "stream": stream,
+                    "temperature": temperature,
+                    "maxTokens": MAX_TOKENS
+                },
+                "messages": [
+                    {
+                        "role": "user",
+                        "text": prompt
+                    }
+                ]
+            }
+        }
+
+    def complete(self, prompt: str, temperature: float) -> Optional[str]:
+        timeout = remaining_timeout(REQUEST_TIMEOUT)
+        with self.breaker.call() as call:
+            response = requests.post(self.url, timeout=timeout, **self._request(prompt, temperature))
+            call.check_response(response)
+        if response.status_code == 200:
+            result = response.json()
+            return result["result"]["alternatives"][0]["message"]["text"].strip()
+        logging.error(f"❌ Ошибка API Yandex GPT: {response.status_code} - {response.text}")
+        return None
+
+    def stream(self, prompt: str, temperature: float, emit: Callable[[str], None]) -> Optional[str]:
+        """
+        Потоковый запрос: API присылает по строке JSON на фрагмент, текст накопительный.
+        emit вызывается с текущим текстом после каждого фрагмента.
+
+        Returns:
+            Итоговый текст или None при ошибке API
+        """
+        request = self._request(prompt, temperature, stream=True)
+        timeout = remaining_timeout(REQUEST_TIMEOUT)
+        with self.breaker.call() as call, \
+                requests.post(self.url, timeout=timeout, stream=True, **request) as response:
+            call.check_response(response)
+            if response.status_code != 200:
+                logging.error(f"❌ Ошибка API Yandex GPT: {response.status_code} - {response.text}")
+                return None
+            text = None
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                text = json.loads(line)["result"]["alternatives"][0]["message"]["text"]
+                emit(text)
+        return text.strip() if text is not None else None
+
+
+class OpenAIProvider(GPTProvider):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = OPENAI_API_KEY, model: str = OPENAI_MODEL,
+                 base_url: str = OPENAI_BASE_URL, breaker: Optional[CircuitBreaker] = None):
+        super().__init__(breaker)
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def complete(self, prompt: str, temperature: float) -> Optional[str]:
+        timeout = remaining_timeout(REQUEST_TIMEOUT)
+        with self.breaker.call() as call:
+            response = requests.post(
+                f"{self.base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                json={
+                    "model": self.model,
+                    "temperature": temperature,
+                    "max_tokens": MAX_TOKENS,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+                timeout=timeout,
+            )
+            call.check_response(response)
+        if response.status_code == 200:
+            return response.json()["choices"][0]["message"]["content"].strip()
+        logging.error(f"❌ Ошибка API OpenAI: {response.status_code} - {response.text}")
+        return None
+
+
+class HedgedRouter:
+    """Маршрутизация запросов между провайдерами с хеджированием по p95"""
+
+    def __init__(self, providers: List[GPTProvider]):
+        self.providers = providers
+        self.stats = {"requests": 0, "hedged": 0, "fallbacks": 0, "failed": 0}
+
+    def configured(self) -> List[GPTProvider]:
+        """Провайдеры с заданным ключом API"""
+        return [p for p in self.providers if p.available]
+
+    def available(self) -> List[GPTProvider]:
+        """Настроенные провайдеры с замкнутым выключателем: сначала с меньшим p95, без статистики — в порядке настроек"""
+        providers = [p for p in self.configured() if p.breaker.allow_request()]
+        return sorted(providers, key=lambda p: p.latency.percentile(95) or float("inf"))
+
+    @staticmethod
+    def hedge_delay(provider: GPTProvider) -> float:
+        p95 = provider.latency.percentile(95)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p95))
+
+    @staticmethod
+    def _call(provider: GPTProvider, prompt: str, temperature: float) -> Optional[str]:
+        """Запрос к провайдеру с учетом длительности (выполняется в потоке)"""
+        provider.stats["requests"] += 1
+        started = time.perf_counter()
+        try:
+            answer = provider.complete(prompt, temperature)
+        except Exception as e:
+            logging.error(f"❌ Ошибка провайдера {provider.name}: {e}")
+            answer = None
+        if answer is None:
+            provider.stats["errors"] += 1
+        else:
+            provider.latency.record(time.perf_counter() - started)
+        return answer
+
+    async def complete(self, prompt: str, temperature: float) -> Optional[str]:
+        """
+        Первый успешный ответ среди провайдеров
+
+        Returns:
+            Текст ответа или None, если все провайдеры ответили ошибкой
+        """
+        self.stats["requests"] += 1
+        providers = self.available()
+        if not providers:
+            self.stats["failed"] += 1
+            return None
+
+        pending: Dict[asyncio.Task, GPTProvider] = {}
+        queue = list(providers)
+
+        def launch() -> Optional[float]:
+            """Запускает следующего провайдера; возвращает задержку до хеджа или None"""
+            provider = queue.pop(0)
+            task = asyncio.ensure_future(asyncio.to_thread(self._call, provider, prompt, temperature))
+            pending[task] = provider
+            return self.hedge_delay(provider) if queue else None
+
+        timeout = launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Провайдер медлит дольше своего p95 — хеджируем следующим
+                    self.stats["hedged"] += 1
+                    logging.info(f"🪁 Хедж-запрос к {queue[0].name}: нет ответа за {timeout:.1f} с")
+                    timeout = launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    answer = task.result()
+                    if answer is not None:
+                        provider.stats["wins"] += 1
+                        return answer
+                if queue and not pending:
+                    # Ответ с ошибкой и ждать некого — сразу пробуем следующего
+                    self.stats["fallbacks"] += 1
+                    timeout = launch()
+            self.stats["failed"] += 1
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "providers": {
+                p.name: {**p.stats, "p95": p.latency.percentile(95), "available": p.available,
+                         "breaker": p.breaker.state}
+                for p in self.providers
+            },
+        }
@@ -0,0 +1,142 @@
+"""
+Локальная заглушка Yandex GPT (foundationModels/v1/completion) для тестов и бенчмарков.
+
+Поддерживает обычный и потоковый режим (completionOptions.stream = true):
+в потоковом ответ приходит построчно (JSON на строку), текст в каждой строке
+накопительный, как у настоящего API. Запуск вручную:
+    python3 -m utils_veretevo.gpt_stub --port 8766 --chunk-delay 0.2
+и затем YANDEX_GPT_URL=http://127.0.0.1:8766/foundationModels/v1/completion
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Union
+
+COMPLETION_PATH = "/foundationModels/v1/completion"
+
+
+def split_chunks(text: str, words_per_chunk: int) -> List[str]:
+    """Накопительные префиксы текста по words_per_chunk слов"""
+    words = text.split(" ")
+    return [" ".join(words[:i]) for i in range(words_per_chunk, len(words), words_per_chunk)] + [text]
+
+
+class YandexGPTStub:
+    """HTTP-сервер, имитирующий генерацию Yandex GPT"""
+
+    def __init__(self, text: Union[str, Callable[[dict], str]] = "Хорошо, сейчас разберусь и отвечу.",
+                 latency: float = 0.0, chunk_delay: float = 0.05, words_per_chunk: int = 2,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.text = text
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.words_per_chunk = words_per_chunk
+        self.requests_count = 0
+        self.requests: List[dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{COMPLETION_PATH}"
+
+    def _make_handler(self):
+        stub = self
+
+        def alternative(text: str, final: bool) -> dict:
+            status = "ALTERNATIVE_STATUS_FINAL" if final else "ALTERNATIVE_STATUS_PARTIAL"
+            return {"result": {
+                "alternatives": [{"message": {"role": "assistant", "text": text}, "status": status}],
+                "modelVersion": "stub",
+            }}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests_count += 1
+                    stub.requests.append(request)
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if not self.path.startswith(COMPLETION_PATH):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                text = stub.text(request) if callable(stub.text) else stub.text
+                if not request.get("completionOptions", {}).get("stream"):
+                    self._send_json(200, alternative(text, True))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunks = split_chunks(text, stub.words_per_chunk)
+                for i, chunk in enumerate(chunks):
+                    if i and stub.chunk_delay:
+                        time.sleep(stub.chunk_delay)
+                    line = json.dumps(alternative(chunk, i == len(chunks) - 1), ensure_ascii=False).encode("utf-8") + b"\n"
+                    self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _send_json(self, status: int, payload: dict):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        """Запускает сервер в фоновом потоке и возвращает base_url"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Останавливает сервер"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка Yandex GPT")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка до первого фрагмента, с")
+    parser.add_argument("--chunk-delay", type=float, default=0.2, help="пауза между фрагментами, с")
+    parser.add_argument("--text", default="Хорошо, сейчас разберусь и отвечу.")
+    args = parser.parse_args()
+
+    stub = YandexGPTStub(text=args.text, latency=args.latency, chunk_delay=args.chunk_delay,
+                         host=args.host, port=args.port)
+    print(f"Заглушка Yandex GPT: {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,11 @@
 import asyncio
 import logging
 from typing import Dict, List, Optional, Set
-from telegram import Update, Bot, ChatMemberUpdated, ChatMember
+from telegram import Update, ChatMemberUpdated, ChatMember
 from telegram.ext import Application, ContextTypes
 from telegram.error import TelegramError, Forbidden
 from config_veretevo.env import TELEGRAM_TOKEN
+from utils_veretevo.telegram_api import build_bot
 from services_veretevo.department_service import load_departments, save_departments, DEPARTMENTS
 from config_veretevo.constants import DEPARTMENTS_JSON_PATH
 
@@ -17,18 +18,21 @@ logger = logging.getLogger(__name__)
 class GroupMonitor:
     """Класс для мониторинга событий в группах и автоматического обновления конфигурации"""
     
-    def __init__(self, token: str = None, enable_notifications: bool = True):
+    def __init__(self, token: str = None, enable_notifications: bool = True,
+                 base_url: str = None, local_mode: bool = None):
         """
         Инициализация монитора групп
         
         Args:
             token (str): Токен бота. Если не указан, используется из env
             enable_notifications (bool): Включить уведомления о изменениях
+            base_url (str): Адрес Bot API. Если не указан, используется TELEGRAM_API_BASE_URL
+            local_mode (bool): Локальный режим сервера Bot API. Если не указан, используется TELEGRAM_LOCAL_MODE
         """
         self.token = token or TELEGRAM_TOKEN
         if not self.token:
             raise ValueError("Токен Telegram бота не найден")
-        self.bot = Bot(token=self.token)
+        self.bot = build_bot(self.token, base_url=base_url, local_mode=local_mode)
         self.monitored_chats: Set[int] = set()
         self.enable_notifications = enable_notifications
         self.load_monitored_chats()
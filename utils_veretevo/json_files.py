@@ -0,0 +1,54 @@
+"""
+Атомарная запись файлов данных.
+
+Файл пишется во временный файл с уникальным именем в том же каталоге,
+сбрасывается на диск (fsync) и подменяет старый через os.replace — при
+падении процесса на диске остается либо прежняя, либо новая версия целиком,
+но не обрезанный файл. Уникальное имя нужно, потому что один файл могут
+одновременно писать бот и скрипт из cron: с общим <path>.tmp один писатель
+затер бы или переименовал чужой временный файл.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+
+# umask процесса читается один раз: os.umask меняет его для всех потоков
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(path: str) -> int:
+    """Права для нового файла: как у заменяемого, иначе обычные с учетом umask"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = 'w') -> Iterator:
+    """Открывает временный файл рядом с path на запись и по выходе атомарно подменяет им path"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp создает файл с правами 0600 — возвращаем права заменяемого файла
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = 2):
+    """Атомарно записывает data в JSON-файл path"""
+    with atomic_open(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
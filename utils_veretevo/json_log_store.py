@@ -0,0 +1,76 @@
+"""
+Словарь на диске: JSON-снимок плюс журнал изменений (JSONL).
+
+Изменение одной записи дописывает в журнал одну строку — O(1) ввода-вывода
+вместо перезаписи всего файла. При загрузке журнал проигрывается поверх
+снимка. Уплотнение атомарно записывает новый снимок (write_json_atomic) и
+только затем очищает журнал: если процесс упадет между этими шагами,
+журнал проиграется повторно, что безопасно (операции идемпотентны).
+Оборванная последняя строка журнала (сбой при записи) пропускается.
+
+Снимок совместим со старым форматом — это обычный JSON-словарь.
+Синхронизацию потоков обеспечивает вызывающий код.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict
+
+from utils_veretevo.json_files import write_json_atomic
+
+OP_PUT = "put"
+OP_DELETE = "del"
+
+
+class JsonLogStore:
+    """Снимок snapshot_path и журнал log_path для одного словаря"""
+
+    def __init__(self, snapshot_path: str, log_path: str):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.log_entries = 0
+
+    def load(self) -> Dict[str, Any]:
+        """Читает снимок и применяет к нему журнал"""
+        data: Dict[str, Any] = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.log_entries = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line_no, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logging.warning(f"⚠️ Пропущена поврежденная строка {line_no} журнала {self.log_path}")
+                        continue
+                    if record.get("op") == OP_PUT:
+                        data[record["key"]] = record["value"]
+                    elif record.get("op") == OP_DELETE:
+                        data.pop(record["key"], None)
+                    self.log_entries += 1
+        return data
+
+    def _append(self, record: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.log_entries += 1
+
+    def put(self, key: str, value: Any):
+        """Записывает значение ключа в журнал"""
+        self._append({"op": OP_PUT, "key": key, "value": value})
+
+    def delete(self, key: str):
+        """Записывает удаление ключа в журнал"""
+        self._append({"op": OP_DELETE, "key": key})
+
+    def compact(self, data: Dict[str, Any]):
+        """Атомарно записывает полный снимок и очищает журнал"""
+        write_json_atomic(self.snapshot_path, data)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self.log_entries = 0
@@ -1,6 +1,7 @@
 import logging
 from telegram import ReplyKeyboardMarkup, InlineKeyboardMarkup, InlineKeyboardButton
 from config_veretevo.constants import GENERAL_DIRECTOR_ID
+from utils_veretevo.contact_export import EXPORT_FORMATS, available_export_formats
 from typing import Any, Dict, Optional
 
 def main_menu_keyboard(chat_type: str = "private", user_id: Optional[int] = None) -> ReplyKeyboardMarkup | None:
@@ -88,6 +89,43 @@ def contact_categories_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+def contacts_page_keyboard(scope: str, sort: str, first_phone: str = "", last_phone: str = "",
+                           has_prev: bool = False, has_next: bool = False) -> InlineKeyboardMarkup:
+    """Листание списка контактов: курсор — телефон крайнего контакта страницы"""
+    prefix = f"contacts_page_{scope}_{sort}"
+    buttons = []
+    nav = []
+    if has_prev:
+        nav.append(InlineKeyboardButton("◀️ Назад", callback_data=f"{prefix}_p_{first_phone}"))
+    if has_next:
+        nav.append(InlineKeyboardButton("Вперед ▶️", callback_data=f"{prefix}_n_{last_phone}"))
+    if nav:
+        buttons.append(nav)
+    if sort == "name":
+        buttons.append([InlineKeyboardButton("🕒 Сначала новые", callback_data=f"contacts_page_{scope}_updated_f_")])
+    else:
+        buttons.append([InlineKeyboardButton("🔤 По имени", callback_data=f"contacts_page_{scope}_name_f_")])
+    back = "contacts_categories" if scope != "all" else "contacts_menu"
+    buttons.append([InlineKeyboardButton("🔙 Назад", callback_data=back)])
+    return InlineKeyboardMarkup(buttons)
+
+
+def contacts_export_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура экспорта: категория и формат файла (Excel — только если установлен openpyxl)"""
+    categories = [("📋 Все", "all"), ("🏭 Поставщики", "supplier"), ("🏗️ Подрядчики", "contractor"), ("👥 Сотрудники", "employee")]
+    formats = available_export_formats()
+    buttons = [
+        [
+            InlineKeyboardButton(f"{title}: {EXPORT_FORMATS[export_format]['title']}",
+                                 callback_data=f"contacts_export_{export_format}_{category}")
+            for export_format in formats
+        ]
+        for title, category in categories
+    ]
+    buttons.append([InlineKeyboardButton("🔙 Назад", callback_data="contacts_menu")])
+    return InlineKeyboardMarkup(buttons)
+
+
 def contact_actions_keyboard(contact_id: str) -> InlineKeyboardMarkup:
     """Клавиатура действий с конкретным контактом"""
     buttons = [
@@ -6,7 +6,8 @@ from utils_veretevo.formatting import format_task_message
 from config_veretevo.env import ASSISTANTS_CHAT_ID, FINANCE_CHAT_ID
 from services_veretevo.department_service import DEPARTMENTS
 from utils_veretevo.keyboards import get_task_action_keyboard
-from utils_veretevo.todoist_service import add_comment
+from utils_veretevo.deadline import request_deadline
+from utils_veretevo.todoist_service import add_comment, HANDLER_BUDGET as TODOIST_BUDGET
 
 async def send_task_with_media(context: ContextTypes.DEFAULT_TYPE, chat_id: int, task: Dict[str, Any], reply_markup: Optional[InlineKeyboardMarkup] = None):
     logging.debug(f"send_task_with_media: task_id={task.get('id')}, chat_id={chat_id}")
@@ -161,7 +162,8 @@ async def send_task_action_comment(context: ContextTypes.DEFAULT_TYPE, task: dic
     # --- Синхронизация комментария с Todoist ---
     if task.get("todoist_task_id"):
         try:
-            add_comment(task["todoist_task_id"], msg)
+            with request_deadline(TODOIST_BUDGET):
+                add_comment(task["todoist_task_id"], msg)
         except Exception as e:
             import logging
             logging.error(f"[TODOIST] Не удалось добавить комментарий в Todoist: {e}")
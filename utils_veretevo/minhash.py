@@ -0,0 +1,93 @@
+"""
+Поиск почти одинаковых текстов через MinHash и LSH.
+
+Каждый текст превращается в множество терминов (основы слов и триграммы из
+text_index), по нему считается MinHash-подпись. Подписи режутся на полосы (LSH):
+тексты, совпавшие хотя бы в одной полосе, становятся кандидатами и
+проверяются по оценке коэффициента Жаккара. Так не нужно сравнивать все пары.
+"""
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+import numpy as np
+
+from utils_veretevo.text_index import extract_terms
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16          # 16 полос по 4 строки: кандидаты при сходстве от ~0.5
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+class MinHasher:
+    """Считает MinHash-подписи с фиксированными (воспроизводимыми) перестановками"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_permutations = num_permutations
+        # Коэффициенты меньше 2^31, чтобы a*x + b для 32-битного x не переполнял uint64
+        self._a = rng.integers(1, 1 << 31, size=num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_permutations, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash-подпись текста (массив uint64 длины num_permutations)"""
+        terms = extract_terms(text)
+        if not terms:
+            return np.full(self.num_permutations, MAX_HASH, dtype=np.uint64)
+        hashes = np.array([zlib.crc32(term.encode("utf-8")) for term in terms], dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Оценка коэффициента Жаккара по двум подписям"""
+    return float(np.mean(first == second))
+
+
+def find_duplicate_clusters(documents: Iterable[Tuple[Hashable, str]], threshold: float = 0.7,
+                            bands: int = LSH_BANDS, hasher: MinHasher = None) -> List[List[Hashable]]:
+    """
+    Группирует почти одинаковые тексты
+
+    Args:
+        documents: Пары (id, текст)
+        threshold: Минимальная оценка сходства Жаккара для объединения
+        bands: Число полос LSH (должно делить число перестановок)
+        hasher: MinHasher (по умолчанию создается новый)
+
+    Returns:
+        Кластеры из двух и более id
+    """
+    hasher = hasher or MinHasher()
+    rows = hasher.num_permutations // bands
+    signatures: Dict[Hashable, np.ndarray] = {doc_id: hasher.signature(text) for doc_id, text in documents}
+
+    buckets = defaultdict(list)
+    for doc_id, signature in signatures.items():
+        for band in range(bands):
+            buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(doc_id)
+
+    parent = {doc_id: doc_id for doc_id in signatures}
+
+    def find(doc_id):
+        while parent[doc_id] != doc_id:
+            parent[doc_id] = parent[parent[doc_id]]
+            doc_id = parent[doc_id]
+        return doc_id
+
+    checked = set()
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                pair = (first, second)
+                if pair in checked or find(first) == find(second):
+                    continue
+                checked.add(pair)
+                if estimate_similarity(signatures[first], signatures[second]) >= threshold:
+                    parent[find(first)] = find(second)
+
+    clusters = defaultdict(list)
+    for doc_id in signatures:
+        clusters[find(doc_id)].append(doc_id)
+    return [members for members in clusters.values() if len(members) > 1]
@@ -0,0 +1,53 @@
+"""
+Постепенное обновление сообщения Telegram по мере генерации текста.
+
+Частые edit_message_text упираются в лимиты Telegram, поэтому правки
+прореживаются: не чаще одной за interval секунд, промежуточные фрагменты
+пропускаются (последний всегда показывается при следующей правке).
+Финальную правку с клавиатурой делает вызывающий код после close().
+"""
+import logging
+import time
+
+from telegram.error import BadRequest, RetryAfter
+
+STREAM_EDIT_INTERVAL = 0.7  # секунд между правками сообщения
+STREAM_CURSOR = " ▌"
+
+
+class ProgressiveMessage:
+    """Прореженные правки одного сообщения с накопленным текстом"""
+
+    def __init__(self, bot, chat_id: int, message_id: int, prefix: str = "",
+                 interval: float = STREAM_EDIT_INTERVAL):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.prefix = prefix
+        self.interval = interval
+        self.edits = 0
+        self._last_text = None
+        self._next_edit_at = 0.0
+        self._closed = False
+
+    async def update(self, text: str):
+        """Показывает накопленный текст, если с прошлой правки прошло достаточно времени"""
+        if self._closed or text == self._last_text or time.monotonic() < self._next_edit_at:
+            return
+        try:
+            await self.bot.edit_message_text(
+                chat_id=self.chat_id, message_id=self.message_id, text=self.prefix + text + STREAM_CURSOR
+            )
+            self.edits += 1
+            self._last_text = text
+            self._next_edit_at = time.monotonic() + self.interval
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            self._next_edit_at = time.monotonic() + float(retry_after)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                logging.warning(f"⚠️ Не удалось обновить сообщение {self.message_id}: {e}")
+
+    def close(self):
+        """Прекращает промежуточные правки (дальше сообщение редактирует вызывающий код)"""
+        self._closed = True
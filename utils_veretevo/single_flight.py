@@ -0,0 +1,103 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight).
+
+Если запрос с тем же ключом уже выполняется, новый вызывающий не идет во
+внешний API, а ждет результат первого — и получает тот же ответ (или то же
+исключение). Когда запрос завершился, ключ освобождается: следующий вызов
+снова выполнит запрос (долговременным хранением занимается кэш).
+
+AsyncSingleFlight — для корутин в event loop, SingleFlight — для потоков.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+def content_key(*parts) -> str:
+    """Ключ по содержимому: sha256 от частей (bytes или str)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AsyncSingleFlight:
+    """Single-flight для асинхронного кода"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет factory() или присоединяется к уже идущему вызову с тем же ключом
+
+        Отмена одного из ожидающих не отменяет общий запрос для остальных.
+        """
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["shared"] += 1
+            logging.info(f"🔁 [{self.name}] Ожидаем уже выполняющийся запрос")
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Single-flight для синхронного кода, выполняемого в потоках"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Выполняет func() или ждет результат уже идущего вызова с тем же ключом"""
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            logging.info(f"🔁 [{self.name}] Ожидаем уже выполняющийся запрос")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
@@ -0,0 +1,116 @@
+"""
+Локальная заглушка Yandex SpeechKit (stt:recognize) для тестов и бенчмарков.
+
+Отвечает в формате настоящего API ({"result": "..."}) с настраиваемой задержкой
+и долей ошибок. Запуск вручную:
+    python3 -m utils_veretevo.speechkit_stub --port 8765 --latency 0.5
+и затем YANDEX_SPEECHKIT_URL=http://127.0.0.1:8765/speech/v1/stt:recognize
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Union
+
+RECOGNIZE_PATH = "/speech/v1/stt:recognize"
+
+
+class SpeechKitStub:
+    """HTTP-сервер, имитирующий синхронное распознавание SpeechKit"""
+
+    def __init__(self, latency: float = 0.0, text: Union[str, Callable[[bytes], str]] = "тестовая транскрипция",
+                 fail_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None):
+        self.latency = latency
+        self.text = text
+        self.fail_rate = fail_rate
+        self.requests_count = 0
+        self.failures_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{RECOGNIZE_PATH}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                with stub._lock:
+                    stub.requests_count += 1
+                    failed = stub._random.random() < stub.fail_rate
+                    if failed:
+                        stub.failures_count += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if not self.path.startswith(RECOGNIZE_PATH):
+                    status, payload = 404, {"error_message": "not found"}
+                elif failed:
+                    status, payload = 503, {"error_message": "stub failure"}
+                elif not body:
+                    status, payload = 400, {"error_message": "empty audio"}
+                else:
+                    text = stub.text(body) if callable(stub.text) else stub.text
+                    status, payload = 200, {"result": text}
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        """Запускает сервер в фоновом потоке и возвращает base_url"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Останавливает сервер"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка Yandex SpeechKit")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа в секундах")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--text", default="тестовая транскрипция")
+    args = parser.parse_args()
+
+    stub = SpeechKitStub(latency=args.latency, text=args.text, fail_rate=args.fail_rate,
+                         host=args.host, port=args.port)
+    print(f"Заглушка SpeechKit: {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
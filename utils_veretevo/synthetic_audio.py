@@ -0,0 +1,82 @@
+"""
+Генерация синтетического «речеподобного» аудио для тестов и бенчмарков.
+
+Сигнал имитирует голос: основной тон с плавающей высотой и гармониками,
+слоговая амплитудная модуляция, фразы разной длины, паузы и фоновый шум.
+Распознать его нельзя, но по нагрузке на декодер, обрезку тишины и кодек
+он ведет себя как настоящая запись голосового сообщения.
+"""
+import subprocess
+from typing import Dict, List
+
+import numpy as np
+
+from utils_veretevo.audio_preprocessing import SAMPLE_RATE, get_ffmpeg_path
+
+# Форматы, в которых приходят голосовые и аудио: кодек ffmpeg и контейнер
+AUDIO_FORMATS: Dict[str, List[str]] = {
+    "ogg": ["-c:a", "libopus", "-b:a", "32k", "-f", "ogg"],    # голосовые Telegram
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "64k", "-f", "mp3"],
+    "m4a": ["-c:a", "aac", "-b:a", "64k", "-movflags", "frag_keyframe+empty_moov", "-f", "ipod"],
+    "wav": ["-c:a", "pcm_s16le", "-f", "wav"],
+}
+
+
+def make_speech_like(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """
+    Генерирует речеподобный сигнал
+
+    Args:
+        seconds: Длительность в секундах
+        sample_rate: Частота дискретизации
+        seed: Зерно генератора для воспроизводимости
+
+    Returns:
+        Массив сэмплов int16 (моно)
+    """
+    rng = np.random.default_rng(seed)
+    size = int(sample_rate * seconds)
+    t = np.arange(size) / sample_rate
+
+    # Фразы 0.4–1.5 с, разделенные паузами 0.2–1.2 с
+    envelope = np.zeros(size)
+    position = 0.3
+    while position < seconds - 0.3:
+        length = rng.uniform(0.4, 1.5)
+        start, end = int(position * sample_rate), int(min(position + length, seconds) * sample_rate)
+        envelope[start:end] = 1.0
+        position += length + rng.uniform(0.2, 1.2)
+
+    # Основной тон 120–220 Гц с медленным «интонационным» дрейфом
+    pitch = 170 + 50 * np.sin(2 * np.pi * 0.3 * t + rng.uniform(0, np.pi))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    # Слоги ~4 Гц и шипящие
+    syllables = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)))
+    voice = voice * syllables + 0.15 * rng.standard_normal(size)
+
+    signal = voice * envelope * 0.25 + 0.001 * rng.standard_normal(size)
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+def encode_samples(samples: np.ndarray, audio_format: str, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    Кодирует сэмплы в один из AUDIO_FORMATS через ffmpeg
+
+    Args:
+        samples: Массив сэмплов int16 (моно)
+        audio_format: Ключ из AUDIO_FORMATS
+        sample_rate: Частота дискретизации сэмплов
+
+    Returns:
+        Содержимое закодированного файла
+    """
+    command = [
+        get_ffmpeg_path(), "-nostdin", "-v", "error",
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-i", "-",
+        *AUDIO_FORMATS[audio_format], "-",
+    ]
+    result = subprocess.run(command, input=samples.tobytes(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg не смог закодировать {audio_format}: {result.stderr.decode(errors='ignore').strip()}")
+    return result.stdout
@@ -0,0 +1,79 @@
+"""
+Настройки подключения к Telegram Bot API.
+
+Позволяет работать как с публичным api.telegram.org, так и с собственным
+сервером telegram-bot-api. В локальном режиме (--local) сервер возвращает
+путь к файлу на диске, поэтому голосовые и видео читаются напрямую,
+без HTTP-скачивания и без лимита 20 МБ.
+"""
+import logging
+import os
+import tempfile
+from typing import Optional, Tuple
+
+from telegram import Bot
+from telegram.ext import ApplicationBuilder
+
+from config_veretevo.env import (
+    TELEGRAM_API_BASE_FILE_URL, TELEGRAM_API_BASE_URL, TELEGRAM_LOCAL_MODE, telegram_file_url,
+)
+
+
+def build_bot(token: str, base_url: Optional[str] = None, base_file_url: Optional[str] = None,
+              local_mode: Optional[bool] = None) -> Bot:
+    """
+    Создает Bot с адресом API из настроек (или переданными явно)
+
+    Args:
+        token: Токен бота
+        base_url: Адрес Bot API (по умолчанию TELEGRAM_API_BASE_URL)
+        base_file_url: Адрес для скачивания файлов (по умолчанию выводится из base_url,
+            если он передан, иначе TELEGRAM_API_BASE_FILE_URL)
+        local_mode: Сервер запущен с --local (по умолчанию TELEGRAM_LOCAL_MODE)
+    """
+    if not base_file_url:
+        base_file_url = telegram_file_url(base_url) if base_url else TELEGRAM_API_BASE_FILE_URL
+    return Bot(
+        token=token,
+        base_url=base_url or TELEGRAM_API_BASE_URL,
+        base_file_url=base_file_url,
+        local_mode=TELEGRAM_LOCAL_MODE if local_mode is None else local_mode,
+    )
+
+
+def configure_application_builder(builder: ApplicationBuilder) -> ApplicationBuilder:
+    """Применяет адрес Bot API и локальный режим к ApplicationBuilder"""
+    builder = builder.base_url(TELEGRAM_API_BASE_URL).base_file_url(TELEGRAM_API_BASE_FILE_URL)
+    if TELEGRAM_LOCAL_MODE:
+        builder = builder.local_mode(True)
+    return builder
+
+
+def api_method_url(token: str, method: str) -> str:
+    """URL метода Bot API для прямых HTTP-запросов (requests)"""
+    return f"{TELEGRAM_API_BASE_URL}{token}/{method}"
+
+
+async def fetch_telegram_file(bot: Bot, file_id: str, suffix: str = "") -> Tuple[str, bool]:
+    """
+    Получает файл из Telegram в виде пути на диске
+
+    В локальном режиме возвращает путь из file_path без копирования;
+    иначе скачивает файл во временный файл.
+
+    Returns:
+        (путь к файлу, нужно ли удалить его после использования)
+    """
+    file = await bot.get_file(file_id)
+    if getattr(bot, "local_mode", False) is True and file.file_path and os.path.isfile(file.file_path):
+        logging.info(f"[TELEGRAM] Файл {file_id} прочитан локально: {file.file_path}")
+        return file.file_path, False
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        temp_path = temp_file.name
+    try:
+        await file.download_to_drive(temp_path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return temp_path, True
@@ -5,9 +5,9 @@
 import asyncio
 import logging
 from typing import Dict, List, Optional, Tuple
-from telegram import Bot
 from telegram.error import TelegramError, Forbidden, BadRequest
 from config_veretevo.env import TELEGRAM_TOKEN
+from utils_veretevo.telegram_api import build_bot
 from services_veretevo.department_service import load_departments, save_departments, DEPARTMENTS
 
 logger = logging.getLogger(__name__)
@@ -15,17 +15,19 @@ logger = logging.getLogger(__name__)
 class TelegramGroupSync:
     """Класс для синхронизации членов Telegram-групп с конфигурацией отделов"""
     
-    def __init__(self, token: str = None):
+    def __init__(self, token: str = None, base_url: str = None, local_mode: bool = None):
         """
         Инициализация синхронизатора
         
         Args:
             token (str): Токен бота. Если не указан, используется из env
+            base_url (str): Адрес Bot API. Если не указан, используется TELEGRAM_API_BASE_URL
+            local_mode (bool): Локальный режим сервера Bot API. Если не указан, используется TELEGRAM_LOCAL_MODE
         """
         self.token = token or TELEGRAM_TOKEN
         if not self.token:
             raise ValueError("Токен Telegram бота не найден")
-        self.bot = Bot(token=self.token)
+        self.bot = build_bot(self.token, base_url=base_url, local_mode=local_mode)
     
     async def initialize(self):
         """Инициализирует бота"""
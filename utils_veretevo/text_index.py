@@ -0,0 +1,250 @@
+"""
+Инвертированный индекс с ранжированием BM25 для поиска по коротким текстам.
+
+Текст нормализуется (нижний регистр, ё -> е, без пунктуации), слова
+усекаются простым стеммером для русского языка, а дополнительно в индекс
+попадают символьные триграммы слов, чтобы находились опечатки и другие
+словоформы. Индекс строится один раз и затем обновляется по одному документу,
+поиск проходит только по спискам документов для терминов запроса.
+Для поиска по началу слова ("сигн" -> "сигнализация") основы хранятся
+в отсортированном словаре, кандидаты находятся двоичным поиском.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+# Окончания и суффиксы, отбрасываемые стеммером (от длинных к коротким)
+RUSSIAN_ENDINGS = sorted([
+    "ирование", "ование", "ение", "ание", "ость", "ости", "остью",
+    "ировать", "овать", "ывать", "ивать", "ться", "тся", "ешь", "ишь", "ете", "ите",
+    "ить", "ать", "еть", "ять", "ыть", "ила", "ала", "ела", "или", "али", "ели", "ило", "ало",
+    "ил", "ал", "ел", "ял",
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ая", "яя", "ое", "ее",
+    "ой", "ый", "ий", "ей", "ом", "ем", "ам", "ям", "ах", "ях", "ую", "юю",
+    "ть", "ет", "ит", "ут", "ют", "ат", "ят", "ла", "ло", "ли", "ны", "на",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+# Вес совпадения целого слова относительно триграммы
+WORD_WEIGHT = 2.0
+NGRAM_SIZE = 3
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Термины, встречающиеся больше чем в этой доле документов, почти не влияют
+# на ранжирование (idf ~ 0), но дают самые длинные списки — их пропускаем
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_DOCUMENTS_FOR_PRUNING = 100
+
+# Поиск по началу слова: минимальная длина начала и сколько основ подставлять
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 10
+
+
+def normalize_text(text: str) -> str:
+    """Нижний регистр, ё -> е, только буквы и цифры через пробел"""
+    return " ".join(WORD_RE.findall(text.lower().replace("ё", "е")))
+
+
+def stem_word(word: str) -> str:
+    """Отбрасывает типичное русское окончание, оставляя основу не короче MIN_STEM_LENGTH"""
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def extract_terms(text: str) -> Counter:
+    """
+    Термины текста с частотами
+
+    Returns:
+        Counter терминов: "w:<основа>" для слов и "g:<триграмма>" для триграмм
+    """
+    terms = Counter()
+    for word in normalize_text(text).split():
+        terms["w:" + stem_word(word)] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - NGRAM_SIZE + 1):
+            terms["g:" + padded[i:i + NGRAM_SIZE]] += 1
+    return terms
+
+
+class BM25Index:
+    """Инвертированный индекс BM25 с инкрементальным добавлением и удалением"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_lengths: Dict[Hashable, float] = {}
+        self._total_length = 0.0
+        self._norms: Optional[Dict[Hashable, float]] = None
+        self._vocabulary: List[str] = []  # отсортированные основы слов
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_terms
+
+    @staticmethod
+    def _weight(term: str) -> float:
+        return WORD_WEIGHT if term.startswith("w:") else 1.0
+
+    def add(self, doc_id: Hashable, text: str):
+        """Добавляет документ (или заменяет существующий с тем же id)"""
+        terms = extract_terms(text)
+        with self._lock:
+            self.remove(doc_id)
+            for term, count in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    if term.startswith("w:"):
+                        bisect.insort(self._vocabulary, term[2:])
+                postings[doc_id] = count
+            length = float(sum(terms.values()))
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+            self._norms = None
+
+    def add_many(self, documents: Iterable[Tuple[Hashable, str]]):
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable):
+        """Удаляет документ из индекса, если он там есть"""
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+                        if term.startswith("w:"):
+                            position = bisect.bisect_left(self._vocabulary, term[2:])
+                            del self._vocabulary[position]
+            self._total_length -= self._doc_lengths.pop(doc_id)
+            self._norms = None
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._vocabulary.clear()
+            self._total_length = 0.0
+            self._norms = None
+
+    def prefix_terms(self, prefix: str, limit: int = MAX_PREFIX_EXPANSIONS) -> List[str]:
+        """Термины слов, основы которых начинаются с prefix"""
+        with self._lock:
+            position = bisect.bisect_left(self._vocabulary, prefix)
+            result = []
+            while position < len(self._vocabulary) and len(result) < limit:
+                stem = self._vocabulary[position]
+                if not stem.startswith(prefix):
+                    break
+                result.append("w:" + stem)
+                position += 1
+            return result
+
+    def _expand_prefixes(self, query: str, query_terms: Counter) -> Dict[str, str]:
+        """
+        Добавляет к запросу основы, начинающиеся с незнакомых индексу слов запроса
+
+        Returns:
+            Термин -> исходный термин запроса, который он заменяет
+        """
+        origins = {term: term for term in query_terms}
+        for word in normalize_text(query).split():
+            origin = "w:" + stem_word(word)
+            if len(word) < MIN_PREFIX_LENGTH or origin in self._postings:
+                continue
+            for term in self.prefix_terms(word):
+                query_terms[term] += 1
+                origins.setdefault(term, origin)
+        return origins
+
+    def _length_norms(self) -> Dict[Hashable, float]:
+        """Множители длины документов BM25; пересчитываются только после изменений индекса"""
+        if self._norms is None:
+            average_length = self._total_length / len(self._doc_lengths)
+            self._norms = {
+                doc_id: BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                for doc_id, length in self._doc_lengths.items()
+            }
+        return self._norms
+
+    def search(self, query: str, top_k: int = 5, prefix: bool = False,
+               accept: Optional[Callable[[Hashable], bool]] = None,
+               min_coverage: float = 0.0, ngrams: bool = True) -> List[Tuple[Hashable, float]]:
+        """
+        Ищет документы, наиболее релевантные запросу
+
+        Args:
+            query: Текст запроса
+            top_k: Сколько кандидатов вернуть
+            prefix: Искать также слова, начинающиеся с незнакомых слов запроса
+            accept: Фильтр id документов, применяется до отбора top_k
+            min_coverage: Минимальная доля (по весу) терминов запроса, найденных
+                в документе; отсекает документы, совпавшие парой триграмм
+            ngrams: Учитывать триграммы; без них поиск быстрее, но не прощает опечаток
+
+        Returns:
+            Список (id документа, оценка BM25), по убыванию оценки
+        """
+        query_terms = extract_terms(query)
+        if not ngrams:
+            query_terms = Counter({term: count for term, count in query_terms.items() if term.startswith("w:")})
+        with self._lock:
+            total_docs = len(self._doc_terms)
+            if not total_docs or not query_terms:
+                return []
+            origins = self._expand_prefixes(query, query_terms) if prefix else {t: t for t in query_terms}
+            if len(set(origins.values())) == 1:
+                min_coverage = 0.0  # любой найденный документ содержит единственный термин запроса
+            norms = self._length_norms()
+            prune = total_docs >= MIN_DOCUMENTS_FOR_PRUNING
+
+            scores: Dict[Hashable, float] = {}
+            covered: Dict[Hashable, set] = {}
+            pruned = set()
+            for term, query_count in query_terms.items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                doc_freq = len(postings)
+                if prune and doc_freq > total_docs * MAX_DOCUMENT_FREQUENCY:
+                    pruned.add(term)
+                    continue
+                idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+                weight = idf * query_count * self._weight(term) * (BM25_K1 + 1)
+                for doc_id, term_freq in postings.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * term_freq / (term_freq + norms[doc_id])
+                    if min_coverage:
+                        covered.setdefault(doc_id, set()).add(origins[term])
+
+        candidates = scores.items()
+        if min_coverage:
+            # Слишком частые термины пропущены при подсчете — в долю их не включаем
+            total = sum(self._weight(term) for term in set(origins.values()) - pruned)
+            candidates = [item for item in candidates
+                          if sum(self._weight(term) for term in covered[item[0]]) >= min_coverage * total]
+        if accept is not None:
+            candidates = [item for item in candidates if accept(item[0])]
+        return heapq.nlargest(top_k, candidates, key=lambda item: item[1])
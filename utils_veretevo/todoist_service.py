@@ -2,6 +2,8 @@ import os
 import requests
 from datetime import datetime, date
 from dotenv import load_dotenv
+from utils_veretevo.circuit_breaker import get_breaker
+from utils_veretevo.deadline import remaining_timeout
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -17,6 +19,19 @@ HEADERS = {
 
 # Таймауты для HTTP запросов
 TIMEOUT = 10  # 10 секунд на запрос
+HANDLER_BUDGET = 15  # секунд на все вызовы Todoist из одного обработчика бота
+SYNC_BUDGET = 120  # секунд на один проход периодической синхронизации
+
+# При частых сбоях Todoist вызовы сразу получают CircuitOpenError, а не ждут таймаута
+todoist_breaker = get_breaker("todoist", slow_call_seconds=5)
+
+def _call(method, url, **kwargs):
+    """Запрос к Todoist под выключателем и с учетом срока обработчика"""
+    timeout = remaining_timeout(TIMEOUT)
+    with todoist_breaker.call():
+        response = method(url, headers=HEADERS, timeout=timeout, **kwargs)
+        response.raise_for_status()
+    return response
 
 def create_task(content, description=None):
     data = {'content': content}
@@ -29,34 +44,28 @@ def create_task(content, description=None):
     today = date.today()
     data['due_date'] = today.isoformat()
     
-    response = requests.post(f'{TODOIST_API_URL}/tasks', json=data, headers=HEADERS, timeout=TIMEOUT)
-    response.raise_for_status()
+    response = _call(requests.post, f'{TODOIST_API_URL}/tasks', json=data)
     return response.json()['id']
 
 def close_task(task_id):
-    response = requests.post(f'{TODOIST_API_URL}/tasks/{task_id}/close', headers=HEADERS, timeout=TIMEOUT)
-    response.raise_for_status()
+    response = _call(requests.post, f'{TODOIST_API_URL}/tasks/{task_id}/close')
     return response.status_code == 204
 
 def delete_task(task_id):
-    response = requests.delete(f'{TODOIST_API_URL}/tasks/{task_id}', headers=HEADERS, timeout=TIMEOUT)
-    response.raise_for_status()
+    response = _call(requests.delete, f'{TODOIST_API_URL}/tasks/{task_id}')
     return response.status_code == 204
 
 def add_comment(task_id, content):
     data = {'task_id': task_id, 'content': content}
-    response = requests.post(f'{TODOIST_API_URL}/comments', json=data, headers=HEADERS, timeout=TIMEOUT)
-    response.raise_for_status()
+    response = _call(requests.post, f'{TODOIST_API_URL}/comments', json=data)
     return response.json()['id']
 
 def get_task(task_id):
-    response = requests.get(f'{TODOIST_API_URL}/tasks/{task_id}', headers=HEADERS, timeout=TIMEOUT)
-    response.raise_for_status()
+    response = _call(requests.get, f'{TODOIST_API_URL}/tasks/{task_id}')
     return response.json()
 
 def get_comments(task_id):
-    response = requests.get(f'{TODOIST_API_URL}/comments?task_id={task_id}', headers=HEADERS, timeout=TIMEOUT)
-    response.raise_for_status()
+    response = _call(requests.get, f'{TODOIST_API_URL}/comments?task_id={task_id}')
     return response.json()
 
 def get_director_tasks_from_todoist():
@@ -64,8 +73,7 @@ def get_director_tasks_from_todoist():
         params = {}
         if TODOIST_PROJECT_ID:
             params['project_id'] = TODOIST_PROJECT_ID
-        response = requests.get(f'{TODOIST_API_URL}/tasks', headers=HEADERS, params=params, timeout=TIMEOUT)
-        response.raise_for_status()
+        response = _call(requests.get, f'{TODOIST_API_URL}/tasks', params=params)
         tasks = response.json()
         result = []
         for t in tasks:
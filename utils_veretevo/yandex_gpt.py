@@ -1,12 +1,22 @@
 import os
 import requests
 from dotenv import load_dotenv
+from utils_veretevo.completion_cache import completion_cache, make_cache_key
+from utils_veretevo.single_flight import SingleFlight
+from utils_veretevo.circuit_breaker import get_breaker
+from utils_veretevo.deadline import remaining_timeout
 
 # Загружаем переменные из .env файла
 load_dotenv()
 
 YANDEX_GPT_API_URL = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
 YANDEX_GPT_API_KEY = os.getenv("YANDEX_GPT_API_KEY")
+MODEL_URI = "gpt://b1g8c7c7c7c7c7c7c7c7/yandexgpt-lite"
+TEMPERATURE = 0.2
+
+improve_single_flight = SingleFlight("GPT improve")
+# Общий с провайдером генерации ответов: это один и тот же сервис
+gpt_breaker = get_breaker("yandex_gpt")
 
 PROMPT = (
     "Исправь ошибки и улучши текст задачи, надиктованный голосом. "
@@ -14,28 +24,47 @@ PROMPT = (
     "Ответь только улучшенным текстом, без пояснений."
 )
 
-def improve_task_text(text: str) -> str:
+def improve_task_text(text: str, use_cache: bool = True) -> str:
     if not YANDEX_GPT_API_KEY:
         print(f"[WARN] YANDEX_GPT_API_KEY не задан в переменных окружения! Возвращаем исходный текст.")
         return text  # fallback: возвращаем исходный текст
     
+    cache_key = make_cache_key(MODEL_URI, TEMPERATURE, PROMPT + "\n" + text)
+    if use_cache:
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    else:
+        completion_cache.record_bypass()
+    
+    # Улучшение необязательно: при отключенном GPT или исчерпанном сроке
+    # обработчика сразу возвращаем исходный текст (исключение ниже)
+    try:
+        # Одинаковый текст, улучшаемый одновременно, отправляется в GPT один раз
+        return improve_single_flight.do(cache_key, lambda: _request_improved_text(text, cache_key))
+    except Exception as e:
+        print(f"[ОШИБКА] YandexGPT: {e}")
+        return text  # fallback: возвращаем исходный текст
+
+
+def _request_improved_text(text: str, cache_key: str) -> str:
     headers = {
         "Authorization": f"Api-Key {YANDEX_GPT_API_KEY}",
         "Content-Type": "application/json",
     }
     data = {
-        "modelUri": "gpt://b1g8c7c7c7c7c7c7c7c7/yandexgpt-lite",
-        "completionOptions": {"stream": False, "temperature": 0.2, "maxTokens": 200},
+        "modelUri": MODEL_URI,
+        "completionOptions": {"stream": False, "temperature": TEMPERATURE, "maxTokens": 200},
         "messages": [
             {"role": "system", "text": PROMPT},
             {"role": "user", "text": text}
         ]
     }
-    try:
-        resp = requests.post(YANDEX_GPT_API_URL, headers=headers, json=data, timeout=15)
+    timeout = remaining_timeout(15)
+    with gpt_breaker.call():
+        resp = requests.post(YANDEX_GPT_API_URL, headers=headers, json=data, timeout=timeout)
         resp.raise_for_status()
-        result = resp.json()
-        return result["result"]["alternatives"][0]["message"]["text"]
-    except Exception as e:
-        print(f"[ОШИБКА] YandexGPT: {e}")
-        return text  # fallback: возвращаем исходный текст 
\ No newline at end of file
+    result = resp.json()
+    improved = result["result"]["alternatives"][0]["message"]["text"]
+    completion_cache.put(cache_key, improved)
+    return improved
@@ -5,20 +5,41 @@ import json
 import base64
 from typing import Optional
 from pydub import AudioSegment
-from config_veretevo import env
+from utils_veretevo.audio_preprocessing import preprocess_audio_file
+from utils_veretevo.single_flight import SingleFlight, content_key
+from utils_veretevo.circuit_breaker import get_breaker
+from utils_veretevo.deadline import remaining_timeout
+
+DEFAULT_SPEECHKIT_URL = "https://stt.api.cloud.yandex.net/speech/v1/stt:recognize"
+
+# Одинаковое аудио, распознаваемое одновременно (повторная отправка, пересылка
+# одного голосового в несколько чатов), отправляется в SpeechKit один раз
+speech_single_flight = SingleFlight("SpeechKit")
+speechkit_breaker = get_breaker("speechkit", slow_call_seconds=20)
+
+
+def _env_setting(name: str) -> Optional[str]:
+    """Настройка из config_veretevo.env; без настроек бота (CLI-скрипты) — из переменных окружения"""
+    try:
+        from config_veretevo import env
+    except ValueError:
+        # env требует TELEGRAM_TOKEN и ASSISTANTS_CHAT_ID, распознаванию они не нужны
+        return os.getenv(name)
+    return getattr(env, name, None) or os.getenv(name)
 
 class YandexSpeechKitTranscriber:
-    def __init__(self, api_key: str = None, folder_id: str = None):
+    def __init__(self, api_key: str = None, folder_id: str = None, base_url: str = None):
         """
         Инициализация транскрайбера Yandex SpeechKit
         
         Args:
             api_key: API ключ для Yandex SpeechKit (берется из config_veretevo.env или переменной окружения)
             folder_id: ID папки в Yandex Cloud (берется из config_veretevo.env или переменной окружения)
+            base_url: Адрес API распознавания (YANDEX_SPEECHKIT_URL, например локальная заглушка для тестов)
         """
-        self.api_key = api_key or env.YANDEX_SPEECHKIT_API_KEY or os.getenv('YANDEX_SPEECHKIT_API_KEY')
-        self.folder_id = folder_id or env.YANDEX_FOLDER_ID or os.getenv('YANDEX_FOLDER_ID')
-        self.base_url = "https://stt.api.cloud.yandex.net/speech/v1/stt:recognize"
+        self.api_key = api_key or _env_setting('YANDEX_SPEECHKIT_API_KEY')
+        self.folder_id = folder_id or _env_setting('YANDEX_FOLDER_ID')
+        self.base_url = base_url or os.getenv('YANDEX_SPEECHKIT_URL') or DEFAULT_SPEECHKIT_URL
         
         if not self.api_key:
             raise ValueError("Не установлен API ключ Yandex SpeechKit. Установите переменную YANDEX_SPEECHKIT_API_KEY")
@@ -32,6 +53,27 @@ class YandexSpeechKitTranscriber:
         Args:
             input_path: Путь к входному аудиофайлу
             
+        Returns:
+            Путь к временному OGG файлу или None при ошибке
+        """
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as temp_file:
+            output_path = temp_file.name
+        try:
+            # Декодируем один раз и обрабатываем тишину/громкость в NumPy
+            preprocess_audio_file(input_path, output_path)
+            return output_path
+        except Exception as e:
+            print(f"[ПРЕДУПРЕЖДЕНИЕ] Векторизованная конвертация не удалась, используем pydub: {e}")
+            os.unlink(output_path)
+        return self._convert_audio_to_ogg_pydub(input_path)
+
+    def _convert_audio_to_ogg_pydub(self, input_path: str) -> Optional[str]:
+        """
+        Прежняя конвертация через pydub (резервный вариант и эталон для бенчмарка)
+
+        Args:
+            input_path: Путь к входному аудиофайлу
+
         Returns:
             Путь к временному OGG файлу или None при ошибке
         """
@@ -52,6 +94,40 @@ class YandexSpeechKitTranscriber:
             print(f"[ОШИБКА] Не удалось конвертировать аудио: {e}")
             return None
 
+    def recognize(self, audio_data: bytes, timeout: float = 30) -> str:
+        """
+        Распознает уже сконвертированные OGG/Opus данные без отладочного вывода
+        
+        Args:
+            audio_data: Содержимое OGG файла
+            timeout: Таймаут запроса в секундах
+            
+        Returns:
+            Текст транскрипции (пустая строка, если речь не найдена)
+            
+        Raises:
+            RuntimeError: если API вернул ошибку или неожиданный ответ
+        """
+        key = content_key("recognize", self.base_url, audio_data)
+        return speech_single_flight.do(key, lambda: self._recognize(audio_data, timeout))
+
+    def _recognize(self, audio_data: bytes, timeout: float) -> str:
+        url = f"{self.base_url}?folderId={self.folder_id}&lang=ru-RU&model=general:rc&sampleRateHertz=48000&profanityFilter=false&partialResults=false"
+        headers = {
+            'Authorization': f'Api-Key {self.api_key}',
+            'Content-Type': 'application/octet-stream'
+        }
+        timeout = remaining_timeout(timeout)
+        with speechkit_breaker.call() as call:
+            response = requests.post(url, headers=headers, data=audio_data, timeout=timeout)
+            call.check_response(response)
+        if response.status_code != 200:
+            raise RuntimeError(f"Ошибка API SpeechKit: {response.status_code} {response.text[:200]}")
+        result = response.json()
+        if 'result' not in result:
+            raise RuntimeError(f"Неожиданный ответ от API: {result}")
+        return result['result']
+
     def transcribe_audio(self, audio_path: str) -> Optional[str]:
         """
         Транскрибирует аудиофайл через Yandex SpeechKit
@@ -95,7 +171,10 @@ class YandexSpeechKitTranscriber:
             print(f"[DEBUG] Первые 100 байт: {audio_data[:100]}")
             
             # Отправляем запрос
-            response = requests.post(url, headers=headers, data=audio_data, timeout=30)
+            timeout = remaining_timeout(30)
+            with speechkit_breaker.call() as call:
+                response = requests.post(url, headers=headers, data=audio_data, timeout=timeout)
+                call.check_response(response)
             
             print(f"[DEBUG] Получен ответ: статус {response.status_code}")
             print(f"[DEBUG] Response headers: {dict(response.headers)}")
@@ -132,6 +211,14 @@ class YandexSpeechKitTranscriber:
         Returns:
             Текст транскрипции или None при ошибке
         """
+        try:
+            with open(file_path, 'rb') as f:
+                key = content_key("process", self.base_url, f.read())
+        except OSError:
+            return self._process_audio_file(file_path)
+        return speech_single_flight.do(key, lambda: self._process_audio_file(file_path))
+
+    def _process_audio_file(self, file_path: str) -> Optional[str]:
         temp_files = []
         try:
             print(f"[DEBUG] Начинаем обработку файла: {file_path}")